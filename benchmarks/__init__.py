@@ -0,0 +1,8 @@
+"""
+TradingAgents-CN 性能基准测试
+各基准脚本均使用本地桩服务或伪造数据源，可离线运行
+
+- run_suite: 热点路径基准套件（选股/缓存/采样/评分/分析图），结果为可对比的JSON
+- fakes / fixtures: 套件使用的伪数据源、确定性伪LLM与录制数据
+- bench_*: 针对单项优化的独立对比脚本
+"""
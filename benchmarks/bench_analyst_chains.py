@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+分析师链节点开销基准测试
+对比每次调用都重建提示模板 + bind_tools（旧实现）与预编译分析师链（新实现）的单次节点开销，
+使用不发起网络请求的伪LLM，只测量链构建与提示渲染本身的耗时。
+
+用法:
+    python -m benchmarks.bench_analyst_chains --iterations 200
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from tradingagents.agents.utils.agent_utils import Toolkit
+from tradingagents.agents.utils.analyst_chain import CompiledAnalystChain, get_tool_names
+from tradingagents.agents.analysts.market_analyst import MARKET_SYSTEM_PROMPT
+
+
+class FakeToolChatModel(BaseChatModel):
+    """立即返回固定回复的伪聊天模型，bind_tools 与 ChatOpenAI 一样做工具schema转换"""
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-tool-chat"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="ok"))])
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+
+def _node_inputs(index: int):
+    """每次调用的动态变量"""
+    ticker = f"{600000 + index % 50}"
+    return {
+        'system_message': f"请对{ticker}进行技术分析。",
+        'current_date': '2025-06-30',
+        'ticker': ticker,
+        'company_name': f"公司{ticker}",
+    }
+
+
+def run_legacy(llm, tools, iterations: int) -> float:
+    """旧实现：每次调用重建提示模板、逐个 partial、重新 bind_tools"""
+    messages = [HumanMessage(content="分析")]
+    start = time.perf_counter()
+    for i in range(iterations):
+        variables = _node_inputs(i)
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", MARKET_SYSTEM_PROMPT),
+            MessagesPlaceholder(variable_name="messages"),
+        ])
+        prompt = prompt.partial(system_message=variables['system_message'])
+        prompt = prompt.partial(tool_names=", ".join(get_tool_names(tools)))
+        prompt = prompt.partial(current_date=variables['current_date'])
+        prompt = prompt.partial(ticker=variables['ticker'])
+        prompt = prompt.partial(company_name=variables['company_name'])
+        chain = prompt | llm.bind_tools(tools)
+        chain.invoke(messages)
+    return time.perf_counter() - start
+
+
+def run_compiled(llm, tools, iterations: int) -> float:
+    """新实现：图构建时编译一次，调用时只注入动态变量"""
+    messages = [HumanMessage(content="分析")]
+    analyst_chain = CompiledAnalystChain("benchmark", llm, MARKET_SYSTEM_PROMPT)
+    start = time.perf_counter()
+    for i in range(iterations):
+        analyst_chain.invoke(tools, messages, **_node_inputs(i))
+    return time.perf_counter() - start
+
+
+def run_dashscope_clients(iterations: int) -> Optional[dict]:
+    """阿里百炼工具调用客户端：每次新建 vs 复用（不发起网络请求）"""
+    try:
+        from tradingagents.llm_adapters import ChatDashScopeOpenAI
+    except ImportError:
+        return None
+
+    os.environ.setdefault("DASHSCOPE_API_KEY", "sk-benchmark")
+    start = time.perf_counter()
+    for _ in range(iterations):
+        ChatDashScopeOpenAI(model="qwen-plus", temperature=0.1, max_tokens=2000)
+    per_call_ms = (time.perf_counter() - start) * 1000 / iterations
+    return {'new_client_per_call_ms': round(per_call_ms, 3), 'reused_client_ms': 0.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='分析师链节点开销基准测试')
+    parser.add_argument('--iterations', type=int, default=200, help='每种实现的调用次数')
+    args = parser.parse_args()
+
+    toolkit = Toolkit({"online_tools": True})
+    tools = [toolkit.get_stock_market_data_unified, toolkit.get_YFin_data_online,
+             toolkit.get_stockstats_indicators_report_online]
+    llm = FakeToolChatModel()
+
+    # 预热（导入、首次schema转换）
+    run_legacy(llm, tools, 5)
+    run_compiled(llm, tools, 5)
+
+    legacy = run_legacy(llm, tools, args.iterations)
+    compiled = run_compiled(llm, tools, args.iterations)
+
+    result = {
+        'benchmark': 'analyst_chains',
+        'iterations': args.iterations,
+        'tools': len(tools),
+        'legacy_per_node_ms': round(legacy * 1000 / args.iterations, 3),
+        'compiled_per_node_ms': round(compiled * 1000 / args.iterations, 3),
+        'speedup': round(legacy / compiled, 2) if compiled else None,
+        'dashscope_client': run_dashscope_clients(min(args.iterations, 50)),
+    }
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+异步数据管道基准测试
+启动本地腾讯行情/K线桩服务，测量 AsyncDataPipeline 处理 N 只股票的吞吐量（股票/秒）
+
+用法:
+    python -m benchmarks.bench_async_pipeline --symbols 1000 --latency-ms 20
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from aiohttp import web
+
+from tradingagents.dataflows.async_data_pipeline import AsyncDataPipeline, PipelineConfig
+
+
+def _make_symbols(count: int):
+    """生成沪深股票代码"""
+    symbols = []
+    for i in range(count):
+        prefix = '600' if i % 2 == 0 else '000'
+        symbols.append(f"{prefix}{i // 2:03d}")
+    return symbols
+
+
+def _quote_line(code: str) -> str:
+    """构造一条腾讯行情格式的数据"""
+    rng = random.Random(code)
+    price = round(rng.uniform(5, 100), 2)
+    fields = ['0'] * 50
+    fields[1] = f"股票{code[-6:]}"
+    fields[2] = code[-6:]
+    fields[3] = str(price)
+    fields[4] = str(round(price * rng.uniform(0.95, 1.05), 2))
+    fields[5] = str(price)
+    fields[6] = str(rng.randint(10000, 1000000))
+    fields[33] = str(round(price * 1.03, 2))
+    fields[34] = str(round(price * 0.97, 2))
+    fields[37] = str(rng.randint(1000, 100000))
+    fields[38] = str(round(rng.uniform(0.5, 10), 2))
+    fields[39] = str(round(rng.uniform(5, 60), 2))
+    fields[45] = str(round(rng.uniform(20, 2000), 2))
+    fields[46] = str(round(rng.uniform(0.5, 8), 2))
+    return f'v_{code}="{"~".join(fields)}";\n'
+
+
+def _kline_payload(code: str, count: int) -> str:
+    """构造腾讯K线格式的数据"""
+    rng = random.Random(code)
+    price = rng.uniform(5, 100)
+    bars = []
+    for day in range(count):
+        close = price * rng.uniform(0.97, 1.03)
+        bars.append([f"2025-01-{day % 28 + 1:02d}", f"{price:.2f}", f"{close:.2f}",
+                     f"{max(price, close) * 1.01:.2f}", f"{min(price, close) * 0.99:.2f}",
+                     str(rng.randint(10000, 1000000))])
+        price = close
+    return json.dumps({'code': 0, 'data': {code: {'qfqday': bars}}})
+
+
+def create_stub_app(latency_ms: float) -> web.Application:
+    """创建模拟腾讯行情/K线接口的桩服务"""
+    delay = latency_ms / 1000
+
+    async def handle(request: web.Request) -> web.Response:
+        await asyncio.sleep(delay)
+        if request.path.startswith('/q='):
+            codes = request.path[len('/q='):].split(',')
+            return web.Response(text=''.join(_quote_line(code) for code in codes))
+        if request.path == '/appstock/app/kline/kline':
+            code, _, _, _, count, _ = request.query['param'].split(',')
+            return web.Response(text=_kline_payload(code, int(count)))
+        return web.Response(status=404)
+
+    app = web.Application()
+    app.router.add_get('/{tail:.*}', handle)
+    return app
+
+
+async def run_benchmark(symbol_count: int, latency_ms: float, fetch_workers: int) -> dict:
+    """启动桩服务并运行管道"""
+    runner = web.AppRunner(create_stub_app(latency_ms))
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+
+    config = PipelineConfig(
+        fetch_workers=fetch_workers,
+        quote_base_url=base_url,
+        kline_base_url=base_url,
+        enable_caching=False,
+        enable_social=False,
+        enable_manager_fallback=False,
+    )
+    pipeline = AsyncDataPipeline(config)
+    symbols = _make_symbols(symbol_count)
+
+    try:
+        start = time.perf_counter()
+        result = await pipeline.process_symbols(symbols)
+        elapsed = time.perf_counter() - start
+    finally:
+        await runner.cleanup()
+
+    succeeded = sum(1 for item in result['results'].values() if 'error' not in item)
+    return {
+        'benchmark': 'async_pipeline',
+        'symbols': symbol_count,
+        'succeeded': succeeded,
+        'stub_latency_ms': latency_ms,
+        'fetch_workers': fetch_workers,
+        'elapsed_seconds': round(elapsed, 3),
+        'symbols_per_second': round(symbol_count / elapsed, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='AsyncDataPipeline 吞吐量基准测试')
+    parser.add_argument('--symbols', type=int, default=1000, help='股票数量')
+    parser.add_argument('--latency-ms', type=float, default=20.0, help='桩服务单次响应延迟（毫秒）')
+    parser.add_argument('--fetch-workers', type=int, default=32, help='获取阶段工作器数量')
+    args = parser.parse_args()
+
+    result = asyncio.run(run_benchmark(args.symbols, args.latency_ms, args.fetch_workers))
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+记忆向量检索基准测试
+在 10k / 100k 条记忆规模下，对比 NumPy 平铺索引与 ChromaDB 持久化（HNSW）集合的
+写入耗时、查询延迟（p50/p95）以及重启后重新加载耗时。使用随机向量，不调用嵌入接口。
+
+用法:
+    python -m benchmarks.bench_memory --sizes 10000,100000 --dim 1024 --queries 200
+"""
+
+import argparse
+import json
+import shutil
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from tradingagents.agents.utils.vector_store import NumpyVectorStore
+
+
+def _percentile(values: List[float], q: float) -> float:
+    return round(float(np.percentile(values, q)), 3)
+
+
+def _make_data(size: int, dim: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((size, dim), dtype=np.float32)
+    ids = [f"m{i}" for i in range(size)]
+    documents = [f"情景 {i}" for i in range(size)]
+    metadatas = [{"recommendation": f"建议 {i}"} for i in range(size)]
+    return ids, vectors, documents, metadatas
+
+
+def _measure_queries(collection, queries: np.ndarray, n_results: int) -> Dict[str, float]:
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        collection.query(query_embeddings=[query.tolist()], n_results=n_results,
+                         include=["metadatas", "documents", "distances"])
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {'query_p50_ms': _percentile(latencies, 50), 'query_p95_ms': _percentile(latencies, 95)}
+
+
+def bench_numpy(size: int, dim: int, queries: np.ndarray, n_results: int, batch: int) -> Dict:
+    ids, vectors, documents, metadatas = _make_data(size, dim)
+    workdir = tempfile.mkdtemp(prefix="bench_memory_numpy_")
+    try:
+        store = NumpyVectorStore("bench", workdir, autosave=False)
+        start = time.perf_counter()
+        for i in range(0, size, batch):
+            store.upsert(ids[i:i + batch], vectors[i:i + batch], documents[i:i + batch], metadatas[i:i + batch])
+        store.flush()
+        insert_time = time.perf_counter() - start
+
+        result = {'backend': 'numpy', 'size': size, 'insert_s': round(insert_time, 3)}
+        result.update(_measure_queries(store, queries, n_results))
+
+        start = time.perf_counter()
+        reloaded = NumpyVectorStore("bench", workdir)
+        result['reload_s'] = round(time.perf_counter() - start, 3)
+        result['reloaded_count'] = reloaded.count()
+        return result
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def bench_chromadb(size: int, dim: int, queries: np.ndarray, n_results: int, batch: int) -> Dict:
+    try:
+        import chromadb
+        from chromadb.config import Settings
+    except ImportError:
+        return {'backend': 'chromadb', 'size': size, 'skipped': 'chromadb未安装'}
+
+    ids, vectors, documents, metadatas = _make_data(size, dim)
+    workdir = tempfile.mkdtemp(prefix="bench_memory_chroma_")
+    try:
+        settings = Settings(anonymized_telemetry=False)
+        client = chromadb.PersistentClient(path=workdir, settings=settings)
+        collection = client.create_collection(name="bench")
+        batch = min(batch, client.get_max_batch_size())
+        start = time.perf_counter()
+        for i in range(0, size, batch):
+            collection.upsert(ids=ids[i:i + batch], embeddings=vectors[i:i + batch],
+                              documents=documents[i:i + batch], metadatas=metadatas[i:i + batch])
+        insert_time = time.perf_counter() - start
+
+        result = {'backend': 'chromadb', 'size': size, 'insert_s': round(insert_time, 3)}
+        result.update(_measure_queries(collection, queries, n_results))
+
+        start = time.perf_counter()
+        reloaded = chromadb.PersistentClient(path=workdir, settings=settings).get_collection(name="bench")
+        reloaded.query(query_embeddings=[queries[0].tolist()], n_results=n_results)
+        result['reload_s'] = round(time.perf_counter() - start, 3)
+        result['reloaded_count'] = reloaded.count()
+        return result
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+BACKENDS = {'numpy': bench_numpy, 'chromadb': bench_chromadb}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='记忆向量检索基准测试')
+    parser.add_argument('--sizes', default='10000,100000', help='记忆规模，逗号分隔')
+    parser.add_argument('--dim', type=int, default=1024, help='向量维度（text-embedding-v3为1024）')
+    parser.add_argument('--queries', type=int, default=200, help='查询次数')
+    parser.add_argument('--n-results', type=int, default=2, help='每次查询返回的记忆数')
+    parser.add_argument('--batch', type=int, default=5000, help='写入批大小')
+    parser.add_argument('--backends', default='numpy,chromadb', help='测试的后端，逗号分隔')
+    args = parser.parse_args()
+
+    queries = np.random.default_rng(7).standard_normal((args.queries, args.dim), dtype=np.float32)
+    results = []
+    for size in [int(s) for s in args.sizes.split(',') if s]:
+        for backend in [b.strip() for b in args.backends.split(',') if b.strip()]:
+            results.append(BACKENDS[backend](size, args.dim, queries, args.n_results, args.batch))
+
+    print(json.dumps({'benchmark': 'memory', 'dim': args.dim, 'queries': args.queries,
+                      'results': results}, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+追踪开销基准测试
+测量 log_tool_call 装饰器在追踪关闭、开启（内存导出）以及旧实现（每个参数两次 str() + 两条INFO日志）
+下的单次调用开销，参数中包含一个 DataFrame。
+
+用法:
+    python -m benchmarks.bench_tracing --iterations 20000
+"""
+
+import argparse
+import functools
+import json
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+from tradingagents.utils import tracing
+from tradingagents.utils.tool_logging import log_tool_call, tool_logger
+
+
+def legacy_log_tool_call(func):
+    """旧实现的参数处理与日志开销（用于对比）"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        args_info = {'args': [str(arg)[:100] + '...' if len(str(arg)) > 100 else str(arg) for arg in args]}
+        tool_logger.info(f"🔧 [工具调用] {func.__name__} - 开始", extra={'args_info': args_info})
+        result = func(*args, **kwargs)
+        tool_logger.info(f"✅ [工具调用] {func.__name__} - 完成")
+        return result
+    return wrapper
+
+
+def _tool(frame, ticker):
+    return ticker
+
+
+def _per_call_us(func, frame, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(frame, "600519")
+    return round((time.perf_counter() - start) * 1e6 / iterations, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='追踪开销基准测试')
+    parser.add_argument('--iterations', type=int, default=20000, help='调用次数')
+    parser.add_argument('--rows', type=int, default=500, help='DataFrame参数行数')
+    args = parser.parse_args()
+
+    # 只测量格式化/追踪开销，不测量日志输出本身
+    logging.getLogger("tools").setLevel(logging.WARNING)
+    frame = pd.DataFrame(np.random.default_rng(0).standard_normal((args.rows, 6)),
+                         columns=['open', 'high', 'low', 'close', 'volume', 'amount'])
+
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        pass
+    baseline_us = (time.perf_counter() - start) * 1e6 / args.iterations
+
+    tracing.configure_tracing(enabled=False)
+    disabled = _per_call_us(log_tool_call()(_tool), frame, args.iterations)
+
+    exporter = tracing.InMemorySpanExporter()
+    tracing.configure_tracing(enabled=True, exporters=[exporter])
+    enabled = _per_call_us(log_tool_call()(_tool), frame, args.iterations)
+
+    tracing.configure_tracing(enabled=False)
+    legacy = _per_call_us(legacy_log_tool_call(_tool), frame, max(args.iterations // 100, 20))
+    plain = _per_call_us(_tool, frame, args.iterations)
+
+    print(json.dumps({
+        'benchmark': 'tracing',
+        'iterations': args.iterations,
+        'dataframe_rows': args.rows,
+        'loop_overhead_us': round(baseline_us, 3),
+        'undecorated_us': plain,
+        'tracing_disabled_us': disabled,
+        'tracing_enabled_us': enabled,
+        'legacy_str_format_us': legacy,
+        'sample_span': exporter.spans[-1].to_dict() if exporter.spans else None,
+    }, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
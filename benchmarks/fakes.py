@@ -0,0 +1,701 @@
+"""
+离线基准测试的伪数据源与伪LLM
+基于 fixtures 中的录制行情，提供与腾讯/新浪/东方财富/通达信数据源接口一致的伪提供器、
+确定性伪LLM，以及把这些伪组件注入选股引擎和分析图的补丁；同时屏蔽网络连接，
+任何遗漏的真实网络请求都会立即失败并被计数，而不是拖慢或污染测量结果。
+"""
+
+import re
+import socket
+import threading
+import time
+import zlib
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.fixtures import load_quote_templates, load_reports, make_universe, render
+
+
+def _index_universe(universe: Optional[Iterable[Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    quotes = universe if universe is not None else load_quote_templates()
+    return {quote['symbol']: quote for quote in quotes}
+
+
+# ==================== 网络屏蔽 ====================
+
+class NetworkAccessError(ConnectionError):
+    """离线基准测试中发生了真实网络请求"""
+
+
+class NetworkGuard:
+    """记录被拦截的网络请求（次数与前若干个目标地址）"""
+
+    def __init__(self, keep: int = 10):
+        self.keep = keep
+        self.attempts = 0
+        self.targets: List[str] = []
+        self._lock = threading.Lock()
+
+    def record(self, target: Any):
+        with self._lock:
+            self.attempts += 1
+            if len(self.targets) < self.keep:
+                self.targets.append(str(target))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'blocked_network_calls': self.attempts, 'blocked_targets': list(self.targets)}
+
+
+@contextmanager
+def block_network(guard: Optional[NetworkGuard] = None):
+    """
+    屏蔽 DNS 解析和 TCP/UDP 连接（Unix域套接字不受影响）
+
+    Yields:
+        NetworkGuard: 被拦截请求的统计
+    """
+    guard = guard or NetworkGuard()
+    original_connect = socket.socket.connect
+    original_connect_ex = socket.socket.connect_ex
+
+    def fake_getaddrinfo(host, *args, **kwargs):
+        guard.record(host)
+        raise NetworkAccessError(f"离线基准测试禁止网络访问: {host}")
+
+    def fake_connect(sock, address):
+        if sock.family == getattr(socket, 'AF_UNIX', None):
+            return original_connect(sock, address)
+        guard.record(address)
+        raise NetworkAccessError(f"离线基准测试禁止网络访问: {address}")
+
+    def fake_connect_ex(sock, address):
+        if sock.family == getattr(socket, 'AF_UNIX', None):
+            return original_connect_ex(sock, address)
+        guard.record(address)
+        raise NetworkAccessError(f"离线基准测试禁止网络访问: {address}")
+
+    with mock.patch.object(socket, 'getaddrinfo', fake_getaddrinfo), \
+            mock.patch.object(socket.socket, 'connect', fake_connect), \
+            mock.patch.object(socket.socket, 'connect_ex', fake_connect_ex):
+        yield guard
+
+
+# ==================== 伪数据源 ====================
+
+class _FakeQuoteProvider:
+    """伪实时行情数据源基类：从录制行情返回数据，可模拟网络延迟"""
+
+    source_name = 'fake'
+    # 各数据源价格口径的微小差异，用于覆盖多源融合逻辑
+    price_bias = 0.0
+
+    def __init__(self, universe: Optional[Iterable[Dict[str, Any]]] = None, latency: float = 0.0):
+        """
+        Args:
+            universe: 行情字典列表，默认使用录制样本
+            latency: 每次请求的模拟延迟（秒）
+        """
+        self.quotes = _index_universe(universe)
+        self.latency = latency
+        self.calls = 0
+
+    def _quote(self, symbol: str) -> Optional[Dict[str, Any]]:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self.quotes.get(symbol)
+
+    def _base_info(self, symbol: str, quote: Dict[str, Any]) -> Dict[str, Any]:
+        price = round(quote['current_price'] * (1 + self.price_bias), 2)
+        change = round(price - quote['prev_close'], 2)
+        return {
+            'symbol': symbol,
+            'name': quote['name'],
+            'current_price': price,
+            'prev_close': quote['prev_close'],
+            'open': quote['open'],
+            'high': quote['high'],
+            'low': quote['low'],
+            'volume': quote['volume'],
+            'turnover': quote['turnover'],
+            'change': change,
+            'change_pct': round(change / quote['prev_close'] * 100, 2) if quote['prev_close'] else 0.0,
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'source': self.source_name,
+        }
+
+    def get_stock_info(self, symbol: str) -> Optional[Dict[str, Any]]:
+        quote = self._quote(symbol)
+        return self._base_info(symbol, quote) if quote else None
+
+    def get_multiple_stocks(self, symbols: List[str], **kwargs) -> Dict[str, Dict[str, Any]]:
+        results = {}
+        for symbol in symbols:
+            info = self.get_stock_info(symbol)
+            if info:
+                results[symbol] = info
+        return results
+
+
+class FakeTencentProvider(_FakeQuoteProvider):
+    """伪腾讯财经数据源"""
+    source_name = '腾讯财经'
+    price_bias = 0.0005
+
+
+class FakeSinaProvider(_FakeQuoteProvider):
+    """伪新浪财经数据源"""
+    source_name = '新浪财经'
+    price_bias = -0.0005
+
+
+class FakeEastMoneyProvider(_FakeQuoteProvider):
+    """伪东方财富数据源（额外返回市值与估值字段）"""
+    source_name = '东方财富'
+
+    def get_stock_info(self, symbol: str) -> Optional[Dict[str, Any]]:
+        quote = self._quote(symbol)
+        if not quote:
+            return None
+        info = self._base_info(symbol, quote)
+        info.update({
+            'market_cap': quote['market_cap'],
+            'pe_ratio': quote['pe_ratio'],
+            'pb_ratio': quote['pb_ratio'],
+        })
+        return info
+
+
+class FakeTdxProvider(_FakeQuoteProvider):
+    """伪通达信数据源：实时行情与确定性生成的日K线"""
+    source_name = '通达信'
+
+    def get_real_time_data(self, stock_code: str) -> Dict:
+        quote = self._quote(stock_code)
+        if not quote:
+            return {}
+        price, last_close = quote['current_price'], quote['prev_close']
+        return {
+            'code': stock_code,
+            'name': quote['name'],
+            'price': price,
+            'last_close': last_close,
+            'open': quote['open'],
+            'high': quote['high'],
+            'low': quote['low'],
+            'volume': quote['volume'] // 100,
+            'amount': quote['turnover'],
+            'change': price - last_close,
+            'change_percent': (price - last_close) / last_close * 100 if last_close > 0 else 0,
+            'update_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        }
+
+    def get_stock_history_data(self, stock_code: str, start_date: str, end_date: str,
+                               period: str = 'D') -> pd.DataFrame:
+        quote = self._quote(stock_code)
+        if not quote:
+            return pd.DataFrame()
+        return make_history_bars(quote, start_date, end_date, period)
+
+    def get_stock_history_batch(self, symbols: List[str], start_date: str, end_date: str,
+                                period: str = 'D', max_workers: Optional[int] = None) -> Dict[str, pd.DataFrame]:
+        results = {}
+        for symbol in symbols:
+            frame = self.get_stock_history_data(symbol, start_date, end_date, period)
+            if not frame.empty:
+                results[symbol] = frame
+        return results
+
+
+def make_history_bars(quote: Dict[str, Any], start_date: str, end_date: str, period: str = 'D') -> pd.DataFrame:
+    """按股票代码确定性生成以最新价收尾的K线（列名与通达信数据源一致）"""
+    freq = {'D': 'B', 'W': 'W-FRI', 'M': 'M'}.get(period, 'B')
+    index = pd.date_range(start=start_date, end=end_date, freq=freq, name='datetime')
+    if len(index) == 0:
+        return pd.DataFrame()
+
+    rng = np.random.default_rng(zlib.crc32(quote['symbol'].encode()))
+    returns = rng.normal(0.0005, 0.018, size=len(index))
+    close = quote['current_price'] * np.exp(returns[::-1].cumsum()[::-1] - returns[-1])
+    spread = rng.uniform(0.002, 0.025, size=len(index))
+    open_ = np.roll(close, 1)
+    open_[0] = close[0]
+    volume = (quote['volume'] * rng.lognormal(0.0, 0.3, size=len(index))).astype(np.int64)
+    return pd.DataFrame({
+        'Open': open_.round(2),
+        'High': (np.maximum(open_, close) * (1 + spread)).round(2),
+        'Low': (np.minimum(open_, close) * (1 - spread)).round(2),
+        'Close': close.round(2),
+        'Volume': volume,
+        'Amount': (volume * close).round(2),
+    }, index=index)
+
+
+class FakeStockMasterManager:
+    """伪股票主数据管理器"""
+
+    def __init__(self, universe: Iterable[Dict[str, Any]]):
+        self.frame = pd.DataFrame([
+            {'symbol': q['symbol'], 'name': q['name'], 'industry': q.get('industry', ''), 'market': 'A股'}
+            for q in universe
+        ])
+
+    def load_stock_list(self, market: Optional[str] = None) -> Optional[pd.DataFrame]:
+        return self.frame.copy()
+
+    def save_stock_list(self, stock_list: List[Dict[str, Any]]):
+        pass
+
+    def get_stock_info(self, symbol: str) -> Optional[Dict[str, Any]]:
+        rows = self.frame[self.frame['symbol'] == symbol]
+        return rows.iloc[0].to_dict() if not rows.empty else None
+
+
+class FakeDataSourceConfig:
+    """伪数据源配置：东方财富 > 腾讯 > 新浪，启用多源融合"""
+
+    def __init__(self, priority_order: Optional[List[str]] = None, enable_multi_source: bool = True):
+        self.priority_order = priority_order or ['eastmoney', 'tencent', 'sina']
+        self.enable_multi_source = enable_multi_source
+
+    def get_priority_order(self) -> List[str]:
+        return list(self.priority_order)
+
+    def is_source_enabled(self, source: str) -> bool:
+        return source in self.priority_order
+
+    def is_tiered_enabled(self) -> bool:
+        return False
+
+    def get_strategy_config(self) -> Dict[str, Any]:
+        return {'enable_multi_source': self.enable_multi_source}
+
+
+def make_fake_providers(universe: Optional[List[Dict[str, Any]]] = None,
+                        latency: float = 0.0) -> Dict[str, _FakeQuoteProvider]:
+    """创建全部伪数据源"""
+    return {
+        'eastmoney': FakeEastMoneyProvider(universe, latency),
+        'tencent': FakeTencentProvider(universe, latency),
+        'sina': FakeSinaProvider(universe, latency),
+        'tdx': FakeTdxProvider(universe, latency),
+    }
+
+
+def make_fake_data_manager(universe: Optional[List[Dict[str, Any]]] = None, latency: float = 0.0):
+    """
+    创建使用伪数据源的 EnhancedDataManager
+
+    绕过 __init__ 中的数据源/分层管理器/异步管道初始化，只保留传统多源获取路径，
+    这样测量的是真实的多源获取与融合逻辑，而数据来自录制行情。
+    """
+    from tradingagents.dataflows.enhanced_data_manager import EnhancedDataManager
+
+    universe = universe if universe is not None else load_quote_templates()
+    providers = make_fake_providers(universe, latency)
+    providers.pop('tdx')
+
+    manager = EnhancedDataManager.__new__(EnhancedDataManager)
+    manager.providers = providers
+    manager.provider_status = {name: True for name in providers}
+    manager.config = FakeDataSourceConfig()
+    manager.historical_manager = None
+    manager.stock_master_manager = FakeStockMasterManager(universe)
+    manager.tiered_manager = None
+    manager.enable_tiered = False
+    manager.async_pipeline = None
+    manager.enable_async = False
+    return manager
+
+
+class FakeTailLatencyProvider:
+    """
+    伪多源管理器数据源：按录制行情返回 MultiSourceManager 格式的价格数据
+
+    大部分请求耗时 latency 秒，按 tail_ratio 的概率出现 tail_latency 秒的长尾，用于测量对冲请求。
+    """
+
+    def __init__(self, name: str, universe: Optional[Iterable[Dict[str, Any]]] = None,
+                 latency: float = 0.002, tail_ratio: float = 0.05, tail_latency: float = 0.1, seed: int = 42):
+        self.name = name
+        self.quotes = _index_universe(universe)
+        self.latency = latency
+        self.tail_ratio = tail_ratio
+        self.tail_latency = tail_latency
+        self._rng = np.random.default_rng(zlib.crc32(name.encode()) + seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def get_data(self, data_type: str, symbol: str) -> Dict[str, Any]:
+        with self._lock:
+            self.calls += 1
+            slow = self._rng.random() < self.tail_ratio
+        time.sleep(self.tail_latency if slow else self.latency)
+        quote = self.quotes.get(symbol)
+        if data_type != 'price' or not quote:
+            return {'status': 'failed', 'error': '数据获取失败'}
+        return {
+            'source': self.name,
+            'symbol': symbol,
+            'price': quote['current_price'],
+            'open': quote['open'],
+            'high': quote['high'],
+            'low': quote['low'],
+            'volume': quote['volume'],
+            'status': 'success',
+        }
+
+    def health_check(self) -> bool:
+        return True
+
+
+def make_fake_multi_source_manager(universe: Optional[List[Dict[str, Any]]] = None, enable_hedging: bool = True,
+                                   latency: float = 0.002, tail_ratio: float = 0.05, tail_latency: float = 0.1,
+                                   seed: int = 42):
+    """创建使用长尾延迟伪数据源的 MultiSourceManager（清空共享的被动健康统计，保证各用例互不影响）"""
+    from tradingagents.analytics.source_health import get_source_health_tracker
+    from tradingagents.dataflows.multi_source_manager import MultiSourceManager
+
+    universe = universe if universe is not None else load_quote_templates()
+    get_source_health_tracker().reset()
+    manager = MultiSourceManager(enable_hedging=enable_hedging)
+    manager.sources = {name: FakeTailLatencyProvider(name, universe, latency, tail_ratio, tail_latency, seed)
+                       for name in ('tencent', 'eastmoney', 'sina')}
+    return manager
+
+
+def make_fake_selector(universe: Optional[List[Dict[str, Any]]] = None, latency: float = 0.0):
+    """
+    创建使用伪数据管理器的 StockSelector
+
+    走真实的 __init__，只把数据管理器和采样器换成伪实现，AI策略/批处理/龙虎榜组件置空。
+    """
+    from tradingagents.selectors import stock_selector
+    from tradingagents.selectors.intelligent_sampling import IntelligentSampler
+
+    data_manager = make_fake_data_manager(universe, latency)
+    with mock.patch.object(stock_selector, 'EnhancedDataManager', return_value=data_manager), \
+            mock.patch.object(stock_selector, 'get_intelligent_sampler',
+                              side_effect=lambda: IntelligentSampler(data_manager)), \
+            mock.patch.object(stock_selector, 'get_ai_strategy_manager', return_value=None), \
+            mock.patch.object(stock_selector, 'get_batch_ai_processor', return_value=None), \
+            mock.patch.object(stock_selector, 'get_longhubang_analyzer', return_value=None), \
+            mock.patch.object(stock_selector, 'get_longhubang_provider', return_value=None):
+        return stock_selector.StockSelector(cache_enabled=True)
+
+
+# ==================== 伪LLM ====================
+
+# 按提示开头识别智能体角色（顺序即优先级）
+_ROLE_KEYWORDS = (
+    ('风险管理委员会', 'risk_manager'),
+    ('投资组合经理', 'research_manager'),
+    ('激进风险', 'risky'),
+    ('保守风险', 'safe'),
+    ('中性风险', 'neutral'),
+    ('看涨分析师', 'bull'),
+    ('看跌分析师', 'bear'),
+    ('交易员', 'trader'),
+    ('新闻分析师', 'news'),
+    ('社交媒体', 'social'),
+    ('情绪', 'social'),
+    ('基本面', 'fundamentals'),
+    ('技术分析', 'market'),
+    ('反思', 'reflection'),
+)
+_SYMBOL_PATTERN = re.compile(r'(?<!\d)(\d{6})(?!\d)')
+
+LLM_CALL_COUNTER: Counter = Counter()
+_llm_counter_lock = threading.Lock()
+
+
+def _message_text(message: Any) -> str:
+    if isinstance(message, dict):
+        content = message.get('content', '')
+    else:
+        content = getattr(message, 'content', message)
+    return content if isinstance(content, str) else str(content)
+
+
+def detect_role(messages: List[Any]) -> str:
+    """根据首条消息识别调用方角色，无法识别时返回 default"""
+    if not messages:
+        return 'default'
+    first = _message_text(messages[0])
+    for text in (first[:160], first):
+        for keyword, role in _ROLE_KEYWORDS:
+            if keyword in text:
+                return role
+    return 'default'
+
+
+def _make_fake_llm_class():
+    """延迟导入 langchain_core，仅在需要伪LLM时才定义"""
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_core.messages import AIMessage
+    from langchain_core.outputs import ChatGeneration, ChatResult
+
+    class FakeDeterministicLLM(BaseChatModel):
+        """
+        确定性伪聊天模型
+
+        按调用方角色返回录制回复（相同输入总是得到相同输出），从不发起工具调用；
+        回复中包含“最终交易建议/目标价位/置信度/风险评分”，信号处理可直接本地解析。
+        """
+
+        latency_ms: float = 0.0
+        universe: Dict[str, Dict[str, Any]] = {}
+
+        @property
+        def _llm_type(self) -> str:
+            return "fake-deterministic"
+
+        def _find_quote(self, messages: List[Any]) -> Dict[str, Any]:
+            """按提示中出现的股票代码（其次是公司名称）确定回复对应的股票"""
+            text = "\n".join(_message_text(message) for message in messages)
+            for symbol in _SYMBOL_PATTERN.findall(text):
+                if symbol in self.universe:
+                    return self.universe[symbol]
+            for quote in self.universe.values():
+                if quote['name'] in text:
+                    return quote
+            return next(iter(self.universe.values()))
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+            role = detect_role(messages)
+            with _llm_counter_lock:
+                LLM_CALL_COUNTER[role] += 1
+            if self.latency_ms:
+                time.sleep(self.latency_ms / 1000)
+
+            responses = load_reports()['llm_responses']
+            content = render(responses.get(role, responses['default']), self._find_quote(messages))
+            return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+        def bind_tools(self, tools, **kwargs):
+            return self
+
+    return FakeDeterministicLLM
+
+
+_fake_llm_class = None
+
+
+def make_fake_llm(universe: Optional[List[Dict[str, Any]]] = None, latency_ms: float = 0.0):
+    """创建确定性伪LLM"""
+    global _fake_llm_class
+    if _fake_llm_class is None:
+        _fake_llm_class = _make_fake_llm_class()
+    return _fake_llm_class(latency_ms=latency_ms, universe=_index_universe(universe))
+
+
+class FakeLLMManager:
+    """伪动态LLM管理器，总是返回同一个伪LLM"""
+
+    def __init__(self, llm):
+        self.llm = llm
+
+    def get_enabled_models(self) -> Dict[str, Dict[str, Any]]:
+        return {}
+
+    def set_current_model(self, model_key: str) -> bool:
+        return False
+
+    def get_current_llm(self):
+        return self.llm
+
+    def get_current_config(self):
+        return None
+
+
+# ==================== 伪工具与数据接口 ====================
+
+def _tool_output(kind: str, quote: Dict[str, Any], **extra) -> str:
+    outputs = load_reports()['tool_outputs']
+    return render(outputs.get(kind, outputs['default']), quote, **extra)
+
+
+def _tool_kind(tool_name: str) -> str:
+    name = tool_name.lower()
+    if 'fundamental' in name or 'balance' in name or 'cashflow' in name or 'income' in name:
+        return 'fundamentals'
+    if 'news' in name:
+        return 'news'
+    if 'sentiment' in name or 'social' in name or 'reddit' in name:
+        return 'sentiment'
+    if 'data' in name or 'indicator' in name or 'yfin' in name or 'market' in name:
+        return 'market_data'
+    return 'default'
+
+
+class OfflineDataTools:
+    """录制数据驱动的工具/数据接口实现"""
+
+    def __init__(self, universe: Optional[List[Dict[str, Any]]] = None):
+        self.quotes = _index_universe(universe)
+        self.tdx = FakeTdxProvider(list(self.quotes.values()))
+
+    def quote(self, ticker: Any) -> Dict[str, Any]:
+        match = _SYMBOL_PATTERN.search(str(ticker))
+        if match and match.group(1) in self.quotes:
+            return self.quotes[match.group(1)]
+        return next(iter(self.quotes.values()))
+
+    def tool_result(self, tool_name: str, **kwargs) -> str:
+        ticker = next((v for k, v in kwargs.items() if k in ('ticker', 'stock_code', 'symbol')), '')
+        quote = self.quote(ticker)
+        kind = _tool_kind(tool_name)
+        if kind == 'market_data':
+            bars = make_history_bars(quote, '2025-05-01', '2025-06-30')
+            return _tool_output(kind, quote, history=bars.tail(10).to_string())
+        return _tool_output(kind, quote)
+
+    def china_stock_info(self, ticker: str) -> str:
+        quote = self.quote(ticker)
+        return (f"股票代码: {quote['symbol']}\n股票名称: {quote['name']}\n所属行业: {quote.get('industry', '')}\n"
+                f"当前价格: {quote['current_price']}\n数据来源: 离线录制")
+
+    def research_reports(self, ticker: str, limit: int = 15):
+        from tradingagents.dataflows.research_report_utils import ResearchReport
+
+        quote = self.quote(ticker)
+        reports = []
+        for item in load_reports()['research_reports'][:limit]:
+            fields = {k: v for k, v in item.items() if k != 'target_ratio'}
+            fields['title'] = render(fields['title'], quote)
+            reports.append(ResearchReport(
+                target_price=round(quote['current_price'] * item['target_ratio'], 2),
+                current_price=quote['current_price'],
+                **fields,
+            ))
+        return reports
+
+    def institutional_consensus(self, ticker: str) -> Dict[str, Any]:
+        reports = self.research_reports(ticker)
+        targets = [r.target_price for r in reports if r.target_price]
+        return {
+            'total_reports': len(reports),
+            'institution_count': len({r.institution for r in reports}),
+            'rating_distribution': dict(Counter(r.rating for r in reports)),
+            'average_target_price': round(sum(targets) / len(targets), 2) if targets else None,
+            'target_price_range': {'min': min(targets, default=None), 'max': max(targets, default=None)},
+        }
+
+    def stock_data_report(self, ticker: str, start_date: str = None, end_date: str = None, *args, **kwargs) -> str:
+        return self.tool_result('get_stock_market_data_unified', ticker=ticker)
+
+    def spot_frame(self) -> pd.DataFrame:
+        """东方财富A股实时行情表（akshare stock_zh_a_spot_em 的列名）"""
+        return pd.DataFrame([{
+            '代码': q['symbol'], '名称': q['name'], '最新价': q['current_price'], '昨收': q['prev_close'],
+            '涨跌幅': round((q['current_price'] / q['prev_close'] - 1) * 100, 2) if q['prev_close'] else 0.0,
+            '成交量': q['volume'], '成交额': q['turnover'], '市盈率': q['pe_ratio'], '市净率': q['pb_ratio'],
+            '总市值': q['market_cap'],
+        } for q in self.quotes.values()])
+
+
+def make_fake_toolkit_class(data_tools: OfflineDataTools):
+    """
+    生成 Toolkit 的伪子类：每个工具保持原有名称、描述与参数schema，返回录制数据
+    """
+    from langchain_core.tools import BaseTool, StructuredTool
+    from tradingagents.agents.utils.agent_utils import Toolkit
+
+    namespace = {}
+    for attr in dir(Toolkit):
+        tool = getattr(Toolkit, attr, None)
+        if not isinstance(tool, BaseTool):
+            continue
+
+        def fake(_tool_name=tool.name, **kwargs):
+            return data_tools.tool_result(_tool_name, **kwargs)
+
+        namespace[attr] = staticmethod(StructuredTool.from_function(
+            func=lambda _fake=fake, **kwargs: _fake(**kwargs),
+            name=tool.name,
+            description=tool.description,
+            args_schema=tool.args_schema,
+        ))
+    return type('FakeToolkit', (Toolkit,), namespace)
+
+
+def _make_fake_unified_news_tool(data_tools: OfflineDataTools):
+    def create_unified_news_tool(toolkit):
+        def get_stock_news_unified(stock_code: str, max_news: int = 100):
+            return data_tools.tool_result('get_stock_news_unified', stock_code=stock_code)
+
+        get_stock_news_unified.name = "get_stock_news_unified"
+        get_stock_news_unified.description = "统一新闻获取工具（离线录制）"
+        return get_stock_news_unified
+    return create_unified_news_tool
+
+
+class _FakeDataSourceManager:
+    def __init__(self, data_tools: OfflineDataTools):
+        self.data_tools = data_tools
+
+    def get_stock_data(self, symbol: str, start_date: str = None, end_date: str = None, *args, **kwargs) -> str:
+        return self.data_tools.stock_data_report(symbol, start_date, end_date)
+
+
+@contextmanager
+def offline_data_patches(universe: Optional[List[Dict[str, Any]]] = None):
+    """
+    屏蔽网络并把模块级数据接口替换为录制数据
+
+    Yields:
+        NetworkGuard: 被拦截请求的统计
+    """
+    data_tools = OfflineDataTools(universe)
+    with ExitStack() as stack:
+        guard = stack.enter_context(block_network())
+        stack.enter_context(mock.patch('tradingagents.dataflows.interface.get_china_stock_info_unified',
+                                       data_tools.china_stock_info))
+        stack.enter_context(mock.patch('tradingagents.dataflows.research_report_utils.get_stock_research_reports',
+                                       data_tools.research_reports))
+        stack.enter_context(mock.patch('tradingagents.dataflows.research_report_utils.get_institutional_consensus',
+                                       data_tools.institutional_consensus))
+        stack.enter_context(mock.patch('tradingagents.dataflows.data_source_manager.get_data_source_manager',
+                                       lambda: _FakeDataSourceManager(data_tools)))
+        try:
+            import akshare  # noqa: F401
+            stack.enter_context(mock.patch('akshare.stock_zh_a_spot_em', data_tools.spot_frame))
+        except ImportError:
+            pass
+        yield guard
+
+
+@contextmanager
+def offline_graph_patches(llm, universe: Optional[List[Dict[str, Any]]] = None):
+    """
+    在 offline_data_patches 基础上，为 TradingAgentsGraph 注入伪LLM与伪工具集
+
+    Yields:
+        NetworkGuard: 被拦截请求的统计
+    """
+    data_tools = OfflineDataTools(universe)
+    with ExitStack() as stack:
+        guard = stack.enter_context(offline_data_patches(universe))
+        stack.enter_context(mock.patch('tradingagents.graph.trading_graph.get_llm_manager',
+                                       lambda: FakeLLMManager(llm)))
+        stack.enter_context(mock.patch('tradingagents.graph.trading_graph.Toolkit',
+                                       make_fake_toolkit_class(data_tools)))
+        stack.enter_context(mock.patch('tradingagents.agents.analysts.news_analyst.create_unified_news_tool',
+                                       _make_fake_unified_news_tool(data_tools)))
+        yield guard
+
+
+__all__ = [
+    'NetworkAccessError', 'NetworkGuard', 'block_network',
+    'FakeTencentProvider', 'FakeSinaProvider', 'FakeEastMoneyProvider', 'FakeTdxProvider',
+    'FakeStockMasterManager', 'FakeDataSourceConfig', 'FakeLLMManager', 'OfflineDataTools',
+    'make_history_bars', 'make_fake_providers', 'make_fake_data_manager', 'make_fake_selector',
+    'make_fake_llm', 'make_fake_toolkit_class', 'detect_role', 'LLM_CALL_COUNTER',
+    'offline_data_patches', 'offline_graph_patches', 'make_universe',
+]
@@ -0,0 +1,123 @@
+"""
+基准测试录制数据
+quotes.json 为录制的A股行情样本，reports.json 为伪LLM回复、数据工具输出与研报样本。
+make_universe 以行情样本为模板，按固定随机种子扩展出任意规模的确定性股票池。
+"""
+
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+FIXTURE_DIR = Path(__file__).parent
+
+# 扩展股票代码使用的板块前缀，从 5000 起编号以避开模板中的真实代码
+_SYNTHETIC_PREFIXES = ('60', '00', '30', '68')
+_SYNTHETIC_OFFSET = 5000
+MAX_UNIVERSE_SIZE = len(_SYNTHETIC_PREFIXES) * (10000 - _SYNTHETIC_OFFSET)
+
+
+@lru_cache(maxsize=None)
+def _load_json(name: str) -> Dict[str, Any]:
+    with open(FIXTURE_DIR / name, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_quote_templates() -> List[Dict[str, Any]]:
+    """录制的行情样本"""
+    return [dict(quote) for quote in _load_json('quotes.json')['quotes']]
+
+
+def load_reports() -> Dict[str, Any]:
+    """伪LLM回复、工具输出与研报样本"""
+    return _load_json('reports.json')
+
+
+@lru_cache(maxsize=8)
+def _build_universe(size: int, seed: int) -> tuple:
+    templates = load_quote_templates()
+    if size > MAX_UNIVERSE_SIZE:
+        raise ValueError(f"股票池规模不能超过 {MAX_UNIVERSE_SIZE}")
+
+    rng = np.random.default_rng(seed)
+    scale = rng.lognormal(mean=0.0, sigma=0.6, size=size)
+    activity = rng.lognormal(mean=0.0, sigma=0.8, size=size)
+    change = np.clip(rng.normal(0.0, 0.02, size=size), -0.1, 0.1)
+    spread = rng.uniform(0.002, 0.03, size=size)
+
+    universe = []
+    for i in range(size):
+        template = templates[i % len(templates)]
+        if i < len(templates):
+            # 前几只保持录制原样
+            universe.append(dict(template))
+            continue
+
+        k = i - len(templates)
+        prefix = _SYNTHETIC_PREFIXES[k % len(_SYNTHETIC_PREFIXES)]
+        symbol = f"{prefix}{_SYNTHETIC_OFFSET + k // len(_SYNTHETIC_PREFIXES):04d}"
+
+        prev_close = round(template['prev_close'] * scale[i], 2) or 0.01
+        price = round(prev_close * (1 + change[i]), 2) or 0.01
+        volume = int(template['volume'] * activity[i])
+        universe.append({
+            'symbol': symbol,
+            'name': f"{template['name']}{k // len(templates) + 1}",
+            'industry': template['industry'],
+            'current_price': price,
+            'prev_close': prev_close,
+            'open': prev_close,
+            'high': round(max(price, prev_close) * (1 + spread[i]), 2),
+            'low': round(min(price, prev_close) * (1 - spread[i]), 2),
+            'volume': volume,
+            'turnover': round(volume * price, 2),
+            'market_cap': round(template['market_cap'] * scale[i], 2),
+            'pe_ratio': round(template['pe_ratio'] * float(activity[i]) ** 0.25, 2),
+            'pb_ratio': round(template['pb_ratio'] * float(scale[i]) ** 0.5, 2),
+            'turnover_rate': round(template['turnover_rate'] * activity[i], 2),
+        })
+    return tuple(universe)
+
+
+def make_universe(size: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """
+    生成确定性的股票池（相同 size/seed 每次结果一致）
+
+    Args:
+        size: 股票数量
+        seed: 随机种子
+
+    Returns:
+        List[Dict]: 每只股票的行情字典，字段与 quotes.json 一致
+    """
+    return [dict(quote) for quote in _build_universe(size, seed)]
+
+
+class _SafeFormatDict(dict):
+    """缺失的占位符原样保留"""
+
+    def __missing__(self, key):
+        return '{' + key + '}'
+
+
+def render(template: str, quote: Dict[str, Any], **extra) -> str:
+    """用行情字段填充录制文本中的占位符"""
+    price = quote.get('current_price', 0.0)
+    values = _SafeFormatDict(
+        symbol=quote.get('symbol', ''),
+        name=quote.get('name', quote.get('symbol', '')),
+        industry=quote.get('industry', ''),
+        price=f"{price:.2f}",
+        low=f"{quote.get('low', price):.2f}",
+        high=f"{quote.get('high', price):.2f}",
+        target=f"{price * 1.15:.2f}",
+        pe=quote.get('pe_ratio', 'N/A'),
+        pb=quote.get('pb_ratio', 'N/A'),
+        market_cap=f"{quote.get('market_cap', 0) / 1e8:.1f}",
+        change_pct=f"{(price / quote['prev_close'] - 1) * 100:.2f}" if quote.get('prev_close') else '0.00',
+        volume=quote.get('volume', 0),
+    )
+    values.update(extra)
+    return template.format_map(values)
@@ -0,0 +1,244 @@
+"""
+基准测试框架
+用 benchmark_case 注册用例，run_case 先预热、再计时若干轮（每轮前先做一次GC，且不开启 tracemalloc，避免放大耗时），
+最后单独跑一轮用 tracemalloc 统计内存峰值。结果写成带环境信息的 JSON，compare_results
+按延迟 p50、吞吐量和内存峰值对比两次运行，超过阈值的变化标记为回归。
+"""
+
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+SUITE_NAME = "tradingagents-offline-benchmarks"
+SCHEMA_VERSION = 1
+
+
+@dataclass
+class BenchmarkContext:
+    """用例运行参数"""
+    size: int = 500                  # 股票池规模
+    iterations: int = 3              # 计时轮数
+    warmup: int = 1                  # 预热轮数
+    seed: int = 42                   # 随机种子
+    provider_latency: float = 0.0    # 伪数据源单次请求延迟（秒）
+    llm_latency_ms: float = 0.0      # 伪LLM单次调用延迟（毫秒）
+
+
+@dataclass
+class CaseRun:
+    """
+    用例的一次准备结果
+
+    run 为被计时的函数，返回本轮处理的条目数（None 表示使用 items）；
+    teardown 在所有轮次结束后调用；extra 返回附加指标（如网络拦截次数、缓存命中数）。
+    """
+    run: Callable[[], Optional[int]]
+    items: int = 1
+    teardown: Optional[Callable[[], None]] = None
+    extra: Optional[Callable[[], Dict[str, Any]]] = None
+
+
+@dataclass
+class BenchmarkCase:
+    name: str
+    description: str
+    setup: Callable[[BenchmarkContext], CaseRun]
+
+
+@dataclass
+class BenchmarkResult:
+    """单个用例的测量结果"""
+    name: str
+    description: str
+    iterations: int
+    items_per_iteration: float
+    latency_ms: Dict[str, float]
+    throughput_per_s: float
+    peak_memory_mb: float
+    extra: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+_CASES: Dict[str, BenchmarkCase] = {}
+
+
+def benchmark_case(name: str, description: str = ""):
+    """注册基准测试用例（装饰 setup 函数）"""
+    def decorator(setup: Callable[[BenchmarkContext], CaseRun]):
+        _CASES[name] = BenchmarkCase(name=name, description=description or (setup.__doc__ or "").strip(),
+                                     setup=setup)
+        return setup
+    return decorator
+
+
+def get_cases(only: Optional[List[str]] = None) -> List[BenchmarkCase]:
+    """按注册顺序返回用例，only 为名称前缀过滤"""
+    cases = list(_CASES.values())
+    if only:
+        cases = [case for case in cases if any(case.name.startswith(prefix) for prefix in only)]
+    return cases
+
+
+def _latency_summary(samples_ms: List[float]) -> Dict[str, float]:
+    values = np.asarray(samples_ms, dtype=float)
+    return {
+        'mean': round(float(values.mean()), 3),
+        'p50': round(float(np.percentile(values, 50)), 3),
+        'p95': round(float(np.percentile(values, 95)), 3),
+        'min': round(float(values.min()), 3),
+        'max': round(float(values.max()), 3),
+    }
+
+
+def run_case(case: BenchmarkCase, context: BenchmarkContext) -> BenchmarkResult:
+    """运行单个用例：预热 -> 计时 -> 内存峰值"""
+    prepared = None
+    try:
+        prepared = case.setup(context)
+        for _ in range(context.warmup):
+            prepared.run()
+
+        samples_ms = []
+        processed = []
+        for _ in range(max(context.iterations, 1)):
+            # 先回收前面用例/轮次留下的垃圾，避免把它们的GC开销算到本轮
+            gc.collect()
+            start = time.perf_counter()
+            items = prepared.run()
+            samples_ms.append((time.perf_counter() - start) * 1000)
+            processed.append(prepared.items if items is None else items)
+
+        gc.collect()
+        tracemalloc.start()
+        try:
+            prepared.run()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        total_seconds = sum(samples_ms) / 1000
+        extra = prepared.extra() if prepared.extra else {}
+        return BenchmarkResult(
+            name=case.name,
+            description=case.description,
+            iterations=len(samples_ms),
+            items_per_iteration=round(sum(processed) / len(processed), 2),
+            latency_ms=_latency_summary(samples_ms),
+            throughput_per_s=round(sum(processed) / total_seconds, 3) if total_seconds > 0 else 0.0,
+            peak_memory_mb=round(peak / 1024 / 1024, 3),
+            extra=extra,
+        )
+    except Exception as e:
+        return BenchmarkResult(name=case.name, description=case.description, iterations=0,
+                               items_per_iteration=0, latency_ms={}, throughput_per_s=0.0,
+                               peak_memory_mb=0.0, error=f"{type(e).__name__}: {e}")
+    finally:
+        if prepared and prepared.teardown:
+            prepared.teardown()
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              timeout=5, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+                              ).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def build_report(results: List[BenchmarkResult], context: BenchmarkContext) -> Dict[str, Any]:
+    """组装结果文件内容"""
+    return {
+        'suite': SUITE_NAME,
+        'schema_version': SCHEMA_VERSION,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': _git_commit(),
+        'environment': {
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'params': asdict(context),
+        'results': {result.name: result.to_dict() for result in results},
+    }
+
+
+def write_report(report: Dict[str, Any], path: str):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def load_report(path: str) -> Dict[str, Any]:
+    with open(path, 'r', encoding='utf-8') as f:
+        report = json.load(f)
+    if report.get('suite') != SUITE_NAME:
+        raise ValueError(f"不是基准测试结果文件: {path}")
+    if report.get('schema_version') != SCHEMA_VERSION:
+        raise ValueError(f"结果文件版本不一致: {report.get('schema_version')} != {SCHEMA_VERSION}")
+    return report
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any],
+                    threshold: float = 0.10) -> List[Dict[str, Any]]:
+    """
+    对比两次运行结果
+
+    Args:
+        baseline: 基线结果（load_report 的返回值）
+        current: 本次结果
+        threshold: 相对变化超过该比例视为回归（延迟/内存变大或吞吐量变小）
+
+    Returns:
+        List[Dict]: 每个共同用例的对比行，包含 regressions 字段
+    """
+    if baseline.get('params', {}).get('size') != current.get('params', {}).get('size'):
+        print("⚠️ 两次运行的股票池规模不同，对比结果仅供参考", file=sys.stderr)
+
+    rows = []
+    for name, now in current['results'].items():
+        before = baseline['results'].get(name)
+        if not before or before.get('error') or now.get('error'):
+            continue
+
+        metrics = {
+            'p50_ms': (before['latency_ms']['p50'], now['latency_ms']['p50'], True),
+            'throughput_per_s': (before['throughput_per_s'], now['throughput_per_s'], False),
+            'peak_memory_mb': (before['peak_memory_mb'], now['peak_memory_mb'], True),
+        }
+        row = {'name': name, 'regressions': []}
+        for metric, (old, new, lower_is_better) in metrics.items():
+            change = (new - old) / old if old else 0.0
+            row[metric] = {'baseline': old, 'current': new, 'change': round(change, 4)}
+            if (change > threshold) if lower_is_better else (change < -threshold):
+                row['regressions'].append(metric)
+        rows.append(row)
+    return rows
+
+
+def format_comparison(rows: List[Dict[str, Any]]) -> str:
+    """对比结果的文本表格"""
+    lines = [f"{'用例':<36}{'p50(ms)':>22}{'吞吐量(/s)':>24}{'内存峰值(MB)':>22}"]
+    for row in rows:
+        cells = []
+        for metric in ('p50_ms', 'throughput_per_s', 'peak_memory_mb'):
+            item = row[metric]
+            mark = '❗' if metric in row['regressions'] else ''
+            cells.append(f"{item['baseline']:.2f}→{item['current']:.2f} ({item['change']:+.1%}){mark}")
+        lines.append(f"{row['name']:<36}{cells[0]:>22}{cells[1]:>24}{cells[2]:>22}")
+    return "\n".join(lines)
@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+"""
+离线性能基准测试套件
+使用录制行情、伪腾讯/新浪/东方财富/通达信数据源和确定性伪LLM，测量选股、缓存、采样、评分
+与完整分析图各热点路径的延迟（mean/p50/p95）、吞吐量和内存峰值，结果写成可跨运行对比的JSON。
+运行期间屏蔽网络，遗漏的真实请求会在结果的 extra.blocked_network_calls 中体现。
+
+用法:
+    python -m benchmarks.run_suite --size 500 --iterations 3 --output benchmarks/results/latest.json
+    python -m benchmarks.run_suite --only selector,scoring --compare benchmarks/results/baseline.json
+"""
+
+import argparse
+import copy
+import logging
+import os
+import shutil
+import sys
+import tempfile
+from contextlib import ExitStack
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.fakes import (
+    LLM_CALL_COUNTER, make_fake_data_manager, make_fake_llm, make_fake_multi_source_manager, make_fake_providers,
+    make_fake_selector, make_history_bars, offline_data_patches, offline_graph_patches,
+)
+from benchmarks.fixtures import load_quote_templates, make_universe
+from benchmarks.harness import (
+    BenchmarkContext, CaseRun, benchmark_case, build_report, compare_results, format_comparison,
+    get_cases, load_report, run_case, write_report,
+)
+
+DEFAULT_OUTPUT = os.path.join('benchmarks', 'results', 'latest.json')
+TRADE_DATE = '2025-06-30'
+# 价格在信号处理合理区间（A股1-1000元）内的代表性股票
+GRAPH_TICKER = '600036'
+
+
+def _offline_stack(universe) -> ExitStack:
+    stack = ExitStack()
+    stack.guard = stack.enter_context(offline_data_patches(universe))
+    return stack
+
+
+def _universe_frame(universe) -> pd.DataFrame:
+    """采样器输入：选股引擎在行情丰富后的股票表"""
+    frame = pd.DataFrame(universe).rename(columns={'symbol': 'ts_code'})
+    return frame
+
+
+@benchmark_case('selector.select_stocks', '选股主流程：股票列表 -> 智能采样 -> 多源行情 + 综合评分 -> 排序')
+def selector_case(context: BenchmarkContext) -> CaseRun:
+    from tradingagents.selectors.stock_selector import SelectionCriteria
+
+    universe = make_universe(context.size, context.seed)
+    stack = _offline_stack(universe)
+    selector = make_fake_selector(universe, context.provider_latency)
+    criteria = SelectionCriteria(limit=20)
+    last = {}
+
+    def run():
+        np.random.seed(context.seed)
+        result = selector.select_stocks(criteria)
+        last.update(candidates=result.total_candidates, scored=len(result.data), returned=len(result.symbols))
+        return result.total_candidates
+
+    def extra():
+        calls = {name: provider.calls for name, provider in selector.data_manager.providers.items()}
+        return {**last, 'provider_calls': calls, **stack.guard.to_dict()}
+
+    return CaseRun(run=run, items=context.size, teardown=stack.close, extra=extra)
+
+
+@benchmark_case('selector.select_stocks_pushdown', '选股主流程 + 基础字段筛选与排序：条件下推并只为最终结果计算评分')
+def selector_pushdown_case(context: BenchmarkContext) -> CaseRun:
+    from tradingagents.selectors.filter_conditions import FilterOperator
+    from tradingagents.selectors.stock_selector import SelectionCriteria
+
+    universe = make_universe(context.size, context.seed)
+    stack = _offline_stack(universe)
+    selector = make_fake_selector(universe, context.provider_latency)
+    criteria = SelectionCriteria(
+        filters=[selector.create_enum_filter('ts_code', FilterOperator.STARTS_WITH, '60')],
+        sort_by='ts_code',
+        sort_ascending=True,
+        limit=20
+    )
+    last = {}
+
+    def run():
+        np.random.seed(context.seed)
+        result = selector.select_stocks(criteria)
+        plan = result.summary.get('query_plan', {})
+        last.update(candidates=result.total_candidates, returned=len(result.symbols),
+                    score_evaluations=plan.get('score_evaluations'),
+                    skipped_score_evaluations=plan.get('skipped_score_evaluations'))
+        return result.total_candidates
+
+    def extra():
+        return {**last, **stack.guard.to_dict()}
+
+    return CaseRun(run=run, items=context.size, teardown=stack.close, extra=extra)
+
+
+@benchmark_case('selector.select_stocks_topk', '选股主流程 + 综合评分前K名：按快照预估评分增量评分并提前终止')
+def selector_topk_case(context: BenchmarkContext) -> CaseRun:
+    from tradingagents.selectors.stock_selector import SelectionCriteria
+
+    universe = make_universe(context.size, context.seed)
+    stack = _offline_stack(universe)
+    selector = make_fake_selector(universe, context.provider_latency)
+    criteria = SelectionCriteria(limit=20, enable_top_k=True)
+    last = {}
+
+    def run():
+        np.random.seed(context.seed)
+        result = selector.select_stocks(criteria)
+        plan = result.summary.get('query_plan', {})
+        last.update(candidates=result.total_candidates, returned=len(result.symbols),
+                    score_evaluations=plan.get('score_evaluations'),
+                    skipped_score_evaluations=plan.get('skipped_score_evaluations'),
+                    stopped_early=plan.get('top_k', {}).get('stopped_early'),
+                    max_gap=plan.get('top_k', {}).get('max_gap'),
+                    margin_exceeded=plan.get('top_k', {}).get('margin_exceeded'),
+                    possibly_inexact=plan.get('top_k', {}).get('possibly_inexact'))
+        return result.total_candidates
+
+    def extra():
+        return {**last, **stack.guard.to_dict()}
+
+    return CaseRun(run=run, items=context.size, teardown=stack.close, extra=extra)
+
+
+@benchmark_case('data_manager.latest_price', '多源最新行情获取与智能融合（东方财富/腾讯/新浪）')
+def latest_price_case(context: BenchmarkContext) -> CaseRun:
+    universe = make_universe(context.size, context.seed)
+    stack = _offline_stack(universe)
+    manager = make_fake_data_manager(universe, context.provider_latency)
+    symbols = [quote['symbol'] for quote in universe]
+
+    def run():
+        return sum(1 for symbol in symbols if manager.get_latest_price_data(symbol))
+
+    return CaseRun(run=run, items=len(symbols), teardown=stack.close, extra=lambda: stack.guard.to_dict())
+
+
+# 长尾延迟用例每轮最多请求的股票数（每次请求都有真实的等待时间）
+MULTI_SOURCE_MAX_SYMBOLS = 200
+
+
+def _multi_source_case(context: BenchmarkContext, enable_hedging: bool) -> CaseRun:
+    universe = make_universe(context.size, context.seed)
+    stack = _offline_stack(universe)
+    manager = make_fake_multi_source_manager(universe, enable_hedging=enable_hedging, seed=context.seed)
+    symbols = [quote['symbol'] for quote in universe][:MULTI_SOURCE_MAX_SYMBOLS]
+
+    def run():
+        return sum(1 for symbol in symbols if manager.get_price_data(symbol).get('status') == 'success')
+
+    def teardown():
+        manager.close()
+        stack.close()
+
+    def extra():
+        return {'hedge_stats': manager.get_hedge_stats(), 'source_health': manager.get_source_health(),
+                **stack.guard.to_dict()}
+
+    return CaseRun(run=run, items=len(symbols), teardown=teardown, extra=extra)
+
+
+@benchmark_case('multi_source.price', '多源管理器行情获取：健康度加权选源，数据源有5%长尾延迟')
+def multi_source_price_case(context: BenchmarkContext) -> CaseRun:
+    return _multi_source_case(context, enable_hedging=False)
+
+
+@benchmark_case('multi_source.price_hedged', '多源管理器行情获取 + 对冲请求：主数据源超过p90延迟时竞速次优数据源')
+def multi_source_hedged_case(context: BenchmarkContext) -> CaseRun:
+    return _multi_source_case(context, enable_hedging=True)
+
+
+def _scoring_inputs(universe, multi_source: bool):
+    providers = make_fake_providers(universe)
+    manager = make_fake_data_manager(universe)
+    inputs = []
+    for quote in universe:
+        symbol = quote['symbol']
+        if multi_source:
+            inputs.append((symbol, {name: providers[name].get_stock_info(symbol)
+                                    for name in ('eastmoney', 'tencent', 'sina')}))
+        else:
+            inputs.append((symbol, manager.get_latest_price_data(symbol)))
+    return inputs
+
+
+def _scoring_case(context: BenchmarkContext, multi_source: bool) -> CaseRun:
+    from tradingagents.analytics.comprehensive_scoring_system import ComprehensiveScoringSystem
+
+    universe = make_universe(context.size, context.seed)
+    stack = _offline_stack(universe)
+    scoring = ComprehensiveScoringSystem()
+    inputs = _scoring_inputs(universe, multi_source)
+
+    def run():
+        for symbol, stock_data in inputs:
+            scoring.calculate_comprehensive_score(symbol, stock_data)
+        return len(inputs)
+
+    return CaseRun(run=run, items=len(inputs), teardown=stack.close, extra=lambda: stack.guard.to_dict())
+
+
+@benchmark_case('scoring.merged_quote', '综合评分：选股引擎使用的已融合单源行情')
+def scoring_merged_case(context: BenchmarkContext) -> CaseRun:
+    return _scoring_case(context, multi_source=False)
+
+
+@benchmark_case('scoring.multi_source', '综合评分：多源原始行情（走数据融合引擎）')
+def scoring_multi_source_case(context: BenchmarkContext) -> CaseRun:
+    return _scoring_case(context, multi_source=True)
+
+
+@benchmark_case('scoring.batch', '综合评分：已融合单源行情按列向量化批量评分')
+def scoring_batch_case(context: BenchmarkContext) -> CaseRun:
+    from tradingagents.analytics.comprehensive_scoring_system import ComprehensiveScoringSystem
+
+    universe = make_universe(context.size, context.seed)
+    stack = _offline_stack(universe)
+    scoring = ComprehensiveScoringSystem()
+    inputs = _scoring_inputs(universe, multi_source=False)
+    frame = pd.DataFrame([stock_data for _, stock_data in inputs])
+    symbols = [symbol for symbol, _ in inputs]
+
+    def run():
+        return len(scoring.calculate_scores_batch(frame, symbols))
+
+    return CaseRun(run=run, items=len(inputs), teardown=stack.close, extra=lambda: stack.guard.to_dict())
+
+
+@benchmark_case('sampler.smart_sample', '智能采样：基础筛选 + 活跃度 + 混合策略采样')
+def sampler_case(context: BenchmarkContext) -> CaseRun:
+    from tradingagents.selectors.intelligent_sampling import IntelligentSampler, SamplingConfig
+
+    universe = make_universe(context.size, context.seed)
+    stack = _offline_stack(universe)
+    sampler = IntelligentSampler(make_fake_data_manager(universe))
+    frame = _universe_frame(universe)
+    config = SamplingConfig(max_candidates=max(50, context.size // 4), min_market_cap=5.0,
+                            min_daily_volume=5000000, min_price=1.0, max_price=300.0)
+    last = {}
+
+    def run():
+        np.random.seed(context.seed)
+        result = sampler.smart_sample(frame, config)
+        last.update(sampled=len(result.sampled_stocks), quality_score=round(result.quality_score, 4))
+        return len(frame)
+
+    return CaseRun(run=run, items=len(frame), teardown=stack.close,
+                   extra=lambda: {**last, **stack.guard.to_dict()})
+
+
+def _cache_fixture(context: BenchmarkContext):
+    from tradingagents.dataflows.cache_manager import StockDataCache
+
+    universe = make_universe(min(context.size, 300), context.seed)
+    workdir = tempfile.mkdtemp(prefix='bench_stock_cache_')
+    cache = StockDataCache(workdir)
+    frames = {quote['symbol']: make_history_bars(quote, '2025-01-01', TRADE_DATE) for quote in universe}
+    return cache, frames, workdir
+
+
+@benchmark_case('stock_data_cache.write', '行情缓存写入：DataFrame + 元数据')
+def cache_write_case(context: BenchmarkContext) -> CaseRun:
+    cache, frames, workdir = _cache_fixture(context)
+
+    def run():
+        for symbol, frame in frames.items():
+            cache.save_stock_data(symbol, frame, '2025-01-01', TRADE_DATE, data_source='tdx')
+        return len(frames)
+
+    return CaseRun(run=run, items=len(frames), teardown=lambda: shutil.rmtree(workdir, ignore_errors=True))
+
+
+@benchmark_case('stock_data_cache.hit', '行情缓存命中：查找 + 加载')
+def cache_hit_case(context: BenchmarkContext) -> CaseRun:
+    cache, frames, workdir = _cache_fixture(context)
+    for symbol, frame in frames.items():
+        cache.save_stock_data(symbol, frame, '2025-01-01', TRADE_DATE, data_source='tdx')
+    stats = {'hits': 0}
+
+    def run():
+        hits = 0
+        for symbol in frames:
+            cache_key = cache.find_cached_stock_data(symbol, '2025-01-01', TRADE_DATE, data_source='tdx')
+            if cache_key is not None and cache.load_stock_data(cache_key) is not None:
+                hits += 1
+        stats['hits'] = hits
+        return len(frames)
+
+    return CaseRun(run=run, items=len(frames), teardown=lambda: shutil.rmtree(workdir, ignore_errors=True),
+                   extra=lambda: dict(stats))
+
+
+@benchmark_case('stock_data_cache.miss', '行情缓存未命中：在已有缓存中查找不存在的股票')
+def cache_miss_case(context: BenchmarkContext) -> CaseRun:
+    cache, frames, workdir = _cache_fixture(context)
+    for symbol, frame in frames.items():
+        cache.save_stock_data(symbol, frame, '2025-01-01', TRADE_DATE, data_source='tdx')
+    missing = [f"9{symbol[1:]}" for symbol in frames]
+
+    def run():
+        for symbol in missing:
+            cache.find_cached_stock_data(symbol, '2025-01-01', TRADE_DATE, data_source='tdx')
+        return len(missing)
+
+    return CaseRun(run=run, items=len(missing), teardown=lambda: shutil.rmtree(workdir, ignore_errors=True))
+
+
+@benchmark_case('graph.propagate', '完整分析图：市场/基本面/新闻/情绪分析师 -> 多空辩论 -> 交易员 -> 风控')
+def graph_case(context: BenchmarkContext) -> CaseRun:
+    from tradingagents.default_config import DEFAULT_CONFIG
+
+    # 提示中找不到股票代码/名称时伪LLM按第一只股票回复，因此把被分析股票排在最前
+    universe = sorted(load_quote_templates(), key=lambda quote: quote['symbol'] != GRAPH_TICKER)
+    llm = make_fake_llm(universe, context.llm_latency_ms)
+    workdir = tempfile.mkdtemp(prefix='bench_graph_')
+    previous_cwd = os.getcwd()
+
+    stack = ExitStack()
+    guard = stack.enter_context(offline_graph_patches(llm, universe))
+    stack.callback(shutil.rmtree, workdir, ignore_errors=True)
+    stack.callback(os.chdir, previous_cwd)
+    try:
+        # propagate 会把完整状态写到当前目录的 eval_results 下
+        os.chdir(workdir)
+        from tradingagents.graph.trading_graph import TradingAgentsGraph
+
+        config = copy.deepcopy(DEFAULT_CONFIG)
+        config.update({
+            'project_dir': workdir,
+            'results_dir': os.path.join(workdir, 'results'),
+            'data_cache_dir': os.path.join(workdir, 'data_cache'),
+            'memory_enabled': False,
+            'online_tools': True,
+            'max_debate_rounds': 1,
+            'max_risk_discuss_rounds': 1,
+        })
+        graph = TradingAgentsGraph(['market', 'social', 'news', 'fundamentals'], config=config)
+    except Exception:
+        stack.close()
+        raise
+
+    last = {}
+
+    def run():
+        LLM_CALL_COUNTER.clear()
+        _, decision = graph.propagate(GRAPH_TICKER, TRADE_DATE)
+        last.update(decision=decision, llm_calls=dict(LLM_CALL_COUNTER))
+        return 1
+
+    def extra():
+        return {**last, 'signal_processor': graph.signal_processor.get_metrics(), **guard.to_dict()}
+
+    return CaseRun(run=run, items=1, teardown=stack.close, extra=extra)
+
+
+def _print_summary(results):
+    print(f"\n{'用例':<32}{'p50(ms)':>12}{'p95(ms)':>12}{'吞吐量(/s)':>14}{'内存峰值(MB)':>14}")
+    for result in results:
+        if result.error:
+            print(f"{result.name:<32}  ❌ {result.error}")
+            continue
+        print(f"{result.name:<32}{result.latency_ms['p50']:>12.2f}{result.latency_ms['p95']:>12.2f}"
+              f"{result.throughput_per_s:>14.2f}{result.peak_memory_mb:>14.2f}")
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='离线性能基准测试套件')
+    parser.add_argument('--only', default='', help='只运行名称以这些前缀开头的用例，逗号分隔')
+    parser.add_argument('--list', action='store_true', help='列出全部用例')
+    parser.add_argument('--size', type=int, default=500, help='股票池规模')
+    parser.add_argument('--iterations', type=int, default=3, help='计时轮数')
+    parser.add_argument('--warmup', type=int, default=1, help='预热轮数')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    parser.add_argument('--provider-latency', type=float, default=0.0, help='伪数据源单次请求延迟（秒）')
+    parser.add_argument('--llm-latency-ms', type=float, default=0.0, help='伪LLM单次调用延迟（毫秒）')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='结果JSON路径')
+    parser.add_argument('--compare', help='与指定的基线结果JSON对比')
+    parser.add_argument('--threshold', type=float, default=0.10, help='回归判定阈值（相对变化）')
+    parser.add_argument('--verbose', action='store_true', help='输出被测代码的日志')
+    args = parser.parse_args(argv)
+
+    cases = get_cases([p.strip() for p in args.only.split(',') if p.strip()])
+    if args.list:
+        for case in cases:
+            print(f"{case.name:<32}{case.description}")
+        return 0
+
+    if not args.verbose:
+        # 被测代码每只股票都会输出多条日志，默认只保留错误
+        logging.disable(logging.WARNING)
+
+    # 评分历史写入临时目录，避免基准测试向 ./data 写入数据
+    from tradingagents.analytics.score_history_store import get_score_history_store
+    history_dir = tempfile.mkdtemp(prefix='bench_score_history_')
+    get_score_history_store(history_dir)
+
+    context = BenchmarkContext(size=args.size, iterations=args.iterations, warmup=args.warmup, seed=args.seed,
+                               provider_latency=args.provider_latency, llm_latency_ms=args.llm_latency_ms)
+    results = []
+    try:
+        for case in cases:
+            print(f"▶ {case.name} ...", file=sys.stderr, flush=True)
+            results.append(run_case(case, context))
+    finally:
+        shutil.rmtree(history_dir, ignore_errors=True)
+
+    report = build_report(results, context)
+    write_report(report, args.output)
+    _print_summary(results)
+    print(f"\n结果已写入: {args.output}")
+
+    if args.compare:
+        rows = compare_results(load_report(args.compare), report, args.threshold)
+        print(f"\n与基线对比（阈值 {args.threshold:.0%}）:\n{format_comparison(rows)}")
+        if any(row['regressions'] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,53 @@
+"""
+失败类型识别测试
+
+运行: python -m unittest tests.test_adaptive_concurrency
+"""
+
+import unittest
+
+from tradingagents.selectors.adaptive_concurrency import CallOutcome, classify_failure
+
+
+class _Response:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class _HTTPError(Exception):
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.response = _Response(status_code)
+
+
+class ClassifyFailureTest(unittest.TestCase):
+
+    def test_http_429_is_rate_limited(self):
+        for message in ('429 Client Error: Too Many Requests for url: https://api.example.com',
+                        'Error code: 429 - quota exceeded',
+                        'HTTP 429',
+                        'status=429'):
+            self.assertEqual(classify_failure(message), CallOutcome.RATE_LIMITED, message)
+        self.assertEqual(classify_failure(_HTTPError('server said no', 429)), CallOutcome.RATE_LIMITED)
+
+    def test_stock_codes_containing_429_are_not_rate_limited(self):
+        for message in ('600429 分析失败: 数据为空',
+                        '获取002429历史数据失败',
+                        'KeyError: 300429.SZ',
+                        '价格 4.29 异常'):
+            self.assertEqual(classify_failure(message), CallOutcome.ERROR, message)
+        self.assertEqual(classify_failure(ValueError('股票600429解析失败')), CallOutcome.ERROR)
+
+    def test_unrelated_frequency_messages_are_not_rate_limited(self):
+        for message in ('数据频率不支持', '不支持的K线频率: 5min'):
+            self.assertEqual(classify_failure(message), CallOutcome.ERROR, message)
+        self.assertEqual(classify_failure('请求过于频繁，请稍后再试'), CallOutcome.RATE_LIMITED)
+
+    def test_timeouts(self):
+        self.assertEqual(classify_failure(TimeoutError()), CallOutcome.TIMEOUT)
+        self.assertEqual(classify_failure('Read timed out.'), CallOutcome.TIMEOUT)
+        self.assertEqual(classify_failure(_HTTPError('gateway', 502)), CallOutcome.ERROR)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+"""
+研报增量获取水位测试
+
+运行: python -m unittest tests.test_research_report_store
+"""
+
+import tempfile
+import unittest
+
+from tradingagents.dataflows.research_report_utils import (
+    ResearchReport, ResearchReportManager, ResearchReportProvider, ResearchReportStore,
+)
+
+
+def _report(source: str, publish_date: str) -> ResearchReport:
+    return ResearchReport(
+        title=f"{source} {publish_date}", analyst='分析师', institution=source, publish_date=publish_date,
+        rating='买入', target_price=None, current_price=None, summary='', key_points=[],
+        pe_forecast=None, revenue_growth=None, profit_growth=None, source=source, confidence_level=0.8,
+    )
+
+
+class _FakeProvider(ResearchReportProvider):
+    def __init__(self, name, reports):
+        super().__init__()
+        self.name = name
+        self.reports = reports
+        self.fail = False
+        self.calls = []
+
+    def get_reports_since(self, ticker, limit=10, since=None):
+        self.calls.append(since)
+        if self.fail:
+            raise ConnectionError('timeout')
+        return [r for r in self.reports if not since or r.publish_date >= since]
+
+
+class ProviderWatermarkTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.manager = ResearchReportManager(store=ResearchReportStore(self.tmp.name), refresh_interval_hours=0)
+        self.fast = _FakeProvider('A', [_report('A', '2024-06-01')])
+        self.slow = _FakeProvider('B', [_report('B', '2024-01-15')])
+        self.manager.providers = [self.fast, self.slow]
+
+    def test_failed_provider_keeps_its_watermark(self):
+        self.slow.fail = True
+        self.manager.get_comprehensive_reports('600000', force_refresh=True)
+        self.assertEqual(self.manager.store.load('600000')['provider_watermarks'], {'A': '2024-06-01'})
+
+        # B 恢复后从自己的水位（此处为空）开始获取，A 的更新日期不会挡住 B 的旧研报
+        self.slow.fail = False
+        reports = self.manager.get_comprehensive_reports('600000', force_refresh=True)
+        self.assertEqual(self.slow.calls[-1], None)
+        self.assertEqual(self.fast.calls[-1], '2024-06-01')
+        self.assertIn('B', {r.source for r in reports})
+        self.assertEqual(self.manager.store.load('600000')['provider_watermarks'],
+                         {'A': '2024-06-01', 'B': '2024-01-15'})
+
+    def test_empty_incremental_result_keeps_watermark(self):
+        self.manager.get_comprehensive_reports('600000', force_refresh=True)
+        self.fast.reports = []
+        self.manager.get_comprehensive_reports('600000', force_refresh=True)
+        self.assertEqual(self.manager.store.load('600000')['provider_watermarks'],
+                         {'A': '2024-06-01', 'B': '2024-01-15'})
+
+
+if __name__ == '__main__':
+    unittest.main()
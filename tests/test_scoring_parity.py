@@ -0,0 +1,144 @@
+"""
+批量评分与逐只评分一致性测试
+
+calculate_scores_batch 必须与 calculate_comprehensive_score 给出完全相同的结果
+（总分、评级、置信度、各类别评分、建议与风险等级）。
+
+运行: python -m unittest tests.test_scoring_parity
+"""
+
+import logging
+import random
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from tradingagents.analytics.score_history_store import get_score_history_store
+
+# 评分历史写入临时目录（全局实例只在首次调用时取参数）
+_HISTORY_DIR = tempfile.mkdtemp(prefix='score_history_test_')
+get_score_history_store(_HISTORY_DIR)
+
+from tradingagents.analytics.comprehensive_scoring_system import (  # noqa: E402
+    BATCH_CATEGORIES, ComprehensiveScoringSystem, ScoreCategory, _round_values, _row_to_stock_data,
+)
+
+# 各评分分支的阈值及其两侧的取值
+PRICE_VALUES = [0, -1, 1, 4.99, 5, 9.99, 10, 19.99, 20, 29.99, 30, 99.99, 100, 150]
+CHANGE_PCT_VALUES = [-10.5, -10, -5.01, -5, -4.99, -2, -1.99, 0, 0.01, 2, 2.01, 5, 5.01, 10, 10.01]
+VOLUME_VALUES = [0, -5, 999999, 1000000, 1000001, 10000000, 10000001, 50000000, 50000001,
+                 100000000, 100000001]
+TURNOVER_VALUES = [0, 1e9, 5e9, 5e9 + 1, 1e10, 1e10 + 1]
+# turnover / (volume * price) 的匹配区间 [0.8, 1.2] 边界
+VOLUME_RATIO_VALUES = [0.79, 0.8, 1.0, 1.2, 1.21]
+
+
+def _random_quotes(count: int, seed: int):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        price = rng.choice(PRICE_VALUES + [rng.uniform(1, 200)])
+        row = {
+            'symbol': f"{i:06d}",
+            'current_price': price,
+            'change_pct': rng.choice(CHANGE_PCT_VALUES + [rng.uniform(-11, 11)]),
+            'volume': rng.choice(VOLUME_VALUES + [rng.randint(0, 300000000)]),
+            'turnover': rng.choice(TURNOVER_VALUES + [rng.uniform(0, 3e10)]),
+            'high': rng.choice([price, price * 1.1, price + 1, 0, None]),
+            'low': rng.choice([price, price * 0.9, price - 1, 0, None]),
+            'timestamp': '2025-06-30 15:00:00',
+        }
+        if row['volume'] and price and rng.random() < 0.2:
+            row['turnover'] = row['volume'] * price * rng.choice(VOLUME_RATIO_VALUES)
+        # 缺失字段
+        for key in list(row):
+            if key != 'symbol' and rng.random() < 0.08:
+                del row[key]
+        # 走逐只评分回退路径的异常值
+        if rng.random() < 0.01:
+            row['change_pct'] = 'abc'
+        if rng.random() < 0.005:
+            row['extra'] = {'nested': 1}
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def _scalar_row(score):
+    categories = [score.category_scores[category].score for category in BATCH_CATEGORIES]
+    return [score.overall_score, score.grade, score.confidence, *categories,
+            score.recommendation, score.risk_level]
+
+
+def _batch_row(row):
+    categories = [row[f"{category.value}_score"] for category in BATCH_CATEGORIES]
+    return [row['overall_score'], row['grade'], row['confidence'], *categories,
+            row['recommendation'], row['risk_level']]
+
+
+class BatchScoringParityTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.CRITICAL)
+        cls.scoring = ComprehensiveScoringSystem()
+        cls.scoring.history_store = None
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+        shutil.rmtree(_HISTORY_DIR, ignore_errors=True)
+
+    def assert_parity(self, frame, news_data=None):
+        batch = self.scoring.calculate_scores_batch(frame, news_data=news_data, record_history=False)
+        self.assertEqual(len(batch), len(frame))
+        mismatches = []
+        for i in range(len(frame)):
+            stock_data = _row_to_stock_data(frame.iloc[i])
+            symbol = stock_data['symbol']
+            score = self.scoring.calculate_comprehensive_score(symbol, stock_data,
+                                                               (news_data or {}).get(symbol))
+            expected, actual = _scalar_row(score), _batch_row(batch.iloc[i])
+            self.assertEqual(batch.iloc[i]['symbol'], symbol)
+            if expected != actual:
+                mismatches.append((stock_data, expected, actual))
+        self.assertEqual(mismatches[:5], [], f"{len(mismatches)} 行不一致")
+
+    def test_randomized_quotes_with_boundaries_and_missing_fields(self):
+        frame = _random_quotes(3000, seed=1)
+        news = {'000003': [{'title': '利好', 'content': '公司业绩大幅增长', 'source': 'test'}]}
+        self.assert_parity(frame, news_data=news)
+
+    def test_threshold_grid(self):
+        rows = []
+        for change_pct in CHANGE_PCT_VALUES:
+            for volume in VOLUME_VALUES:
+                for price in (4.99, 5, 30):
+                    rows.append({'symbol': f"{len(rows):06d}", 'current_price': price,
+                                 'change_pct': change_pct, 'volume': volume,
+                                 'turnover': volume * price, 'high': price * 1.05, 'low': price * 0.95})
+        self.assert_parity(pd.DataFrame(rows))
+
+    def test_all_optional_fields_missing(self):
+        frame = pd.DataFrame([{'symbol': '000001'}, {'symbol': '000002', 'current_price': 10.0},
+                              {'symbol': '000003', 'change_pct': 3.0}])
+        self.assert_parity(frame)
+
+    def test_round_values_matches_builtin_round_on_ties(self):
+        ties = np.concatenate([np.arange(0, 100, 0.005), np.arange(0, 10, 0.0005),
+                               [2.675, 1.005, 0.125, 0.375, 72.5, 66.665, 0.0, -0.0]])
+        for digits in (1, 2, 3):
+            rounded = _round_values(ties, digits)
+            expected = np.array([round(value, digits) for value in ties.tolist()])
+            self.assertTrue(np.array_equal(rounded, expected), f"digits={digits}")
+
+    def test_batch_columns(self):
+        batch = self.scoring.calculate_scores_batch(_random_quotes(5, seed=2), record_history=False)
+        self.assertIn(f"{ScoreCategory.TECHNICAL.value}_score", batch.columns)
+        self.assertEqual(list(batch.columns[:4]), ['symbol', 'overall_score', 'grade', 'confidence'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+本地信号提取测试
+
+运行: python -m unittest tests.test_signal_extraction
+"""
+
+import unittest
+
+from tradingagents.graph.signal_processing import LocalSignalExtractor
+
+THRESHOLD = 0.8
+
+
+def _price_checker(price, is_china):
+    return 1 <= price <= 1000 if is_china else 0.1 <= price <= 5000
+
+
+class LocalSignalExtractorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.extractor = LocalSignalExtractor()
+
+    def extract(self, text, is_china=True):
+        return self.extractor.extract(text, is_china, _price_checker)
+
+    def test_standard_decision(self):
+        result, score = self.extract("最终交易建议: **买入**\n目标价位: ¥32.5\n置信度: 0.8\n风险评分: 0.4\n"
+                                     "理由: 业绩超预期，估值合理")
+        self.assertGreaterEqual(score, THRESHOLD)
+        self.assertEqual(result['action'], '买入')
+        self.assertEqual(result['target_price'], 32.5)
+        self.assertEqual(result['confidence'], 0.8)
+        self.assertEqual(result['risk_score'], 0.4)
+
+    def test_price_range_uses_midpoint(self):
+        result, _ = self.extract("最终建议：持有\n目标价格：28-32元")
+        self.assertEqual(result['target_price'], 30.0)
+
+    def test_ratio_scales(self):
+        cases = [
+            ("置信度: 8/10\n风险评分: 7/10", 0.8, 0.7),
+            ("置信度: 80%\n风险评分: 35%", 0.8, 0.35),
+            ("置信度: 85\n风险评分: 0.3", 0.85, 0.3),
+            ("confidence: 9 / 10\nrisk score: 2/10", 0.9, 0.2),
+        ]
+        for ratios, confidence, risk_score in cases:
+            with self.subTest(ratios=ratios):
+                result, score = self.extract(f"最终交易建议: 买入\n目标价: 30元\n{ratios}")
+                self.assertGreaterEqual(score, THRESHOLD)
+                self.assertAlmostEqual(result['confidence'], confidence)
+                self.assertAlmostEqual(result['risk_score'], risk_score)
+
+    def test_ambiguous_ratio_falls_back_to_llm(self):
+        for ratios in ("置信度: 8\n风险评分: 0.3", "置信度: 0.8\n风险评分: 7", "置信度: 8/0"):
+            with self.subTest(ratios=ratios):
+                _, score = self.extract(f"最终交易建议: 买入\n目标价: 30元\n{ratios}")
+                self.assertLess(score, THRESHOLD)
+
+    def test_year_is_not_target_price(self):
+        cases = [
+            "最终交易建议: 买入\n目标价格：2025年达到30元",
+            "最终交易建议: 买入\n目标价：2025-12-31前看到35元",
+            "FINAL TRANSACTION PROPOSAL: **BUY**\ntarget price: 2026 year-end outlook positive",
+            "最终交易建议: 卖出\n目标价位：3个月内回落",
+            "最终交易建议: 买入\n目标价：20%上涨空间",
+        ]
+        for text in cases:
+            with self.subTest(text=text):
+                result, score = self.extract(text, is_china='FINAL' not in text)
+                self.assertIsNone(result['target_price'])
+                self.assertLess(score, THRESHOLD)
+
+    def test_decimal_price_not_truncated_by_date_guard(self):
+        result, _ = self.extract("最终交易建议: 买入\n目标价：35.8元（2025年底）")
+        self.assertEqual(result['target_price'], 35.8)
+
+
+if __name__ == '__main__':
+    unittest.main()
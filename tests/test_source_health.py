@@ -0,0 +1,104 @@
+"""
+数据源被动健康统计测试
+
+运行: python -m unittest tests.test_source_health
+"""
+
+import unittest
+from unittest import mock
+
+import requests
+
+from tradingagents.analytics.source_health import (
+    EWMA, LatencyHistogram, SourceHealthTracker, WindowedCounter,
+)
+from tradingagents.dataflows import http_client
+from tradingagents.dataflows.http_client import PooledHttpClient
+
+
+class EWMATest(unittest.TestCase):
+
+    def test_first_sample_seeds_then_smooths(self):
+        ewma = EWMA(alpha=0.5)
+        self.assertEqual(ewma.get(default=-1.0), -1.0)
+        self.assertEqual(ewma.update(10), 10.0)
+        self.assertEqual(ewma.update(20), 15.0)
+        self.assertEqual(ewma.update(15), 15.0)
+
+    def test_converges_to_constant_input(self):
+        ewma = EWMA(alpha=0.2)
+        ewma.update(1000)
+        for _ in range(100):
+            ewma.update(100)
+        self.assertAlmostEqual(ewma.get(), 100.0, places=3)
+
+
+class WindowedCounterTest(unittest.TestCase):
+
+    def test_counts_expire_after_window(self):
+        counter = WindowedCounter(window_seconds=60, buckets=12)
+        counter.add(1, now=1000.0)
+        counter.add(2, now=1030.0)
+        self.assertEqual(counter.total(now=1030.0), 3)
+        self.assertEqual(counter.total(now=1059.0), 3)
+        # 1000 所在的桶滑出窗口，1030 的仍在
+        self.assertEqual(counter.total(now=1060.0), 2)
+        self.assertEqual(counter.total(now=1095.0), 0)
+
+    def test_reused_bucket_is_reset(self):
+        counter = WindowedCounter(window_seconds=10, buckets=2)
+        counter.add(5, now=0.0)
+        counter.add(1, now=10.0)  # 同一个桶位，下一个周期
+        self.assertEqual(counter.total(now=10.0), 1)
+
+
+class LatencyHistogramTest(unittest.TestCase):
+
+    def test_percentiles_return_bucket_upper_bounds(self):
+        histogram = LatencyHistogram(min_ms=1, max_ms=10000, growth=1.2, window_seconds=300)
+        now = histogram._rotated_at
+        for latency in range(1, 101):
+            histogram.record(float(latency), now=now)
+        for q, expected in ((0.5, 50.0), (0.9, 90.0), (0.99, 99.0)):
+            value = histogram.percentile(q, now=now)
+            # 对数分桶：返回值不小于真实分位数，且误差不超过一个桶的增长率
+            self.assertGreaterEqual(value, expected)
+            self.assertLessEqual(value, expected * 1.2)
+
+    def test_old_windows_are_dropped(self):
+        histogram = LatencyHistogram(window_seconds=10)
+        now = histogram._rotated_at
+        histogram.record(5000.0, now=now)
+        self.assertGreaterEqual(histogram.percentile(0.5, now=now + 11), 5000.0)  # 上一周期仍参与
+        self.assertIsNone(histogram.percentile(0.5, now=now + 25))
+
+
+class HttpClientRecordingTest(unittest.TestCase):
+
+    def _response(self, status_code):
+        response = mock.Mock(status_code=status_code, content=b'{}', headers={})
+        return response
+
+    def test_requests_are_recorded_under_client_name(self):
+        tracker = SourceHealthTracker(min_samples=1)
+        client = PooledHttpClient('fake_source', max_retries=0)
+        responses = [self._response(200), self._response(404), self._response(503)]
+        with mock.patch.object(http_client, '_health_tracker', tracker), \
+                mock.patch.object(client.session, 'request', side_effect=responses):
+            for _ in responses:
+                client.get('http://example.invalid/quote')
+        with mock.patch.object(http_client, '_health_tracker', tracker), \
+                mock.patch.object(client.session, 'request', side_effect=requests.ConnectionError('refused')):
+            with self.assertRaises(requests.ConnectionError):
+                client.get('http://example.invalid/quote')
+
+        snapshot = tracker.snapshot('fake_source')
+        self.assertEqual(snapshot.total_requests, 4)
+        # 404 说明数据源可达，只算无效数据；503 与连接异常算失败
+        self.assertEqual(snapshot.total_errors, 2)
+        self.assertEqual(snapshot.total_invalid, 1)
+        self.assertEqual(snapshot.last_error, 'connection error')
+
+
+if __name__ == '__main__':
+    unittest.main()
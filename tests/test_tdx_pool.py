@@ -0,0 +1,98 @@
+"""
+通达信连接池故障处理测试
+
+运行: python -m unittest tests.test_tdx_pool
+"""
+
+import threading
+import unittest
+from unittest import mock
+
+from tradingagents.dataflows import tdx_utils
+from tradingagents.dataflows.tdx_utils import TdxConnectionPool, TongDaXinDataProvider
+
+
+class _FakeApi:
+    instances = 0
+
+    def __init__(self):
+        type(self).instances += 1
+        self.disconnected = False
+
+    def connect(self, ip, port, time_out=None):
+        return True
+
+    def get_security_count(self, market):
+        return 1
+
+    def disconnect(self):
+        self.disconnected = True
+
+
+def _make_pool():
+    _FakeApi.instances = 0
+    servers = [{'ip': '127.0.0.1', 'port': 7709}, {'ip': '127.0.0.2', 'port': 7709}]
+    return TdxConnectionPool(servers, pool_size=1, api_factory=_FakeApi, max_failures=1)
+
+
+class ConnectionFailureTest(unittest.TestCase):
+
+    def test_data_errors_keep_connection(self):
+        pool = _make_pool()
+        for _ in range(3):
+            with self.assertRaises(KeyError):
+                with pool.connection() as api:
+                    raise KeyError('600000')
+        self.assertEqual(_FakeApi.instances, 1)
+        self.assertFalse(api.disconnected)
+        self.assertTrue(all(s.failures == 0 for s in pool.servers))
+        self.assertEqual(len(pool.healthy_servers()), 2)
+
+    def test_transport_errors_evict_connection(self):
+        pool = _make_pool()
+        with self.assertRaises(ConnectionResetError):
+            with pool.connection() as api:
+                raise ConnectionResetError('reset by peer')
+        self.assertTrue(api.disconnected)
+        self.assertEqual(sum(s.failures for s in pool.servers), 1)
+        with pool.connection() as second:
+            self.assertIsNot(second, api)
+
+    def test_none_response_counts_as_transport_error(self):
+        provider = TongDaXinDataProvider.__new__(TongDaXinDataProvider)
+        api = mock.Mock()
+        api.get_security_bars.return_value = None
+        with self.assertRaises(tdx_utils.TDX_TRANSPORT_ERRORS):
+            provider._fetch_history_bars(api, '600429', '2024-01-01', '2024-02-01')
+
+
+class ConnectionPoolSingletonTest(unittest.TestCase):
+
+    def test_concurrent_first_callers_share_one_pool(self):
+        provider = TongDaXinDataProvider.__new__(TongDaXinDataProvider)
+        provider.pool = None
+        provider.pool_size = 1
+        provider._pool_lock = threading.Lock()
+        provider._get_servers = lambda: [{'ip': '127.0.0.1', 'port': 7709}]
+
+        barrier = threading.Barrier(8)
+        pools = []
+
+        def worker():
+            barrier.wait()
+            pools.append(provider.get_connection_pool())
+
+        with mock.patch.object(tdx_utils, 'TdxConnectionPool',
+                               side_effect=lambda servers, pool_size: _make_pool()) as factory:
+            threads = [threading.Thread(target=worker) for _ in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        self.assertEqual(factory.call_count, 1)
+        self.assertTrue(all(p is pools[0] for p in pools))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+流式批量下载断点测试
+
+运行: python -m unittest tests.test_tiered_streaming
+"""
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas as pd
+
+from tradingagents.dataflows.tiered_data_manager import DataType, TieredDataManager
+
+
+def _make_manager(fail_after=None):
+    """不初始化数据源的 TieredDataManager，分块获取与落盘替换为内存实现"""
+    manager = TieredDataManager.__new__(TieredDataManager)
+    manager.stats = {'batch_requests': 0, 'realtime_requests': 0, 'cache_hits': 0,
+                     'total_requests': 0, 'performance_log': []}
+    manager.fetched = []
+
+    def fetch_chunk(symbols, data_type, start_date, end_date):
+        if fail_after is not None and len(manager.fetched) >= fail_after:
+            raise KeyboardInterrupt
+        manager.fetched.append((list(symbols), start_date, end_date))
+        frame = pd.DataFrame({'date': ['2025-01-02'], 'close': [10.0]})
+        return {symbol: frame for symbol in symbols}, {symbol: 'fake' for symbol in symbols}
+
+    manager._fetch_chunk = fetch_chunk
+    manager._persist_symbol_data = lambda symbol, df, data_type: None
+    return manager
+
+
+class StreamingCheckpointTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.checkpoint = str(Path(self.tmpdir.name) / 'checkpoint.json')
+        self.symbols = [f"{i:06d}" for i in range(10)]
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_finished_checkpoint_starts_fresh(self):
+        manager = _make_manager()
+        first = manager.batch_download_streaming(self.symbols, chunk_size=4, checkpoint_path=self.checkpoint)
+        second = manager.batch_download_streaming(self.symbols, chunk_size=4, checkpoint_path=self.checkpoint)
+        self.assertEqual((first['saved_this_run'], first['chunks']), (10, 3))
+        self.assertEqual((second['saved_this_run'], second['chunks']), (10, 3))
+        self.assertEqual(second['resumed_from'], 0)
+
+    def test_unfinished_checkpoint_resumes(self):
+        with self.assertRaises(KeyboardInterrupt):
+            _make_manager(fail_after=2).batch_download_streaming(
+                self.symbols, chunk_size=4, checkpoint_path=self.checkpoint)
+        resumed = _make_manager().batch_download_streaming(self.symbols, chunk_size=4,
+                                                           checkpoint_path=self.checkpoint)
+        self.assertEqual(resumed['resumed_from'], 8)
+        self.assertEqual(resumed['saved_this_run'], 2)
+        self.assertEqual(resumed['successful'], 10)
+
+    def test_default_dates_are_resolved(self):
+        manager = _make_manager()
+        summary = manager.batch_download_streaming(self.symbols, chunk_size=20, checkpoint_path=self.checkpoint)
+        _, start_date, end_date = manager.fetched[0]
+        self.assertIsNotNone(start_date)
+        self.assertIsNotNone(end_date)
+        with open(summary['checkpoint_path'], encoding='utf-8') as f:
+            saved = json.load(f)
+        self.assertEqual((saved['start_date'], saved['end_date']), (start_date, end_date))
+        self.assertNotIn('auto', TieredDataManager._checkpoint_filename(DataType.HISTORICAL, start_date, end_date))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+"""
+Top-K 近似提前终止统计测试
+
+运行: python -m unittest tests.test_top_k
+"""
+
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from tradingagents.selectors.stock_selector import StockSelector
+
+
+class _Scoring:
+    def __init__(self, estimates):
+        self.estimates = estimates
+
+    def estimate_overall_score(self, symbol, quote):
+        return self.estimates[symbol]
+
+    def flush_score_history(self):
+        pass
+
+
+class TopKGapStatsTest(unittest.TestCase):
+
+    def _run(self, estimates, actual, limit=1, margin=5.0):
+        selector = StockSelector.__new__(StockSelector)
+        selector.scoring_system = _Scoring(estimates)
+        selector.data_manager = mock.Mock()
+        selector.data_manager.get_price_snapshot.return_value = {s: {'current_price': 10} for s in estimates}
+        selector._score_symbol = lambda symbol: {'ts_code': symbol, 'overall_score': actual[symbol]}
+        stock_data = pd.DataFrame({'ts_code': list(estimates)})
+        stats = {}
+        result = selector._enrich_top_k(stock_data, limit, margin, stats)
+        return result, stats
+
+    def test_gap_within_margin_is_reported(self):
+        result, stats = self._run({'A': 80, 'B': 60, 'C': 50}, {'A': 82, 'B': 61, 'C': 99})
+        self.assertTrue(stats['stopped_early'])
+        self.assertEqual(stats['max_gap'], 2)
+        self.assertEqual(stats['margin_exceeded'], 0)
+        self.assertFalse(stats['possibly_inexact'])
+        self.assertEqual(result['ts_code'].tolist(), ['A'])
+
+    def test_missed_bound_is_flagged(self):
+        # B 的实际评分比预估高出 margin 以上，提前终止可能漏掉同样被低估的 C
+        result, stats = self._run({'A': 80, 'B': 79, 'C': 50}, {'A': 70, 'B': 90, 'C': 99})
+        self.assertTrue(stats['stopped_early'])
+        self.assertEqual(stats['margin_exceeded'], 1)
+        self.assertEqual(stats['max_gap'], 11)
+        self.assertTrue(stats['possibly_inexact'])
+        self.assertEqual(result['ts_code'].tolist(), ['B'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+"""
+追踪 span 嵌套与采样测试
+
+运行: python -m unittest tests.test_tracing
+"""
+
+import random
+import threading
+import unittest
+
+from tradingagents.utils.tracing import InMemorySpanExporter, Tracer, get_current_span
+
+
+class NestedSpanTest(unittest.TestCase):
+
+    def test_unsampled_root_restores_context_after_child(self):
+        tracer = Tracer(enabled=True, sample_rate=0.0)
+        with tracer.start_span('root') as root:
+            with tracer.start_span('child') as child:
+                self.assertIsNot(child, root)
+                self.assertIs(get_current_span(), child)
+            self.assertIs(get_current_span(), root)
+        self.assertIsNone(get_current_span())
+
+    def test_sampling_rate_holds_across_nested_spans(self):
+        random.seed(7)
+        exporter = InMemorySpanExporter(max_spans=1000)
+        tracer = Tracer(enabled=True, sample_rate=0.5, exporters=[exporter])
+        for _ in range(200):
+            with tracer.start_span('root'):
+                with tracer.start_span('child'):
+                    with tracer.start_span('grandchild'):
+                        pass
+            self.assertIsNone(get_current_span())
+
+        sampled_roots = 200 - tracer.dropped_roots
+        self.assertGreater(tracer.dropped_roots, 50)
+        self.assertGreater(sampled_roots, 50)
+        self.assertEqual(len(exporter.spans), sampled_roots * 3)
+        # 已采样的子 span 都挂在同一 trace 的父 span 下
+        by_id = {span.span_id: span for span in exporter.spans}
+        for span in exporter.spans:
+            if span.parent_id is not None:
+                self.assertEqual(by_id[span.parent_id].trace_id, span.trace_id)
+
+    def test_unsampled_spans_are_isolated_between_threads(self):
+        tracer = Tracer(enabled=True, sample_rate=0.0)
+        leaked = []
+
+        def worker():
+            for _ in range(500):
+                with tracer.start_span('root'):
+                    with tracer.start_span('child'):
+                        pass
+                if get_current_span() is not None:
+                    leaked.append(get_current_span())
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(leaked, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
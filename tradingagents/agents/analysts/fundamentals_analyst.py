@@ -3,11 +3,12 @@
 使用统一工具自动识别股票类型并调用相应数据源
 """
 
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import AIMessage
 
 # 导入分析模块日志装饰器
 from tradingagents.utils.tool_logging import log_analyst_module
+from tradingagents.agents.utils.analyst_chain import CompiledAnalystChain, get_tool_calling_llm, get_tool_names
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
@@ -78,7 +79,27 @@ def _get_company_name_for_fundamentals(ticker: str, market_info: dict) -> str:
         return f"股票{ticker}"
 
 
+# 系统提示模板（运行时注入 system_message、current_date、company_name、ticker）
+FUNDAMENTALS_SYSTEM_PROMPT = (
+    "🔴 强制要求：你必须调用工具获取真实数据！"
+    "🚫 绝对禁止：不允许假设、编造或直接回答任何问题！"
+    "✅ 你必须：立即调用提供的工具获取真实数据，然后基于真实数据进行分析。"
+    "可用工具：{tool_names}。\n{system_message}"
+    "当前日期：{current_date}。"
+    "分析目标：{company_name}（股票代码：{ticker}）。"
+    "请确保在分析中正确区分公司名称和股票代码。"
+)
+
+
 def create_fundamentals_analyst(llm, toolkit):
+    # 工具调用LLM和分析链在图构建时创建一次，节点调用时复用
+    tool_llm = get_tool_calling_llm(llm)
+    analyst_chain = CompiledAnalystChain("基本面分析师", tool_llm, FUNDAMENTALS_SYSTEM_PROMPT)
+    analysis_chain = ChatPromptTemplate.from_messages([
+        ("system", "你是专业的股票基本面分析师，基于提供的真实数据进行分析。"),
+        ("human", "{analysis_request}")
+    ]) | tool_llm
+
     @log_analyst_module("fundamentals")
     def fundamentals_analyst_node(state):
         logger.debug(f"📊 [DEBUG] ===== 基本面分析师节点开始 =====")
@@ -116,20 +137,11 @@ def create_fundamentals_analyst(llm, toolkit):
             # 使用统一的基本面分析工具，工具内部会自动识别股票类型
             logger.info(f"📊 [基本面分析师] 使用统一基本面分析工具，自动识别股票类型")
             tools = [toolkit.get_stock_fundamentals_unified]
-            # 安全地获取工具名称用于调试
-            tool_names_debug = []
-            for tool in tools:
-                if hasattr(tool, 'name'):
-                    tool_names_debug.append(tool.name)
-                elif hasattr(tool, '__name__'):
-                    tool_names_debug.append(tool.__name__)
-                else:
-                    tool_names_debug.append(str(tool))
-            logger.debug(f"📊 [DEBUG] 选择的工具: {tool_names_debug}")
+            logger.debug(f"📊 [DEBUG] 选择的工具: {get_tool_names(tools)}")
             logger.debug(f"📊 [DEBUG] 🔧 统一工具将自动处理: {market_info['market_name']}")
         else:
             # 离线模式：优先使用FinnHub数据，SimFin作为补充
-            if is_china:
+            if market_info['is_china']:
                 # A股使用本地缓存数据
                 tools = [
                     toolkit.get_china_stock_data,
@@ -316,70 +328,9 @@ def create_fundamentals_analyst(llm, toolkit):
             "现在立即开始调用工具！不要说任何其他话！"
         )
 
-        # 系统提示模板
-        system_prompt = (
-            "🔴 强制要求：你必须调用工具获取真实数据！"
-            "🚫 绝对禁止：不允许假设、编造或直接回答任何问题！"
-            "✅ 你必须：立即调用提供的工具获取真实数据，然后基于真实数据进行分析。"
-            "可用工具：{tool_names}。\n{system_message}"
-            "当前日期：{current_date}。"
-            "分析目标：{company_name}（股票代码：{ticker}）。"
-            "请确保在分析中正确区分公司名称和股票代码。"
-        )
-
-        # 创建提示模板
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", system_prompt),
-            MessagesPlaceholder(variable_name="messages"),
-        ])
-
-        prompt = prompt.partial(system_message=system_message)
-        # 安全地获取工具名称，处理函数和工具对象
-        tool_names = []
-        for tool in tools:
-            if hasattr(tool, 'name'):
-                tool_names.append(tool.name)
-            elif hasattr(tool, '__name__'):
-                tool_names.append(tool.__name__)
-            else:
-                tool_names.append(str(tool))
-
-        prompt = prompt.partial(tool_names=", ".join(tool_names))
-        prompt = prompt.partial(current_date=current_date)
-        prompt = prompt.partial(ticker=ticker)
-        prompt = prompt.partial(company_name=company_name)
-
-        # 检测阿里百炼模型并创建新实例
-        if hasattr(llm, '__class__') and 'DashScope' in llm.__class__.__name__:
-            logger.debug(f"📊 [DEBUG] 检测到阿里百炼模型，创建新实例以避免工具缓存")
-            from tradingagents.llm_adapters import ChatDashScopeOpenAI
-            fresh_llm = ChatDashScopeOpenAI(
-                model=llm.model_name,
-                temperature=llm.temperature,
-                max_tokens=getattr(llm, 'max_tokens', 2000)
-            )
-        else:
-            fresh_llm = llm
-
-        logger.debug(f"📊 [DEBUG] 创建LLM链，工具数量: {len(tools)}")
-        # 安全地获取工具名称用于调试
-        debug_tool_names = []
-        for tool in tools:
-            if hasattr(tool, 'name'):
-                debug_tool_names.append(tool.name)
-            elif hasattr(tool, '__name__'):
-                debug_tool_names.append(tool.__name__)
-            else:
-                debug_tool_names.append(str(tool))
-        logger.debug(f"📊 [DEBUG] 绑定的工具列表: {debug_tool_names}")
-        logger.debug(f"📊 [DEBUG] 创建工具链，让模型自主决定是否调用工具")
-
-        try:
-            chain = prompt | fresh_llm.bind_tools(tools)
-            logger.debug(f"📊 [DEBUG] ✅ 工具绑定成功，绑定了 {len(tools)} 个工具")
-        except Exception as e:
-            logger.error(f"📊 [DEBUG] ❌ 工具绑定失败: {e}")
-            raise e
+        tool_names = get_tool_names(tools)
+        logger.debug(f"📊 [DEBUG] 绑定的工具列表: {tool_names}")
+        logger.debug(f"📊 [DEBUG] 使用预编译工具链，让模型自主决定是否调用工具")
 
         logger.debug(f"📊 [DEBUG] 调用LLM链...")
 
@@ -397,7 +348,14 @@ def create_fundamentals_analyst(llm, toolkit):
                 if "002027" in content:
                     logger.info(f"🔍 [股票代码追踪] 消息 {i} 中包含正确股票代码 002027")
 
-        result = chain.invoke(state["messages"])
+        result = analyst_chain.invoke(
+            tools,
+            state["messages"],
+            system_message=system_message,
+            current_date=current_date,
+            ticker=ticker,
+            company_name=company_name,
+        )
         logger.debug(f"📊 [DEBUG] LLM调用完成")
 
         # 检查LLM返回结果中的股票代码
@@ -413,15 +371,8 @@ def create_fundamentals_analyst(llm, toolkit):
         logger.debug(f"📊 [DEBUG] 工具调用数量: {len(result.tool_calls) if hasattr(result, 'tool_calls') else 0}")
         logger.debug(f"📊 [DEBUG] 内容长度: {len(result.content) if hasattr(result, 'content') else 0}")
 
-        # 检查工具调用 - 安全地获取工具名称
-        expected_tools = []
-        for tool in tools:
-            if hasattr(tool, 'name'):
-                expected_tools.append(tool.name)
-            elif hasattr(tool, '__name__'):
-                expected_tools.append(tool.__name__)
-            else:
-                expected_tools.append(str(tool))
+        # 检查工具调用
+        expected_tools = tool_names
 
         actual_tools = [tc['name'] for tc in result.tool_calls] if hasattr(result, 'tool_calls') and result.tool_calls else []
 
@@ -520,13 +471,7 @@ def create_fundamentals_analyst(llm, toolkit):
 - 分析要详细且专业"""
 
             try:
-                # 创建简单的分析链
-                analysis_prompt_template = ChatPromptTemplate.from_messages([
-                    ("system", "你是专业的股票基本面分析师，基于提供的真实数据进行分析。"),
-                    ("human", "{analysis_request}")
-                ])
-                
-                analysis_chain = analysis_prompt_template | fresh_llm
+                # 使用预编译的分析链
                 analysis_result = analysis_chain.invoke({"analysis_request": analysis_prompt})
                 
                 if hasattr(analysis_result, 'content'):
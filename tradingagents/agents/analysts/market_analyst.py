@@ -7,6 +7,7 @@ import traceback
 
 # 导入分析模块日志装饰器
 from tradingagents.utils.tool_logging import log_analyst_module
+from tradingagents.agents.utils.analyst_chain import CompiledAnalystChain, get_tool_names
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
@@ -260,7 +261,24 @@ def create_market_analyst_react(llm, toolkit):
     return market_analyst_react_node
 
 
+# 系统提示模板（运行时注入 system_message、current_date、company_name、ticker）
+MARKET_SYSTEM_PROMPT = (
+    "你是一位专业的股票技术分析师，与其他分析师协作。"
+    "使用提供的工具来获取和分析股票数据。"
+    "如果你无法完全回答，没关系；其他分析师会从不同角度继续分析。"
+    "执行你能做的技术分析工作来取得进展。"
+    "如果你有明确的技术面投资建议：**买入/持有/卖出**，"
+    "请在你的回复中明确标注，但不要使用'最终交易建议'前缀，因为最终决策需要综合所有分析师的意见。"
+    "你可以使用以下工具：{tool_names}。\n{system_message}"
+    "供你参考，当前日期是{current_date}。"
+    "我们要分析的是{company_name}（股票代码：{ticker}）。"
+    "请确保所有分析都使用中文，并在分析中正确区分公司名称和股票代码。"
+)
+
+
 def create_market_analyst(llm, toolkit):
+    # 分析链在图构建时编译一次，节点调用时只注入动态变量
+    analyst_chain = CompiledAnalystChain("市场分析师", llm, MARKET_SYSTEM_PROMPT)
 
     def market_analyst_node(state):
         logger.debug(f"📈 [DEBUG] ===== 市场分析师节点开始 =====")
@@ -287,16 +305,7 @@ def create_market_analyst(llm, toolkit):
             # 使用统一的市场数据工具，工具内部会自动识别股票类型
             logger.info(f"📊 [市场分析师] 使用统一市场数据工具，自动识别股票类型")
             tools = [toolkit.get_stock_market_data_unified]
-            # 安全地获取工具名称用于调试
-            tool_names_debug = []
-            for tool in tools:
-                if hasattr(tool, 'name'):
-                    tool_names_debug.append(tool.name)
-                elif hasattr(tool, '__name__'):
-                    tool_names_debug.append(tool.__name__)
-                else:
-                    tool_names_debug.append(str(tool))
-            logger.debug(f"📊 [DEBUG] 选择的工具: {tool_names_debug}")
+            logger.debug(f"📊 [DEBUG] 选择的工具: {get_tool_names(tools)}")
             logger.debug(f"📊 [DEBUG] 🔧 统一工具将自动处理: {market_info['market_name']}")
         else:
             tools = [
@@ -340,45 +349,15 @@ def create_market_analyst(llm, toolkit):
         )
 
 
-        prompt = ChatPromptTemplate.from_messages(
-            [
-                (
-                    "system",
-                    "你是一位专业的股票技术分析师，与其他分析师协作。"
-                    "使用提供的工具来获取和分析股票数据。"
-                    "如果你无法完全回答，没关系；其他分析师会从不同角度继续分析。"
-                    "执行你能做的技术分析工作来取得进展。"
-                    "如果你有明确的技术面投资建议：**买入/持有/卖出**，"
-                    "请在你的回复中明确标注，但不要使用'最终交易建议'前缀，因为最终决策需要综合所有分析师的意见。"
-                    "你可以使用以下工具：{tool_names}。\n{system_message}"
-                    "供你参考，当前日期是{current_date}。"
-                    "我们要分析的是{company_name}（股票代码：{ticker}）。"
-                    "请确保所有分析都使用中文，并在分析中正确区分公司名称和股票代码。",
-                ),
-                MessagesPlaceholder(variable_name="messages"),
-            ]
+        result = analyst_chain.invoke(
+            tools,
+            state["messages"],
+            system_message=system_message,
+            current_date=current_date,
+            ticker=ticker,
+            company_name=company_name,
         )
 
-        prompt = prompt.partial(system_message=system_message)
-        # 安全地获取工具名称，处理函数和工具对象
-        tool_names = []
-        for tool in tools:
-            if hasattr(tool, 'name'):
-                tool_names.append(tool.name)
-            elif hasattr(tool, '__name__'):
-                tool_names.append(tool.__name__)
-            else:
-                tool_names.append(str(tool))
-
-        prompt = prompt.partial(tool_names=", ".join(tool_names))
-        prompt = prompt.partial(current_date=current_date)
-        prompt = prompt.partial(ticker=ticker)
-        prompt = prompt.partial(company_name=company_name)
-
-        chain = prompt | llm.bind_tools(tools)
-
-        result = chain.invoke(state["messages"])
-
         # 处理市场分析报告
         if len(result.tool_calls) == 0:
             # 没有工具调用，直接使用LLM的回复
@@ -1,4 +1,3 @@
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 import time
 import json
 from datetime import datetime
@@ -6,6 +5,7 @@ from datetime import datetime
 # 导入统一日志系统和分析模块日志装饰器
 from tradingagents.utils.logging_init import get_logger
 from tradingagents.utils.tool_logging import log_analyst_module
+from tradingagents.agents.utils.analyst_chain import CompiledAnalystChain
 # 导入统一新闻工具
 from tradingagents.tools.unified_news_tool import create_unified_news_tool
 # 导入增强新闻工具
@@ -16,7 +16,53 @@ from tradingagents.utils.stock_utils import StockUtils
 logger = get_logger("analysts.news")
 
 
+# 系统提示模板（运行时注入 system_message、research_report_context、current_date、ticker）
+NEWS_SYSTEM_PROMPT = (
+    "您是一位专业的财经新闻分析师。"
+    "\n🚨 CRITICAL REQUIREMENT - 绝对强制要求："
+    "\n"
+    "\n❌ 禁止行为："
+    "\n- 绝对禁止在没有调用工具的情况下直接回答"
+    "\n- 绝对禁止基于推测或假设生成任何分析内容"
+    "\n- 绝对禁止跳过工具调用步骤"
+    "\n- 绝对禁止说'我无法获取实时数据'等借口"
+    "\n"
+    "\n✅ 强制执行步骤："
+    "\n1. 您的第一个动作必须是调用 get_enhanced_stock_news 工具（推荐）"
+    "\n   - 该工具整合东方财富、新浪、腾讯等多个数据源"
+    "\n   - 提供更丰富、更全面的新闻数据"
+    "\n2. 如果增强工具失败，可备用 get_stock_news_unified 工具"
+    "\n3. 只有在成功获取新闻数据后，才能开始分析"
+    "\n4. 您的回答必须基于工具返回的真实数据"
+    "\n"
+    "\n🔧 工具调用格式示例："
+    "\n调用: get_stock_news_unified(stock_code='{ticker}', max_news=10)"
+    "\n"
+    "\n⚠️ 如果您不调用工具，您的回答将被视为无效并被拒绝。"
+    "\n⚠️ 您必须先调用工具获取数据，然后基于数据进行分析。"
+    "\n⚠️ 没有例外，没有借口，必须调用工具。"
+    "\n"
+    "\n您可以访问以下工具：{tool_names}。"
+    "\n{system_message}"
+    "\n{research_report_context}"
+    "\n供您参考，当前日期是{current_date}。我们正在查看公司{ticker}。"
+    "\n请严格按照上述要求执行，用中文撰写所有分析内容。"
+)
+
+
 def create_news_analyst(llm, toolkit):
+    # 创建增强新闻工具（优先）+ 统一新闻工具（备用），图构建时创建一次
+    enhanced_news_tool = get_enhanced_stock_news
+    enhanced_news_tool.name = "get_enhanced_stock_news"
+    
+    unified_news_tool = create_unified_news_tool(toolkit)
+    unified_news_tool.name = "get_stock_news_unified"
+    
+    tools = [enhanced_news_tool, unified_news_tool]
+
+    # 分析链在图构建时编译一次，节点调用时只注入动态变量
+    analyst_chain = CompiledAnalystChain("新闻分析师", llm, NEWS_SYSTEM_PROMPT)
+
     @log_analyst_module("news")
     def news_analyst_node(state):
         start_time = datetime.now()
@@ -66,14 +112,6 @@ def create_news_analyst(llm, toolkit):
             logger.warning(f"⚠️ [新闻分析师] 获取研报发布信息失败: {e}")
             research_report_news = ""
         
-        # 创建增强新闻工具（优先）+ 统一新闻工具（备用）
-        enhanced_news_tool = get_enhanced_stock_news
-        enhanced_news_tool.name = "get_enhanced_stock_news"
-        
-        unified_news_tool = create_unified_news_tool(toolkit)
-        unified_news_tool.name = "get_stock_news_unified"
-        
-        tools = [enhanced_news_tool, unified_news_tool]
         logger.info(f"[新闻分析师] 已加载增强新闻工具: {[tool.name for tool in tools]}")
 
         system_message = (
@@ -119,49 +157,6 @@ def create_news_analyst(llm, toolkit):
 请撰写详细的中文分析报告，并在报告末尾附上Markdown表格总结关键发现。"""
         )
 
-        prompt = ChatPromptTemplate.from_messages(
-            [
-                (
-                    "system",
-                    "您是一位专业的财经新闻分析师。"
-                    "\n🚨 CRITICAL REQUIREMENT - 绝对强制要求："
-                    "\n"
-                    "\n❌ 禁止行为："
-                    "\n- 绝对禁止在没有调用工具的情况下直接回答"
-                    "\n- 绝对禁止基于推测或假设生成任何分析内容"
-                    "\n- 绝对禁止跳过工具调用步骤"
-                    "\n- 绝对禁止说'我无法获取实时数据'等借口"
-                    "\n"
-                    "\n✅ 强制执行步骤："
-                    "\n1. 您的第一个动作必须是调用 get_enhanced_stock_news 工具（推荐）"
-                    "\n   - 该工具整合东方财富、新浪、腾讯等多个数据源"
-                    "\n   - 提供更丰富、更全面的新闻数据"
-                    "\n2. 如果增强工具失败，可备用 get_stock_news_unified 工具"
-                    "\n3. 只有在成功获取新闻数据后，才能开始分析"
-                    "\n4. 您的回答必须基于工具返回的真实数据"
-                    "\n"
-                    "\n🔧 工具调用格式示例："
-                    "\n调用: get_stock_news_unified(stock_code='{ticker}', max_news=10)"
-                    "\n"
-                    "\n⚠️ 如果您不调用工具，您的回答将被视为无效并被拒绝。"
-                    "\n⚠️ 您必须先调用工具获取数据，然后基于数据进行分析。"
-                    "\n⚠️ 没有例外，没有借口，必须调用工具。"
-                    "\n"
-                    "\n您可以访问以下工具：{tool_names}。"
-                    "\n{system_message}"
-                    "\n{research_report_context}"
-                    "\n供您参考，当前日期是{current_date}。我们正在查看公司{ticker}。"
-                    "\n请严格按照上述要求执行，用中文撰写所有分析内容。",
-                ),
-                MessagesPlaceholder(variable_name="messages"),
-            ]
-        )
-
-        prompt = prompt.partial(system_message=system_message)
-        prompt = prompt.partial(tool_names=", ".join([tool.name for tool in tools]))
-        prompt = prompt.partial(current_date=current_date)
-        prompt = prompt.partial(ticker=ticker)
-        prompt = prompt.partial(research_report_context=research_report_news)
         
         logger.info(f"[新闻分析师] 准备调用LLM进行新闻分析，模型: {llm.__class__.__name__}")
         
@@ -221,9 +216,15 @@ def create_news_analyst(llm, toolkit):
         
         # 标准模式：正常的LLM调用
         llm_start_time = datetime.now()
-        chain = prompt | llm.bind_tools(tools)
         logger.info(f"[新闻分析师] 开始LLM调用，分析 {ticker} 的新闻")
-        result = chain.invoke(state["messages"])
+        result = analyst_chain.invoke(
+            tools,
+            state["messages"],
+            system_message=system_message,
+            research_report_context=research_report_news,
+            current_date=current_date,
+            ticker=ticker,
+        )
         
         llm_end_time = datetime.now()
         llm_time_taken = (llm_end_time - llm_start_time).total_seconds()
@@ -1,10 +1,10 @@
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 import time
 import json
 
 # 导入统一日志系统和分析模块日志装饰器
 from tradingagents.utils.logging_init import get_logger
 from tradingagents.utils.tool_logging import log_analyst_module
+from tradingagents.agents.utils.analyst_chain import CompiledAnalystChain
 # 导入增强新闻工具
 from tradingagents.tools.enhanced_news_tool import get_enhanced_market_sentiment, get_enhanced_social_discussions
 # 导入股票工具类
@@ -12,7 +12,30 @@ from tradingagents.utils.stock_utils import StockUtils
 logger = get_logger("analysts.social_media")
 
 
+# 系统提示模板（运行时注入 system_message、current_date、ticker）
+SOCIAL_MEDIA_SYSTEM_PROMPT = (
+    "您是一位有用的AI助手，与其他助手协作。"
+    " 使用提供的工具来推进回答问题。"
+    " 如果您无法完全回答，没关系；具有不同工具的其他助手"
+    " 将从您停下的地方继续帮助。执行您能做的以取得进展。"
+    " 如果您或任何其他助手有最终交易提案：**买入/持有/卖出**或可交付成果，"
+    " 请在您的回应前加上最终交易提案：**买入/持有/卖出**，以便团队知道停止。"
+    " 您可以访问以下工具：{tool_names}。\n{system_message}"
+    "供您参考，当前日期是{current_date}。我们要分析的当前公司是{ticker}。请用中文撰写所有分析内容。"
+)
+
+
 def create_social_media_analyst(llm, toolkit):
+    # 🚀 使用增强社交媒体工具，集成雪球、股吧等数据源
+    enhanced_sentiment_tool = get_enhanced_market_sentiment
+    enhanced_sentiment_tool.name = "get_enhanced_market_sentiment"
+    
+    enhanced_discussions_tool = get_enhanced_social_discussions  
+    enhanced_discussions_tool.name = "get_enhanced_social_discussions"
+
+    # 分析链在图构建时编译一次，节点调用时只注入动态变量
+    analyst_chain = CompiledAnalystChain("社交媒体分析师", llm, SOCIAL_MEDIA_SYSTEM_PROMPT)
+
     @log_analyst_module("social_media")
     def social_media_analyst_node(state):
         current_date = state["trade_date"]
@@ -22,16 +45,8 @@ def create_social_media_analyst(llm, toolkit):
         # 获取市场信息
         market_info = StockUtils.get_market_info(ticker)
         logger.info(f"[社交媒体分析师] 股票类型: {market_info['market_name']}")
-        
-        # 🚀 使用增强社交媒体工具，集成雪球、股吧等数据源
         logger.info(f"[社交媒体分析师] 使用增强社交媒体工具，整合雪球、东方财富股吧等数据源")
         
-        enhanced_sentiment_tool = get_enhanced_market_sentiment
-        enhanced_sentiment_tool.name = "get_enhanced_market_sentiment"
-        
-        enhanced_discussions_tool = get_enhanced_social_discussions  
-        enhanced_discussions_tool.name = "get_enhanced_social_discussions"
-        
         if toolkit.config["online_tools"]:
             tools = [enhanced_sentiment_tool, enhanced_discussions_tool, toolkit.get_stock_news_openai]
         else:
@@ -92,42 +107,14 @@ def create_social_media_analyst(llm, toolkit):
 注意：由于中国社交媒体API限制，如果数据获取受限，请明确说明并提供替代分析建议。"""
         )
 
-        prompt = ChatPromptTemplate.from_messages(
-            [
-                (
-                    "system",
-                    "您是一位有用的AI助手，与其他助手协作。"
-                    " 使用提供的工具来推进回答问题。"
-                    " 如果您无法完全回答，没关系；具有不同工具的其他助手"
-                    " 将从您停下的地方继续帮助。执行您能做的以取得进展。"
-                    " 如果您或任何其他助手有最终交易提案：**买入/持有/卖出**或可交付成果，"
-                    " 请在您的回应前加上最终交易提案：**买入/持有/卖出**，以便团队知道停止。"
-                    " 您可以访问以下工具：{tool_names}。\n{system_message}"
-                    "供您参考，当前日期是{current_date}。我们要分析的当前公司是{ticker}。请用中文撰写所有分析内容。",
-                ),
-                MessagesPlaceholder(variable_name="messages"),
-            ]
+        result = analyst_chain.invoke(
+            tools,
+            state["messages"],
+            system_message=system_message,
+            current_date=current_date,
+            ticker=ticker,
         )
 
-        prompt = prompt.partial(system_message=system_message)
-        # 安全地获取工具名称，处理函数和工具对象
-        tool_names = []
-        for tool in tools:
-            if hasattr(tool, 'name'):
-                tool_names.append(tool.name)
-            elif hasattr(tool, '__name__'):
-                tool_names.append(tool.__name__)
-            else:
-                tool_names.append(str(tool))
-
-        prompt = prompt.partial(tool_names=", ".join(tool_names))
-        prompt = prompt.partial(current_date=current_date)
-        prompt = prompt.partial(ticker=ticker)
-
-        chain = prompt | llm.bind_tools(tools)
-
-        result = chain.invoke(state["messages"])
-
         report = ""
 
         if len(result.tool_calls) == 0:
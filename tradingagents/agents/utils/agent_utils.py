@@ -11,6 +11,7 @@ import os
 from dateutil.relativedelta import relativedelta
 from langchain_openai import ChatOpenAI
 import tradingagents.dataflows.interface as interface
+from tradingagents.dataflows.data_context import run_scoped_fetch
 from tradingagents.default_config import DEFAULT_CONFIG
 from langchain_core.messages import HumanMessage
 
@@ -175,7 +176,10 @@ class Toolkit:
             logger.debug(f"📊 [DEBUG] 成功导入统一数据源接口")
 
             logger.debug(f"📊 [DEBUG] 正在调用统一数据源接口...")
-            result = get_china_stock_data_unified(stock_code, start_date, end_date)
+            result = run_scoped_fetch(
+                'china_stock_data', stock_code, start_date, end_date,
+                lambda: get_china_stock_data_unified(stock_code, start_date, end_date)
+            )
 
             logger.debug(f"📊 [DEBUG] 统一数据源接口调用完成")
             logger.debug(f"📊 [DEBUG] 返回结果类型: {type(result)}")
@@ -620,13 +624,12 @@ class Toolkit:
 
             # 获取最近30天的数据用于基本面分析
             from datetime import datetime, timedelta
-            end_date = datetime.strptime(curr_date, '%Y-%m-%d')
-            start_date = end_date - timedelta(days=30)
+            end_date = datetime.strptime(curr_date, '%Y-%m-%d').strftime('%Y-%m-%d')
+            start_date = (datetime.strptime(curr_date, '%Y-%m-%d') - timedelta(days=30)).strftime('%Y-%m-%d')
 
-            stock_data = get_china_stock_data_unified(
-                ticker,
-                start_date.strftime('%Y-%m-%d'),
-                end_date.strftime('%Y-%m-%d')
+            stock_data = run_scoped_fetch(
+                'china_stock_data', ticker, start_date, end_date,
+                lambda: get_china_stock_data_unified(ticker, start_date, end_date)
             )
 
             logger.debug(f"📊 [DEBUG] 股票数据获取完成，长度: {len(stock_data) if stock_data else 0}")
@@ -641,7 +644,10 @@ class Toolkit:
             analyzer = OptimizedChinaDataProvider()
 
             # 生成真正的基本面分析报告
-            fundamentals_report = analyzer._generate_fundamentals_report(ticker, stock_data)
+            fundamentals_report = run_scoped_fetch(
+                'china_fundamentals_report', ticker, start_date, end_date,
+                lambda: analyzer._generate_fundamentals_report(ticker, stock_data)
+            )
 
             logger.debug(f"📊 [DEBUG] 中国基本面分析报告生成完成")
             logger.debug(f"📊 [DEBUG] get_china_fundamentals 结果长度: {len(fundamentals_report)}")
@@ -762,7 +768,10 @@ class Toolkit:
                     # 获取股票价格数据
                     from tradingagents.dataflows.interface import get_china_stock_data_unified
                     logger.info(f"🔍 [股票代码追踪] 调用 get_china_stock_data_unified，传入参数: ticker='{ticker}', start_date='{start_date}', end_date='{end_date}'")
-                    stock_data = get_china_stock_data_unified(ticker, start_date, end_date)
+                    stock_data = run_scoped_fetch(
+                        'china_stock_data', ticker, start_date, end_date,
+                        lambda: get_china_stock_data_unified(ticker, start_date, end_date)
+                    )
                     logger.info(f"🔍 [股票代码追踪] get_china_stock_data_unified 返回结果前200字符: {stock_data[:200] if stock_data else 'None'}")
                     result_data.append(f"## A股价格数据\n{stock_data}")
                 except Exception as e:
@@ -774,7 +783,11 @@ class Toolkit:
                     from tradingagents.dataflows.optimized_china_data import OptimizedChinaDataProvider
                     analyzer = OptimizedChinaDataProvider()
                     logger.info(f"🔍 [股票代码追踪] 调用 OptimizedChinaDataProvider._generate_fundamentals_report，传入参数: ticker='{ticker}'")
-                    fundamentals_data = analyzer._generate_fundamentals_report(ticker, stock_data if 'stock_data' in locals() else "")
+                    price_data = stock_data if 'stock_data' in locals() else ""
+                    fundamentals_data = run_scoped_fetch(
+                        'china_fundamentals_report', ticker, start_date, end_date,
+                        lambda: analyzer._generate_fundamentals_report(ticker, price_data)
+                    )
                     logger.info(f"🔍 [股票代码追踪] _generate_fundamentals_report 返回结果前200字符: {fundamentals_data[:200] if fundamentals_data else 'None'}")
                     result_data.append(f"## A股基本面数据\n{fundamentals_data}")
                 except Exception as e:
@@ -790,7 +803,10 @@ class Toolkit:
                 # 主要数据源：AKShare
                 try:
                     from tradingagents.dataflows.interface import get_hk_stock_data_unified
-                    hk_data = get_hk_stock_data_unified(ticker, start_date, end_date)
+                    hk_data = run_scoped_fetch(
+                        'hk_stock_data', ticker, start_date, end_date,
+                        lambda: get_hk_stock_data_unified(ticker, start_date, end_date)
+                    )
 
                     # 检查数据质量
                     if hk_data and len(hk_data) > 100 and "❌" not in hk_data:
@@ -853,7 +869,10 @@ class Toolkit:
 
                 try:
                     from tradingagents.dataflows.interface import get_fundamentals_openai
-                    us_data = get_fundamentals_openai(ticker, curr_date)
+                    us_data = run_scoped_fetch(
+                        'us_fundamentals', ticker, curr_date, curr_date,
+                        lambda: get_fundamentals_openai(ticker, curr_date)
+                    )
                     result_data.append(f"## 美股基本面数据\n{us_data}")
                 except Exception as e:
                     result_data.append(f"## 美股基本面数据\n获取失败: {e}")
@@ -921,7 +940,10 @@ class Toolkit:
 
                 try:
                     from tradingagents.dataflows.interface import get_china_stock_data_unified
-                    stock_data = get_china_stock_data_unified(ticker, start_date, end_date)
+                    stock_data = run_scoped_fetch(
+                        'china_stock_data', ticker, start_date, end_date,
+                        lambda: get_china_stock_data_unified(ticker, start_date, end_date)
+                    )
                     result_data.append(f"## A股市场数据\n{stock_data}")
                 except Exception as e:
                     result_data.append(f"## A股市场数据\n获取失败: {e}")
@@ -932,7 +954,10 @@ class Toolkit:
 
                 try:
                     from tradingagents.dataflows.interface import get_hk_stock_data_unified
-                    hk_data = get_hk_stock_data_unified(ticker, start_date, end_date)
+                    hk_data = run_scoped_fetch(
+                        'hk_stock_data', ticker, start_date, end_date,
+                        lambda: get_hk_stock_data_unified(ticker, start_date, end_date)
+                    )
                     result_data.append(f"## 港股市场数据\n{hk_data}")
                 except Exception as e:
                     result_data.append(f"## 港股市场数据\n获取失败: {e}")
@@ -943,7 +968,10 @@ class Toolkit:
 
                 try:
                     from tradingagents.dataflows.interface import get_YFin_data_online
-                    us_data = get_YFin_data_online(ticker, start_date, end_date)
+                    us_data = run_scoped_fetch(
+                        'us_stock_data', ticker, start_date, end_date,
+                        lambda: get_YFin_data_online(ticker, start_date, end_date)
+                    )
                     result_data.append(f"## 美股市场数据\n{us_data}")
                 except Exception as e:
                     result_data.append(f"## 美股市场数据\n获取失败: {e}")
@@ -0,0 +1,128 @@
+"""
+分析师链预编译工具
+分析师节点的提示模板、工具绑定在图构建时编译一次，运行时只注入动态变量
+（系统消息、当前日期、股票代码等），避免每次节点调用都重建提示模板和重新 bind_tools。
+"""
+
+import threading
+from typing import Any, Dict, List, Sequence, Tuple
+
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+def get_tool_names(tools: Sequence[Any]) -> List[str]:
+    """安全地获取工具名称，兼容工具对象和普通函数"""
+    names = []
+    for tool in tools:
+        if hasattr(tool, 'name'):
+            names.append(tool.name)
+        elif hasattr(tool, '__name__'):
+            names.append(tool.__name__)
+        else:
+            names.append(str(tool))
+    return names
+
+
+class CompiledAnalystChain:
+    """
+    预编译的分析师链
+
+    提示模板在构造时创建；每组工具对应的 `prompt | llm.bind_tools(tools)` 在首次使用时
+    编译并缓存（同一分析师在不同模式下可能使用不同工具组）。
+    """
+
+    def __init__(self, name: str, llm, system_prompt: str):
+        """
+        Args:
+            name: 分析师名称（用于日志）
+            llm: 绑定工具的LLM
+            system_prompt: 系统提示模板，可包含 {tool_names} 及运行时注入的变量
+        """
+        self.name = name
+        self.llm = llm
+        self.prompt = ChatPromptTemplate.from_messages([
+            ("system", system_prompt),
+            MessagesPlaceholder(variable_name="messages"),
+        ])
+        self._chains: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def get_chain(self, tools: Sequence[Any]):
+        """获取（必要时编译）指定工具组的链"""
+        tool_names = tuple(get_tool_names(tools))
+        chain = self._chains.get(tool_names)
+        if chain is None:
+            with self._lock:
+                chain = self._chains.get(tool_names)
+                if chain is None:
+                    prompt = self.prompt.partial(tool_names=", ".join(tool_names))
+                    chain = prompt | self.llm.bind_tools(list(tools))
+                    self._chains[tool_names] = chain
+                    logger.debug(f"🔗 [{self.name}] 编译分析师链，工具: {list(tool_names)}")
+        return chain
+
+    def invoke(self, tools: Sequence[Any], messages: List[Any], **variables):
+        """
+        调用链
+
+        Args:
+            tools: 本次使用的工具组
+            messages: 对话消息
+            variables: 提示模板中的运行时变量
+        """
+        return self.get_chain(tools).invoke({"messages": messages, **variables})
+
+
+# 共享的工具调用LLM实例（按模型参数区分）
+_tool_llms: Dict[Tuple, Any] = {}
+_tool_llms_lock = threading.Lock()
+_llm_http_client = None
+
+
+def get_llm_http_client():
+    """获取进程内共享的LLM HTTP连接池客户端"""
+    global _llm_http_client
+    if _llm_http_client is None:
+        with _tool_llms_lock:
+            if _llm_http_client is None:
+                import httpx
+                _llm_http_client = httpx.Client(
+                    limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+                    timeout=httpx.Timeout(120.0, connect=10.0),
+                )
+    return _llm_http_client
+
+
+def get_tool_calling_llm(llm):
+    """
+    获取用于工具调用的LLM
+
+    阿里百炼原生适配器通过 OpenAI 兼容接口进行工具调用：按模型参数复用同一个
+    ChatDashScopeOpenAI 实例，并共享HTTP连接池，而不是每次调用都新建客户端。
+    其他模型（包括已是 OpenAI 兼容适配器的实例）直接返回原实例。
+    """
+    class_name = llm.__class__.__name__
+    if 'DashScope' not in class_name or class_name == 'ChatDashScopeOpenAI':
+        return llm
+
+    key = (llm.model_name, llm.temperature, getattr(llm, 'max_tokens', 2000))
+    tool_llm = _tool_llms.get(key)
+    if tool_llm is None:
+        from tradingagents.llm_adapters import ChatDashScopeOpenAI
+        http_client = get_llm_http_client()
+        with _tool_llms_lock:
+            tool_llm = _tool_llms.get(key)
+            if tool_llm is None:
+                tool_llm = ChatDashScopeOpenAI(
+                    model=key[0],
+                    temperature=key[1],
+                    max_tokens=key[2],
+                    http_client=http_client,
+                )
+                _tool_llms[key] = tool_llm
+                logger.debug(f"🔗 创建共享阿里百炼工具调用实例: {key[0]}")
+    return tool_llm
@@ -11,13 +11,19 @@ from typing import Dict, Optional
 from tradingagents.utils.logging_init import get_logger
 logger = get_logger("agents.utils.memory")
 
+from .vector_store import NumpyVectorStore, make_memory_id
+
+# 支持的记忆存储后端
+MEMORY_BACKENDS = ("chromadb", "numpy")
+
 
 class ChromaDBManager:
     """单例ChromaDB管理器，避免并发创建集合的冲突"""
 
     _instance = None
     _lock = threading.Lock()
-    _collections: Dict[str, any] = {}
+    _collections: Dict[tuple, any] = {}
+    _persistent_clients: Dict[str, any] = {}
     _client = None
 
     def __new__(cls):
@@ -76,33 +82,53 @@ class ChromaDBManager:
                     logger.warning(f"⚠️ [ChromaDB] 使用最简配置初始化: {backup_error}")
                 self._initialized = True
 
-    def get_or_create_collection(self, name: str):
-        """线程安全地获取或创建集合"""
+    def _get_persistent_client(self, persist_directory: str):
+        """获取（必要时创建）指定目录的持久化客户端（调用方需持有锁）"""
+        path = os.path.abspath(persist_directory)
+        client = self._persistent_clients.get(path)
+        if client is None:
+            os.makedirs(path, exist_ok=True)
+            settings = Settings(allow_reset=True, anonymized_telemetry=False)
+            client = chromadb.PersistentClient(path=path, settings=settings)
+            self._persistent_clients[path] = client
+            logger.info(f"📚 [ChromaDB] 持久化存储初始化完成: {path}")
+        return client
+
+    def get_or_create_collection(self, name: str, persist_directory: Optional[str] = None):
+        """
+        线程安全地获取或创建集合
+
+        Args:
+            name: 集合名称
+            persist_directory: 持久化目录；为空时使用进程内（非持久化）客户端
+        """
+        cache_key = (os.path.abspath(persist_directory) if persist_directory else None, name)
         with self._lock:
-            if name in self._collections:
+            if cache_key in self._collections:
                 logger.info(f"📚 [ChromaDB] 使用缓存集合: {name}")
-                return self._collections[name]
+                return self._collections[cache_key]
 
+            client = self._get_persistent_client(persist_directory) if persist_directory else self._client
             try:
                 # 尝试获取现有集合
-                collection = self._client.get_collection(name=name)
+                collection = client.get_collection(name=name)
                 logger.info(f"📚 [ChromaDB] 获取现有集合: {name}")
             except Exception:
                 try:
                     # 创建新集合
-                    collection = self._client.create_collection(name=name)
+                    collection = client.create_collection(name=name)
                     logger.info(f"📚 [ChromaDB] 创建新集合: {name}")
                 except Exception as e:
                     # 可能是并发创建，再次尝试获取
                     try:
-                        collection = self._client.get_collection(name=name)
+                        collection = client.get_collection(name=name)
                         logger.info(f"📚 [ChromaDB] 并发创建后获取集合: {name}")
                     except Exception as final_error:
                         logger.error(f"❌ [ChromaDB] 集合操作失败: {name}, 错误: {final_error}")
                         raise final_error
 
             # 缓存集合
-            self._collections[name] = collection
+            self._collections[cache_key] = collection
             return collection
 
 
@@ -269,9 +295,23 @@ class FinancialSituationMemory:
                 self.client = "DISABLED"
                 logger.warning(f"⚠️ 未找到OPENAI_API_KEY，记忆功能已禁用")
 
-        # 使用单例ChromaDB管理器
-        self.chroma_manager = ChromaDBManager()
-        self.situation_collection = self.chroma_manager.get_or_create_collection(name)
+        # 记忆存储后端：chromadb（HNSW索引）或 numpy（平铺精确索引）；
+        # 配置持久化目录时记忆在进程重启后保留
+        self.memory_backend = (config.get("memory_backend") or os.getenv("MEMORY_BACKEND", "chromadb")).lower()
+        self.persist_directory = config.get("memory_persist_dir") or os.getenv("MEMORY_PERSIST_DIR") or None
+        if self.memory_backend not in MEMORY_BACKENDS:
+            logger.warning(f"⚠️ 未知的记忆存储后端: {self.memory_backend}，使用chromadb")
+            self.memory_backend = "chromadb"
+
+        if self.memory_backend == "numpy":
+            self.chroma_manager = None
+            self.situation_collection = NumpyVectorStore(name, self.persist_directory)
+        else:
+            # 使用单例ChromaDB管理器
+            self.chroma_manager = ChromaDBManager()
+            self.situation_collection = self.chroma_manager.get_or_create_collection(
+                name, persist_directory=self.persist_directory
+            )
 
     def get_embedding(self, text):
         """Get embedding for a text using the configured provider"""
@@ -403,23 +443,106 @@ class FinancialSituationMemory:
             )
             return response.data[0].embedding
 
-    def add_situations(self, situations_and_advice):
-        """Add financial situations and their corresponding advice. Parameter is a list of tuples (situation, rec)"""
+    # 单次批量嵌入请求的最大文本数（阿里百炼 text-embedding-v3 单次最多10条）
+    DASHSCOPE_BATCH_SIZE = 10
+    OPENAI_BATCH_SIZE = 256
+
+    def _uses_dashscope_embedding(self) -> bool:
+        """是否使用阿里百炼嵌入服务（与 get_embedding 的判断保持一致）"""
+        return (self.llm_provider in ("dashscope", "alibaba") or
+                (self.llm_provider in ("google", "deepseek", "openrouter") and self.client is None))
+
+    @property
+    def embedding_key(self):
+        """嵌入服务标识，标识相同的记忆实例可以共享同一份嵌入向量"""
+        if self.client == "DISABLED":
+            return ("disabled",)
+        return (self.llm_provider, getattr(self, "embedding", None),
+                str(getattr(self.client, "base_url", "")) if self.client is not None else "dashscope")
+
+    def get_embeddings(self, texts):
+        """
+        批量获取嵌入向量
+
+        去重后按提供商的批量上限分批调用一次嵌入接口；批量调用失败时逐条回退到 get_embedding。
+        返回结果与输入文本一一对应。
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+        if self.client == "DISABLED":
+            return [[0.0] * 1024 for _ in texts]
+
+        unique_texts = list(dict.fromkeys(texts))
+        embedded: Dict[str, list] = {}
+        use_dashscope = self._uses_dashscope_embedding()
+        batch_size = self.DASHSCOPE_BATCH_SIZE if use_dashscope else self.OPENAI_BATCH_SIZE
+
+        for start in range(0, len(unique_texts), batch_size):
+            batch = unique_texts[start:start + batch_size]
+            try:
+                if use_dashscope:
+                    import dashscope
+                    from dashscope import TextEmbedding
+
+                    if not getattr(dashscope, 'api_key', None):
+                        raise ValueError("DashScope API密钥未设置")
+                    response = TextEmbedding.call(model=self.embedding, input=batch)
+                    if response.status_code != 200:
+                        raise ValueError(f"{response.code} - {response.message}")
+                    items = sorted(response.output['embeddings'], key=lambda item: item.get('text_index', 0))
+                    vectors = [item['embedding'] for item in items]
+                else:
+                    if self.client is None:
+                        raise ValueError("嵌入客户端未初始化")
+                    response = self.client.embeddings.create(model=self.embedding, input=batch)
+                    vectors = [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+                if len(vectors) != len(batch):
+                    raise ValueError(f"返回向量数 {len(vectors)} 与输入数 {len(batch)} 不一致")
+                embedded.update(zip(batch, vectors))
+                logger.debug(f"✅ 批量embedding成功，数量: {len(batch)}")
+            except Exception as e:
+                logger.debug(f"💡 批量embedding失败，逐条回退: {e}")
+                for text in batch:
+                    embedded[text] = self.get_embedding(text)
+
+        return [embedded[text] for text in texts]
+
+    def add_situations(self, situations_and_advice, embeddings=None):
+        """
+        Add financial situations and their corresponding advice. Parameter is a list of tuples (situation, rec)
+
+        Args:
+            situations_and_advice: (situation, recommendation) 列表
+            embeddings: 预先计算好的情景嵌入向量（与列表一一对应），为空时批量计算
+        """
 
         situations = []
         advice = []
         ids = []
-        embeddings = []
-
-        offset = self.situation_collection.count()
+        positions: Dict[str, int] = {}
 
+        # 基于内容的稳定ID：重复写入同一条记忆只会覆盖，不会产生重复记录
         for i, (situation, recommendation) in enumerate(situations_and_advice):
+            memory_id = make_memory_id(situation, recommendation)
+            if memory_id in positions:
+                continue
+            positions[memory_id] = i
             situations.append(situation)
             advice.append(recommendation)
-            ids.append(str(offset + i))
-            embeddings.append(self.get_embedding(situation))
+            ids.append(memory_id)
+
+        if not situations:
+            return
+        if embeddings is None:
+            embeddings = self.get_embeddings(situations)
+        elif len(embeddings) != len(situations_and_advice):
+            raise ValueError(f"嵌入向量数量 {len(embeddings)} 与情景数量 {len(situations_and_advice)} 不一致")
+        else:
+            embeddings = [embeddings[positions[memory_id]] for memory_id in ids]
 
-        self.situation_collection.add(
+        self.situation_collection.upsert(
             documents=situations,
             metadatas=[{"recommendation": rec} for rec in advice],
             embeddings=embeddings,
@@ -0,0 +1,200 @@
+"""
+记忆向量存储
+提供基于 NumPy 的持久化平铺索引（适合小中规模记忆集合，精确余弦检索），接口与
+ChromaDB collection 的 count/add/upsert/query 子集保持一致，可直接替换 FinancialSituationMemory
+中的集合；以及基于内容的稳定记忆ID，保证重复写入同一条记忆是幂等的。
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# 导入统一日志系统
+from tradingagents.utils.logging_init import get_logger
+logger = get_logger("agents.utils.memory")
+
+
+def make_memory_id(situation: str, recommendation: str) -> str:
+    """根据情景和建议内容生成稳定的记忆ID（相同内容总是得到相同ID）"""
+    digest = hashlib.sha256(f"{situation}\x1f{recommendation}".encode("utf-8")).hexdigest()
+    return digest[:32]
+
+
+class NumpyVectorStore:
+    """
+    NumPy 平铺向量索引
+
+    向量按行存放在 float32 矩阵中并预先归一化，查询即一次矩阵-向量乘法加 argpartition 取 top-k。
+    指定 persist_directory 时持久化为 `<name>.npz`（ID与向量）和 `<name>.json`（文档与元数据），
+    写入采用临时文件 + 原子替换。返回的 distances 为余弦距离（1 - 余弦相似度）。
+    """
+
+    def __init__(self, name: str, persist_directory: Optional[str] = None, autosave: bool = True):
+        """
+        Args:
+            name: 集合名称
+            persist_directory: 持久化目录，为空时仅保存在内存中
+            autosave: 每次写入后是否立即落盘（批量导入时可关闭并手动调用 flush）
+        """
+        self.name = name
+        self.persist_directory = Path(persist_directory) if persist_directory else None
+        self.autosave = autosave
+        self._lock = threading.RLock()
+        self._ids: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._documents: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._vectors: Optional[np.ndarray] = None
+        self._size = 0
+        self._dirty = False
+
+        if self.persist_directory:
+            self.persist_directory.mkdir(parents=True, exist_ok=True)
+            self._load()
+
+    # ---------- 持久化 ----------
+
+    @property
+    def _vector_file(self) -> Path:
+        return self.persist_directory / f"{self.name}.npz"
+
+    @property
+    def _document_file(self) -> Path:
+        return self.persist_directory / f"{self.name}.json"
+
+    def _load(self):
+        """从磁盘加载集合"""
+        if not self._vector_file.exists() or not self._document_file.exists():
+            return
+        try:
+            with np.load(self._vector_file, allow_pickle=False) as data:
+                ids = [str(i) for i in data["ids"]]
+                vectors = data["vectors"].astype(np.float32, copy=False)
+            with open(self._document_file, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+            if len(ids) != len(payload["documents"]) or len(ids) != vectors.shape[0]:
+                raise ValueError("向量文件与文档文件记录数不一致")
+
+            self._ids = ids
+            self._index = {memory_id: i for i, memory_id in enumerate(ids)}
+            self._documents = payload["documents"]
+            self._metadatas = payload["metadatas"]
+            self._vectors = vectors
+            self._size = len(ids)
+            logger.info(f"📚 [向量存储] 加载集合: {self.name}，记忆数: {self._size}")
+        except Exception as e:
+            logger.error(f"❌ [向量存储] 加载集合失败: {self.name}, 错误: {e}")
+
+    def flush(self):
+        """将集合写入磁盘（原子替换）"""
+        if not self.persist_directory:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            vectors = self._vectors[:self._size] if self._vectors is not None else np.zeros((0, 0), np.float32)
+            vector_tmp = self._vector_file.with_name(self._vector_file.name + ".tmp")
+            document_tmp = self._document_file.with_suffix(".json.tmp")
+            with open(vector_tmp, "wb") as f:
+                np.savez(f, ids=np.array(self._ids, dtype=str), vectors=vectors)
+            with open(document_tmp, "w", encoding="utf-8") as f:
+                json.dump({"documents": self._documents, "metadatas": self._metadatas}, f, ensure_ascii=False)
+            os.replace(vector_tmp, self._vector_file)
+            os.replace(document_tmp, self._document_file)
+            self._dirty = False
+
+    # ---------- 写入 ----------
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _ensure_capacity(self, dim: int, extra: int):
+        """按倍增策略扩容向量矩阵，避免每次写入都复制整个矩阵"""
+        if self._vectors is None or self._vectors.shape[0] == 0:
+            self._vectors = np.zeros((max(extra, 16), dim), dtype=np.float32)
+            return
+        if self._vectors.shape[1] != dim:
+            raise ValueError(f"向量维度不一致: 集合为 {self._vectors.shape[1]}，写入为 {dim}")
+        required = self._size + extra
+        if required > self._vectors.shape[0]:
+            capacity = max(required, self._vectors.shape[0] * 2)
+            grown = np.zeros((capacity, dim), dtype=np.float32)
+            grown[:self._size] = self._vectors[:self._size]
+            self._vectors = grown
+
+    def upsert(self, ids: Sequence[str], embeddings: Sequence[Sequence[float]],
+               documents: Optional[Sequence[str]] = None,
+               metadatas: Optional[Sequence[Dict[str, Any]]] = None):
+        """插入或更新记忆（ID已存在时覆盖）"""
+        if not ids:
+            return
+        vectors = self._normalize(np.asarray(embeddings, dtype=np.float32))
+        documents = list(documents) if documents is not None else [""] * len(ids)
+        metadatas = list(metadatas) if metadatas is not None else [{} for _ in ids]
+
+        with self._lock:
+            self._ensure_capacity(vectors.shape[1], len(ids))
+            for memory_id, vector, document, metadata in zip(ids, vectors, documents, metadatas):
+                position = self._index.get(memory_id)
+                if position is None:
+                    position = self._size
+                    self._index[memory_id] = position
+                    self._ids.append(memory_id)
+                    self._documents.append(document)
+                    self._metadatas.append(metadata)
+                    self._size += 1
+                else:
+                    self._documents[position] = document
+                    self._metadatas[position] = metadata
+                self._vectors[position] = vector
+            self._dirty = True
+            if self.autosave:
+                self.flush()
+
+    def add(self, ids: Sequence[str], embeddings: Sequence[Sequence[float]],
+            documents: Optional[Sequence[str]] = None,
+            metadatas: Optional[Sequence[Dict[str, Any]]] = None):
+        """兼容 ChromaDB 接口：ID已存在时同样覆盖"""
+        self.upsert(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+
+    # ---------- 查询 ----------
+
+    def count(self) -> int:
+        return self._size
+
+    def query(self, query_embeddings: Sequence[Sequence[float]], n_results: int = 1,
+              include: Optional[Sequence[str]] = None) -> Dict[str, List[List[Any]]]:
+        """
+        精确余弦检索，返回结构与 ChromaDB collection.query 一致
+        """
+        queries = self._normalize(np.asarray(query_embeddings, dtype=np.float32))
+        result = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+
+        with self._lock:
+            size = self._size
+            matrix = self._vectors[:size] if size else None
+            for query in queries:
+                if matrix is None:
+                    for values in result.values():
+                        values.append([])
+                    continue
+                k = min(n_results, size)
+                scores = matrix @ query
+                if k < size:
+                    top = np.argpartition(-scores, k - 1)[:k]
+                    top = top[np.argsort(-scores[top])]
+                else:
+                    top = np.argsort(-scores)
+                result["ids"].append([self._ids[i] for i in top])
+                result["documents"].append([self._documents[i] for i in top])
+                result["metadatas"].append([self._metadatas[i] for i in top])
+                result["distances"].append([float(1.0 - scores[i]) for i in top])
+        return result
@@ -5,6 +5,7 @@
 """
 
 import numpy as np
+import pandas as pd
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
 import statistics
@@ -16,6 +17,7 @@ import math
 from .data_fusion_engine import get_fusion_engine, DataPoint, DataSourceType
 from .data_quality_analyzer import get_quality_analyzer
 from .sentiment_analyzer import SentimentAnalyzer
+from .score_history_store import get_score_history_store
 from tradingagents.utils.logging_manager import get_logger
 
 logger = get_logger('agents')
@@ -31,6 +33,44 @@ class ScoreCategory(Enum):
     OVERALL = "overall"            # 综合评分
 
 
+# 参与综合评分的类别（顺序与 _calculate_category_scores 一致，决定综合评分的累加顺序）
+BATCH_CATEGORIES = (
+    ScoreCategory.TECHNICAL, ScoreCategory.FUNDAMENTAL, ScoreCategory.SENTIMENT,
+    ScoreCategory.QUALITY, ScoreCategory.RISK,
+)
+
+# 批量评分使用的行情字段
+BATCH_QUOTE_FIELDS = ('change_pct', 'volume', 'turnover', 'current_price', 'high', 'low')
+
+
+def _round_values(values: np.ndarray, digits: int) -> np.ndarray:
+    """
+    与内置 round 结果一致的向量化取整
+    
+    np.round 先放大再取整，放大后恰好接近 .5 时可能与内置 round（按精确十进制值舍入）不同，
+    这些接近舍入边界的值逐个用内置 round 计算，其余值两种方式结果相同。
+    """
+    values = np.asarray(values, dtype=float)
+    rounded = np.round(values, digits)
+    with np.errstate(invalid='ignore'):
+        scaled = values * (10.0 ** digits)
+        near_tie = np.abs(scaled - np.floor(scaled) - 0.5) <= 1e-6 * np.maximum(1.0, np.abs(scaled))
+    for i in np.flatnonzero(near_tie):
+        rounded[i] = round(float(values[i]), digits)
+    return rounded
+
+
+def _row_to_stock_data(row: pd.Series) -> Dict[str, Any]:
+    """DataFrame 行转为标量接口的行情字典（空值视为字段不存在）"""
+    stock_data = {}
+    for key, value in row.items():
+        missing = pd.isna(value)
+        if isinstance(missing, (bool, np.bool_)) and missing:
+            continue
+        stock_data[key] = value
+    return stock_data
+
+
 @dataclass
 class CategoryScore:
     """类别评分"""
@@ -84,8 +124,13 @@ class ComprehensiveScoringSystem:
         self.quality_analyzer = get_quality_analyzer()
         self.sentiment_analyzer = SentimentAnalyzer()
         
-        # 历史评分记录
+        # 历史评分记录（内存中保留最近50条，完整历史写入持久化存储）
         self.score_history = {}
+        try:
+            self.history_store = get_score_history_store()
+        except Exception as e:
+            logger.warning(f"评分历史存储初始化失败，仅在内存中保留评分历史: {e}")
+            self.history_store = None
         
         logger.info("综合评分系统初始化完成")
         logger.info(f"   评分类别: {len(self.category_weights)} 个")
@@ -111,22 +156,7 @@ class ComprehensiveScoringSystem:
             logger.info(f"开始计算综合评分: {symbol}")
             
             # 计算各类别评分
-            category_scores = {}
-            
-            # 技术面评分
-            category_scores[ScoreCategory.TECHNICAL] = self._calculate_technical_score(symbol, stock_data)
-            
-            # 基本面评分
-            category_scores[ScoreCategory.FUNDAMENTAL] = self._calculate_fundamental_score(symbol, stock_data, additional_data)
-            
-            # 情绪面评分
-            category_scores[ScoreCategory.SENTIMENT] = self._calculate_sentiment_score(symbol, news_data)
-            
-            # 数据质量评分
-            category_scores[ScoreCategory.QUALITY] = self._calculate_quality_score(symbol, stock_data, news_data)
-            
-            # 风险评分
-            category_scores[ScoreCategory.RISK] = self._calculate_risk_score(symbol, stock_data)
+            category_scores = self._calculate_category_scores(symbol, stock_data, news_data, additional_data)
             
             # 计算综合评分
             overall_score, overall_confidence = self._calculate_overall_score(category_scores)
@@ -171,6 +201,254 @@ class ComprehensiveScoringSystem:
             logger.error(f"综合评分计算失败: {symbol} - {str(e)}")
             return self._create_default_score(symbol, str(e))
 
+    def estimate_overall_score(self, symbol: str, stock_data: Dict[str, Any],
+                               news_data: List[Dict[str, Any]] = None) -> float:
+        """
+        只计算综合评分数值（不生成建议、不写入历史记录），用于选股时按廉价行情快照预估排序
+        
+        Args:
+            symbol: 股票代码
+            stock_data: 股票数据
+            news_data: 新闻数据
+            
+        Returns:
+            综合评分（与 calculate_comprehensive_score 的 overall_score 口径一致）
+        """
+        try:
+            category_scores = self._calculate_category_scores(symbol, stock_data, news_data)
+            overall_score, _ = self._calculate_overall_score(category_scores)
+            return round(overall_score, 2)
+        except Exception as e:
+            logger.debug(f"预估综合评分失败: {symbol} - {e}")
+            return 50.0
+
+    def calculate_scores_batch(self, frame: pd.DataFrame, symbols: Optional[List[str]] = None,
+                               news_data: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+                               record_history: bool = True) -> pd.DataFrame:
+        """
+        批量计算综合评分（按列向量化计算，结果与逐只调用 calculate_comprehensive_score 一致）
+        
+        每一行对应一只股票的单源（已融合）行情，行中的空值视为该字段不存在，
+        即第 i 行等价于标量接口的 stock_data = {列名: 值 for 非空单元格}。
+        含新闻数据、字段值无法转为数值或嵌套多源数据的行按标量路径逐只计算类别评分。
+        
+        Args:
+            frame: 行情DataFrame（current_price/change_pct/volume/turnover/high/low 等列）
+            symbols: 股票代码，为空时取 symbol 列，没有 symbol 列时取行索引
+            news_data: {股票代码: 新闻列表}
+            record_history: 是否写入评分历史（与标量接口行为一致）
+            
+        Returns:
+            DataFrame[symbol, overall_score, grade, confidence, technical_score, fundamental_score,
+                      sentiment_score, quality_score, risk_score, recommendation, risk_level]
+        """
+        result_columns = ['symbol', 'overall_score', 'grade', 'confidence'] + \
+                         [f"{category.value}_score" for category in BATCH_CATEGORIES] + \
+                         ['recommendation', 'risk_level']
+        if frame is None or frame.empty:
+            return pd.DataFrame(columns=result_columns)
+        
+        if symbols is None:
+            symbols = frame['symbol'].tolist() if 'symbol' in frame.columns else [str(i) for i in frame.index]
+        symbols = list(symbols)
+        if len(symbols) != len(frame):
+            raise ValueError(f"股票代码数量({len(symbols)})与行数({len(frame)})不一致")
+        frame = frame.reset_index(drop=True)
+        
+        scores, confidences, scalar_rows = self._batch_category_scores(frame, symbols, news_data)
+        
+        # 与 _calculate_overall_score 相同的累加顺序，保证浮点结果一致
+        weighted_sum = np.zeros(len(frame))
+        total_weight = np.zeros(len(frame))
+        total_confidence = np.zeros(len(frame))
+        for category in BATCH_CATEGORIES:
+            weight = self.category_weights[category]
+            weighted_sum = weighted_sum + scores[category] * weight * confidences[category]
+            total_weight = total_weight + weight * confidences[category]
+            total_confidence = total_confidence + confidences[category]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            overall = np.where(total_weight > 0, weighted_sum / total_weight, 50.0)
+        overall_confidence = total_confidence / len(BATCH_CATEGORIES)
+        
+        # 评级与建议按未取整的综合评分判断（与标量路径一致）
+        thresholds = sorted(self.grade_thresholds.items(), reverse=True)
+        grade = np.select([overall >= threshold for threshold, _ in thresholds],
+                          [label for _, label in thresholds], 'D')
+        
+        risk = scores[ScoreCategory.RISK]
+        sentiment = scores[ScoreCategory.SENTIMENT]
+        recommendation = pd.Series(np.select(
+            [overall >= 80, overall >= 70, overall >= 60, overall >= 50],
+            ["强烈推荐", "推荐", "谨慎推荐", "观望"], "不推荐"), dtype=object)
+        recommendation = recommendation + np.where(risk < 40, " (高风险)", "") + \
+            np.select([sentiment > 80, sentiment < 40], [" (市场情绪积极)", " (市场情绪谨慎)"], "")
+        risk_level = np.select([risk >= 80, risk >= 60, risk >= 40], ["低", "中等", "中高"], "高")
+        
+        result = pd.DataFrame({
+            'symbol': symbols,
+            'overall_score': _round_values(overall, 2),
+            'grade': grade,
+            'confidence': _round_values(overall_confidence, 3),
+            **{f"{category.value}_score": scores[category] for category in BATCH_CATEGORIES},
+            'recommendation': recommendation.to_numpy(),
+            'risk_level': risk_level,
+        })[result_columns]
+        
+        if record_history:
+            self._record_batch_history(result)
+        
+        logger.info(f"批量综合评分完成: {len(result)}只股票 (逐只计算{scalar_rows}只)")
+        return result
+
+    def _batch_category_scores(self, frame: pd.DataFrame, symbols: List[str],
+                               news_data: Optional[Dict[str, List[Dict[str, Any]]]] = None
+                               ) -> Tuple[Dict[ScoreCategory, np.ndarray], Dict[ScoreCategory, np.ndarray], int]:
+        """
+        向量化计算各类别评分和置信度（评分已按标量路径的方式取整）
+        
+        Returns:
+            (评分, 置信度, 按标量路径计算的行数)
+        """
+        n = len(frame)
+        present = frame.notna()
+        field_count = present.sum(axis=1).to_numpy(dtype=float)
+        
+        # 需要逐只计算的行：字段值无法转为数值、嵌套多源数据、有新闻数据
+        fallback = np.zeros(n, dtype=bool)
+        values, has = {}, {}
+        for name in BATCH_QUOTE_FIELDS:
+            if name in frame.columns:
+                numeric = pd.to_numeric(frame[name], errors='coerce').to_numpy(dtype='float64')
+                has[name] = present[name].to_numpy()
+                fallback |= has[name] & np.isnan(numeric)
+                values[name] = np.where(has[name], numeric, 0.0)
+            else:
+                has[name] = np.zeros(n, dtype=bool)
+                values[name] = np.zeros(n)
+        for name in frame.columns:
+            if frame[name].dtype == object:
+                fallback |= frame[name].map(lambda value: isinstance(value, dict)).to_numpy(dtype=bool)
+        if news_data:
+            fallback |= np.array([bool(news_data.get(symbol)) for symbol in symbols])
+        
+        change_pct = values['change_pct']
+        volume = values['volume']
+        turnover = values['turnover']
+        current_price = values['current_price']
+        high = np.where(has['high'], values['high'], current_price)
+        low = np.where(has['low'], values['low'], current_price)
+        
+        scores, confidences = {}, {}
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            # 技术面：价格动量、成交量、价格位置
+            momentum = np.select([change_pct > 5, change_pct > 2, change_pct > 0, change_pct > -2, change_pct > -5],
+                                 [85, 75, 65, 55, 45], 30)
+            volume_ratio = turnover / (volume * current_price)
+            volume_score = np.where(
+                volume > 0,
+                np.where((turnover != 0) & (current_price != 0),
+                         np.where((volume_ratio >= 0.8) & (volume_ratio <= 1.2), 80, 60), 70),
+                30)
+            price_position = (current_price - low) / (high - low)
+            position = np.where(
+                high > low,
+                np.select([price_position >= 0.8, price_position >= 0.6, price_position >= 0.4, price_position >= 0.2],
+                          [85, 75, 65, 45], 35),
+                50)
+            scores[ScoreCategory.TECHNICAL] = (momentum + volume_score + position) / 3
+            confidences[ScoreCategory.TECHNICAL] = np.minimum(1.0, field_count / 10)
+            
+            # 基本面：估算市值、价格水平、流动性
+            estimated_market_cap = (turnover / current_price) * current_price
+            market_cap = np.where(
+                (current_price > 0) & (turnover > 0),
+                np.select([estimated_market_cap > 10000000000, estimated_market_cap > 5000000000,
+                           estimated_market_cap > 1000000000], [80, 75, 70], 60),
+                50)
+            price_level = np.where(
+                current_price > 0,
+                np.select([current_price < 10, current_price < 30, current_price < 100], [85, 75, 65], 50),
+                30)
+            industry = np.select([volume > 100000000, volume > 50000000, volume > 10000000], [80, 70, 60], 50)
+            scores[ScoreCategory.FUNDAMENTAL] = (market_cap + price_level + industry) / 3
+            confidences[ScoreCategory.FUNDAMENTAL] = np.full(n, 0.6)
+            
+            # 情绪面：无新闻数据时的默认评分
+            scores[ScoreCategory.SENTIMENT] = np.full(n, 50.0)
+            confidences[ScoreCategory.SENTIMENT] = np.full(n, 0.3)
+            
+            # 数据质量：单源行情的股票/新闻质量取默认值，数据源数量即字段数量
+            diversity = np.select([field_count >= 3, field_count >= 2], [85, 75], 60)
+            scores[ScoreCategory.QUALITY] = (50 + 50 + diversity) / 3
+            confidences[ScoreCategory.QUALITY] = np.minimum(1.0, field_count / 5)
+            
+            # 风险：价格波动、流动性、价格水平
+            abs_change = np.abs(change_pct)
+            volatility_risk = np.select([abs_change > 10, abs_change > 5, abs_change > 2], [30, 50, 70], 85)
+            liquidity_risk = np.select([volume > 50000000, volume > 10000000, volume > 1000000], [85, 70, 50], 30)
+            price_level_risk = np.select([current_price < 5, current_price < 20, current_price < 100], [40, 70, 80], 60)
+            scores[ScoreCategory.RISK] = (volatility_risk + liquidity_risk + price_level_risk) / 3
+            confidences[ScoreCategory.RISK] = np.full(n, 0.7)
+        
+        for category in BATCH_CATEGORIES:
+            scores[category] = _round_values(scores[category], 2)
+        
+        fallback_rows = np.flatnonzero(fallback)
+        for i in fallback_rows:
+            symbol = symbols[i]
+            stock_data = _row_to_stock_data(frame.iloc[i])
+            category_scores = self._calculate_category_scores(
+                symbol, stock_data, news_data.get(symbol) if news_data else None)
+            for category in BATCH_CATEGORIES:
+                scores[category][i] = category_scores[category].score
+                confidences[category][i] = category_scores[category].confidence
+        
+        return scores, confidences, len(fallback_rows)
+
+    def _record_batch_history(self, result: pd.DataFrame):
+        """批量写入评分历史"""
+        try:
+            timestamp = datetime.now()
+            if self.history_store is not None:
+                self.history_store.append_frame(result.assign(timestamp=timestamp))
+                return
+            category_columns = [f"{category.value}_score" for category in BATCH_CATEGORIES]
+            for row in result.drop(columns=category_columns).itertuples(index=False):
+                history = self.score_history.setdefault(row.symbol, [])
+                history.append({
+                    'timestamp': timestamp,
+                    'overall_score': row.overall_score,
+                    'grade': row.grade,
+                    'recommendation': row.recommendation
+                })
+                if len(history) > 50:
+                    history.pop(0)
+        except Exception as e:
+            logger.debug(f"批量更新评分历史失败: {e}")
+
+    def _calculate_category_scores(self, symbol: str, stock_data: Dict[str, Any],
+                                   news_data: List[Dict[str, Any]] = None,
+                                   additional_data: Dict[str, Any] = None) -> Dict[ScoreCategory, CategoryScore]:
+        """计算各类别评分"""
+        category_scores = {}
+        
+        # 技术面评分
+        category_scores[ScoreCategory.TECHNICAL] = self._calculate_technical_score(symbol, stock_data)
+        
+        # 基本面评分
+        category_scores[ScoreCategory.FUNDAMENTAL] = self._calculate_fundamental_score(symbol, stock_data, additional_data)
+        
+        # 情绪面评分
+        category_scores[ScoreCategory.SENTIMENT] = self._calculate_sentiment_score(symbol, news_data)
+        
+        # 数据质量评分
+        category_scores[ScoreCategory.QUALITY] = self._calculate_quality_score(symbol, stock_data, news_data)
+        
+        # 风险评分
+        category_scores[ScoreCategory.RISK] = self._calculate_risk_score(symbol, stock_data)
+        
+        return category_scores
+
     def _calculate_technical_score(self, symbol: str, stock_data: Dict[str, Any]) -> CategoryScore:
         """计算技术面评分"""
         try:
@@ -786,13 +1064,26 @@ class ComprehensiveScoringSystem:
             # 保持最近50条记录
             if len(history) > 50:
                 history.pop(0)
+            
+            if self.history_store is not None:
+                self.history_store.append(
+                    symbol, score.timestamp, score.overall_score,
+                    category_scores={category.value: category_score.score
+                                     for category, category_score in score.category_scores.items()},
+                    confidence=score.confidence,
+                    grade=score.grade,
+                    recommendation=score.recommendation
+                )
                 
         except Exception as e:
             logger.debug(f"更新评分历史失败: {e}")
 
     def get_score_trend(self, symbol: str, days: int = 7) -> Dict[str, Any]:
-        """获取评分趋势"""
+        """获取评分趋势（优先查询持久化存储，重启后仍可用）"""
         try:
+            if self.history_store is not None:
+                return self.history_store.get_trend(symbol, days)
+            
             if symbol not in self.score_history:
                 return {'error': '无历史数据'}
             
@@ -825,6 +1116,39 @@ class ComprehensiveScoringSystem:
             logger.error(f"获取评分趋势失败: {e}")
             return {'error': str(e)}
 
+    def get_score_movers(self, days: int = 7, top_n: int = 50, category: str = 'overall',
+                         direction: str = 'up', symbols: List[str] = None):
+        """
+        全市场评分变动排行（如本周综合评分提升最多的股票）
+        
+        Args:
+            days: 时间窗口（天）
+            top_n: 返回数量
+            category: 评分类别（overall/technical/fundamental/sentiment/quality/risk）
+            direction: 'up' 提升最多，'down' 下降最多
+            symbols: 限定股票范围
+            
+        Returns:
+            评分变动DataFrame，评分历史存储不可用时返回None
+        """
+        if self.history_store is None:
+            logger.warning("评分历史存储不可用，无法查询评分变动")
+            return None
+        try:
+            return self.history_store.get_movers(days=days, top_n=top_n, category=category,
+                                                 direction=direction, symbols=symbols)
+        except Exception as e:
+            logger.error(f"查询评分变动失败: {e}")
+            return None
+
+    def flush_score_history(self):
+        """把缓冲的评分历史写入持久化存储"""
+        if self.history_store is not None:
+            try:
+                self.history_store.flush()
+            except Exception as e:
+                logger.warning(f"评分历史落盘失败: {e}")
+
 
 # 全局实例
 _comprehensive_scoring_system = None
@@ -842,4 +1166,11 @@ def calculate_comprehensive_score(symbol: str, stock_data: Dict[str, Any],
                                 news_data: List[Dict[str, Any]] = None) -> ComprehensiveScore:
     """计算股票综合评分"""
     system = get_comprehensive_scoring_system()
-    return system.calculate_comprehensive_score(symbol, stock_data, news_data)
\ No newline at end of file
+    return system.calculate_comprehensive_score(symbol, stock_data, news_data)
+
+
+def calculate_scores_batch(frame: pd.DataFrame, symbols: List[str] = None,
+                           news_data: Dict[str, List[Dict[str, Any]]] = None) -> pd.DataFrame:
+    """批量计算股票综合评分"""
+    system = get_comprehensive_scoring_system()
+    return system.calculate_scores_batch(frame, symbols, news_data)
\ No newline at end of file
@@ -180,6 +180,13 @@ class DynamicWeightManager:
                     'status_score': self._convert_status_to_score(source_metrics.status)
                 }
             
+            # 真实请求的被动健康统计：近期请求越多越可信，直接参与性能评分
+            for source, snapshot in self.reliability_monitor.health_tracker.snapshots().items():
+                if source in metrics and snapshot.total_requests >= self.reliability_monitor.health_tracker.min_samples:
+                    metrics[source]['inband_health'] = snapshot.health_score
+                    if snapshot.p90_ms is not None:
+                        metrics[source]['p90_latency'] = snapshot.p90_ms
+            
             # 添加额外数据
             if additional_data:
                 for source, extra_metrics in additional_data.items():
@@ -286,6 +293,10 @@ class DynamicWeightManager:
                 response_time_score * weights['response_time_score']
             )
             
+            # 有真实请求统计时与之混合，使权重跟随线上表现
+            if 'inband_health' in metrics:
+                weighted_score = weighted_score * 0.7 + metrics['inband_health'] * 0.3
+            
             return max(0.0, min(1.0, weighted_score))
             
         except Exception as e:
@@ -445,6 +456,8 @@ class DynamicWeightManager:
                     reasoning.append("响应时间较长")
                 if metrics.get('error_count', 0) > 10:
                     reasoning.append("错误次数较多")
+                if metrics.get('inband_health', 1.0) < 0.5:
+                    reasoning.append("真实请求健康度下降")
             
             if not reasoning:
                 reasoning.append(f"基于综合性能评分调整 ({change_pct:+.1f}%)")
@@ -14,6 +14,8 @@ import statistics
 import json
 from collections import defaultdict, deque
 
+from .source_health import RollingMean, SourceHealthSnapshot, get_source_health_tracker
+
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
@@ -92,7 +94,12 @@ class ReliabilityMonitor:
         
         # 性能指标存储
         self.source_metrics = {}
-        self.performance_history = defaultdict(lambda: deque(maxlen=288))  # 保持24小时数据(5分钟间隔)
+        self.performance_history = defaultdict(lambda: RollingMean(288))  # 保持24小时数据(5分钟间隔)
+        
+        # 真实请求路径上的被动健康统计，按增量并入 source_metrics
+        self.health_tracker = get_source_health_tracker()
+        self._inband_synced = {}  # source -> (已并入的请求数, 已并入的错误数)
+        self._inband_lock = threading.Lock()
         
         # 告警系统
         self.alerts = deque(maxlen=1000)  # 保持最近1000条告警
@@ -185,6 +192,76 @@ class ReliabilityMonitor:
             except Exception as e:
                 logger.error(f"检查数据源失败: {source_name} - {e}")
                 self._handle_source_error(source_name, str(e))
+        
+        self.sync_inband_metrics()
+
+    def record_request(self, source_name: str, latency_ms: float, success: bool,
+                       valid: bool = True, error: Optional[str] = None):
+        """
+        记录一次真实请求结果（被动监控）
+        
+        只更新O(1)的流式聚合，指标在 sync_inband_metrics() / get_monitoring_report() 时并入。
+        
+        Args:
+            source_name: 数据源名称
+            latency_ms: 请求耗时(毫秒)
+            success: 请求是否成功
+            valid: 返回数据是否有效
+            error: 失败原因
+        """
+        self.health_tracker.record(source_name, latency_ms, success, valid=valid, error=error)
+
+    def sync_inband_metrics(self):
+        """把真实请求的流式统计并入数据源指标并检查告警条件"""
+        with self._inband_lock:
+            snapshots = self.health_tracker.snapshots()
+            for source_name, snapshot in snapshots.items():
+                self._sync_inband_source(source_name, snapshot)
+
+    def _sync_inband_source(self, source_name: str, snapshot: SourceHealthSnapshot):
+        """并入单个数据源的被动健康快照"""
+        try:
+            metrics = self.source_metrics.get(source_name)
+            if metrics is None:
+                # 未注册探测函数的数据源，完全依靠被动统计
+                metrics = DataSourceMetrics(
+                    source_name=source_name,
+                    last_check=snapshot.last_seen,
+                    status=MonitoringStatus.UNKNOWN,
+                    metadata={'critical': False, 'inband_only': True}
+                )
+                self.source_metrics[source_name] = metrics
+            self._apply_inband_snapshot(metrics, snapshot)
+            self._check_alert_conditions(source_name, metrics)
+        except Exception as e:
+            logger.error(f"并入被动健康统计失败: {source_name} - {e}")
+
+    def _apply_inband_snapshot(self, metrics: DataSourceMetrics, snapshot: SourceHealthSnapshot):
+        """用被动健康快照更新数据源指标（真实流量优先于探测结果）"""
+        synced_requests, synced_errors = self._inband_synced.get(metrics.source_name, (0, 0))
+        new_requests = snapshot.total_requests - synced_requests
+        if new_requests <= 0:
+            return
+        metrics.total_requests += new_requests
+        metrics.error_count += snapshot.total_errors - synced_errors
+        self._inband_synced[metrics.source_name] = (snapshot.total_requests, snapshot.total_errors)
+        
+        if snapshot.last_seen > metrics.last_check:
+            metrics.last_check = snapshot.last_seen
+        if snapshot.ewma_latency_ms > 0:
+            metrics.response_time_ms = snapshot.p50_ms or snapshot.ewma_latency_ms
+            metrics.avg_response_time = snapshot.ewma_latency_ms
+        metrics.success_rate = snapshot.window_success_rate if snapshot.window_requests else snapshot.ewma_success
+        if metrics.metadata.get('inband_only'):
+            # 没有探测数据时，用近期成功率代表可用性、用数据有效率代表质量
+            metrics.uptime_percentage = metrics.success_rate
+        if not metrics.metadata.get('probe_quality'):
+            metrics.data_quality_score = snapshot.window_valid_rate
+        if snapshot.consecutive_failures and snapshot.last_error:
+            metrics.last_error = snapshot.last_error
+        
+        metrics.metadata['inband'] = snapshot.to_dict()
+        metrics.status = self._determine_source_status(metrics)
 
     def _check_single_source(self, source_name: str, source_config: Dict[str, Any], check_time: datetime):
         """检查单个数据源"""
@@ -233,16 +310,17 @@ class ReliabilityMonitor:
         # 更新平均响应时间
         history = self.performance_history[f"{source_name}_response_time"]
         history.append(response_time_ms)
-        metrics.avg_response_time = statistics.mean(history) if history else response_time_ms
+        metrics.avg_response_time = history.mean(response_time_ms)
         
         # 计算可用性百分比
         uptime_history = self.performance_history[f"{source_name}_uptime"]
         uptime_history.append(1 if success else 0)
-        metrics.uptime_percentage = statistics.mean(uptime_history) if uptime_history else (1 if success else 0)
+        metrics.uptime_percentage = uptime_history.mean(1 if success else 0)
         
         # 更新数据质量评分 (从extra_data获取)
         if 'quality_score' in extra_data:
             metrics.data_quality_score = extra_data['quality_score']
+            metrics.metadata['probe_quality'] = True
         
         # 确定状态
         metrics.status = self._determine_source_status(metrics)
@@ -422,6 +500,7 @@ class ReliabilityMonitor:
         """获取监控报告"""
         try:
             current_time = datetime.now()
+            self.sync_inband_metrics()
             
             # 统计各状态数据源数量
             status_counts = defaultdict(int)
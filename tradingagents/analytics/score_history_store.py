@@ -0,0 +1,472 @@
+#!/usr/bin/env python3
+"""
+综合评分历史存储
+按列存储每次综合评分的结果（股票代码、时间、综合及各类别评分），只追加写入；
+数据按自然日分区写成不可变的parquet分段文件，文件名记录时间范围，
+查询时只读取与时间窗口重叠的分段，并支持全市场的向量化趋势查询（如"本周评分提升最多的50只股票"）
+"""
+
+import atexit
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from tradingagents.utils.logging_manager import get_logger
+
+logger = get_logger('agents')
+
+# 数值列：综合评分、各类别评分和置信度
+SCORE_COLUMNS = (
+    'overall_score', 'technical_score', 'fundamental_score', 'sentiment_score',
+    'quality_score', 'risk_score', 'confidence',
+)
+TEXT_COLUMNS = ('grade', 'recommendation')
+ALL_COLUMNS = ('symbol', 'timestamp') + SCORE_COLUMNS + TEXT_COLUMNS
+
+# 类别简称到列名的映射（get_movers 的 category 参数）
+CATEGORY_COLUMNS = {
+    'overall': 'overall_score',
+    'technical': 'technical_score',
+    'fundamental': 'fundamental_score',
+    'sentiment': 'sentiment_score',
+    'quality': 'quality_score',
+    'risk': 'risk_score',
+}
+
+TimeLike = Union[str, datetime, pd.Timestamp, None]
+
+
+@dataclass
+class _Segment:
+    """分段文件及其时间范围（来自文件名，无需读取文件）"""
+    path: Path
+    day: str
+    start: pd.Timestamp
+    end: pd.Timestamp
+
+
+def _to_timestamp(value: TimeLike) -> Optional[pd.Timestamp]:
+    return pd.Timestamp(value) if value is not None else None
+
+
+class ScoreHistoryStore:
+    """
+    综合评分时间序列存储
+
+    写入先进入内存缓冲区，缓冲行数达到 flush_rows 或距上次落盘超过 flush_interval 秒时
+    按日写成新的分段文件（part-<起始毫秒>-<结束毫秒>-<随机串>.parquet），同一天的分段过多时自动合并。
+    查询同时覆盖已落盘分段和未落盘的缓冲区，分段文件不可变，读取结果按路径缓存。
+    """
+
+    def __init__(self, data_dir: str = "./data/score_history", flush_rows: int = 500,
+                 flush_interval: float = 60.0, max_segments_per_day: int = 16,
+                 retention_days: Optional[int] = 365, cache_segments: int = 64):
+        """
+        Args:
+            data_dir: 存储目录
+            flush_rows: 缓冲区落盘的行数阈值
+            flush_interval: 缓冲区落盘的时间阈值（秒）
+            max_segments_per_day: 单日分段数超过该值时合并为一个文件
+            retention_days: 保留天数，落盘时删除更早的分区，None 表示永久保留
+            cache_segments: 缓存的已读取分段数量
+        """
+        self.data_dir = Path(data_dir)
+        self.flush_rows = max(1, flush_rows)
+        self.flush_interval = flush_interval
+        self.max_segments_per_day = max(2, max_segments_per_day)
+        self.retention_days = retention_days
+        self.cache_segments = max(0, cache_segments)
+
+        self._lock = threading.RLock()
+        # 缓冲区：逐条追加的记录按列存放，批量追加的记录直接保存为DataFrame
+        self._buffer: Dict[str, list] = {column: [] for column in ALL_COLUMNS}
+        self._buffer_frames: List[pd.DataFrame] = []
+        self._last_flush = time.time()
+        self._segments: List[_Segment] = []
+        self._segment_cache: 'OrderedDict[Path, pd.DataFrame]' = OrderedDict()
+
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self._scan_segments()
+        atexit.register(self.flush)
+
+        logger.info(f"📈 评分历史存储初始化完成: {self.data_dir} ({len(self._segments)}个分段)")
+
+    # ---------- 分段索引 ----------
+
+    @staticmethod
+    def _parse_segment(path: Path) -> Optional[_Segment]:
+        """从文件名 part-<start_ms>-<end_ms>-<id>.parquet 解析时间范围"""
+        try:
+            _, start_ms, end_ms, _ = path.stem.split('-', 3)
+            return _Segment(path=path, day=path.parent.name,
+                            start=pd.Timestamp(int(start_ms), unit='ms'),
+                            end=pd.Timestamp(int(end_ms), unit='ms'))
+        except (ValueError, TypeError):
+            return None
+
+    def _scan_segments(self):
+        """扫描存储目录，重建分段时间索引"""
+        segments = []
+        for path in self.data_dir.glob("*/part-*.parquet"):
+            segment = self._parse_segment(path)
+            if segment is not None:
+                segments.append(segment)
+            else:
+                logger.warning(f"⚠️ 无法识别的评分历史文件: {path}")
+        segments.sort(key=lambda s: (s.start, s.end))
+        with self._lock:
+            self._segments = segments
+
+    def _overlapping_segments(self, start: Optional[pd.Timestamp], end: Optional[pd.Timestamp]) -> List[_Segment]:
+        return [s for s in self._segments
+                if (start is None or s.end >= start) and (end is None or s.start <= end)]
+
+    def _read_segment(self, segment: _Segment, columns: List[str]) -> pd.DataFrame:
+        """读取分段（缓存完整分段，按需取列）"""
+        data = self._segment_cache.get(segment.path)
+        if data is None:
+            data = pd.read_parquet(segment.path)
+            if self.cache_segments:
+                self._segment_cache[segment.path] = data
+                while len(self._segment_cache) > self.cache_segments:
+                    self._segment_cache.popitem(last=False)
+        else:
+            self._segment_cache.move_to_end(segment.path)
+        return data[[c for c in columns if c in data.columns]]
+
+    # ---------- 写入 ----------
+
+    def append(self, symbol: str, timestamp: datetime, overall_score: float,
+               category_scores: Optional[Dict[str, float]] = None, confidence: float = np.nan,
+               grade: str = '', recommendation: str = ''):
+        """
+        追加一条评分记录
+
+        Args:
+            symbol: 股票代码
+            timestamp: 评分时间
+            overall_score: 综合评分
+            category_scores: 类别评分 {'technical': 72.5, ...}，键为类别简称或列名
+            confidence: 综合置信度
+            grade: 评级
+            recommendation: 投资建议
+        """
+        category_scores = category_scores or {}
+        row = {
+            'symbol': symbol,
+            'timestamp': pd.Timestamp(timestamp),
+            'overall_score': overall_score,
+            'confidence': confidence,
+            'grade': grade or '',
+            'recommendation': recommendation or '',
+        }
+        for category, column in CATEGORY_COLUMNS.items():
+            if column != 'overall_score':
+                row[column] = category_scores.get(category, category_scores.get(column, np.nan))
+
+        with self._lock:
+            for column in ALL_COLUMNS:
+                self._buffer[column].append(row[column])
+            should_flush = (self._buffered_rows() >= self.flush_rows
+                            or time.time() - self._last_flush >= self.flush_interval)
+        if should_flush:
+            self.flush()
+
+    def append_frame(self, frame: pd.DataFrame):
+        """批量追加评分记录，frame 需包含 symbol、timestamp、overall_score 列，缺少的列填充空值"""
+        if frame is None or frame.empty:
+            return
+        chunk = self._normalize(pd.DataFrame({
+            column: (frame[column].to_numpy() if column in frame.columns
+                     else '' if column in TEXT_COLUMNS else np.nan)
+            for column in ALL_COLUMNS
+        }))
+        with self._lock:
+            self._buffer_frames.append(chunk)
+            should_flush = self._buffered_rows() >= self.flush_rows
+        if should_flush:
+            self.flush()
+
+    @staticmethod
+    def _normalize(frame: pd.DataFrame) -> pd.DataFrame:
+        """统一列类型：时间列为datetime，评分列为float64"""
+        frame['timestamp'] = pd.to_datetime(frame['timestamp'])
+        for column in SCORE_COLUMNS:
+            frame[column] = pd.to_numeric(frame[column], errors='coerce').astype('float64')
+        return frame
+
+    def _buffered_rows(self) -> int:
+        """缓冲区行数（调用方持有锁）"""
+        return len(self._buffer['symbol']) + sum(len(frame) for frame in self._buffer_frames)
+
+    def _buffer_frame(self) -> pd.DataFrame:
+        """缓冲区转为DataFrame（调用方持有锁）"""
+        frames = list(self._buffer_frames)
+        if self._buffer['symbol']:
+            frames.append(self._normalize(pd.DataFrame({column: self._buffer[column] for column in ALL_COLUMNS})))
+        return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+    def flush(self) -> int:
+        """把缓冲区按日写成分段文件，返回落盘行数"""
+        with self._lock:
+            if not self._buffered_rows():
+                self._last_flush = time.time()
+                return 0
+            frame = self._buffer_frame()
+            days = frame['timestamp'].dt.strftime('%Y-%m-%d')
+
+            written = 0
+            written_days = []
+            try:
+                for day, part in frame.groupby(days, sort=True):
+                    part = part.sort_values('timestamp', kind='stable').reset_index(drop=True)
+                    self._write_segment(day, part)
+                    written += len(part)
+                    written_days.append(day)
+            except Exception as e:
+                # 已写入的分段保留，缓冲区只保留未写入日期的记录，下次重试
+                logger.error(f"❌ 评分历史落盘失败: {e}")
+                self._buffer = {column: [] for column in ALL_COLUMNS}
+                self._buffer_frames = [frame[~days.isin(written_days).to_numpy()].reset_index(drop=True)]
+                return written
+
+            self._buffer = {column: [] for column in ALL_COLUMNS}
+            self._buffer_frames = []
+            self._last_flush = time.time()
+
+        for day in days.unique():
+            self._maybe_compact(day)
+        if self.retention_days:
+            self.purge(self.retention_days)
+        logger.debug(f"💾 评分历史落盘: {written}条")
+        return written
+
+    def _write_segment(self, day: str, data: pd.DataFrame) -> _Segment:
+        """写入一个不可变分段文件（先写临时文件再改名）并登记到索引"""
+        start = data['timestamp'].iloc[0]
+        end = data['timestamp'].iloc[-1]
+        directory = self.data_dir / day
+        directory.mkdir(parents=True, exist_ok=True)
+        name = f"part-{start.value // 1_000_000}-{-(-end.value // 1_000_000)}-{uuid.uuid4().hex[:8]}.parquet"
+        path = directory / name
+        tmp_path = directory / f".{name}.tmp"
+        data.to_parquet(tmp_path, compression='snappy', index=False)
+        tmp_path.replace(path)
+
+        segment = self._parse_segment(path)
+        with self._lock:
+            self._segments.append(segment)
+            self._segments.sort(key=lambda s: (s.start, s.end))
+        return segment
+
+    def _maybe_compact(self, day: str):
+        with self._lock:
+            count = sum(1 for s in self._segments if s.day == day)
+        if count > self.max_segments_per_day:
+            self.compact(day)
+
+    def compact(self, day: str) -> bool:
+        """把某一天的全部分段合并为一个文件"""
+        with self._lock:
+            segments = [s for s in self._segments if s.day == day]
+            if len(segments) < 2:
+                return False
+            try:
+                merged = pd.concat([self._read_segment(s, list(ALL_COLUMNS)) for s in segments],
+                                   ignore_index=True)
+                merged = merged.sort_values('timestamp', kind='stable').reset_index(drop=True)
+                self._write_segment(day, merged)
+            except Exception as e:
+                logger.warning(f"⚠️ 合并评分历史分段失败: {day} - {e}")
+                return False
+
+            old_paths = {s.path for s in segments}
+            self._segments = [s for s in self._segments if s.path not in old_paths]
+            for path in old_paths:
+                self._segment_cache.pop(path, None)
+                path.unlink(missing_ok=True)
+        logger.debug(f"🗜️ 合并评分历史分段: {day} ({len(segments)}个)")
+        return True
+
+    def purge(self, retention_days: int) -> int:
+        """删除早于保留期的分区，返回删除的分段数"""
+        cutoff = (datetime.now() - timedelta(days=retention_days)).strftime('%Y-%m-%d')
+        with self._lock:
+            expired = [s for s in self._segments if s.day < cutoff]
+            if not expired:
+                return 0
+            self._segments = [s for s in self._segments if s.day >= cutoff]
+            for segment in expired:
+                self._segment_cache.pop(segment.path, None)
+                segment.path.unlink(missing_ok=True)
+            for day in {s.day for s in expired}:
+                try:
+                    (self.data_dir / day).rmdir()
+                except OSError:
+                    pass
+        logger.info(f"🧹 清理过期评分历史: {len(expired)}个分段")
+        return len(expired)
+
+    # ---------- 查询 ----------
+
+    def query(self, start: TimeLike = None, end: TimeLike = None,
+              symbols: Optional[Iterable[str]] = None,
+              columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        查询时间窗口内的评分记录（含未落盘的缓冲区）
+
+        Args:
+            start: 开始时间（含），None 表示不限
+            end: 结束时间（含），None 表示不限
+            symbols: 股票代码，None 表示全部
+            columns: 需要的数值/文本列，symbol 和 timestamp 总会返回
+
+        Returns:
+            按时间排序的评分记录
+        """
+        start, end = _to_timestamp(start), _to_timestamp(end)
+        wanted = ['symbol', 'timestamp'] + [c for c in (columns or ALL_COLUMNS)
+                                            if c not in ('symbol', 'timestamp')]
+
+        with self._lock:
+            frames = [self._read_segment(s, wanted) for s in self._overlapping_segments(start, end)]
+            if self._buffered_rows():
+                frames.append(self._buffer_frame()[wanted])
+
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return pd.DataFrame({c: pd.Series(dtype='datetime64[ns]' if c == 'timestamp' else
+                                               'float64' if c in SCORE_COLUMNS else 'object')
+                                 for c in wanted})
+        data = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+        timestamps = data['timestamp'].to_numpy()
+        mask = np.ones(len(data), dtype=bool)
+        if start is not None:
+            mask &= timestamps >= start.to_datetime64()
+        if end is not None:
+            mask &= timestamps <= end.to_datetime64()
+        if symbols is not None:
+            mask &= data['symbol'].isin(list(symbols)).to_numpy()
+        if not mask.all():
+            data = data[mask]
+        return data.sort_values('timestamp', kind='stable').reset_index(drop=True)
+
+    def get_trend(self, symbol: str, days: int = 7) -> Dict[str, Any]:
+        """单只股票的评分趋势（与 ComprehensiveScoringSystem.get_score_trend 的返回格式一致）"""
+        cutoff = datetime.now() - timedelta(days=days)
+        history = self.query(start=cutoff, symbols=[symbol],
+                             columns=['overall_score', 'grade', 'recommendation'])
+        if history.empty:
+            return {'error': f'无{days}天内的数据'}
+
+        scores = history['overall_score'].to_numpy(dtype=float)
+        recent = history.tail(10)
+        recent_scores = [
+            {'timestamp': ts.to_pydatetime(), 'overall_score': float(score),
+             'grade': grade, 'recommendation': recommendation}
+            for ts, score, grade, recommendation in zip(
+                recent['timestamp'], recent['overall_score'], recent['grade'], recent['recommendation'])
+        ]
+        return {
+            'symbol': symbol,
+            'period_days': days,
+            'score_count': len(scores),
+            'current_score': float(scores[-1]),
+            'avg_score': float(np.mean(scores)),
+            'min_score': float(np.min(scores)),
+            'max_score': float(np.max(scores)),
+            'trend': 'up' if len(scores) > 1 and scores[-1] > scores[0] else 'down' if len(scores) > 1 and scores[-1] < scores[0] else 'stable',
+            'recent_scores': recent_scores
+        }
+
+    def get_movers(self, days: int = 7, top_n: int = 50, category: str = 'overall',
+                   direction: str = 'up', min_points: int = 2,
+                   symbols: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """
+        全市场评分变动排行：窗口内首次与最近一次评分之差
+
+        Args:
+            days: 时间窗口（天）
+            top_n: 返回数量
+            category: 评分类别（overall/technical/fundamental/sentiment/quality/risk）
+            direction: 'up' 提升最多，'down' 下降最多
+            min_points: 窗口内最少评分次数
+            symbols: 限定股票范围
+
+        Returns:
+            DataFrame[symbol, first_score, last_score, change, change_pct, points, first_time, last_time]
+        """
+        column = CATEGORY_COLUMNS.get(category, category)
+        if column not in SCORE_COLUMNS:
+            raise ValueError(f"不支持的评分类别: {category}")
+
+        history = self.query(start=datetime.now() - timedelta(days=days), symbols=symbols, columns=[column])
+        history = history[history[column].notna()]
+        result_columns = ['symbol', 'first_score', 'last_score', 'change', 'change_pct',
+                          'points', 'first_time', 'last_time']
+        if history.empty:
+            return pd.DataFrame(columns=result_columns)
+
+        # query 已按时间排序，稳定排序后每只股票的首行/末行即窗口内首次/最近一次评分
+        history = history.sort_values('symbol', kind='stable')
+        first = history.drop_duplicates('symbol', keep='first').set_index('symbol')
+        last = history.drop_duplicates('symbol', keep='last').set_index('symbol')
+        points = history['symbol'].value_counts()
+
+        movers = pd.DataFrame({
+            'first_score': first[column],
+            'last_score': last[column],
+            'points': points.reindex(first.index),
+            'first_time': first['timestamp'],
+            'last_time': last['timestamp'],
+        })
+        movers['change'] = movers['last_score'] - movers['first_score']
+        movers['change_pct'] = movers['change'] / movers['first_score'].abs().replace(0, np.nan) * 100
+        movers = movers[movers['points'] >= min_points]
+
+        if direction == 'down':
+            movers = movers.nsmallest(top_n, 'change')
+        else:
+            movers = movers.nlargest(top_n, 'change')
+        return movers.rename_axis('symbol').reset_index()[result_columns]
+
+    def latest_scores(self, days: int = 7, symbols: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """窗口内每只股票最近一次的评分记录"""
+        history = self.query(start=datetime.now() - timedelta(days=days), symbols=symbols)
+        return history.drop_duplicates('symbol', keep='last').reset_index(drop=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """存储统计"""
+        with self._lock:
+            return {
+                'data_dir': str(self.data_dir),
+                'segments': len(self._segments),
+                'days': len({s.day for s in self._segments}),
+                'buffered_rows': self._buffered_rows(),
+                'cached_segments': len(self._segment_cache),
+                'earliest': self._segments[0].start.isoformat() if self._segments else None,
+                'latest': max(s.end for s in self._segments).isoformat() if self._segments else None,
+            }
+
+
+# 全局实例
+_score_history_store = None
+_score_history_store_lock = threading.Lock()
+
+
+def get_score_history_store(data_dir: str = "./data/score_history") -> ScoreHistoryStore:
+    """获取全局评分历史存储实例（参数仅在首次调用时生效）"""
+    global _score_history_store
+    with _score_history_store_lock:
+        if _score_history_store is None:
+            _score_history_store = ScoreHistoryStore(data_dir)
+        return _score_history_store
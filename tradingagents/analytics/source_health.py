@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+数据源被动健康统计
+在真实请求路径上记录各数据源的延迟、错误与返回数据有效性，全部使用O(1)更新的流式聚合
+（EWMA、分桶滑动窗口计数、对数分桶延迟直方图），供可靠性监控、动态权重与多源路由使用，无需额外探测流量。
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+class EWMA:
+    """指数加权移动平均，首个样本直接作为初值"""
+
+    def __init__(self, alpha: float = 0.2):
+        self.alpha = alpha
+        self.value: Optional[float] = None
+
+    def update(self, sample: float) -> float:
+        if self.value is None:
+            self.value = float(sample)
+        else:
+            self.value += self.alpha * (sample - self.value)
+        return self.value
+
+    def get(self, default: float = 0.0) -> float:
+        return default if self.value is None else self.value
+
+
+class RollingMean:
+    """定长滑动窗口均值：维护窗口内累计和，追加与查询均为O(1)"""
+
+    def __init__(self, maxlen: int):
+        self._values = deque(maxlen=maxlen)
+        self._sum = 0.0
+
+    def append(self, value: float):
+        if len(self._values) == self._values.maxlen:
+            self._sum -= self._values[0]
+        self._values.append(value)
+        self._sum += value
+
+    def mean(self, default: float = 0.0) -> float:
+        return self._sum / len(self._values) if self._values else default
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+
+class WindowedCounter:
+    """
+    分桶滑动窗口计数器
+
+    窗口被切成固定数量的时间桶，写入时按时间复用过期的桶；查询只累加仍在窗口内的桶，
+    桶数是常数，因此写入和查询都是O(1)。
+    """
+
+    def __init__(self, window_seconds: float = 60.0, buckets: int = 12):
+        self.buckets = max(1, int(buckets))
+        self.bucket_seconds = window_seconds / self.buckets
+        self._counts = [0] * self.buckets
+        self._epochs = [-1] * self.buckets
+
+    def add(self, value: int = 1, now: Optional[float] = None):
+        epoch = int((time.monotonic() if now is None else now) // self.bucket_seconds)
+        index = epoch % self.buckets
+        if self._epochs[index] != epoch:
+            self._epochs[index] = epoch
+            self._counts[index] = 0
+        self._counts[index] += value
+
+    def total(self, now: Optional[float] = None) -> int:
+        epoch = int((time.monotonic() if now is None else now) // self.bucket_seconds)
+        oldest = epoch - self.buckets
+        return sum(count for count, bucket_epoch in zip(self._counts, self._epochs) if bucket_epoch > oldest)
+
+
+class LatencyHistogram:
+    """
+    对数分桶延迟直方图
+
+    桶上界按 min_ms * growth^i 递增，单次记录只增加一个桶的计数；为跟随近期变化，
+    每隔 window_seconds 轮换一次，分位数基于"当前+上一"两个周期合并计算（返回所在桶的上界）。
+    """
+
+    def __init__(self, min_ms: float = 1.0, max_ms: float = 120000.0, growth: float = 1.2,
+                 window_seconds: float = 300.0):
+        self.min_ms = min_ms
+        self.growth = growth
+        self._log_growth = math.log(growth)
+        self.size = int(math.ceil(math.log(max_ms / min_ms) / self._log_growth)) + 1
+        self.window_seconds = window_seconds
+        self._current = [0] * self.size
+        self._previous = [0] * self.size
+        self._current_count = 0
+        self._previous_count = 0
+        self._rotated_at = time.monotonic()
+
+    def _bucket(self, latency_ms: float) -> int:
+        if latency_ms <= self.min_ms:
+            return 0
+        return min(self.size - 1, int(math.ceil(math.log(latency_ms / self.min_ms) / self._log_growth)))
+
+    def upper_bound(self, index: int) -> float:
+        return self.min_ms * self.growth ** index
+
+    def _maybe_rotate(self, now: float):
+        elapsed = now - self._rotated_at
+        if elapsed < self.window_seconds:
+            return
+        if elapsed >= 2 * self.window_seconds:
+            self._previous = [0] * self.size
+            self._previous_count = 0
+        else:
+            self._previous = self._current
+            self._previous_count = self._current_count
+        self._current = [0] * self.size
+        self._current_count = 0
+        self._rotated_at = now
+
+    def record(self, latency_ms: float, now: Optional[float] = None):
+        self._maybe_rotate(time.monotonic() if now is None else now)
+        self._current[self._bucket(latency_ms)] += 1
+        self._current_count += 1
+
+    def count(self) -> int:
+        return self._current_count + self._previous_count
+
+    def percentile(self, q: float, now: Optional[float] = None) -> Optional[float]:
+        """分位数（q取0-1），窗口内无样本时返回None"""
+        self._maybe_rotate(time.monotonic() if now is None else now)
+        total = self.count()
+        if total == 0:
+            return None
+        target = max(1, int(math.ceil(q * total)))
+        cumulative = 0
+        for index in range(self.size):
+            cumulative += self._current[index] + self._previous[index]
+            if cumulative >= target:
+                return self.upper_bound(index)
+        return self.upper_bound(self.size - 1)
+
+
+@dataclass
+class SourceHealthSnapshot:
+    """数据源健康快照"""
+    source: str
+    total_requests: int
+    total_errors: int
+    total_invalid: int
+    window_requests: int
+    window_success_rate: float
+    window_valid_rate: float
+    ewma_success: float
+    ewma_valid: float
+    ewma_latency_ms: float
+    p50_ms: Optional[float]
+    p90_ms: Optional[float]
+    p99_ms: Optional[float]
+    consecutive_failures: int
+    last_error: Optional[str]
+    last_seen: datetime
+    health_score: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'source': self.source,
+            'total_requests': self.total_requests,
+            'total_errors': self.total_errors,
+            'total_invalid': self.total_invalid,
+            'window_requests': self.window_requests,
+            'window_success_rate': round(self.window_success_rate, 4),
+            'window_valid_rate': round(self.window_valid_rate, 4),
+            'ewma_success': round(self.ewma_success, 4),
+            'ewma_valid': round(self.ewma_valid, 4),
+            'ewma_latency_ms': round(self.ewma_latency_ms, 1),
+            'p50_ms': round(self.p50_ms, 1) if self.p50_ms is not None else None,
+            'p90_ms': round(self.p90_ms, 1) if self.p90_ms is not None else None,
+            'p99_ms': round(self.p99_ms, 1) if self.p99_ms is not None else None,
+            'consecutive_failures': self.consecutive_failures,
+            'last_error': self.last_error,
+            'last_seen': self.last_seen.isoformat(),
+            'health_score': round(self.health_score, 4),
+        }
+
+
+class _SourceStats:
+    """单个数据源的流式聚合状态"""
+
+    def __init__(self, alpha: float, window_seconds: float, latency_window_seconds: float):
+        self.success = EWMA(alpha)
+        self.valid = EWMA(alpha)
+        self.latency = EWMA(alpha)
+        self.window_requests = WindowedCounter(window_seconds)
+        self.window_errors = WindowedCounter(window_seconds)
+        self.window_invalid = WindowedCounter(window_seconds)
+        self.histogram = LatencyHistogram(window_seconds=latency_window_seconds)
+        self.total_requests = 0
+        self.total_errors = 0
+        self.total_invalid = 0
+        self.consecutive_failures = 0
+        self.last_error: Optional[str] = None
+        self.last_seen = 0.0
+
+
+class SourceHealthTracker:
+    """
+    数据源被动健康统计器
+
+    由真实请求路径调用 record()，每次记录只做常数次更新；健康评分综合成功率EWMA、
+    数据有效率EWMA与延迟EWMA，连续失败时额外降权，使路由在几次请求内即可避开故障源。
+    """
+
+    def __init__(self, alpha: float = 0.2, window_seconds: float = 60.0,
+                 latency_window_seconds: float = 300.0, latency_reference_ms: float = 1000.0,
+                 min_samples: int = 3):
+        """
+        Args:
+            alpha: EWMA平滑系数，越大对最近请求越敏感
+            window_seconds: 滑动窗口计数的时间窗口（秒）
+            latency_window_seconds: 延迟直方图的轮换周期（秒）
+            latency_reference_ms: 延迟评分基准，延迟等于该值时延迟评分为0.5
+            min_samples: 健康评分生效所需的最少请求数
+        """
+        self.alpha = alpha
+        self.window_seconds = window_seconds
+        self.latency_window_seconds = latency_window_seconds
+        self.latency_reference_ms = latency_reference_ms
+        self.min_samples = min_samples
+        self._stats: Dict[str, _SourceStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, source: str, latency_ms: float, success: bool, valid: bool = True,
+               error: Optional[str] = None):
+        """
+        记录一次真实请求结果
+
+        Args:
+            source: 数据源名称
+            latency_ms: 请求耗时（毫秒）
+            success: 请求是否成功（未抛异常且数据源未报告失败）
+            valid: 返回数据是否有效（仅在成功时有意义）
+            error: 失败原因
+        """
+        now = time.monotonic()
+        valid = bool(success and valid)
+        with self._lock:
+            stats = self._stats.get(source)
+            if stats is None:
+                stats = self._stats[source] = _SourceStats(self.alpha, self.window_seconds,
+                                                           self.latency_window_seconds)
+            stats.total_requests += 1
+            stats.window_requests.add(1, now)
+            stats.success.update(1.0 if success else 0.0)
+            stats.last_seen = time.time()
+            if success:
+                stats.consecutive_failures = 0
+                stats.valid.update(1.0 if valid else 0.0)
+                if not valid:
+                    stats.total_invalid += 1
+                    stats.window_invalid.add(1, now)
+                # 只有成功请求的延迟反映数据源的服务能力，失败请求常常是超时
+                stats.latency.update(latency_ms)
+                stats.histogram.record(latency_ms, now)
+            else:
+                stats.total_errors += 1
+                stats.window_errors.add(1, now)
+                stats.consecutive_failures += 1
+                stats.last_error = error or '未知错误'
+
+    def _score(self, stats: _SourceStats) -> float:
+        latency = stats.latency.get(self.latency_reference_ms)
+        latency_score = 1.0 / (1.0 + latency / self.latency_reference_ms)
+        score = (stats.success.get(1.0) * 0.5 +
+                 stats.valid.get(1.0) * 0.2 +
+                 latency_score * 0.3)
+        if stats.consecutive_failures >= 3:
+            score *= 0.25
+        return max(0.0, min(1.0, score))
+
+    def _snapshot(self, source: str, stats: _SourceStats, now: float) -> SourceHealthSnapshot:
+        window_requests = stats.window_requests.total(now)
+        window_errors = stats.window_errors.total(now)
+        window_successes = window_requests - window_errors
+        window_invalid = stats.window_invalid.total(now)
+        return SourceHealthSnapshot(
+            source=source,
+            total_requests=stats.total_requests,
+            total_errors=stats.total_errors,
+            total_invalid=stats.total_invalid,
+            window_requests=window_requests,
+            window_success_rate=window_successes / window_requests if window_requests else stats.success.get(1.0),
+            window_valid_rate=((window_successes - window_invalid) / window_successes
+                               if window_successes > 0 else stats.valid.get(1.0)),
+            ewma_success=stats.success.get(1.0),
+            ewma_valid=stats.valid.get(1.0),
+            ewma_latency_ms=stats.latency.get(0.0),
+            p50_ms=stats.histogram.percentile(0.5, now),
+            p90_ms=stats.histogram.percentile(0.9, now),
+            p99_ms=stats.histogram.percentile(0.99, now),
+            consecutive_failures=stats.consecutive_failures,
+            last_error=stats.last_error,
+            last_seen=datetime.fromtimestamp(stats.last_seen),
+            health_score=self._score(stats),
+        )
+
+    def snapshot(self, source: str) -> Optional[SourceHealthSnapshot]:
+        """获取单个数据源的健康快照，没有记录时返回None"""
+        with self._lock:
+            stats = self._stats.get(source)
+            return self._snapshot(source, stats, time.monotonic()) if stats else None
+
+    def snapshots(self) -> Dict[str, SourceHealthSnapshot]:
+        """获取全部数据源的健康快照"""
+        now = time.monotonic()
+        with self._lock:
+            return {source: self._snapshot(source, stats, now) for source, stats in self._stats.items()}
+
+    def health_score(self, source: str) -> Optional[float]:
+        """健康评分 (0-1)，样本数不足 min_samples 时返回None"""
+        with self._lock:
+            stats = self._stats.get(source)
+            if stats is None or stats.total_requests < self.min_samples:
+                return None
+            return self._score(stats)
+
+    def health_scores(self, sources: List[str]) -> Dict[str, Optional[float]]:
+        """批量获取健康评分，一次加锁"""
+        with self._lock:
+            scores = {}
+            for source in sources:
+                stats = self._stats.get(source)
+                scores[source] = (self._score(stats) if stats is not None and
+                                  stats.total_requests >= self.min_samples else None)
+            return scores
+
+    def latency_percentile(self, source: str, q: float) -> Optional[float]:
+        """成功请求延迟的分位数（毫秒），窗口内无样本时返回None"""
+        with self._lock:
+            stats = self._stats.get(source)
+            return stats.histogram.percentile(q) if stats else None
+
+    def reset(self, source: Optional[str] = None):
+        """清除指定数据源（为空时清除全部）的统计"""
+        with self._lock:
+            if source is None:
+                self._stats.clear()
+            else:
+                self._stats.pop(source, None)
+
+
+# 全局实例
+_source_health_tracker = None
+_source_health_tracker_lock = threading.Lock()
+
+
+def get_source_health_tracker() -> SourceHealthTracker:
+    """获取全局数据源健康统计器实例"""
+    global _source_health_tracker
+    with _source_health_tracker_lock:
+        if _source_health_tracker is None:
+            _source_health_tracker = SourceHealthTracker()
+        return _source_health_tracker
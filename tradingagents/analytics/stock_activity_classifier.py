@@ -18,6 +18,29 @@ from tradingagents.dataflows.stock_master_manager import get_stock_master_manage
 
 logger = get_logger('activity_classifier')
 
+# 活跃度计算需要的历史数据列
+ACTIVITY_COLUMNS = ['volume', 'close', 'change_pct']
+
+
+def _amount_score(avg_amount):
+    """平均成交额（万元）标准化到0-100分，支持标量和数组"""
+    x = np.asarray(avg_amount, dtype=float)
+    return np.select(
+        [x >= 10000, x >= 1000, x >= 100, x >= 10],       # 1亿元以上 / 1000万-1亿元 / 100万-1000万 / 10万-100万
+        [100.0, 80.0 + 20.0 * (x - 1000) / 9000, 50.0 + 30.0 * (x - 100) / 900, 20.0 + 30.0 * (x - 10) / 90],
+        default=0.0 + 20.0 * x / 10                          # 10万以下
+    )
+
+
+def _volatility_score(volatility):
+    """平均涨跌幅绝对值（%）标准化到0-100分，支持标量和数组"""
+    x = np.asarray(volatility, dtype=float)
+    return np.select(
+        [x >= 5, x >= 3, x >= 1, x >= 0.5],                 # 5%以上 / 3-5% / 1-3% / 0.5-1%
+        [100.0, 80.0 + 20.0 * (x - 3) / 2, 50.0 + 30.0 * (x - 1) / 2, 20.0 + 30.0 * (x - 0.5) / 0.5],
+        default=0.0 + 20.0 * x / 0.5                         # 0.5%以下
+    )
+
 
 class StockActivityClassifier:
     """股票活跃度智能分类器"""
@@ -118,16 +141,7 @@ class StockActivityClassifier:
             avg_amount = (data['volume'] * data['close']).mean() / 10000
             
             # 标准化到0-100分
-            if avg_amount >= 10000:  # 1亿元以上
-                return 100.0
-            elif avg_amount >= 1000:  # 1000万-1亿元
-                return 80.0 + 20.0 * (avg_amount - 1000) / 9000
-            elif avg_amount >= 100:   # 100万-1000万
-                return 50.0 + 30.0 * (avg_amount - 100) / 900
-            elif avg_amount >= 10:    # 10万-100万
-                return 20.0 + 30.0 * (avg_amount - 10) / 90
-            else:                     # 10万以下
-                return 0.0 + 20.0 * avg_amount / 10
+            return float(_amount_score(avg_amount))
                 
         except Exception as e:
             logger.debug(f"计算{symbol}成交量分数失败: {e}")
@@ -156,16 +170,7 @@ class StockActivityClassifier:
             volatility = data['change_pct'].abs().mean()
             
             # 标准化到0-100分
-            if volatility >= 5:      # 5%以上
-                return 100.0
-            elif volatility >= 3:    # 3-5%
-                return 80.0 + 20.0 * (volatility - 3) / 2
-            elif volatility >= 1:    # 1-3%
-                return 50.0 + 30.0 * (volatility - 1) / 2
-            elif volatility >= 0.5:  # 0.5-1%
-                return 20.0 + 30.0 * (volatility - 0.5) / 0.5
-            else:                    # 0.5%以下
-                return 0.0 + 20.0 * volatility / 0.5
+            return float(_volatility_score(volatility))
                 
         except Exception as e:
             logger.debug(f"计算{symbol}价格波动分数失败: {e}")
@@ -241,6 +246,134 @@ class StockActivityClassifier:
                 'error': str(e)
             }
     
+    def _load_history_panel(self, symbols: List[str], days: int, max_workers: int) -> pd.DataFrame:
+        """
+        一次性加载所有股票最近days天的行情，拼成长表（symbol + ACTIVITY_COLUMNS）
+        
+        每只股票的历史文件只读取一次且只读取需要的列，文件读取并行执行。
+        """
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=days+10)  # 多取一些避免周末
+        
+        histories = self.historical_manager.load_historical_data_many(
+            symbols, "daily",
+            start_date.strftime('%Y-%m-%d'),
+            end_date.strftime('%Y-%m-%d'),
+            columns=ACTIVITY_COLUMNS,
+            max_workers=max_workers
+        )
+        
+        frames = [data.tail(days) for data in histories.values()]
+        if frames:
+            panel = pd.concat(frames, ignore_index=True, sort=False)
+            panel['symbol'] = np.repeat(list(histories), [len(frame) for frame in frames])
+        else:
+            panel = pd.DataFrame(columns=['symbol'])
+        for column in ACTIVITY_COLUMNS:
+            # 缺少的列按缺失值处理，与逐只计算时该维度记0分一致
+            panel[column] = pd.to_numeric(panel[column], errors='coerce') if column in panel.columns else np.nan
+        return panel
+    
+    def _load_outstanding_shares(self, symbols: List[str]) -> Tuple[pd.Series, pd.Series]:
+        """
+        一次性读取股票列表中的流通股本
+        
+        Returns:
+            (流通股本, 是否有股票信息)：与 get_stock_info 一致，股票列表中没有流通股本列
+            或找不到该股票时视为没有信息，由调用方按成交量估算
+        """
+        index = pd.Index(symbols)
+        missing = (pd.Series(np.nan, index=index), pd.Series(False, index=index))
+        try:
+            stock_list = self.stock_manager.load_stock_list()
+        except Exception as e:
+            logger.debug(f"读取股票列表失败: {e}")
+            return missing
+        
+        if (stock_list is None or stock_list.empty or 'symbol' not in stock_list.columns
+                or 'outstanding_shares' not in stock_list.columns):
+            return missing
+        
+        shares = stock_list.drop_duplicates('symbol').set_index('symbol')['outstanding_shares']
+        shares = pd.to_numeric(shares, errors='coerce')
+        return shares.reindex(index), pd.Series(index.isin(shares.index), index=index)
+    
+    def calculate_activity_scores(self, symbols: List[str], days: int = 5,
+                                  max_workers: int = 8) -> pd.DataFrame:
+        """
+        批量计算股票活跃度综合分数
+        
+        与逐只调用 calculate_activity_score 的结果一致，但每只股票的历史数据只加载一次，
+        股票列表只读取一次，各维度指标在全部股票上向量化计算。
+        
+        Args:
+            symbols: 股票代码列表
+            days: 计算天数
+            max_workers: 并行读取历史数据的线程数
+            
+        Returns:
+            DataFrame: 每只股票一行，列与 calculate_activity_score 的返回字段相同
+        """
+        symbols = list(dict.fromkeys(symbols))
+        start = datetime.now()
+        
+        panel = self._load_history_panel(symbols, days, max_workers)
+        grouped = panel.groupby('symbol', sort=False)
+        
+        # 数据量不足70%的股票，行情相关维度记0分
+        valid = (grouped.size().reindex(symbols, fill_value=0) >= days * 0.7).to_numpy()
+        
+        # 换手率 = 成交量 / 流通股本 * 100%，没有股票信息时按平均成交量粗略估算流通股本
+        shares, has_info = self._load_outstanding_shares(symbols)
+        estimated = grouped['volume'].mean().reindex(symbols) * 100
+        shares = shares.where(has_info, estimated)
+        turnover = (panel['volume'] / panel['symbol'].map(shares) * 100).groupby(panel['symbol']).mean()
+        turnover = turnover.reindex(symbols).to_numpy(dtype=float)
+        turnover = np.where(valid & (turnover > 0), turnover, 0.0)
+        
+        # 平均成交额（万元）与平均涨跌幅绝对值
+        avg_amount = (panel['volume'] * panel['close']).groupby(panel['symbol']).mean() / 10000
+        volatility = panel['change_pct'].abs().groupby(panel['symbol']).mean()
+        volume_score = np.nan_to_num(_amount_score(avg_amount.reindex(symbols).to_numpy(dtype=float)), nan=0.0)
+        volatility_score = np.nan_to_num(_volatility_score(volatility.reindex(symbols).to_numpy(dtype=float)), nan=0.0)
+        volume_score = np.where(valid, volume_score, 0.0)
+        volatility_score = np.where(valid, volatility_score, 0.0)
+        
+        news_score = np.array([self.calculate_news_heat_score(symbol) for symbol in symbols], dtype=float)
+        fund_score = np.array([self.calculate_fund_flow_score(symbol) for symbol in symbols], dtype=float)
+        
+        # 标准化换手率分数（10%换手率为满分）并计算综合评分
+        turnover_normalized = np.minimum(100.0, turnover * 10)
+        total_score = (
+            turnover_normalized * self.weights['turnover_rate'] +
+            volume_score * self.weights['volume'] +
+            volatility_score * self.weights['price_volatility'] +
+            news_score * self.weights['news_heat'] +
+            fund_score * self.weights['fund_flow']
+        )
+        classification = np.select(
+            [total_score >= self.thresholds['active'], total_score >= self.thresholds['normal']],
+            ['active', 'normal'],
+            default='inactive'
+        )
+        
+        result = pd.DataFrame({
+            'symbol': symbols,
+            'total_score': np.round(total_score, 2),
+            'turnover_rate': np.round(turnover, 2),
+            'turnover_score': np.round(turnover_normalized, 2),
+            'volume_score': np.round(volume_score, 2),
+            'volatility_score': np.round(volatility_score, 2),
+            'news_score': np.round(news_score, 2),
+            'fund_score': np.round(fund_score, 2),
+            'classification': classification,
+            'last_updated': datetime.now().isoformat()
+        })
+        
+        elapsed = (datetime.now() - start).total_seconds()
+        logger.info(f"✅ 批量计算活跃度评分: {len(symbols)}只股票 (有行情{int(valid.sum())}只), 耗时{elapsed:.2f}秒")
+        return result
+    
     def _classify_by_score(self, score: float) -> str:
         """根据分数分类"""
         if score >= self.thresholds['active']:
@@ -250,13 +383,14 @@ class StockActivityClassifier:
         else:
             return 'inactive'    # 冷门股票
     
-    def classify_stocks(self, symbols: List[str], days: int = 5) -> Dict[str, List[str]]:
+    def classify_stocks(self, symbols: List[str], days: int = 5, max_workers: int = 8) -> Dict[str, List[str]]:
         """
         批量分类股票
         
         Args:
             symbols: 股票代码列表
             days: 计算天数
+            max_workers: 并行读取历史数据的线程数
             
         Returns:
             分类结果字典
@@ -270,19 +404,30 @@ class StockActivityClassifier:
             'unknown': []      # 未知分类
         }
         
-        for symbol in symbols:
-            try:
-                score_result = self.calculate_activity_score(symbol, days)
-                classification = score_result['classification']
-                
-                if classification in results:
-                    results[classification].append(symbol)
-                else:
-                    results['unknown'].append(symbol)
+        try:
+            scores = self.calculate_activity_scores(symbols, days, max_workers=max_workers)
+        except Exception as e:
+            logger.error(f"❌ 批量计算活跃度失败，改为逐只计算: {e}")
+            scores = None
+        
+        if scores is not None:
+            classifications = dict(zip(scores['symbol'], scores['classification']))
+            for symbol in symbols:
+                results.get(classifications.get(symbol), results['unknown']).append(symbol)
+        else:
+            for symbol in symbols:
+                try:
+                    score_result = self.calculate_activity_score(symbol, days)
+                    classification = score_result['classification']
                     
-            except Exception as e:
-                logger.error(f"❌ 分类{symbol}失败: {e}")
-                results['unknown'].append(symbol)
+                    if classification in results:
+                        results[classification].append(symbol)
+                    else:
+                        results['unknown'].append(symbol)
+                        
+                except Exception as e:
+                    logger.error(f"❌ 分类{symbol}失败: {e}")
+                    results['unknown'].append(symbol)
         
         # 统计结果
         total = sum(len(v) for v in results.values())
@@ -319,6 +464,11 @@ def classify_stock_activity(symbol: str, days: int = 5) -> Dict[str, float]:
     return get_activity_classifier().calculate_activity_score(symbol, days)
 
 
+def calculate_activity_scores_batch(symbols: List[str], days: int = 5) -> pd.DataFrame:
+    """批量股票活跃度评分"""
+    return get_activity_classifier().calculate_activity_scores(symbols, days)
+
+
 def classify_stocks_batch(symbols: List[str], days: int = 5) -> Dict[str, List[str]]:
     """批量股票活跃度分类"""
     return get_activity_classifier().classify_stocks(symbols, days)
\ No newline at end of file
@@ -24,6 +24,8 @@ from asyncio import Queue, Semaphore
 from collections import defaultdict
 import functools
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 from ..utils.logging_manager import get_logger
 
@@ -51,7 +53,15 @@ class PipelineConfig:
     """管道配置"""
     max_concurrent_tasks: int = 50          # 最大并发任务数
     batch_size: int = 100                   # 批处理大小
-    queue_size: int = 1000                  # 队列大小
+    queue_size: int = 200                   # 阶段间队列大小（有界，提供背压）
+    fetch_workers: int = 32                 # 获取阶段工作器数量（I/O密集）
+    stage_workers: int = 2                  # 其他阶段工作器数量（CPU轻量）
+    executor_workers: int = 16              # 同步数据源的线程池大小
+    quote_base_url: str = "https://qt.gtimg.cn"         # 行情接口地址
+    kline_base_url: str = "https://web.ifzq.gtimg.cn"   # K线接口地址
+    kline_count: int = 30                   # K线条数（用于均线/均量）
+    enable_social: bool = True              # 启用社交数据（雪球）
+    enable_manager_fallback: bool = True    # 行情失败时回退到EnhancedDataManager
     timeout_seconds: float = 30.0           # 超时时间
     retry_count: int = 3                    # 重试次数
     retry_delay: float = 1.0                # 重试延迟
@@ -100,27 +110,21 @@ class AsyncDataPipeline:
         """
         self.config = config or PipelineConfig()
         self.data_manager = None  # 延迟初始化以避免循环导入
+        self._data_manager_lock = threading.Lock()
         
         # 初始化雪球数据提供器
         self.xueqiu_provider = None
-        if XUEQIU_AVAILABLE:
+        if XUEQIU_AVAILABLE and self.config.enable_social:
             try:
                 self.xueqiu_provider = get_xueqiu_provider()
                 logger.info("✅ 异步管道：雪球数据提供器初始化成功")
             except Exception as e:
                 logger.warning(f"⚠️ 异步管道：雪球数据提供器初始化失败: {e}")
         
-        # 创建阶段队列
-        self.queues = {
-            PipelineStage.DATA_FETCH: Queue(maxsize=self.config.queue_size),
-            PipelineStage.DATA_CLEAN: Queue(maxsize=self.config.queue_size),
-            PipelineStage.DATA_ENRICH: Queue(maxsize=self.config.queue_size),
-            PipelineStage.DATA_ANALYZE: Queue(maxsize=self.config.queue_size),
-            PipelineStage.DATA_AGGREGATE: Queue(maxsize=self.config.queue_size)
-        }
-        
-        # 信号量控制并发
-        self.semaphore = Semaphore(self.config.max_concurrent_tasks)
+        # 阶段队列与信号量在 start() 中创建，绑定到当前事件循环
+        self.queues = {}
+        self.result_queue = None
+        self.semaphore = None
         
         # 缓存
         self._cache = {}
@@ -134,12 +138,14 @@ class AsyncDataPipeline:
         self.processors = {}
         self._register_default_processors()
         
-        # HTTP会话
+        # HTTP会话与同步数据源线程池
         self.session = None
+        self._executor = None
         
         # 运行状态
         self.is_running = False
         self.workers = []
+        self._feeder = None
         
         logger.info("🚀 异步数据管道初始化完成")
         logger.info(f"📊 配置: 最大并发={self.config.max_concurrent_tasks}, 批次大小={self.config.batch_size}")
@@ -152,16 +158,35 @@ class AsyncDataPipeline:
         
         self.is_running = True
         
-        # 创建HTTP会话
+        # 有界阶段队列：下游变慢时上游 put 会挂起，形成背压
+        self.queues = {
+            stage: Queue(maxsize=self.config.queue_size) for stage in PipelineStage
+        }
+        self.result_queue = Queue(maxsize=self.config.queue_size)
+        self.semaphore = Semaphore(self.config.max_concurrent_tasks)
+        
+        # 创建HTTP会话（连接池上限与并发任务数一致）
         self.session = aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=self.config.timeout_seconds)
+            timeout=aiohttp.ClientTimeout(total=self.config.timeout_seconds),
+            connector=aiohttp.TCPConnector(limit=self.config.max_concurrent_tasks),
+            headers={
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+                'Referer': 'https://finance.qq.com/'
+            }
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.config.executor_workers,
+            thread_name_prefix='pipeline-sync'
         )
         
-        # 启动工作器
-        self.workers = [
-            asyncio.create_task(self._stage_worker(stage))
-            for stage in PipelineStage
-        ]
+        # 启动工作器：获取阶段为I/O密集，使用更多工作器
+        for stage in PipelineStage:
+            worker_count = (self.config.fetch_workers if stage == PipelineStage.DATA_FETCH
+                            else self.config.stage_workers)
+            self.workers.extend(
+                asyncio.create_task(self._stage_worker(stage))
+                for _ in range(max(1, worker_count))
+            )
         
         # 启动度量收集器
         self.workers.append(
@@ -177,17 +202,21 @@ class AsyncDataPipeline:
         
         self.is_running = False
         
-        # 等待队列清空
-        for queue in self.queues.values():
-            await queue.join()
-        
-        # 取消工作器
-        for worker in self.workers:
-            worker.cancel()
+        # 取消投递器和工作器
+        tasks = self.workers + ([self._feeder] if self._feeder else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.workers = []
+        self._feeder = None
         
-        # 关闭HTTP会话
+        # 关闭HTTP会话和线程池
         if self.session:
             await self.session.close()
+            self.session = None
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
         
         logger.info("🛑 异步数据管道已停止")
     
@@ -209,21 +238,13 @@ class AsyncDataPipeline:
         await self.start()
         
         try:
-            # 创建数据包并加入队列
-            packets = []
-            for symbol in symbols:
-                packet = DataPacket(
-                    id=f"{symbol}_{int(time.time()*1000)}",
-                    symbol=symbol,
-                    stage=PipelineStage.DATA_FETCH,
-                    data={'symbol': symbol}
-                )
-                packets.append(packet)
-                await self.queues[PipelineStage.DATA_FETCH].put(packet)
+            # 独立的投递任务：入口队列满时挂起，与结果收集并行进行
+            self.metrics.total_packets += len(symbols)
+            self._feeder = asyncio.create_task(self._feed_symbols(symbols))
             
             # 收集结果
             results = {}
-            result_queue = self.queues[PipelineStage.DATA_AGGREGATE]
+            result_queue = self.result_queue
             
             # 等待所有结果
             processed_count = 0
@@ -255,7 +276,7 @@ class AsyncDataPipeline:
             # 计算度量
             total_time = time.time() - start_time
             self.metrics.total_time = total_time
-            self.metrics.throughput = processed_count / max(total_time, 1)
+            self.metrics.throughput = processed_count / max(total_time, 1e-6)
             self.metrics.error_rate = (len(symbols) - processed_count) / max(len(symbols), 1)
             
             logger.info(f"✅ 处理完成: {processed_count}/{len(symbols)} 成功")
@@ -271,86 +292,81 @@ class AsyncDataPipeline:
             # 停止管道
             await self.stop()
     
+    async def _feed_symbols(self, symbols: List[str]):
+        """将股票代码逐个投递到获取阶段队列"""
+        fetch_queue = self.queues[PipelineStage.DATA_FETCH]
+        for symbol in symbols:
+            packet = DataPacket(
+                id=f"{symbol}_{int(time.time()*1000)}",
+                symbol=symbol,
+                stage=PipelineStage.DATA_FETCH,
+                data={'symbol': symbol}
+            )
+            await fetch_queue.put(packet)
+    
     async def _stage_worker(self, stage: PipelineStage):
         """阶段工作器"""
         input_queue = self.queues[stage]
         
-        # 确定下一阶段
+        # 确定下一阶段，聚合阶段输出到结果队列
         stage_order = list(PipelineStage)
         current_index = stage_order.index(stage)
         next_stage = stage_order[current_index + 1] if current_index < len(stage_order) - 1 else None
-        output_queue = self.queues[next_stage] if next_stage else None
+        output_queue = self.queues[next_stage] if next_stage else self.result_queue
         
         while self.is_running:
             try:
-                # 从输入队列获取数据包
-                packet = await asyncio.wait_for(
-                    input_queue.get(), 
-                    timeout=1.0
-                )
+                packet = await input_queue.get()
+            except asyncio.CancelledError:
+                break
+            
+            try:
+                processor = self.processors.get(stage)
+                if processor is None:
+                    logger.warning(f"⚠️ 未找到 {stage.value} 阶段的处理器")
+                    packet.error = f"未找到处理器: {stage.value}"
+                    self.metrics.failed_packets += 1
+                    await self.result_queue.put(packet)
+                    continue
                 
-                # 处理数据包
-                async with self.semaphore:
-                    start_time = time.time()
-                    
-                    try:
-                        # 获取处理器
-                        processor = self.processors.get(stage)
-                        if processor:
-                            # 执行处理
-                            processed_packet = await processor(packet)
-                            
-                            # 更新阶段
-                            if next_stage:
-                                processed_packet.stage = next_stage
-                            
-                            # 记录处理时间
-                            process_time = time.time() - start_time
-                            self._stage_timers[stage.value].append(process_time)
-                            
-                            # 发送到下一阶段或完成
-                            if output_queue:
-                                await output_queue.put(processed_packet)
-                            
-                            # 更新度量
-                            self.metrics.processed_packets += 1
-                            
-                        else:
-                            logger.warning(f"⚠️ 未找到 {stage.value} 阶段的处理器")
-                            packet.error = f"未找到处理器: {stage.value}"
-                            self.metrics.failed_packets += 1
-                            
-                            # 直接发送到聚合阶段
-                            if stage != PipelineStage.DATA_AGGREGATE:
-                                await self.queues[PipelineStage.DATA_AGGREGATE].put(packet)
-                    
-                    except Exception as e:
-                        logger.error(f"❌ 处理 {packet.symbol} 在 {stage.value} 阶段失败: {e}")
-                        packet.error = str(e)
-                        packet.retry_count += 1
-                        
-                        # 重试或放弃
-                        if packet.retry_count < self.config.retry_count:
-                            await asyncio.sleep(self.config.retry_delay * packet.retry_count)
-                            await input_queue.put(packet)
-                        else:
-                            self.metrics.failed_packets += 1
-                            # 发送到聚合阶段标记为失败
-                            if stage != PipelineStage.DATA_AGGREGATE:
-                                await self.queues[PipelineStage.DATA_AGGREGATE].put(packet)
+                start_time = time.time()
+                processed_packet = await self._run_processor(processor, stage, packet)
+                self._stage_timers[stage.value].append(time.time() - start_time)
                 
-                # 标记任务完成
-                input_queue.task_done()
+                if processed_packet.error and stage != PipelineStage.DATA_AGGREGATE:
+                    # 失败数据包直接送往结果队列
+                    self.metrics.failed_packets += 1
+                    await self.result_queue.put(processed_packet)
+                    continue
+                
+                if next_stage:
+                    processed_packet.stage = next_stage
+                self.metrics.processed_packets += 1
+                
+                # 下游队列满时在此挂起（背压）
+                await output_queue.put(processed_packet)
                 
-            except asyncio.TimeoutError:
-                # 超时继续循环
-                continue
             except asyncio.CancelledError:
-                # 任务被取消
                 break
             except Exception as e:
                 logger.error(f"❌ 工作器 {stage.value} 异常: {e}")
-                await asyncio.sleep(1)
+            finally:
+                input_queue.task_done()
+    
+    async def _run_processor(self, processor: Callable, stage: PipelineStage,
+                             packet: DataPacket) -> DataPacket:
+        """在信号量保护下执行处理器，失败时在工作器内原地重试"""
+        while True:
+            try:
+                async with self.semaphore:
+                    return await processor(packet)
+            except Exception as e:
+                packet.retry_count += 1
+                if packet.retry_count >= self.config.retry_count:
+                    logger.error(f"❌ 处理 {packet.symbol} 在 {stage.value} 阶段失败: {e}")
+                    packet.error = str(e)
+                    return packet
+                await asyncio.sleep(self.config.retry_delay * packet.retry_count)
     
     def _register_default_processors(self):
         """注册默认处理器"""
@@ -375,17 +391,15 @@ class AsyncDataPipeline:
         # 异步获取多源数据
         fetch_tasks = []
         
-        # 价格数据
+        # 价格与估值数据（同一行情响应）
         fetch_tasks.append(self._fetch_price_data(symbol))
         
-        # 基础数据
-        fetch_tasks.append(self._fetch_basic_data(symbol))
-        
-        # 市场数据
+        # 市场数据（K线均线/均量）
         fetch_tasks.append(self._fetch_market_data(symbol))
         
         # 社交数据（雪球）
-        fetch_tasks.append(self._fetch_social_data(symbol))
+        if self.config.enable_social:
+            fetch_tasks.append(self._fetch_social_data(symbol))
         
         # 并发执行
         results = await asyncio.gather(*fetch_tasks, return_exceptions=True)
@@ -573,70 +587,120 @@ class AsyncDataPipeline:
         
         return packet
     
-    async def _fetch_price_data(self, symbol: str) -> Dict[str, Any]:
-        """异步获取价格数据"""
-        try:
-            # 这里应该调用实际的API
-            # 模拟异步获取
-            await asyncio.sleep(0.1)
-            
-            # 延迟初始化数据管理器以避免循环导入
+    @staticmethod
+    def _to_tencent_code(symbol: str) -> str:
+        """转换为腾讯行情代码格式 (000001 -> sz000001)"""
+        if len(symbol) == 6 and symbol.isdigit():
+            return f"sz{symbol}" if symbol.startswith(('00', '30')) else f"sh{symbol}"
+        return symbol.lower()
+    
+    async def _http_get_text(self, url: str, params: Dict[str, str] = None) -> Optional[str]:
+        """原生异步HTTP GET，返回文本"""
+        async with self.session.get(url, params=params) as response:
+            if response.status != 200:
+                raise aiohttp.ClientResponseError(
+                    response.request_info, response.history,
+                    status=response.status, message=f"HTTP {response.status}"
+                )
+            raw = await response.read()
+        return raw.decode('gbk', errors='ignore')
+    
+    async def _run_sync(self, func: Callable, *args) -> Any:
+        """在线程池中执行同步数据源调用，避免阻塞事件循环"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args))
+    
+    @staticmethod
+    def _parse_quote_text(text: str) -> Dict[str, Any]:
+        """解析腾讯行情响应: v_sh600000="1~浦发银行~600000~..." """
+        if not text or '="' not in text:
+            return {}
+        fields = text.split('="', 1)[1].rsplit('"', 1)[0].split('~')
+        if len(fields) < 47:
+            return {}
+        
+        def num(index: int) -> float:
+            try:
+                return float(fields[index]) if fields[index] else 0.0
+            except ValueError:
+                return 0.0
+        
+        return {
+            'name': fields[1],
+            'price': num(3),
+            'prev_close': num(4),
+            'open': num(5),
+            'volume': num(6) * 100,                 # 手 -> 股
+            'high': num(33),
+            'low': num(34),
+            'amount': num(37) * 10000,              # 万元 -> 元
+            'turnover_rate': num(38),
+            'pe_ratio': num(39),
+            'market_cap': num(45) * 100000000,      # 亿元 -> 元
+            'pb_ratio': num(46),
+        }
+    
+    def _get_data_manager(self):
+        """延迟初始化数据管理器以避免循环导入"""
+        with self._data_manager_lock:
             if self.data_manager is None:
                 try:
                     from ..dataflows.enhanced_data_manager import EnhancedDataManager
                     self.data_manager = EnhancedDataManager()
                 except ImportError:
-                    pass
-            
-            # 使用数据管理器获取
-            if self.data_manager:
-                try:
-                    price_data = self.data_manager.get_latest_price_data(symbol)
-                    if price_data:
-                        return price_data
-                except Exception as e:
-                    logger.debug(f"数据管理器获取失败: {e}")
-            
-            # 返回模拟数据
-            return {
-                'price': np.random.uniform(10, 100),
-                'volume': np.random.randint(1000000, 10000000),
-                'high': np.random.uniform(100, 110),
-                'low': np.random.uniform(90, 100),
-                'prev_close': np.random.uniform(95, 105)
-            }
-        except Exception as e:
-            logger.debug(f"获取价格数据失败 {symbol}: {e}")
-            return {}
+                    self.data_manager = False
+        return self.data_manager or None
     
-    async def _fetch_basic_data(self, symbol: str) -> Dict[str, Any]:
-        """异步获取基础数据"""
+    async def _fetch_price_data(self, symbol: str) -> Dict[str, Any]:
+        """异步获取价格与估值数据（腾讯行情原生异步请求，失败时回退到同步数据管理器）"""
         try:
-            await asyncio.sleep(0.1)
-            
-            # 返回模拟数据
-            return {
-                'market_cap': np.random.uniform(10, 1000) * 100000000,
-                'pe_ratio': np.random.uniform(5, 50),
-                'pb_ratio': np.random.uniform(0.5, 5),
-                'roe': np.random.uniform(5, 30)
-            }
+            text = await self._http_get_text(
+                f"{self.config.quote_base_url}/q={self._to_tencent_code(symbol)}"
+            )
+            quote = self._parse_quote_text(text)
+            if quote.get('price', 0) > 0:
+                return quote
         except Exception as e:
-            logger.debug(f"获取基础数据失败 {symbol}: {e}")
+            logger.debug(f"腾讯行情获取失败 {symbol}: {e}")
+        
+        if not self.config.enable_manager_fallback:
             return {}
+        
+        try:
+            manager = await self._run_sync(self._get_data_manager)
+            if manager:
+                price_data = await self._run_sync(manager.get_latest_price_data, symbol)
+                if price_data:
+                    price_data = dict(price_data)
+                    price_data.setdefault('price', price_data.pop('current_price', 0))
+                    return price_data
+        except Exception as e:
+            logger.debug(f"数据管理器获取失败 {symbol}: {e}")
+        return {}
     
     async def _fetch_market_data(self, symbol: str) -> Dict[str, Any]:
-        """异步获取市场数据"""
+        """异步获取市场数据（腾讯日K线，计算均线与均量）"""
+        code = self._to_tencent_code(symbol)
         try:
-            await asyncio.sleep(0.1)
+            text = await self._http_get_text(
+                f"{self.config.kline_base_url}/appstock/app/kline/kline",
+                params={'param': f"{code},day,,,{self.config.kline_count},qfq"}
+            )
+            start = text.find('{')
+            if start == -1:
+                return {}
+            payload = json.loads(text[start:])
+            stock_data = (payload.get('data') or {}).get(code) or {}
+            bars = stock_data.get('qfqday') or stock_data.get('day') or []
+            closes = [float(bar[2]) for bar in bars if len(bar) >= 6]
+            volumes = [float(bar[5]) * 100 for bar in bars if len(bar) >= 6]
+            if not closes:
+                return {}
             
-            # 返回模拟数据
             return {
-                'sector': 'Technology',
-                'industry': 'Software',
-                'avg_volume': np.random.randint(500000, 5000000),
-                'ma5': np.random.uniform(95, 105),
-                'ma20': np.random.uniform(90, 110)
+                'ma5': float(np.mean(closes[-5:])),
+                'ma20': float(np.mean(closes[-20:])),
+                'avg_volume': float(np.mean(volumes[-20:])),
             }
         except Exception as e:
             logger.debug(f"获取市场数据失败 {symbol}: {e}")
@@ -649,11 +713,7 @@ class AsyncDataPipeline:
                 return {}
             
             # 使用线程池执行同步的雪球API调用
-            loop = asyncio.get_event_loop()
-            
-            # 获取雪球情绪数据
-            xueqiu_sentiment = await loop.run_in_executor(
-                None, 
+            xueqiu_sentiment = await self._run_sync(
                 self.xueqiu_provider.get_stock_sentiment,
                 symbol,
                 7  # days
@@ -663,8 +723,7 @@ class AsyncDataPipeline:
                 return {}
             
             # 获取讨论数据（限制数量以提高速度）
-            discussions = await loop.run_in_executor(
-                None,
+            discussions = await self._run_sync(
                 self.xueqiu_provider.get_stock_discussions,
                 symbol,
                 20  # limit
@@ -779,6 +838,8 @@ class AsyncDataPipeline:
                 # 更新队列大小
                 for stage, queue in self.queues.items():
                     self.metrics.queue_sizes[stage.value] = queue.qsize()
+                if self.result_queue is not None:
+                    self.metrics.queue_sizes['results'] = self.result_queue.qsize()
                 
                 # 计算阶段平均时间
                 for stage, times in self._stage_timers.items():
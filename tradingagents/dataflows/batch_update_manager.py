@@ -68,10 +68,12 @@ class BatchUpdateManager:
         
         logger.info(f"🚀 批量更新管理器初始化完成，最大并行数：{max_workers}")
     
-    def should_update(self, symbol: str, classification: str) -> bool:
-        """判断是否需要更新"""
+    def should_update(self, symbol: str, classification: str,
+                      availability: Optional[Dict[str, Any]] = None) -> bool:
+        """判断是否需要更新（可传入已批量查询的可用性信息）"""
         try:
-            availability = self.historical_manager.get_data_availability(symbol, "daily")
+            if availability is None:
+                availability = self.historical_manager.get_data_availability(symbol, "daily")
             
             if not availability['available']:
                 return True
@@ -94,16 +96,19 @@ class BatchUpdateManager:
         # 批量分类股票
         classifications = self.classifier.classify_stocks(symbols)
         
+        # 一次查询全部股票的数据索引，避免逐只股票反复查询
+        availabilities = self.historical_manager.get_data_availability_many(symbols, "daily")
+        
         tasks = []
         
         for classification, symbols_list in classifications.items():
             for symbol in symbols_list:
-                if self.should_update(symbol, classification):
+                availability = availabilities.get(symbol)
+                if self.should_update(symbol, classification, availability):
                     # 获取更新预估时间
-                    estimated_time = self._estimate_update_time(symbol)
+                    estimated_time = self._estimate_update_time(symbol, availability)
                     
                     # 获取最后更新时间
-                    availability = self.historical_manager.get_data_availability(symbol, "daily")
                     last_update = None
                     if availability['available']:
                         last_update = datetime.fromisoformat(availability['last_updated'])
@@ -124,12 +129,13 @@ class BatchUpdateManager:
         logger.info(f"📊 创建更新任务：{len(tasks)}个，跳过{len(symbols) - len(tasks)}个")
         return tasks
     
-    def _estimate_update_time(self, symbol: str) -> float:
+    def _estimate_update_time(self, symbol: str, availability: Optional[Dict[str, Any]] = None) -> float:
         """估算单个股票更新时间"""
         # 基于历史经验估算
         try:
             # 检查现有数据量
-            availability = self.historical_manager.get_data_availability(symbol, "daily")
+            if availability is None:
+                availability = self.historical_manager.get_data_availability(symbol, "daily")
             
             if not availability['available']:
                 return 5.0  # 全量更新约5秒
@@ -138,7 +144,8 @@ class BatchUpdateManager:
             missing_ranges = self.historical_manager.get_missing_date_ranges(
                 symbol, "daily", 
                 start_date=availability['end_date'],
-                end_date=datetime.now().strftime('%Y-%m-%d')
+                end_date=datetime.now().strftime('%Y-%m-%d'),
+                availability=availability
             )
             
             if not missing_ranges:
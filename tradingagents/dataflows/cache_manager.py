@@ -157,6 +157,10 @@ class StockDataCache:
             logger.error(f"⚠️ 加载元数据失败: {e}")
             return None
     
+    def get_metadata(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """获取缓存项的元数据（symbol、start_date、end_date、data_source 等），不存在时返回None"""
+        return self._load_metadata(cache_key)
+    
     def is_cache_valid(self, cache_key: str, max_age_hours: int = None, symbol: str = None, data_type: str = None) -> bool:
         """检查缓存是否有效 - 支持智能TTL配置"""
         metadata = self._load_metadata(cache_key)
@@ -347,18 +351,22 @@ class StockDataCache:
         logger.info(f"📰 新闻数据已缓存: {symbol} ({data_source}) -> {cache_key}")
         return cache_key
     
-    def save_fundamentals_data(self, symbol: str, fundamentals_data: str,
+    def save_fundamentals_data(self, symbol: str, fundamentals_data: Union[str, Dict[str, Any]],
                               data_source: str = "unknown") -> str:
-        """保存基本面数据到缓存"""
+        """保存基本面数据到缓存（字符串报告或结构化字典）"""
         market_type = self._determine_market_type(symbol)
         cache_key = self._generate_cache_key("fundamentals", symbol,
                                            source=data_source,
                                            market=market_type,
                                            date=datetime.now().strftime("%Y-%m-%d"))
         
-        cache_path = self._get_cache_path("fundamentals", cache_key, "txt", symbol)
+        file_format = "json" if isinstance(fundamentals_data, dict) else "txt"
+        cache_path = self._get_cache_path("fundamentals", cache_key, file_format, symbol)
         with open(cache_path, 'w', encoding='utf-8') as f:
-            f.write(fundamentals_data)
+            if file_format == "json":
+                json.dump(fundamentals_data, f, ensure_ascii=False, default=str)
+            else:
+                f.write(fundamentals_data)
         
         metadata = {
             'symbol': symbol,
@@ -366,7 +374,7 @@ class StockDataCache:
             'data_source': data_source,
             'market_type': market_type,
             'file_path': str(cache_path),
-            'file_format': 'txt'
+            'file_format': file_format
         }
         self._save_metadata(cache_key, metadata)
         
@@ -374,7 +382,7 @@ class StockDataCache:
         logger.info(f"💼 {desc}已缓存: {symbol} ({data_source}) -> {cache_key}")
         return cache_key
     
-    def load_fundamentals_data(self, cache_key: str) -> Optional[str]:
+    def load_fundamentals_data(self, cache_key: str) -> Optional[Union[str, Dict[str, Any]]]:
         """从缓存加载基本面数据"""
         metadata = self._load_metadata(cache_key)
         if not metadata:
@@ -386,6 +394,8 @@ class StockDataCache:
         
         try:
             with open(cache_path, 'r', encoding='utf-8') as f:
+                if metadata.get('file_format') == 'json':
+                    return json.load(f)
                 return f.read()
         except Exception as e:
             logger.error(f"⚠️ 加载基本面缓存数据失败: {e}")
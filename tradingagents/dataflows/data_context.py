@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+单次分析运行的数据上下文
+在一次 TradingAgentsGraph.propagate 运行期间，按 (数据类型, 股票代码, 规范化日期区间)
+缓存工具层的数据获取结果。多个分析师并发请求同一份数据时只会触发一次上游调用（single-flight），
+其余调用等待并复用结果。
+"""
+
+import contextvars
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+_DATE_FORMATS = ('%Y-%m-%d', '%Y%m%d', '%Y/%m/%d', '%Y-%m-%d %H:%M:%S')
+
+
+def normalize_date(value: Optional[str]) -> Optional[str]:
+    """将日期规范化为 YYYY-MM-DD，无法识别时原样返回"""
+    if value is None:
+        return None
+    text = str(value).strip()
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    return text
+
+
+def normalize_ticker(ticker: str) -> str:
+    """规范化股票代码（去空白、转大写）"""
+    return str(ticker).strip().upper()
+
+
+@dataclass
+class _InflightEntry:
+    """正在获取或已获取的数据项"""
+    event: threading.Event = field(default_factory=threading.Event)
+    value: Any = None
+    error: Optional[BaseException] = None
+
+
+@dataclass
+class DataContextStats:
+    """数据上下文统计"""
+    upstream_calls: int = 0     # 实际发起的上游调用
+    cache_hits: int = 0         # 直接命中已完成结果
+    coalesced_waits: int = 0    # 等待并发中的同一请求
+    upstream_time: float = 0.0  # 上游调用总耗时（秒）
+
+    @property
+    def saved_calls(self) -> int:
+        return self.cache_hits + self.coalesced_waits
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'upstream_calls': self.upstream_calls,
+            'cache_hits': self.cache_hits,
+            'coalesced_waits': self.coalesced_waits,
+            'saved_calls': self.saved_calls,
+            'upstream_time': round(self.upstream_time, 3),
+        }
+
+
+class DataContext:
+    """
+    单次运行的数据上下文
+
+    仅在运行期间存活，不做过期处理；失败的获取不会被缓存，后续调用会重新尝试。
+    """
+
+    def __init__(self, ticker: Optional[str] = None, trade_date: Optional[str] = None):
+        self.run_id = uuid.uuid4().hex[:8]
+        self.ticker = ticker
+        self.trade_date = trade_date
+        self.stats = DataContextStats()
+        self._entries: Dict[Tuple, _InflightEntry] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(kind: str, ticker: str, start_date: Optional[str] = None,
+                 end_date: Optional[str] = None, *extra) -> Tuple:
+        """构造缓存键：数据类型 + 规范化代码 + 规范化日期区间"""
+        return (kind, normalize_ticker(ticker), normalize_date(start_date), normalize_date(end_date)) + tuple(extra)
+
+    def get_or_fetch(self, key: Tuple, fetch_func: Callable[[], Any]) -> Any:
+        """
+        获取数据：已完成则直接返回；其他线程正在获取则等待；否则由当前线程获取
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = _InflightEntry()
+                self._entries[key] = entry
+                owner = True
+            else:
+                owner = False
+                if entry.event.is_set():
+                    self.stats.cache_hits += 1
+                else:
+                    self.stats.coalesced_waits += 1
+
+        if not owner:
+            entry.event.wait()
+            if entry.error is None:
+                logger.debug(f"♻️ [数据上下文 {self.run_id}] 复用: {key}")
+                return entry.value
+            # 所有者获取失败：由当前调用自行重试
+            return self.get_or_fetch(key, fetch_func)
+
+        start = time.perf_counter()
+        try:
+            entry.value = fetch_func()
+            return entry.value
+        except BaseException as e:
+            entry.error = e
+            with self._lock:
+                # 失败结果不缓存
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            raise
+        finally:
+            with self._lock:
+                self.stats.upstream_calls += 1
+                self.stats.upstream_time += time.perf_counter() - start
+            entry.event.set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        with self._lock:
+            stats = self.stats.to_dict()
+            stats['cached_items'] = sum(1 for entry in self._entries.values() if entry.event.is_set())
+        stats['run_id'] = self.run_id
+        return stats
+
+
+_current_context: contextvars.ContextVar = contextvars.ContextVar('tradingagents_data_context', default=None)
+
+
+def get_current_data_context() -> Optional[DataContext]:
+    """获取当前运行的数据上下文（不在运行中时返回 None）"""
+    return _current_context.get()
+
+
+@contextmanager
+def data_context_scope(ticker: Optional[str] = None, trade_date: Optional[str] = None):
+    """
+    在 with 块内激活一个新的数据上下文
+
+    LangGraph/LangChain 在线程池中执行节点和工具时会复制 contextvars，
+    因此并发运行的分析师共享同一个上下文。
+    """
+    context = DataContext(ticker, trade_date)
+    token = _current_context.set(context)
+    try:
+        yield context
+    finally:
+        _current_context.reset(token)
+        stats = context.get_stats()
+        logger.info(f"📦 [数据上下文 {context.run_id}] 上游调用 {stats['upstream_calls']} 次，"
+                    f"节省 {stats['saved_calls']} 次 (命中 {stats['cache_hits']}，合并 {stats['coalesced_waits']})")
+
+
+def run_scoped_fetch(kind: str, ticker: str, start_date: Optional[str], end_date: Optional[str],
+                     fetch_func: Callable[[], Any], *extra) -> Any:
+    """
+    在当前运行上下文中获取数据；不在运行中时直接调用 fetch_func
+
+    Args:
+        kind: 数据类型（如 'china_stock_data'）
+        ticker: 股票代码
+        start_date: 开始日期
+        end_date: 结束日期
+        fetch_func: 实际获取函数（无参）
+        extra: 其他参与缓存键的参数
+    """
+    context = get_current_data_context()
+    if context is None:
+        return fetch_func()
+    key = DataContext.make_key(kind, ticker, start_date, end_date, *extra)
+    return context.get_or_fetch(key, fetch_func)
@@ -6,7 +6,7 @@
 
 import os
 import time
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from enum import Enum
 import warnings
 import pandas as pd
@@ -618,6 +618,83 @@ class DataSourceManager:
         
         return f"❌ 所有数据源都无法获取{symbol}的数据"
     
+    # 结构化行情数据的标准列
+    PRICE_FRAME_COLUMNS = ['date', 'open', 'high', 'low', 'close', 'volume', 'amount']
+    _PRICE_COLUMN_MAPPING = {
+        'trade_date': 'date', '日期': 'date', 'Date': 'date',
+        '开盘': 'open', 'Open': 'open',
+        '最高': 'high', 'High': 'high',
+        '最低': 'low', 'Low': 'low',
+        '收盘': 'close', 'Close': 'close',
+        'vol': 'volume', '成交量': 'volume', 'Volume': 'volume',
+        '成交额': 'amount', 'Amount': 'amount',
+    }
+
+    def _normalize_price_frame(self, data: pd.DataFrame) -> Optional[pd.DataFrame]:
+        """将各数据源的日线数据标准化为 PRICE_FRAME_COLUMNS 列"""
+        if data is None or data.empty:
+            return None
+
+        frame = data.rename(columns={k: v for k, v in self._PRICE_COLUMN_MAPPING.items()
+                                     if k in data.columns and v not in data.columns})
+        if 'close' not in frame.columns or 'date' not in frame.columns:
+            return None
+
+        frame = frame[[col for col in self.PRICE_FRAME_COLUMNS if col in frame.columns]].copy()
+        frame['date'] = pd.to_datetime(frame['date'].astype(str), errors='coerce')
+        for col in frame.columns:
+            if col != 'date':
+                frame[col] = pd.to_numeric(frame[col], errors='coerce')
+        frame = frame.dropna(subset=['date', 'close']).sort_values('date').reset_index(drop=True)
+        return frame if not frame.empty else None
+
+    def _fetch_price_frame(self, source: ChinaDataSource, symbol: str,
+                           start_date: str, end_date: str) -> Optional[pd.DataFrame]:
+        """从指定数据源获取原始日线DataFrame（不做格式化）"""
+        if source == ChinaDataSource.TUSHARE:
+            from .tushare_adapter import get_tushare_adapter
+            data = get_tushare_adapter().get_stock_data(symbol, start_date, end_date)
+        elif source == ChinaDataSource.AKSHARE:
+            from .akshare_utils import get_akshare_provider
+            data = get_akshare_provider().get_stock_data(symbol, start_date, end_date)
+        elif source == ChinaDataSource.BAOSTOCK:
+            from .baostock_utils import get_baostock_provider
+            data = get_baostock_provider().get_stock_data(symbol, start_date, end_date)
+        else:
+            return None
+        return self._normalize_price_frame(data)
+
+    def get_stock_dataframe(self, symbol: str, start_date: str = None,
+                            end_date: str = None) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+        """
+        获取标准化的结构化日线数据，支持降级机制
+
+        与 get_stock_data 使用相同的数据源优先级，但返回 DataFrame 而非格式化文本，
+        便于缓存层一次获取、多处复用（报告渲染、评分、指标计算）。
+
+        Returns:
+            (DataFrame, 数据源名称)，所有数据源都失败时返回 (None, None)
+        """
+        fallback_order = [
+            ChinaDataSource.AKSHARE,
+            ChinaDataSource.TUSHARE,
+            ChinaDataSource.BAOSTOCK
+        ]
+        sources = [self.current_source] + [s for s in fallback_order
+                                           if s != self.current_source and s in self.available_sources]
+
+        for source in sources:
+            try:
+                frame = self._fetch_price_frame(source, symbol, start_date, end_date)
+                if frame is not None:
+                    logger.debug(f"📊 [结构化数据] {source.value}获取{symbol}成功: {len(frame)}条")
+                    return frame, source.value
+            except Exception as e:
+                logger.warning(f"⚠️ [结构化数据] {source.value}获取{symbol}失败: {e}")
+                continue
+
+        return None, None
+
     def get_stock_info(self, symbol: str) -> Dict:
         """获取股票基本信息，支持降级机制"""
         logger.info(f"📊 [股票信息] 开始获取{symbol}基本信息...")
@@ -868,6 +945,18 @@ def get_china_stock_data_unified(symbol: str, start_date: str, end_date: str) ->
     return result
 
 
+def get_china_stock_frame_unified(symbol: str, start_date: str,
+                                  end_date: str) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+    """
+    统一的中国股票结构化数据获取接口
+
+    Returns:
+        (标准化日线DataFrame, 数据源名称)
+    """
+    manager = get_data_source_manager()
+    return manager.get_stock_dataframe(symbol, start_date, end_date)
+
+
 def get_china_stock_info_unified(symbol: str) -> Dict:
     """
     统一的中国股票信息获取接口
@@ -14,6 +14,8 @@ import time
 import re
 from bs4 import BeautifulSoup
 
+from .http_client import get_http_client
+
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
@@ -35,22 +37,23 @@ class EastMoneyGubaProvider:
             'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8'
         }
         
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        # 共享池化HTTP客户端（连接池、重试、并发限制、请求指标）
+        self.http = get_http_client('eastmoney_guba', headers=self.headers)
+        self.session = self.http.session
         
         logger.info("✅ 东方财富股吧数据提供器初始化成功")
 
-    def _make_request(self, url: str, params: Dict = None, timeout: int = 30) -> Optional[requests.Response]:
+    def _make_request(self, url: str, params: Dict = None, timeout: Optional[float] = None) -> Optional[requests.Response]:
         """发起HTTP请求，返回Response对象"""
         try:
-            response = self.session.get(url, params=params, timeout=timeout)
+            response = self.http.get(url, params=params, timeout=timeout)
             response.raise_for_status()
             return response
         except Exception as e:
             logger.error(f"❌ 请求失败: {url}, 错误: {str(e)}")
             return None
 
-    def _make_json_request(self, url: str, params: Dict = None, timeout: int = 30) -> Optional[Dict]:
+    def _make_json_request(self, url: str, params: Dict = None, timeout: Optional[float] = None) -> Optional[Dict]:
         """发起HTTP请求，返回JSON数据"""
         try:
             response = self._make_request(url, params, timeout)
@@ -14,6 +14,8 @@ import time
 import re
 import concurrent.futures
 
+from .http_client import get_http_client
+
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
@@ -37,15 +39,16 @@ class EastMoneyProvider:
             'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8'
         }
         
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        # 共享池化HTTP客户端（连接池、重试、并发限制、请求指标）
+        self.http = get_http_client('eastmoney', headers=self.headers)
+        self.session = self.http.session
         
         logger.info("✅ 东方财富数据提供器初始化成功")
 
-    def _make_request(self, url: str, params: Dict = None, timeout: int = 30) -> Optional[Dict]:
+    def _make_request(self, url: str, params: Dict = None, timeout: Optional[float] = None) -> Optional[Dict]:
         """发起HTTP请求"""
         try:
-            response = self.session.get(url, params=params, timeout=timeout)
+            response = self.http.get(url, params=params, timeout=timeout)
             response.raise_for_status()
             
             # 处理JSONP响应
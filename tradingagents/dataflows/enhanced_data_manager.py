@@ -61,6 +61,15 @@ try:
 except ImportError:
     get_tushare_adapter = None
 
+from .http_client import PooledHttpClient
+
+# 被动健康统计（可选）
+try:
+    from tradingagents.analytics.source_health import get_source_health_tracker
+    SOURCE_HEALTH_AVAILABLE = True
+except ImportError:
+    SOURCE_HEALTH_AVAILABLE = False
+
 
 class DataSourceType(Enum):
     """数据源类型枚举"""
@@ -81,6 +90,7 @@ class EnhancedDataManager:
         self.config = get_data_source_config()
         self.historical_manager = get_historical_manager()
         self.stock_master_manager = get_stock_master_manager()
+        self.health_tracker = get_source_health_tracker() if SOURCE_HEALTH_AVAILABLE else None
         
         # 集成分层数据管理器
         self.tiered_manager = None
@@ -169,6 +179,19 @@ class EnhancedDataManager:
                 logger.warning(f"⚠️ {source} 数据源初始化失败: {e}")
                 self.provider_status[source] = False
 
+    def _record_outcome(self, source: str, start_time: float, valid: bool = False,
+                        error: Optional[Exception] = None):
+        """
+        把一次数据源调用的结果记入被动健康统计
+
+        使用共享HTTP客户端的数据源已在传输层逐请求记录，这里只记录其余数据源（AKShare、Tushare等），避免重复计数。
+        """
+        if self.health_tracker is None or isinstance(getattr(self.providers.get(source), 'http', None), PooledHttpClient):
+            return
+        latency_ms = (time.perf_counter() - start_time) * 1000
+        self.health_tracker.record(source, latency_ms, error is None, valid=valid,
+                                   error=str(error) if error is not None else None)
+
     def get_comprehensive_stock_info(self, symbol: str) -> Dict[str, Any]:
         """获取综合股票信息，优先使用分层数据管理器加速"""
         try:
@@ -225,11 +248,14 @@ class EnhancedDataManager:
             
             for source in price_sources:
                 if source in self.providers and self.provider_status.get(source, False):
+                    start_time = time.perf_counter()
                     try:
                         logger.info(f"🔄 尝试从 {source} 获取 {symbol} 数据...")
                         provider = self.providers[source]
                         data = provider.get_stock_info(symbol)
-                        if data and data.get('current_price', 0) > 0:
+                        valid = bool(data) and data.get('current_price', 0) > 0
+                        self._record_outcome(source, start_time, valid=valid)
+                        if valid:
                             price_data[source] = data
                             comprehensive_data['sources'].append(source)
                             valid_sources += 1
@@ -245,6 +271,7 @@ class EnhancedDataManager:
                                 break
                                 
                     except Exception as e:
+                        self._record_outcome(source, start_time, error=e)
                         logger.debug(f"⚠️ {source}获取股票信息失败: {e}")
                         continue
             
@@ -388,19 +415,7 @@ class EnhancedDataManager:
             # 使用综合股票信息获取价格数据
             stock_info = self.get_comprehensive_stock_info(symbol)
             if stock_info and 'current_price' in stock_info:
-                return {
-                    'symbol': symbol,
-                    'current_price': stock_info.get('current_price', 0),
-                    'open': stock_info.get('open', 0),
-                    'high': stock_info.get('high', 0),
-                    'low': stock_info.get('low', 0),
-                    'prev_close': stock_info.get('prev_close', 0),
-                    'volume': stock_info.get('volume', 0),
-                    'amount': stock_info.get('amount', 0),
-                    'change': stock_info.get('change', 0),
-                    'change_pct': stock_info.get('change_pct', 0),
-                    'timestamp': stock_info.get('timestamp', '')
-                }
+                return self._to_price_record(symbol, stock_info)
             
             # 如果综合信息失败，尝试从单个数据源获取
             for source in ['eastmoney', 'tencent', 'sina']:
@@ -422,6 +437,60 @@ class EnhancedDataManager:
             logger.error(f"❌ 获取最新价格数据失败: {symbol}, 错误: {str(e)}")
             return None
 
+    @staticmethod
+    def _to_price_record(symbol: str, stock_info: Dict[str, Any]) -> Dict[str, Any]:
+        """统一的最新价格数据格式"""
+        return {
+            'symbol': symbol,
+            'current_price': stock_info.get('current_price', 0),
+            'open': stock_info.get('open', 0),
+            'high': stock_info.get('high', 0),
+            'low': stock_info.get('low', 0),
+            'prev_close': stock_info.get('prev_close', 0),
+            'volume': stock_info.get('volume', 0),
+            'amount': stock_info.get('amount', 0),
+            'change': stock_info.get('change', 0),
+            'change_pct': stock_info.get('change_pct', 0),
+            'timestamp': stock_info.get('timestamp', '')
+        }
+
+    def get_price_snapshot(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        批量获取单一数据源的行情快照（腾讯/新浪原生批量接口，每次请求数十只股票）
+        
+        与 get_latest_price_data 格式一致，但不做多源融合，适合作为排序预估等廉价用途。
+        
+        Args:
+            symbols: 股票代码列表
+            
+        Returns:
+            {symbol: 价格数据}，所有批量数据源都不可用时返回空字典
+        """
+        if not symbols:
+            return {}
+        
+        for source in ['tencent', 'sina']:
+            if source not in self.providers or not self.provider_status.get(source, False):
+                continue
+            provider = self.providers[source]
+            if not hasattr(provider, 'get_multiple_stocks'):
+                continue
+            try:
+                results = provider.get_multiple_stocks(symbols)
+                snapshot = {
+                    symbol: self._to_price_record(symbol, info)
+                    for symbol, info in (results or {}).items()
+                    if info and info.get('current_price', 0) > 0
+                }
+                if snapshot:
+                    logger.debug(f"📸 {source} 行情快照: {len(snapshot)}/{len(symbols)} 只股票")
+                    return snapshot
+            except Exception as e:
+                logger.debug(f"从{source}获取行情快照失败: {e}")
+                continue
+        
+        return {}
+
     def get_market_overview(self) -> Dict[str, Any]:
         """获取市场总览"""
         try:
@@ -705,6 +774,7 @@ class EnhancedDataManager:
             if market_info['is_china']:
                 # A股使用AKShare
                 if 'akshare' in self.providers and self.provider_status.get('akshare', False):
+                    start_time = time.perf_counter()
                     try:
                         provider = self.providers['akshare']
                         if hasattr(provider, 'ak') and provider.ak is not None:
@@ -716,17 +786,22 @@ class EnhancedDataManager:
                                 network_data = ak.stock_zh_a_hist(symbol, period="weekly", start_date=start_date, end_date=end_date)
                             elif frequency == 'monthly':
                                 network_data = ak.stock_zh_a_hist(symbol, period="monthly", start_date=start_date, end_date=end_date)
+                            self._record_outcome('akshare', start_time, valid=network_data is not None and not network_data.empty)
                     except Exception as e:
+                        self._record_outcome('akshare', start_time, error=e)
                         logger.warning(f"⚠️ AKShare获取历史数据失败: {e}")
             
             elif market_info['is_hk']:
                 # 港股使用AKShare港股数据
                 if 'akshare' in self.providers and self.provider_status.get('akshare', False):
+                    start_time = time.perf_counter()
                     try:
                         provider = self.providers['akshare']
                         if hasattr(provider, 'ak') and provider.ak is not None:
                             network_data = provider.ak.stock_zh_hk_hist(symbol, start_date=start_date, end_date=end_date)
+                            self._record_outcome('akshare', start_time, valid=network_data is not None and not network_data.empty)
                     except Exception as e:
+                        self._record_outcome('akshare', start_time, error=e)
                         logger.warning(f"⚠️ AKShare获取港股历史数据失败: {e}")
             
             # 3. 标准化数据格式并保存到本地存储
@@ -942,15 +1017,19 @@ class EnhancedDataManager:
                 # 按优先级逐个尝试数据源
                 for source in self.config.get_priority_order():
                     if source in self.providers and self.provider_status.get(source, False):
+                        start_time = time.perf_counter()
                         try:
                             provider = self.providers[source]
                             if hasattr(provider, 'get_stock_data'):
                                 data = provider.get_stock_data(symbol, start_date, end_date)
-                                if data is not None and not data.empty:
+                                valid = data is not None and not data.empty
+                                self._record_outcome(source, start_time, valid=valid)
+                                if valid:
                                     results[symbol] = data
                                     logger.info(f"✅ 从 {source} 获取 {symbol} 数据成功")
                                     break
                         except Exception as e:
+                            self._record_outcome(source, start_time, error=e)
                             logger.warning(f"⚠️ {source} 获取 {symbol} 失败: {e}")
                             continue
                             
@@ -963,7 +1042,8 @@ class EnhancedDataManager:
         return results
 
     def batch_download_all_stocks(self, start_date: str = None, end_date: str = None,
-                                 data_types: List[str] = None) -> Dict[str, Any]:
+                                 data_types: List[str] = None, streaming: bool = False,
+                                 chunk_size: int = 200, checkpoint_dir: str = None) -> Dict[str, Any]:
         """
         批量下载所有股票数据 - 性能优化版本
         
@@ -971,6 +1051,9 @@ class EnhancedDataManager:
             start_date: 开始日期
             end_date: 结束日期  
             data_types: 数据类型列表 ['historical', 'financial', 'news']
+            streaming: 是否流式下载（分块落盘+断点续传，仅分层模式支持）
+            chunk_size: 流式下载的分块大小
+            checkpoint_dir: 流式下载的断点清单目录
             
         Returns:
             下载结果统计
@@ -989,7 +1072,9 @@ class EnhancedDataManager:
             else:
                 mapped_types = [DataType.HISTORICAL]
             
-            return self.tiered_manager.batch_download_all(start_date, end_date, mapped_types)
+            return self.tiered_manager.batch_download_all(start_date, end_date, mapped_types,
+                                                          streaming=streaming, chunk_size=chunk_size,
+                                                          checkpoint_dir=checkpoint_dir)
         else:
             logger.info("📡 使用传统方式进行批量下载...")
             return self._batch_download_traditional(start_date, end_date, data_types)
@@ -13,39 +13,91 @@ import json
 import sqlite3
 import threading
 from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
 from tradingagents.utils.logging_manager import get_logger
 from .persistent_storage import get_persistent_manager
 
 logger = get_logger('historical_data')
 
+# SQLite 默认单条语句最多 999 个参数，IN 查询按此分批
+SQLITE_IN_CHUNK_SIZE = 900
+
 
 class HistoricalDataManager:
     """历史数据管理器"""
     
-    def __init__(self, data_dir: str = "./data/historical"):
+    def __init__(self, data_dir: str = "./data/historical", pool_size: int = 8):
         """
         初始化历史数据管理器
         
         Args:
             data_dir: 历史数据存储目录
+            pool_size: SQLite连接池保留的空闲连接数
         """
         self.data_dir = Path(data_dir)
         self.persistent_manager = get_persistent_manager()
         self._lock = threading.Lock()
         
-        # SQLite数据库用于索引和快速查询
+        # SQLite数据库用于索引和快速查询；连接复用，避免每次查询都重新打开数据库
         self.db_path = self.data_dir / "historical_index.db"
+        self.pool_size = max(1, pool_size)
+        self._pool: List[sqlite3.Connection] = []
+        self._pool_lock = threading.Lock()
         self._init_database()
         
         logger.info("📈 历史数据管理器初始化完成")
         logger.info(f"🗄️ 数据库路径: {self.db_path}")
     
+    def _create_connection(self) -> sqlite3.Connection:
+        """创建索引数据库连接（WAL模式：读不阻塞写，并发写入时等待而不是立即报错）"""
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA busy_timeout=30000')
+        return conn
+    
+    @contextmanager
+    def _connection(self):
+        """
+        从连接池借出一个连接，语句块正常结束时提交、异常时回滚，结束后归还
+        
+        每个连接同一时间只被一个线程使用；池中空闲连接超过 pool_size 时直接关闭。
+        """
+        with self._pool_lock:
+            conn = self._pool.pop() if self._pool else None
+        if conn is None:
+            conn = self._create_connection()
+        
+        try:
+            with conn:
+                yield conn
+        except Exception:
+            # 连接可能已处于异常状态，不再放回池中
+            conn.close()
+            raise
+        
+        with self._pool_lock:
+            if len(self._pool) < self.pool_size:
+                self._pool.append(conn)
+                return
+        conn.close()
+    
+    def close(self):
+        """关闭连接池中的全部空闲连接"""
+        with self._pool_lock:
+            pool, self._pool = self._pool, []
+        for conn in pool:
+            try:
+                conn.close()
+            except Exception:
+                pass
+    
     def _init_database(self):
         """初始化SQLite数据库"""
         self.data_dir.mkdir(parents=True, exist_ok=True)
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS stock_data_index (
                     symbol TEXT PRIMARY KEY,
@@ -69,8 +121,6 @@ class HistoricalDataManager:
                     PRIMARY KEY (symbol, frequency, gap_start, gap_end)
                 )
             ''')
-            
-            conn.commit()
     
     def save_historical_data(self, symbol: str, data: pd.DataFrame, 
                            frequency: str = "daily", overwrite: bool = False) -> bool:
@@ -86,9 +136,32 @@ class HistoricalDataManager:
         Returns:
             是否保存成功
         """
+        index_row = self._save_data_file(symbol, data, frequency, overwrite)
+        if index_row is None:
+            return False
+        
+        try:
+            # 更新数据库索引
+            self._update_data_index_many([index_row])
+        except Exception as e:
+            logger.error(f"❌ 保存历史数据失败: {symbol} - {e}")
+            return False
+        
+        record_count = index_row[4]
+        logger.info(f"✅ 保存历史数据: {symbol} ({frequency}) - {record_count} 条记录")
+        return True
+    
+    def _save_data_file(self, symbol: str, data: pd.DataFrame, frequency: str,
+                        overwrite: bool) -> Optional[Tuple]:
+        """
+        合并并写入数据文件（不更新索引）
+        
+        Returns:
+            对应的索引行，失败时返回None
+        """
         if data.empty or 'date' not in data.columns:
             logger.warning(f"⚠️ 无效数据格式: {symbol}")
-            return False
+            return None
         
         try:
             # 确保数据按日期排序
@@ -107,15 +180,11 @@ class HistoricalDataManager:
             # 保存到持久化存储
             self.persistent_manager.save_historical_prices(symbol, data, frequency)
             
-            # 更新数据库索引
-            self._update_data_index(symbol, frequency, data)
-            
-            logger.info(f"✅ 保存历史数据: {symbol} ({frequency}) - {len(data)} 条记录")
-            return True
+            return self._build_index_row(symbol, frequency, data)
             
         except Exception as e:
             logger.error(f"❌ 保存历史数据失败: {symbol} - {e}")
-            return False
+            return None
     
     def load_historical_data(self, symbol: str, frequency: str = "daily",
                            start_date: Optional[str] = None,
@@ -140,11 +209,44 @@ class HistoricalDataManager:
             logger.error(f"❌ 加载历史数据失败: {symbol} - {e}")
             return None
     
-    def _update_data_index(self, symbol: str, frequency: str, data: pd.DataFrame):
-        """更新数据索引"""
-        if data.empty or 'date' not in data.columns:
-            return
+    def load_historical_data_many(self, symbols: List[str], frequency: str = "daily",
+                                  start_date: Optional[str] = None,
+                                  end_date: Optional[str] = None,
+                                  columns: Optional[List[str]] = None,
+                                  max_workers: int = 8) -> Dict[str, pd.DataFrame]:
+        """
+        并行批量加载多只股票的历史价格数据
+        
+        Args:
+            symbols: 股票代码列表
+            frequency: 数据频率
+            start_date: 开始日期 (YYYY-MM-DD)
+            end_date: 结束日期 (YYYY-MM-DD)
+            columns: 只读取的列（date 列总会读取），为空时读取全部列
+            max_workers: 并行读取的线程数
+        
+        Returns:
+            {股票代码: DataFrame}，没有数据的股票不包含在结果中
+        """
+        def load_single(symbol: str):
+            try:
+                return symbol, self.persistent_manager.load_historical_prices(
+                    symbol, frequency, start_date, end_date, columns=columns
+                )
+            except Exception as e:
+                logger.error(f"❌ 加载历史数据失败: {symbol} - {e}")
+                return symbol, None
+        
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return {}
         
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(symbols)))) as executor:
+            loaded = executor.map(load_single, symbols)
+            return {symbol: data for symbol, data in loaded if data is not None and not data.empty}
+    
+    def _build_index_row(self, symbol: str, frequency: str, data: pd.DataFrame) -> Tuple:
+        """生成数据索引行"""
         start_date = data['date'].min().strftime('%Y-%m-%d')
         end_date = data['date'].max().strftime('%Y-%m-%d')
         record_count = len(data)
@@ -157,51 +259,94 @@ class HistoricalDataManager:
             "data_types": str(data.dtypes.to_dict())
         }
         
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute('''
+        return (
+            symbol, frequency, start_date, end_date, record_count,
+            file_path, datetime.now().isoformat(), checksum,
+            json.dumps(metadata)
+        )
+    
+    def _update_data_index(self, symbol: str, frequency: str, data: pd.DataFrame):
+        """更新数据索引"""
+        if data.empty or 'date' not in data.columns:
+            return
+        self._update_data_index_many([self._build_index_row(symbol, frequency, data)])
+    
+    def _update_data_index_many(self, rows: List[Tuple]):
+        """在一个事务中批量写入数据索引行"""
+        if not rows:
+            return
+        with self._connection() as conn:
+            conn.executemany('''
                 INSERT OR REPLACE INTO stock_data_index 
                 (symbol, frequency, start_date, end_date, record_count, 
                  file_path, last_updated, checksum, metadata)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                symbol, frequency, start_date, end_date, record_count,
-                file_path, datetime.now().isoformat(), checksum,
-                json.dumps(metadata)
-            ))
-            conn.commit()
+            ''', rows)
+    
+    @staticmethod
+    def _availability_from_row(row: Optional[Tuple]) -> Dict[str, Any]:
+        """索引行 (start_date, end_date, record_count, last_updated) 转为可用性信息"""
+        if row:
+            return {
+                "available": True,
+                "start_date": row[0],
+                "end_date": row[1],
+                "record_count": row[2],
+                "last_updated": row[3]
+            }
+        return {
+            "available": False,
+            "start_date": None,
+            "end_date": None,
+            "record_count": 0,
+            "last_updated": None
+        }
     
     def get_data_availability(self, symbol: str, frequency: str = "daily") -> Dict[str, Any]:
         """获取数据可用性信息"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             cursor = conn.execute('''
                 SELECT start_date, end_date, record_count, last_updated
                 FROM stock_data_index
                 WHERE symbol = ? AND frequency = ?
             ''', (symbol, frequency))
             
-            result = cursor.fetchone()
-            
-            if result:
-                return {
-                    "available": True,
-                    "start_date": result[0],
-                    "end_date": result[1],
-                    "record_count": result[2],
-                    "last_updated": result[3]
-                }
-            else:
-                return {
-                    "available": False,
-                    "start_date": None,
-                    "end_date": None,
-                    "record_count": 0,
-                    "last_updated": None
-                }
+            return self._availability_from_row(cursor.fetchone())
+    
+    def get_data_availability_many(self, symbols: List[str], frequency: str = "daily") -> Dict[str, Dict[str, Any]]:
+        """
+        批量获取多只股票的数据可用性信息（按主键分批 IN 查询索引）
+        
+        Args:
+            symbols: 股票代码列表
+            frequency: 数据频率
+        
+        Returns:
+            {股票代码: 与 get_data_availability 相同结构的可用性信息}，每只股票都有对应条目
+        """
+        unique_symbols = list(dict.fromkeys(symbols))
+        rows = {}
+        
+        with self._connection() as conn:
+            for i in range(0, len(unique_symbols), SQLITE_IN_CHUNK_SIZE):
+                chunk = unique_symbols[i:i + SQLITE_IN_CHUNK_SIZE]
+                placeholders = ','.join('?' * len(chunk))
+                cursor = conn.execute(f'''
+                    SELECT symbol, start_date, end_date, record_count, last_updated
+                    FROM stock_data_index
+                    WHERE frequency = ? AND symbol IN ({placeholders})
+                ''', (frequency, *chunk))
+                for row in cursor.fetchall():
+                    rows[row[0]] = row[1:]
+        
+        return {symbol: self._availability_from_row(rows.get(symbol)) for symbol in unique_symbols}
     
     def get_missing_date_ranges(self, symbol: str, frequency: str = "daily",
-                              start_date: str = None, end_date: str = None) -> List[Dict[str, str]]:
-        """获取缺失的日期范围"""
-        availability = self.get_data_availability(symbol, frequency)
+                              start_date: str = None, end_date: str = None,
+                              availability: Optional[Dict[str, Any]] = None) -> List[Dict[str, str]]:
+        """获取缺失的日期范围（可传入已批量查询的可用性信息，避免再次查询索引）"""
+        if availability is None:
+            availability = self.get_data_availability(symbol, frequency)
         
         if not availability["available"]:
             return [{"start": start_date or "2000-01-01", "end": end_date or datetime.now().strftime('%Y-%m-%d')}]
@@ -227,10 +372,84 @@ class HistoricalDataManager:
             })
         
         return missing_ranges
-    
+
+    def probe_coverage(self, symbols: List[str], start_date: str = None, end_date: str = None,
+                       frequency: str = "daily", tolerance_days: int = 3) -> Dict[str, Dict[str, Any]]:
+        """
+        批量探测多只股票的本地数据覆盖情况（按主键分批 IN 查询索引，不读取数据文件）
+
+        Args:
+            symbols: 股票代码列表
+            start_date: 需要的开始日期 (YYYY-MM-DD)，None 表示不限
+            end_date: 需要的结束日期 (YYYY-MM-DD)，None 表示到今天
+            frequency: 数据频率
+            tolerance_days: 首尾允许的天数差（覆盖周末、节假日和上市日），与缓存的新鲜度策略一致
+
+        Returns:
+            {symbol: {'status': 'hit'|'partial'|'miss', 'missing_ranges': [{'start','end'}],
+                      'start_date', 'end_date', 'record_count'}}
+        """
+        availability = self.get_data_availability_many(symbols, frequency)
+        unique_symbols = list(availability)
+        rows = {
+            symbol: (info['start_date'], info['end_date'], info['record_count'])
+            for symbol, info in availability.items() if info['available']
+        }
+
+        # 索引中的日期为 YYYY-MM-DD 字符串，逐行用 strptime 解析（逐行 pd.to_datetime 太慢）
+        def parse(value: str):
+            return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+
+        target_end = parse(end_date) if end_date else datetime.now().date()
+        requested_start = parse(start_date) if start_date else None
+        tolerance = timedelta(days=tolerance_days)
+
+        coverage = {}
+        for symbol in unique_symbols:
+            row = rows.get(symbol)
+            if row is None or not row[0] or not row[1]:
+                coverage[symbol] = {
+                    'status': 'miss',
+                    'missing_ranges': [{"start": start_date or "2000-01-01", "end": target_end.isoformat()}],
+                    'start_date': None,
+                    'end_date': None,
+                    'record_count': 0
+                }
+                continue
+
+            data_start = parse(row[0])
+            data_end = parse(row[1])
+            target_start = requested_start if requested_start is not None else data_start
+
+            missing_ranges = []
+            if data_start - target_start > tolerance:
+                missing_ranges.append({
+                    "start": target_start.isoformat(),
+                    "end": (data_start - timedelta(days=1)).isoformat()
+                })
+            if target_end - data_end > tolerance:
+                missing_ranges.append({
+                    "start": (data_end + timedelta(days=1)).isoformat(),
+                    "end": target_end.isoformat()
+                })
+
+            # 本地数据与请求区间完全不重叠时按未命中处理
+            no_overlap = data_end < target_start or data_start > target_end
+            if no_overlap:
+                missing_ranges = [{"start": target_start.isoformat(), "end": target_end.isoformat()}]
+            coverage[symbol] = {
+                'status': 'miss' if no_overlap else ('partial' if missing_ranges else 'hit'),
+                'missing_ranges': missing_ranges,
+                'start_date': row[0],
+                'end_date': row[1],
+                'record_count': row[2] or 0
+            }
+
+        return coverage
+
     def list_available_symbols(self, frequency: str = "daily") -> List[str]:
         """获取可用的股票代码列表"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             cursor = conn.execute('''
                 SELECT DISTINCT symbol FROM stock_data_index
                 WHERE frequency = ?
@@ -240,7 +459,7 @@ class HistoricalDataManager:
     
     def get_data_summary(self, frequency: str = "daily") -> Dict[str, Any]:
         """获取数据摘要信息"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             cursor = conn.execute('''
                 SELECT COUNT(DISTINCT symbol), SUM(record_count),
                        MIN(start_date), MAX(end_date)
@@ -269,7 +488,7 @@ class HistoricalDataManager:
         
         try:
             # 从索引获取文件信息
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connection() as conn:
                 cursor = conn.execute('''
                     SELECT file_path, checksum, record_count, start_date, end_date
                     FROM stock_data_index
@@ -324,12 +543,13 @@ class HistoricalDataManager:
     
     def bulk_save_data(self, data_dict: Dict[str, pd.DataFrame], 
                       frequency: str = "daily", max_workers: int = 4) -> Dict[str, bool]:
-        """批量保存数据"""
+        """批量保存数据（数据文件并行写入，索引在全部写完后用一个事务批量更新）"""
         results = {}
+        index_rows = {}
         
         def save_single(symbol_data):
             symbol, data = symbol_data
-            return symbol, self.save_historical_data(symbol, data, frequency)
+            return symbol, self._save_data_file(symbol, data, frequency, overwrite=False)
         
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
             future_to_symbol = {
@@ -340,12 +560,24 @@ class HistoricalDataManager:
             for future in future_to_symbol:
                 symbol = future_to_symbol[future]
                 try:
-                    symbol, success = future.result()
-                    results[symbol] = success
+                    symbol, index_row = future.result()
+                    results[symbol] = index_row is not None
+                    if index_row is not None:
+                        index_rows[symbol] = index_row
                 except Exception as e:
                     logger.error(f"❌ 批量保存失败: {symbol} - {e}")
                     results[symbol] = False
         
+        try:
+            self._update_data_index_many(list(index_rows.values()))
+        except Exception as e:
+            logger.error(f"❌ 批量更新数据索引失败: {e}")
+            for symbol in index_rows:
+                results[symbol] = False
+            return results
+        
+        saved = sum(results.values())
+        logger.info(f"✅ 批量保存历史数据: {saved}/{len(results)} ({frequency})")
         return results
     
     def export_data(self, symbol: str, frequency: str = "daily", 
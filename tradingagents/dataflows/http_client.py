@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+共享HTTP客户端层
+为各数据源提供器提供线程安全的连接池、keep-alive、带抖动退避的重试、
+按主机并发限制以及请求级指标（延迟、字节数、状态码），
+并把每次真实请求的结果按客户端名称（即数据源名称）记入被动健康统计
+"""
+
+import random
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+# 默认配置：连接池大小需覆盖各提供器 get_multiple_* 的最大并发（20-25）
+DEFAULT_POOL_SIZE = 32
+DEFAULT_TIMEOUT = (5, 20)  # (连接超时, 读取超时)
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_BACKOFF_BASE = 0.3  # 秒
+DEFAULT_BACKOFF_MAX = 5.0   # 秒
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+# 被动健康统计（可选）：延迟导入，避免 analytics 包与数据源模块之间的循环导入
+_health_tracker = None
+
+
+def _get_health_tracker():
+    global _health_tracker
+    if _health_tracker is None:
+        try:
+            from tradingagents.analytics.source_health import get_source_health_tracker
+            _health_tracker = get_source_health_tracker()
+        except ImportError:
+            _health_tracker = False
+    return _health_tracker or None
+
+
+@dataclass
+class HostMetrics:
+    """单个主机的请求指标"""
+    host: str
+    requests: int = 0
+    failures: int = 0
+    retries: int = 0
+    bytes_received: int = 0
+    total_latency_ms: float = 0.0
+    max_latency_ms: float = 0.0
+    status_counts: Dict[int, int] = field(default_factory=lambda: defaultdict(int))
+
+    @property
+    def avg_latency_ms(self) -> float:
+        return self.total_latency_ms / self.requests if self.requests else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'host': self.host,
+            'requests': self.requests,
+            'failures': self.failures,
+            'retries': self.retries,
+            'bytes_received': self.bytes_received,
+            'avg_latency_ms': round(self.avg_latency_ms, 2),
+            'max_latency_ms': round(self.max_latency_ms, 2),
+            'status_counts': dict(self.status_counts),
+        }
+
+
+class PooledHttpClient:
+    """
+    线程安全的池化HTTP客户端
+
+    一个客户端对应一个数据源提供器，内部共享一个 requests.Session：
+    urllib3 连接池本身是线程安全的，Cookie 容器也带锁，因此可以直接被
+    ThreadPoolExecutor 中的多个工作线程共用。
+    """
+
+    def __init__(self, name: str, headers: Optional[Dict[str, str]] = None,
+                 pool_size: int = DEFAULT_POOL_SIZE,
+                 per_host_limit: Optional[int] = None,
+                 timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff_base: float = DEFAULT_BACKOFF_BASE,
+                 backoff_max: float = DEFAULT_BACKOFF_MAX):
+        """
+        初始化池化HTTP客户端
+
+        Args:
+            name: 客户端名称（通常为数据源名称）
+            headers: 默认请求头
+            pool_size: 每个主机的连接池大小，应不小于工作线程数
+            per_host_limit: 每个主机的最大并发请求数，默认等于 pool_size
+            timeout: 默认超时，(连接超时, 读取超时)
+            max_retries: 连接错误/超时/可重试状态码的最大重试次数
+            backoff_base: 退避基数（秒）
+            backoff_max: 单次退避上限（秒）
+        """
+        self.name = name
+        self.pool_size = pool_size
+        self.per_host_limit = per_host_limit or pool_size
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.session = requests.Session()
+        if headers:
+            self.session.headers.update(headers)
+
+        # 重试由客户端自行处理（带抖动），适配器不做重试
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                              max_retries=0, pool_block=True)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._lock = threading.Lock()
+        self._host_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._metrics: Dict[str, HostMetrics] = {}
+
+    def _get_semaphore(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            semaphore = self._host_semaphores.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.per_host_limit)
+                self._host_semaphores[host] = semaphore
+            return semaphore
+
+    def _backoff_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """计算退避时间：指数退避 + 全抖动，优先遵循 Retry-After"""
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    def _record(self, host: str, latency_ms: float, response: Optional[requests.Response],
+                retries: int, failed: bool):
+        with self._lock:
+            metrics = self._metrics.get(host)
+            if metrics is None:
+                metrics = HostMetrics(host=host)
+                self._metrics[host] = metrics
+            metrics.requests += 1
+            metrics.retries += retries
+            metrics.total_latency_ms += latency_ms
+            metrics.max_latency_ms = max(metrics.max_latency_ms, latency_ms)
+            if failed:
+                metrics.failures += 1
+            if response is not None:
+                metrics.status_counts[response.status_code] += 1
+                metrics.bytes_received += len(response.content or b'')
+
+        self._record_health(latency_ms, response, failed)
+
+    def _record_health(self, latency_ms: float, response: Optional[requests.Response], failed: bool):
+        """
+        记录到被动健康统计
+
+        连接异常、429 与 5xx 计为失败；其他 4xx（如股票代码不存在）说明数据源可达，只计为无效数据。
+        """
+        tracker = _get_health_tracker()
+        if tracker is None:
+            return
+        status = response.status_code if response is not None else None
+        success = status is not None and status != 429 and status < 500
+        error = None if success else (f"HTTP {status}" if status is not None else "connection error")
+        tracker.record(self.name, latency_ms, success, valid=not failed, error=error)
+
+    def request(self, method: str, url: str, timeout=None, **kwargs) -> requests.Response:
+        """
+        发起HTTP请求
+
+        连接错误、超时以及 429/5xx 状态码会按抖动退避重试；重试耗尽后
+        连接类异常原样抛出，状态码错误返回最后一次响应，由调用方决定是否 raise_for_status。
+        """
+        host = urlsplit(url).netloc
+        timeout = timeout if timeout is not None else self.timeout
+        semaphore = self._get_semaphore(host)
+
+        start = time.perf_counter()
+        response = None
+        attempt = 0
+        try:
+            while True:
+                try:
+                    with semaphore:
+                        response = self.session.request(method, url, timeout=timeout, **kwargs)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    if attempt >= self.max_retries:
+                        raise
+                    delay = self._backoff_delay(attempt)
+                    logger.debug(f"🔁 [{self.name}] {host} 请求异常，{delay:.2f}s后重试: {e}")
+                else:
+                    if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                        break
+                    delay = self._backoff_delay(attempt, response.headers.get('Retry-After'))
+                    logger.debug(f"🔁 [{self.name}] {host} 状态码{response.status_code}，{delay:.2f}s后重试")
+                time.sleep(delay)
+                attempt += 1
+        except Exception:
+            self._record(host, (time.perf_counter() - start) * 1000, None, attempt, failed=True)
+            raise
+
+        self._record(host, (time.perf_counter() - start) * 1000, response, attempt,
+                     failed=response.status_code >= 400)
+        return response
+
+    def get(self, url: str, params: Optional[Dict] = None, timeout=None, **kwargs) -> requests.Response:
+        """发起GET请求"""
+        return self.request('GET', url, params=params, timeout=timeout, **kwargs)
+
+    def post(self, url: str, data=None, json=None, timeout=None, **kwargs) -> requests.Response:
+        """发起POST请求"""
+        return self.request('POST', url, data=data, json=json, timeout=timeout, **kwargs)
+
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """获取按主机划分的请求指标"""
+        with self._lock:
+            return {host: metrics.to_dict() for host, metrics in self._metrics.items()}
+
+    def reset_metrics(self):
+        """清空请求指标"""
+        with self._lock:
+            self._metrics.clear()
+
+    def close(self):
+        """关闭底层会话及连接池"""
+        self.session.close()
+
+
+# 全局客户端注册表
+_clients: Dict[str, PooledHttpClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_http_client(name: str, headers: Optional[Dict[str, str]] = None, **kwargs) -> PooledHttpClient:
+    """
+    获取（或创建）指定名称的共享HTTP客户端
+
+    同名客户端在进程内只创建一次，后续调用忽略 headers/kwargs。
+    """
+    with _clients_lock:
+        client = _clients.get(name)
+        if client is None:
+            client = PooledHttpClient(name, headers=headers, **kwargs)
+            _clients[name] = client
+            logger.debug(f"🌐 创建共享HTTP客户端: {name} (连接池: {client.pool_size})")
+        return client
+
+
+def get_all_http_metrics() -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """获取所有共享HTTP客户端的请求指标"""
+    with _clients_lock:
+        clients = list(_clients.items())
+    return {name: client.get_metrics() for name, client in clients}
@@ -15,6 +15,7 @@ import re
 from dataclasses import dataclass, field
 from enum import Enum
 
+from .http_client import get_http_client
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('longhubang')
 
@@ -84,8 +85,9 @@ class LongHuBangProvider:
             'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8'
         }
         
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        # 共享池化HTTP客户端（连接池、重试、并发限制、请求指标）
+        self.http = get_http_client('longhubang', headers=self.headers)
+        self.session = self.http.session
         
         # 缓存设置
         self._cache = {}
@@ -93,10 +95,10 @@ class LongHuBangProvider:
         
         logger.info("✅ 龙虎榜数据提供器初始化成功")
     
-    def _make_request(self, url: str, params: Dict = None, timeout: int = 30) -> Optional[Dict]:
+    def _make_request(self, url: str, params: Dict = None, timeout: Optional[float] = None) -> Optional[Dict]:
         """发起HTTP请求"""
         try:
-            response = self.session.get(url, params=params, timeout=timeout)
+            response = self.http.get(url, params=params, timeout=timeout)
             response.raise_for_status()
             
             # 处理JSONP响应
@@ -6,9 +6,12 @@
 
 import time
 import random
+import threading
 import requests
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FuturesTimeoutError, wait
+from dataclasses import dataclass, replace
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from collections import defaultdict
 
 from tradingagents.utils.logging_manager import get_logger
@@ -16,10 +19,49 @@ from .config import get_config
 
 logger = get_logger('multi_source')
 
+# 被动健康统计（可选）
+try:
+    from tradingagents.analytics.source_health import get_source_health_tracker
+    SOURCE_HEALTH_AVAILABLE = True
+except ImportError:
+    SOURCE_HEALTH_AVAILABLE = False
+
+# 健康评分低于该值（约等于连续失败3次）时视为不健康，等待下一次探测恢复
+UNHEALTHY_SCORE = 0.2
+# 加权选择时的最小评分，保证低分数据源仍有少量流量用于恢复判断
+MIN_SELECTION_SCORE = 0.05
+
+
+@dataclass
+class HedgePolicy:
+    """对冲请求策略（按数据类型配置）"""
+    enabled: bool = True
+    latency_percentile: float = 0.9     # 主数据源超过该延迟分位数仍未返回时发出对冲请求
+    default_delay_ms: float = 1000.0    # 主数据源尚无延迟统计时的对冲等待
+    min_delay_ms: float = 20.0
+    max_delay_ms: float = 5000.0
+    budget_ratio: float = 0.1           # 对冲预算：每个请求积累的令牌数，即对冲请求占比上限
+    budget_burst: float = 5.0           # 令牌上限，允许短时间内集中对冲
+    timeout_seconds: float = 15.0       # 整体等待上限，超时使用备用方案
+
+
+DEFAULT_HEDGE_POLICIES = {
+    'price': HedgePolicy(),
+    'fundamentals': HedgePolicy(default_delay_ms=2000.0, budget_ratio=0.05),
+    'news': HedgePolicy(enabled=False),
+    'social': HedgePolicy(enabled=False),
+}
+
+
 class MultiSourceManager:
     """多数据源管理器 - 智能负载均衡和融合"""
     
-    def __init__(self):
+    def __init__(self, enable_hedging: bool = True, hedge_workers: int = 16):
+        """
+        Args:
+            enable_hedging: 是否启用对冲请求（主数据源慢于其p90延迟时并发请求次优数据源）
+            hedge_workers: 对冲请求线程池大小
+        """
         self.config = get_config()
         self.sources = {
             'eastmoney': EastMoneyProvider(),
@@ -31,6 +73,24 @@ class MultiSourceManager:
         self.health_status = defaultdict(lambda: {'healthy': True, 'last_check': 0})
         self.call_counts = defaultdict(int)
         self.last_call_time = defaultdict(float)
+        self.health_tracker = get_source_health_tracker() if SOURCE_HEALTH_AVAILABLE else None
+        
+        # 对冲请求
+        self.enable_hedging = enable_hedging
+        self.hedge_policies = {name: replace(policy) for name, policy in DEFAULT_HEDGE_POLICIES.items()}
+        self.hedge_workers = hedge_workers
+        self._hedge_executor = None
+        self._hedge_lock = threading.Lock()
+        self._hedge_tokens = {}
+        self._hedge_stats = defaultdict(lambda: {
+            'requests': 0,
+            'hedged': 0,
+            'hedge_wins': 0,
+            'budget_exhausted': 0,
+            'timeouts': 0,
+            'latency_saved_ms': 0.0,
+            'latency_saved_samples': 0,
+        })
         
     def get_price_data(self, symbol: str) -> Dict[str, Any]:
         """获取价格数据 - 智能负载均衡"""
@@ -61,24 +121,207 @@ class MultiSourceManager:
             logger.warning(f"所有{data_type}数据源不可用，使用备用方案")
             return self._get_fallback_data(data_type, symbol)
         
-        # 轮询选择数据源
-        selected = self._select_provider(healthy_providers)
+        policy = self.hedge_policies.get(data_type)
+        if self.enable_hedging and policy is not None and policy.enabled and len(healthy_providers) > 1:
+            return self._get_with_hedging(data_type, symbol, healthy_providers, policy)
         
+        # 按健康度加权选择数据源
+        selected = self._select_provider(healthy_providers)
+        result, error = self._call_provider(selected, data_type, symbol)
+        if error is not None:
+            return self._get_fallback_data(data_type, symbol)
+        return result
+    
+    def _call_provider(self, provider: str, data_type: str, symbol: str) -> Tuple[Any, Optional[Exception]]:
+        """调用数据源并记录结果，返回 (结果, 异常)"""
+        start_time = time.perf_counter()
         try:
-            result = self.sources[selected].get_data(data_type, symbol)
-            self._mark_success(selected)
-            return result
+            result = self.sources[provider].get_data(data_type, symbol)
         except Exception as e:
-            logger.error(f"{selected}获取{data_type}数据失败: {e}")
-            self._mark_failure(selected)
+            logger.error(f"{provider}获取{data_type}数据失败: {e}")
+            self._mark_failure(provider)
+            self._record_outcome(provider, start_time, error=e)
+            return None, e
+        self._mark_success(provider)
+        self._record_outcome(provider, start_time, result=result)
+        return result, None
+    
+    @staticmethod
+    def _is_usable(result: Any) -> bool:
+        """结果是否可直接采用（数据源内部失败时返回 status=failed）"""
+        return not (isinstance(result, dict) and result.get('status') == 'failed')
+    
+    def _get_hedge_executor(self) -> ThreadPoolExecutor:
+        with self._hedge_lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(max_workers=self.hedge_workers,
+                                                          thread_name_prefix='source-hedge')
+            return self._hedge_executor
+    
+    def _hedge_delay(self, provider: str, policy: HedgePolicy) -> float:
+        """对冲等待时间（秒）：主数据源成功请求的延迟分位数，限制在策略上下限之内"""
+        delay_ms = None
+        if self.health_tracker is not None:
+            delay_ms = self.health_tracker.latency_percentile(provider, policy.latency_percentile)
+        if delay_ms is None:
+            delay_ms = policy.default_delay_ms
+        return min(policy.max_delay_ms, max(policy.min_delay_ms, delay_ms)) / 1000
+    
+    def _earn_hedge_budget(self, data_type: str, policy: HedgePolicy):
+        """每个请求积累 budget_ratio 个对冲令牌，并计入请求数"""
+        with self._hedge_lock:
+            tokens = self._hedge_tokens.get(data_type, policy.budget_burst)
+            self._hedge_tokens[data_type] = min(policy.budget_burst, tokens + policy.budget_ratio)
+            self._hedge_stats[data_type]['requests'] += 1
+    
+    def _spend_hedge_budget(self, data_type: str) -> bool:
+        """消耗一个对冲令牌，预算不足时返回False"""
+        with self._hedge_lock:
+            stats = self._hedge_stats[data_type]
+            if self._hedge_tokens.get(data_type, 0.0) < 1.0:
+                stats['budget_exhausted'] += 1
+                return False
+            self._hedge_tokens[data_type] -= 1.0
+            stats['hedged'] += 1
+            return True
+    
+    def _count_hedge(self, data_type: str, key: str, value: float = 1):
+        with self._hedge_lock:
+            self._hedge_stats[data_type][key] += value
+    
+    def _get_with_hedging(self, data_type: str, symbol: str, providers: List[str],
+                          policy: HedgePolicy) -> Dict[str, Any]:
+        """
+        对冲请求：先请求最优数据源，超过其延迟分位数仍未返回时再请求次优数据源，采用先返回的有效结果
+        
+        已在执行的阻塞请求无法中断，落败的请求只取消尚未开始的部分；
+        它完成后结果仍计入被动健康统计，主数据源落败时据此统计节省的延迟。
+        """
+        self._earn_hedge_budget(data_type, policy)
+        primary = self._select_provider(providers)
+        executor = self._get_hedge_executor()
+        start_time = time.perf_counter()
+        deadline = start_time + policy.timeout_seconds
+        primary_future = executor.submit(self._call_provider, primary, data_type, symbol)
+        
+        try:
+            result, error = primary_future.result(timeout=self._hedge_delay(primary, policy))
+            return self._get_fallback_data(data_type, symbol) if error is not None else result
+        except FuturesTimeoutError:
+            pass
+        
+        pending = {primary_future: primary}
+        if self._spend_hedge_budget(data_type):
+            backup = self._select_provider([p for p in providers if p != primary])
+            logger.debug(f"{primary}获取{data_type}数据超过对冲等待，对冲请求{backup}: {symbol}")
+            pending[executor.submit(self._call_provider, backup, data_type, symbol)] = backup
+        
+        winner, last_result = None, None
+        while pending and winner is None:
+            done, _ = wait(list(pending), timeout=max(0.0, deadline - time.perf_counter()),
+                           return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                provider = pending.pop(future)
+                result, error = future.result()
+                if error is not None:
+                    continue
+                last_result = result
+                if self._is_usable(result):
+                    winner = provider
+                    break
+        
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        for future in pending:
+            future.cancel()
+        
+        if winner is not None and winner != primary:
+            self._count_hedge(data_type, 'hedge_wins')
+            if primary_future in pending:
+                primary_future.add_done_callback(
+                    lambda _: self._record_latency_saved(data_type, start_time, elapsed_ms))
+        
+        if winner is None and last_result is None:
+            if pending:
+                self._count_hedge(data_type, 'timeouts')
+                logger.warning(f"{data_type}数据请求超时({policy.timeout_seconds}s)，使用备用方案: {symbol}")
             return self._get_fallback_data(data_type, symbol)
+        return last_result
+    
+    def _record_latency_saved(self, data_type: str, start_time: float, winner_elapsed_ms: float):
+        """主数据源落败请求完成时，记录对冲节省的延迟"""
+        saved_ms = (time.perf_counter() - start_time) * 1000 - winner_elapsed_ms
+        with self._hedge_lock:
+            stats = self._hedge_stats[data_type]
+            stats['latency_saved_ms'] += max(0.0, saved_ms)
+            stats['latency_saved_samples'] += 1
+    
+    def set_hedge_policy(self, data_type: str, policy: HedgePolicy):
+        """设置某类数据的对冲策略"""
+        self.hedge_policies[data_type] = policy
+    
+    def get_hedge_stats(self) -> Dict[str, Dict[str, Any]]:
+        """对冲请求统计：对冲率、对冲胜出率、预算耗尽次数与节省的延迟"""
+        with self._hedge_lock:
+            report = {}
+            for data_type, stats in self._hedge_stats.items():
+                samples = stats['latency_saved_samples']
+                report[data_type] = {
+                    **stats,
+                    'latency_saved_ms': round(stats['latency_saved_ms'], 1),
+                    'hedge_rate': round(stats['hedged'] / stats['requests'], 4) if stats['requests'] else 0.0,
+                    'win_rate': round(stats['hedge_wins'] / stats['hedged'], 4) if stats['hedged'] else 0.0,
+                    'avg_latency_saved_ms': round(stats['latency_saved_ms'] / samples, 1) if samples else 0.0,
+                }
+            return report
+    
+    def close(self):
+        """关闭对冲请求线程池（不等待仍在执行的落败请求）"""
+        with self._hedge_lock:
+            executor, self._hedge_executor = self._hedge_executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+    
+    def _record_outcome(self, provider: str, start_time: float, result: Any = None,
+                        error: Optional[Exception] = None):
+        """记录真实请求结果到被动健康统计，并据此刷新健康状态（代替一次探测）"""
+        if self.health_tracker is None:
+            return
+        latency_ms = (time.perf_counter() - start_time) * 1000
+        if error is not None:
+            success, valid, reason = False, False, str(error)
+        else:
+            # 数据源内部捕获异常后返回 status=failed；只有 status=success 且带有数据字段才算有效
+            status = result.get('status') if isinstance(result, dict) else None
+            success = status != 'failed'
+            valid = status == 'success' and len(result) > 1
+            reason = result.get('error') if isinstance(result, dict) and not success else None
+        self.health_tracker.record(provider, latency_ms, success, valid=valid, error=reason)
+        
+        status = self.health_status[provider]
+        if success:
+            status['healthy'] = True
+        else:
+            score = self.health_tracker.health_score(provider)
+            status['healthy'] = score is None or score >= UNHEALTHY_SCORE
+        status['last_check'] = time.time()
     
     def _select_provider(self, providers: List[str]) -> str:
-        """选择数据源提供商 - 轮询+权重"""
-        # 简单轮询
-        min_calls = min(self.call_counts[p] for p in providers)
-        candidates = [p for p in providers if self.call_counts[p] == min_calls]
-        selected = random.choice(candidates)
+        """选择数据源提供商 - 真实请求健康度加权，无统计时轮询"""
+        scores = self.health_tracker.health_scores(providers) if self.health_tracker else {}
+        known = [score for score in scores.values() if score is not None]
+        if known:
+            # 尚无统计的数据源按已知评分均值参与选择，保证获得探索流量
+            prior = sum(known) / len(known)
+            weights = [max(MIN_SELECTION_SCORE, prior if scores[p] is None else scores[p]) ** 2
+                       for p in providers]
+            selected = random.choices(providers, weights=weights)[0]
+        else:
+            # 简单轮询
+            min_calls = min(self.call_counts[p] for p in providers)
+            candidates = [p for p in providers if self.call_counts[p] == min_calls]
+            selected = random.choice(candidates)
         
         # 记录调用
         self.call_counts[selected] += 1
@@ -101,6 +344,13 @@ class MultiSourceManager:
         
         return status['healthy']
     
+    def get_source_health(self) -> Dict[str, Dict[str, Any]]:
+        """获取各数据源的被动健康统计"""
+        if self.health_tracker is None:
+            return {}
+        return {name: snapshot.to_dict() for name, snapshot in self.health_tracker.snapshots().items()
+                if name in self.sources}
+    
     def _mark_success(self, provider: str):
         """标记数据源成功"""
         self.health_status[provider]['healthy'] = True
@@ -7,8 +7,12 @@
 import os
 import time
 import random
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable
+
+import pandas as pd
+
 from .cache_manager import get_cache
 from .config import get_config
 
@@ -16,6 +20,11 @@ from .config import get_config
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
 
+# 结构化数据在缓存中的数据源标识
+FRAME_DATA_SOURCE = "unified_frame"
+# 报告模板版本：修改报告格式时递增，使记忆化的渲染结果失效
+REPORT_TEMPLATE_VERSION = "1"
+
 
 class OptimizedChinaDataProvider:
     """优化的A股数据提供器 - 集成缓存和Tushare数据接口"""
@@ -26,6 +35,11 @@ class OptimizedChinaDataProvider:
         self.last_api_call = 0
         self.min_api_interval = 0.5  # Tushare数据接口调用间隔较短
         
+        # 报告渲染记忆化缓存 (数据指纹, 模板版本) -> 报告文本
+        self._render_cache = OrderedDict()
+        self._render_cache_size = 256
+        self._stock_names = {}
+        
         logger.info(f"📊 优化A股数据提供器初始化完成")
     
     def _wait_for_rate_limit(self):
@@ -39,6 +53,52 @@ class OptimizedChinaDataProvider:
         
         self.last_api_call = time.time()
     
+    def get_stock_frame(self, symbol: str, start_date: str, end_date: str,
+                        force_refresh: bool = False) -> Optional[pd.DataFrame]:
+        """
+        获取A股标准化日线数据（结构化） - 优先使用缓存
+
+        缓存中保存的是标准化后的 DataFrame，报告文本在需要时再渲染，
+        因此评分、指标计算等数值型消费者可以直接复用同一份数据。
+
+        Returns:
+            列为 date/open/high/low/close/volume/amount 的 DataFrame，获取失败返回 None
+        """
+        if not force_refresh:
+            cache_key = self.cache.find_cached_stock_data(
+                symbol=symbol,
+                start_date=start_date,
+                end_date=end_date,
+                data_source=FRAME_DATA_SOURCE
+            )
+            # find_cached_stock_data 可能返回其他日期区间的部分匹配，只接受覆盖请求区间的缓存
+            metadata = self.cache.get_metadata(cache_key) if cache_key else None
+            if (metadata and (metadata.get('start_date') or '') <= start_date
+                    and (metadata.get('end_date') or '') >= end_date):
+                cached_frame = self.cache.load_stock_data(cache_key)
+                if isinstance(cached_frame, pd.DataFrame) and not cached_frame.empty:
+                    cached_frame['date'] = pd.to_datetime(cached_frame['date'])
+                    window = (cached_frame['date'] >= start_date) & (cached_frame['date'] <= end_date)
+                    logger.info(f"⚡ 从缓存加载A股结构化数据: {symbol}")
+                    return cached_frame[window].reset_index(drop=True)
+
+        self._wait_for_rate_limit()
+
+        from .data_source_manager import get_china_stock_frame_unified
+        frame, source = get_china_stock_frame_unified(symbol, start_date, end_date)
+        if frame is None or frame.empty:
+            return None
+
+        self.cache.save_stock_data(
+            symbol=symbol,
+            data=frame,
+            start_date=start_date,
+            end_date=end_date,
+            data_source=FRAME_DATA_SOURCE
+        )
+        logger.info(f"✅ A股结构化数据获取成功: {symbol} ({source}, {len(frame)}条)")
+        return frame
+
     def get_stock_data(self, symbol: str, start_date: str, end_date: str, 
                       force_refresh: bool = False) -> str:
         """
@@ -55,23 +115,16 @@ class OptimizedChinaDataProvider:
         """
         logger.info(f"📈 获取A股数据: {symbol} ({start_date} 到 {end_date})")
         
-        # 检查缓存（除非强制刷新）
-        if not force_refresh:
-            cache_key = self.cache.find_cached_stock_data(
-                symbol=symbol,
-                start_date=start_date,
-                end_date=end_date,
-                data_source="tdx"
-            )
-            
-            if cache_key:
-                cached_data = self.cache.load_stock_data(cache_key)
-                if cached_data:
-                    logger.info(f"⚡ 从缓存加载A股数据: {symbol}")
-                    return cached_data
+        # 优先使用结构化数据，按需渲染报告
+        try:
+            frame = self.get_stock_frame(symbol, start_date, end_date, force_refresh)
+            if frame is not None:
+                return self._render_stock_report(symbol, frame, start_date, end_date)
+        except Exception as e:
+            logger.warning(f"⚠️ 结构化数据获取失败，回退到文本接口: {symbol}, {e}")
         
-        # 缓存未命中，从Tushare数据接口获取
-        logger.info(f"🌐 从Tushare数据接口获取数据: {symbol}")
+        # 结构化数据不可用（如仅TDX可用），回退到统一文本接口
+        logger.info(f"🌐 从统一数据源文本接口获取数据: {symbol}")
         
         try:
             # API限制处理
@@ -98,15 +151,6 @@ class OptimizedChinaDataProvider:
                 # 生成备用数据
                 return self._generate_fallback_data(symbol, start_date, end_date, "数据源API调用失败")
             
-            # 保存到缓存
-            self.cache.save_stock_data(
-                symbol=symbol,
-                data=formatted_data,
-                start_date=start_date,
-                end_date=end_date,
-                data_source="unified"  # 使用统一数据源标识
-            )
-            
             logger.info(f"✅ A股数据获取成功: {symbol}")
             return formatted_data
             
@@ -123,6 +167,97 @@ class OptimizedChinaDataProvider:
             # 生成备用数据
             return self._generate_fallback_data(symbol, start_date, end_date, error_msg)
     
+    def _memoized_render(self, key: tuple, render: Callable[[], str]) -> str:
+        """按 (数据指纹, 模板版本) 记忆化渲染结果"""
+        key = key + (REPORT_TEMPLATE_VERSION,)
+        report = self._render_cache.get(key)
+        if report is None:
+            report = render()
+            self._render_cache[key] = report
+            if len(self._render_cache) > self._render_cache_size:
+                self._render_cache.popitem(last=False)
+        else:
+            self._render_cache.move_to_end(key)
+        return report
+    
+    def _get_stock_name(self, symbol: str) -> str:
+        """获取股票名称（进程内缓存）"""
+        name = self._stock_names.get(symbol)
+        if name is None:
+            try:
+                from .data_source_manager import get_china_stock_info_unified
+                name = get_china_stock_info_unified(symbol).get('name') or f'股票{symbol}'
+            except Exception as e:
+                logger.debug(f"获取股票名称失败: {symbol}, {e}")
+                name = f'股票{symbol}'
+            self._stock_names[symbol] = name
+        return name
+    
+    def _render_stock_report(self, symbol: str, frame: pd.DataFrame,
+                             start_date: str, end_date: str) -> str:
+        """将结构化日线数据渲染为报告文本"""
+        fingerprint = (symbol, start_date, end_date, len(frame),
+                       str(frame['date'].iloc[-1]), float(frame['close'].iloc[-1]))
+        
+        def render() -> str:
+            stock_name = self._get_stock_name(symbol)
+            latest_price = float(frame['close'].iloc[-1])
+            prev_close = float(frame['close'].iloc[-2]) if len(frame) > 1 else latest_price
+            change = latest_price - prev_close
+            change_pct = (change / prev_close * 100) if prev_close else 0
+            
+            result = f"📊 {stock_name}({symbol})\n"
+            result += f"数据期间: {start_date} 至 {end_date}\n"
+            result += f"数据条数: {len(frame)}条\n\n"
+            result += f"💰 最新价格: ¥{latest_price:.2f}\n"
+            result += f"📈 涨跌额: {change:+.2f} ({change_pct:+.2f}%)\n\n"
+            result += f"📊 价格统计:\n"
+            result += f"   最高价: ¥{frame['high'].max():.2f}\n"
+            result += f"   最低价: ¥{frame['low'].min():.2f}\n"
+            result += f"   平均价: ¥{frame['close'].mean():.2f}\n"
+            if 'volume' in frame.columns:
+                result += f"   成交量: {frame['volume'].iloc[-1]:,.0f}股\n"
+            
+            display_rows = min(3, len(frame))
+            display = frame.tail(display_rows).copy()
+            display['date'] = display['date'].dt.strftime('%Y-%m-%d')
+            result += f"\n最新{display_rows}天数据:\n"
+            result += display.to_string(index=False)
+            return result
+        
+        return self._memoized_render(('stock', ) + fingerprint, render)
+    
+    def get_fundamentals_record(self, symbol: str, force_refresh: bool = False) -> Dict[str, Any]:
+        """
+        获取A股结构化基本面数据 - 优先使用缓存
+        
+        Returns:
+            包含公司名称、价格、行业信息和财务指标的字典
+        """
+        if not force_refresh:
+            cache_key = self.cache.find_cached_fundamentals_data(symbol, data_source=FRAME_DATA_SOURCE)
+            if cache_key:
+                record = self.cache.load_fundamentals_data(cache_key)
+                if isinstance(record, dict):
+                    logger.info(f"⚡ 从缓存加载A股结构化基本面数据: {symbol}")
+                    return record
+        
+        current_date = datetime.now().strftime('%Y-%m-%d')
+        start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
+        frame = self.get_stock_frame(symbol, start_date, current_date)
+        if frame is not None:
+            record = self._build_fundamentals_record(symbol, frame=frame)
+        else:
+            stock_data = self.get_stock_data(symbol, start_date, current_date)
+            record = self._build_fundamentals_record(symbol, stock_data=stock_data)
+        
+        self.cache.save_fundamentals_data(
+            symbol=symbol,
+            fundamentals_data=record,
+            data_source=FRAME_DATA_SOURCE
+        )
+        return record
+    
     def get_fundamentals_data(self, symbol: str, force_refresh: bool = False) -> str:
         """
         获取A股基本面数据 - 优先使用缓存
@@ -136,50 +271,11 @@ class OptimizedChinaDataProvider:
         """
         logger.info(f"📊 获取A股基本面数据: {symbol}")
         
-        # 检查缓存（除非强制刷新）
-        if not force_refresh:
-            # 查找基本面数据缓存
-            for metadata_file in self.cache.metadata_dir.glob(f"*_meta.json"):
-                try:
-                    import json
-                    with open(metadata_file, 'r', encoding='utf-8') as f:
-                        metadata = json.load(f)
-                    
-                    if (metadata.get('symbol') == symbol and 
-                        metadata.get('data_type') == 'fundamentals' and
-                        metadata.get('market_type') == 'china'):
-                        
-                        cache_key = metadata_file.stem.replace('_meta', '')
-                        if self.cache.is_cache_valid(cache_key, symbol=symbol, data_type='fundamentals'):
-                            cached_data = self.cache.load_stock_data(cache_key)
-                            if cached_data:
-                                logger.info(f"⚡ 从缓存加载A股基本面数据: {symbol}")
-                                return cached_data
-                except Exception:
-                    continue
-        
-        # 缓存未命中，生成基本面分析
-        logger.debug(f"🔍 生成A股基本面分析: {symbol}")
-        
         try:
-            # 先获取股票数据
-            current_date = datetime.now().strftime('%Y-%m-%d')
-            start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-            
-            stock_data = self.get_stock_data(symbol, start_date, current_date)
-            
-            # 生成基本面分析报告
-            fundamentals_data = self._generate_fundamentals_report(symbol, stock_data)
-            
-            # 保存到缓存
-            self.cache.save_fundamentals_data(
-                symbol=symbol,
-                fundamentals_data=fundamentals_data,
-                data_source="tdx_analysis"
-            )
-            
+            record = self.get_fundamentals_record(symbol, force_refresh)
+            report = self._render_fundamentals_report(record)
             logger.info(f"✅ A股基本面数据生成成功: {symbol}")
-            return fundamentals_data
+            return report
             
         except Exception as e:
             error_msg = f"基本面数据生成失败: {str(e)}"
@@ -188,11 +284,19 @@ class OptimizedChinaDataProvider:
     
     def _generate_fundamentals_report(self, symbol: str, stock_data: str) -> str:
         """基于股票数据生成真实的基本面分析报告"""
+        record = self._build_fundamentals_record(symbol, stock_data=stock_data)
+        return self._render_fundamentals_report(record)
+    
+    def _build_fundamentals_record(self, symbol: str, frame: Optional[pd.DataFrame] = None,
+                                   stock_data: str = "") -> Dict[str, Any]:
+        """
+        构建结构化基本面数据
+
+        优先从结构化日线数据中直接读取价格信息；仅在只有文本数据时解析文本。
+        """
 
         # 添加详细的股票代码追踪日志
-        logger.debug(f"🔍 [股票代码追踪] _generate_fundamentals_report 接收到的股票代码: '{symbol}' (类型: {type(symbol)})")
-        logger.debug(f"🔍 [股票代码追踪] 股票代码长度: {len(str(symbol))}")
-        logger.debug(f"🔍 [股票代码追踪] 股票代码字符: {list(str(symbol))}")
+        logger.debug(f"🔍 [股票代码追踪] _build_fundamentals_record 接收到的股票代码: '{symbol}' (类型: {type(symbol)})")
         logger.debug(f"🔍 [股票代码追踪] 接收到的股票数据前200字符: {stock_data[:200] if stock_data else 'None'}")
 
         # 从股票数据中提取信息
@@ -200,70 +304,100 @@ class OptimizedChinaDataProvider:
         current_price = "N/A"
         volume = "N/A"
         change_pct = "N/A"
+        price_value = None
+        change_pct_value = None
+        volume_value = None
 
         # 首先尝试从统一接口获取股票基本信息
-        try:
-            logger.debug(f"🔍 [股票代码追踪] 尝试获取{symbol}的基本信息...")
-            from .interface import get_china_stock_info_unified
-            stock_info = get_china_stock_info_unified(symbol)
-            logger.debug(f"🔍 [股票代码追踪] 获取到的股票信息: {stock_info}")
-
-            if "股票名称:" in stock_info:
-                lines = stock_info.split('\n')
+        name = self._get_stock_name(symbol)
+        if name and name != f'股票{symbol}':
+            company_name = name
+            logger.debug(f"🔍 [股票代码追踪] 从统一接口获取到股票名称: {company_name}")
+
+        if frame is not None and not frame.empty:
+            # 结构化数据：直接读取数值
+            price_value = float(frame['close'].iloc[-1])
+            prev_close = float(frame['close'].iloc[-2]) if len(frame) > 1 else price_value
+            change_pct_value = (price_value - prev_close) / prev_close * 100 if prev_close else 0.0
+            current_price = f"¥{price_value:.2f}"
+            change_pct = f"{change_pct_value:+.2f}%"
+            if 'volume' in frame.columns:
+                volume_value = float(frame['volume'].iloc[-1])
+                volume = f"{volume_value:,.0f}股"
+        else:
+            # 然后从股票数据中提取价格信息
+            if "股票名称:" in stock_data:
+                lines = stock_data.split('\n')
                 for line in lines:
-                    if "股票名称:" in line:
+                    if "股票名称:" in line and company_name == "未知公司":
                         company_name = line.split(':')[1].strip()
-                        logger.debug(f"🔍 [股票代码追踪] 从统一接口获取到股票名称: {company_name}")
-                        break
-        except Exception as e:
-            logger.warning(f"⚠️ 获取股票基本信息失败: {e}")
-
-        # 然后从股票数据中提取价格信息
-        if "股票名称:" in stock_data:
-            lines = stock_data.split('\n')
-            for line in lines:
-                if "股票名称:" in line and company_name == "未知公司":
-                    company_name = line.split(':')[1].strip()
-                elif "当前价格:" in line:
-                    current_price = line.split(':')[1].strip()
-                elif "涨跌幅:" in line:
-                    change_pct = line.split(':')[1].strip()
-                elif "成交量:" in line:
-                    volume = line.split(':')[1].strip()
-
-        # 尝试从股票数据表格中提取最新价格信息
-        if current_price == "N/A" and stock_data:
-            try:
-                lines = stock_data.split('\n')
-                for i, line in enumerate(lines):
-                    if "最新数据:" in line and i + 1 < len(lines):
-                        # 查找数据行
-                        for j in range(i + 1, min(i + 5, len(lines))):
-                            data_line = lines[j].strip()
-                            if data_line and not data_line.startswith('日期') and not data_line.startswith('-'):
-                                # 尝试解析数据行
-                                parts = data_line.split()
-                                if len(parts) >= 4:
-                                    try:
-                                        # 假设格式: 日期 股票代码 开盘 收盘 最高 最低 成交量 成交额...
-                                        current_price = parts[3]  # 收盘价
-                                        logger.debug(f"🔍 [股票代码追踪] 从数据表格提取到收盘价: {current_price}")
-                                        break
-                                    except (IndexError, ValueError):
-                                        continue
-                        break
-            except Exception as e:
-                logger.debug(f"🔍 [股票代码追踪] 解析股票数据表格失败: {e}")
+                    elif "当前价格:" in line:
+                        current_price = line.split(':')[1].strip()
+                    elif "涨跌幅:" in line:
+                        change_pct = line.split(':')[1].strip()
+                    elif "成交量:" in line:
+                        volume = line.split(':')[1].strip()
+
+            # 尝试从股票数据表格中提取最新价格信息
+            if current_price == "N/A" and stock_data:
+                try:
+                    lines = stock_data.split('\n')
+                    for i, line in enumerate(lines):
+                        if "最新数据:" in line and i + 1 < len(lines):
+                            # 查找数据行
+                            for j in range(i + 1, min(i + 5, len(lines))):
+                                data_line = lines[j].strip()
+                                if data_line and not data_line.startswith('日期') and not data_line.startswith('-'):
+                                    # 尝试解析数据行
+                                    parts = data_line.split()
+                                    if len(parts) >= 4:
+                                        try:
+                                            # 假设格式: 日期 股票代码 开盘 收盘 最高 最低 成交量 成交额...
+                                            current_price = parts[3]  # 收盘价
+                                            logger.debug(f"🔍 [股票代码追踪] 从数据表格提取到收盘价: {current_price}")
+                                            break
+                                        except (IndexError, ValueError):
+                                            continue
+                            break
+                except Exception as e:
+                    logger.debug(f"🔍 [股票代码追踪] 解析股票数据表格失败: {e}")
 
         # 根据股票代码判断行业和基本信息
-        logger.debug(f"🔍 [股票代码追踪] 调用 _get_industry_info，传入参数: '{symbol}'")
         industry_info = self._get_industry_info(symbol)
-        logger.debug(f"🔍 [股票代码追踪] _get_industry_info 返回结果: {industry_info}")
-
-        logger.debug(f"🔍 [股票代码追踪] 调用 _estimate_financial_metrics，传入参数: '{symbol}'")
         financial_estimates = self._estimate_financial_metrics(symbol, current_price)
         logger.debug(f"🔍 [股票代码追踪] _estimate_financial_metrics 返回结果: {financial_estimates}")
 
+        return {
+            'symbol': symbol,
+            'company_name': company_name,
+            'current_price': current_price,
+            'change_pct': change_pct,
+            'volume': volume,
+            'price_value': price_value,
+            'change_pct_value': change_pct_value,
+            'volume_value': volume_value,
+            'industry_info': industry_info,
+            'financial_estimates': financial_estimates,
+            'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        }
+
+    def _render_fundamentals_report(self, record: Dict[str, Any]) -> str:
+        """将结构化基本面数据渲染为报告文本（按模板版本记忆化）"""
+        fingerprint = (record['symbol'], record['generated_at'], record['current_price'])
+        return self._memoized_render(('fundamentals', ) + fingerprint,
+                                     lambda: self._format_fundamentals_report(record))
+
+    def _format_fundamentals_report(self, record: Dict[str, Any]) -> str:
+        """基本面报告模板"""
+        symbol = record['symbol']
+        company_name = record['company_name']
+        current_price = record['current_price']
+        change_pct = record['change_pct']
+        volume = record['volume']
+        industry_info = record['industry_info']
+        financial_estimates = record['financial_estimates']
+        generated_at = datetime.strptime(record['generated_at'], '%Y-%m-%d %H:%M:%S')
+
         logger.debug(f"🔍 [股票代码追踪] 开始生成报告，使用股票代码: '{symbol}'")
         
         # 检查数据来源并生成相应说明
@@ -289,7 +423,7 @@ class OptimizedChinaDataProvider:
 - **当前股价**: {current_price}
 - **涨跌幅**: {change_pct}
 - **成交量**: {volume}
-- **分析日期**: {datetime.now().strftime('%Y年%m月%d日')}{data_source_note}
+- **分析日期**: {generated_at.strftime('%Y年%m月%d日')}{data_source_note}
 
 ## 💰 财务数据分析
 
@@ -383,7 +517,7 @@ class OptimizedChinaDataProvider:
 实际投资决策请结合最新财报数据和专业分析师意见。
 
 **数据来源**: {data_source if data_source else "多源数据"}数据接口 + 基本面分析模型
-**生成时间**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+**生成时间**: {record['generated_at']}
 """
         
         return report
@@ -141,8 +141,8 @@ class PersistentDataManager:
             "frequency": frequency,
             "updated_at": datetime.now().isoformat(),
             "date_range": {
-                "start": data['date'].min() if 'date' in data.columns else None,
-                "end": data['date'].max() if 'date' in data.columns else None
+                "start": str(data['date'].min()) if 'date' in data.columns else None,
+                "end": str(data['date'].max()) if 'date' in data.columns else None
             },
             "record_count": len(data),
             "checksum": self._calculate_checksum(data)
@@ -156,23 +156,42 @@ class PersistentDataManager:
     
     def load_historical_prices(self, symbol: str, frequency: str = "daily",
                              start_date: Optional[str] = None, 
-                             end_date: Optional[str] = None) -> Optional[pd.DataFrame]:
-        """加载历史价格数据"""
+                             end_date: Optional[str] = None,
+                             columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        """加载历史价格数据（columns 指定时只读取这些列和 date 列）"""
         file_path = self._get_file_path("historical", symbol, frequency)
         
         if not file_path.exists():
             return None
         
         try:
-            data = pd.read_parquet(file_path)
+            if columns:
+                wanted = list(dict.fromkeys(['date', *columns]))
+                try:
+                    data = pd.read_parquet(file_path, columns=wanted)
+                except Exception:
+                    # 文件中缺少部分列时读取全部列，再保留存在的列
+                    data = pd.read_parquet(file_path)
+                    data = data[[column for column in wanted if column in data.columns]]
+            else:
+                data = pd.read_parquet(file_path)
             
             if 'date' in data.columns and (start_date or end_date):
-                data['date'] = pd.to_datetime(data['date'])
+                if not pd.api.types.is_datetime64_any_dtype(data['date']):
+                    data['date'] = pd.to_datetime(data['date'])
                 
+                # 合并成一个布尔掩码只做一次行筛选；无时区的日期列直接在 numpy 数组上比较
+                dates = data['date']
+                values = dates.to_numpy() if dates.dt.tz is None else dates
+                mask = np.ones(len(data), dtype=bool)
                 if start_date:
-                    data = data[data['date'] >= pd.to_datetime(start_date)]
+                    bound = pd.Timestamp(start_date)
+                    mask &= np.asarray(values >= (bound.to_datetime64() if dates.dt.tz is None else bound))
                 if end_date:
-                    data = data[data['date'] <= pd.to_datetime(end_date)]
+                    bound = pd.Timestamp(end_date)
+                    mask &= np.asarray(values <= (bound.to_datetime64() if dates.dt.tz is None else bound))
+                if not mask.all():
+                    data = data[mask]
             
             return data
         except Exception as e:
@@ -6,11 +6,14 @@
 
 import requests
 import time
+import threading
+import concurrent.futures
+from pathlib import Path
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
 import json
 import re
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
@@ -52,6 +55,17 @@ class ResearchReportProvider:
         """获取研报数据"""
         raise NotImplementedError
     
+    def get_reports_since(self, ticker: str, limit: int = 10, since: Optional[str] = None) -> List[ResearchReport]:
+        """
+        获取不早于指定发布日期的研报（增量获取）
+
+        默认实现获取后按日期过滤；支持服务端日期过滤的数据源可覆盖此方法。
+        """
+        reports = self.get_reports(ticker, limit)
+        if not since:
+            return reports
+        return [report for report in reports if report.publish_date >= since]
+    
     def _parse_rating(self, rating_text: str) -> str:
         """标准化评级"""
         rating_text = rating_text.upper()
@@ -108,6 +122,10 @@ class EastMoneyResearchProvider(ResearchReportProvider):
         
     def get_reports(self, ticker: str, limit: int = 10) -> List[ResearchReport]:
         """获取东方财富研报数据 - 支持多种API"""
+        return self.get_reports_since(ticker, limit)
+    
+    def get_reports_since(self, ticker: str, limit: int = 10, since: Optional[str] = None) -> List[ResearchReport]:
+        """获取东方财富研报数据，since 不为空时由服务端按日期过滤"""
         try:
             logger.info(f"🔍 开始从东方财富获取研报: {ticker}")
             
@@ -120,14 +138,14 @@ class EastMoneyResearchProvider(ResearchReportProvider):
             all_reports = []
             
             # 1. 尝试获取机构调研数据 (主要数据源)
-            survey_reports = self._get_survey_reports(formatted_ticker, limit)
+            survey_reports = self._get_survey_reports(formatted_ticker, limit, since)
             if survey_reports:
                 all_reports.extend(survey_reports)
                 logger.info(f"✅ 东方财富机构调研数据获取成功: {len(survey_reports)} 条")
             
             # 2. 如果调研数据不足，尝试获取价值分析数据
             if len(all_reports) < limit:
-                value_reports = self._get_value_analysis_reports(formatted_ticker, limit - len(all_reports))
+                value_reports = self._get_value_analysis_reports(formatted_ticker, limit - len(all_reports), since)
                 if value_reports:
                     all_reports.extend(value_reports)
                     logger.info(f"✅ 东方财富价值分析数据获取成功: {len(value_reports)} 条")
@@ -188,6 +206,13 @@ class EastMoneyResearchProvider(ResearchReportProvider):
             'client': 'WEB'
         }
     
+    def _build_filter(self, ticker: str, date_column: str, since: Optional[str] = None) -> str:
+        """构建过滤条件，since 不为空时只查询该日期及之后的数据"""
+        filter_str = f'(SECURITY_CODE="{ticker.split(".")[0]}")'
+        if since:
+            filter_str += f"({date_column}>='{since}')"
+        return filter_str
+    
     def _make_api_request(self, params: Dict[str, str]) -> Optional[Dict]:
         """发送API请求 - 直接使用JSON响应"""
         try:
@@ -509,13 +534,13 @@ class EastMoneyResearchProvider(ResearchReportProvider):
         
         return key_points[:3]  # 最多3个关键观点
 
-    def _get_survey_reports(self, ticker: str, limit: int) -> List[ResearchReport]:
+    def _get_survey_reports(self, ticker: str, limit: int, since: Optional[str] = None) -> List[ResearchReport]:
         """获取机构调研报告"""
         try:
             params = {
                 'reportName': 'RPT_ORG_SURVEY',
                 'columns': 'ALL',
-                'filter': f'(SECURITY_CODE="{ticker.split(".")[0]}")',
+                'filter': self._build_filter(ticker, 'NOTICE_DATE', since),
                 'pageNumber': 1,
                 'pageSize': str(limit),
                 'sortTypes': -1,
@@ -533,13 +558,13 @@ class EastMoneyResearchProvider(ResearchReportProvider):
             logger.warning(f"⚠️ 获取机构调研数据失败: {e}")
             return []
     
-    def _get_value_analysis_reports(self, ticker: str, limit: int) -> List[ResearchReport]:
+    def _get_value_analysis_reports(self, ticker: str, limit: int, since: Optional[str] = None) -> List[ResearchReport]:
         """获取价值分析数据作为补充"""
         try:
             params = {
                 'reportName': 'RPT_VALUEANALYSIS_DET',
                 'columns': 'ALL',
-                'filter': f'(SECURITY_CODE="{ticker.split(".")[0]}")',
+                'filter': self._build_filter(ticker, 'TRADE_DATE', since),
                 'pageNumber': 1,
                 'pageSize': str(limit),
                 'sortTypes': -1,
@@ -1977,43 +2002,169 @@ class AKShareResearchProvider(ResearchReportProvider):
         return reports
 
 
+class ResearchReportStore:
+    """
+    研报持久化存储
+
+    每只股票一个JSON文件，保存历史研报、各数据源已获取到的最新发布日期（水位）和最近一次检查时间，
+    管理器据此向每个数据源只增量获取其水位之后的研报，避免重复下载同一批研报历史。
+    水位按数据源分别保存：某个数据源失败时它的水位不前移，下次仍从原水位补齐。
+    """
+
+    def __init__(self, store_dir: Optional[str] = None, max_reports_per_ticker: int = 200):
+        if store_dir is None:
+            store_dir = Path(__file__).parent / "data_cache" / "research_reports"
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.max_reports_per_ticker = max_reports_per_ticker
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _get_lock(self, ticker: str) -> threading.Lock:
+        with self._locks_guard:
+            lock = self._locks.get(ticker)
+            if lock is None:
+                lock = threading.Lock()
+                self._locks[ticker] = lock
+            return lock
+
+    def _get_path(self, ticker: str) -> Path:
+        safe_ticker = re.sub(r'[^\w.]', '_', ticker.upper())
+        return self.store_dir / f"{safe_ticker}.json"
+
+    def load(self, ticker: str) -> Dict[str, Any]:
+        """加载股票的研报存储记录"""
+        path = self._get_path(ticker)
+        if not path.exists():
+            return {'ticker': ticker, 'reports': [], 'provider_watermarks': {}, 'last_checked': None}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            entry['reports'] = [ResearchReport(**item) for item in entry.get('reports', [])]
+            # 旧格式只有全局 latest_publish_date，无法判断各数据源是否已补齐，各数据源重新全量获取一次
+            entry['provider_watermarks'] = entry.get('provider_watermarks') or {}
+            return entry
+        except Exception as e:
+            logger.warning(f"⚠️ 研报存储读取失败，将重新获取: {ticker}, {e}")
+            return {'ticker': ticker, 'reports': [], 'provider_watermarks': {}, 'last_checked': None}
+
+    def is_fresh(self, entry: Dict[str, Any], refresh_interval_hours: float) -> bool:
+        """最近一次检查是否仍在刷新间隔内"""
+        last_checked = entry.get('last_checked')
+        if not last_checked:
+            return False
+        try:
+            checked_at = datetime.fromisoformat(last_checked)
+        except ValueError:
+            return False
+        return datetime.now() - checked_at < timedelta(hours=refresh_interval_hours)
+
+    def merge(self, ticker: str, new_reports: List[ResearchReport], key_func,
+              provider_watermarks: Optional[Dict[str, Optional[str]]] = None) -> List[ResearchReport]:
+        """
+        合并新研报并写回存储，同时刷新检查时间
+
+        Args:
+            ticker: 股票代码
+            new_reports: 本次获取的研报
+            key_func: 研报去重键函数
+            provider_watermarks: 本次成功完成检查的数据源 -> 新水位，未列出的数据源保留原水位
+        Returns:
+            List[ResearchReport]: 合并后的全部研报（按发布日期降序）
+        """
+        with self._get_lock(ticker):
+            entry = self.load(ticker)
+            merged = {key_func(report): report for report in entry['reports']}
+            added = 0
+            for report in new_reports:
+                key = key_func(report)
+                if key not in merged:
+                    added += 1
+                merged[key] = report
+
+            reports = sorted(merged.values(), key=lambda r: r.publish_date, reverse=True)
+            reports = reports[:self.max_reports_per_ticker]
+
+            watermarks = dict(entry['provider_watermarks'])
+            for name, watermark in (provider_watermarks or {}).items():
+                if watermark and (not watermarks.get(name) or watermark > watermarks[name]):
+                    watermarks[name] = watermark
+
+            record = {
+                'ticker': ticker,
+                'reports': [asdict(report) for report in reports],
+                'provider_watermarks': watermarks,
+                'last_checked': datetime.now().isoformat(),
+            }
+            path = self._get_path(ticker)
+            tmp_path = path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(record, f, ensure_ascii=False, indent=2)
+            tmp_path.replace(path)
+
+            if added:
+                logger.debug(f"💾 研报存储更新: {ticker}, 新增 {added} 条, 共 {len(reports)} 条")
+            return reports
+
+
 class ResearchReportManager:
     """研报数据管理器"""
     
-    def __init__(self):
+    # 各数据源的单次获取时限（秒），超时的数据源本次结果被放弃
+    DEFAULT_PROVIDER_TIMEOUTS = {
+        "东方财富": 20.0,
+        "同花顺": 15.0,
+        "AKShare": 45.0,
+    }
+    DEFAULT_PROVIDER_TIMEOUT = 30.0
+    
+    def __init__(self, store: Optional[ResearchReportStore] = None,
+                 provider_timeouts: Optional[Dict[str, float]] = None,
+                 refresh_interval_hours: float = 6.0):
         self.providers = [
             EastMoneyResearchProvider(),
             TongHuaShunResearchProvider(),
             AKShareResearchProvider()
         ]
+        self.store = store or ResearchReportStore()
+        self.provider_timeouts = dict(self.DEFAULT_PROVIDER_TIMEOUTS)
+        if provider_timeouts:
+            self.provider_timeouts.update(provider_timeouts)
+        self.refresh_interval_hours = refresh_interval_hours
+        # 超时数据源的线程无法强制终止，使用长期存在的线程池避免阻塞调用方
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=len(self.providers) * 2, thread_name_prefix="research_report"
+        )
         logger.info(f"🚀 研报数据管理器初始化完成，可用数据源: {[p.name for p in self.providers]}")
     
-    def get_comprehensive_reports(self, ticker: str, limit_per_source: int = 5) -> List[ResearchReport]:
-        """获取综合研报数据"""
+    def get_comprehensive_reports(self, ticker: str, limit_per_source: int = 5,
+                                  force_refresh: bool = False) -> List[ResearchReport]:
+        """
+        获取综合研报数据
+
+        先读取本地研报存储：在刷新间隔内直接使用存储结果；否则并行向各数据源
+        增量请求其各自水位之后的研报，合并入存储后再去重排序。
+        """
         try:
             logger.info(f"📊 开始获取 {ticker} 的综合研报数据")
             
-            all_reports = []
-            successful_sources = []
-            failed_sources = []
-            
-            # 并行获取各数据源的研报
-            for provider in self.providers:
-                try:
-                    reports = provider.get_reports(ticker, limit_per_source)
-                    if reports:  # 只有在有数据时才算成功
-                        all_reports.extend(reports)
-                        successful_sources.append(provider.name)
-                        logger.info(f"✅ {provider.name} 获取到 {len(reports)} 条研报")
-                    else:
-                        failed_sources.append(provider.name)
-                        logger.warning(f"⚠️ {provider.name} 返回空数据")
-                except Exception as e:
-                    failed_sources.append(provider.name)
-                    logger.warning(f"⚠️ {provider.name} 获取研报失败: {str(e)}")
-                    continue
+            entry = self.store.load(ticker)
+            if not force_refresh and self.store.is_fresh(entry, self.refresh_interval_hours):
+                all_reports = entry['reports']
+                logger.info(f"💾 使用本地研报存储: {ticker}, {len(all_reports)} 条 (检查于 {entry['last_checked']})")
+            else:
+                new_reports, successful_sources, failed_sources, watermarks = self._fetch_from_providers(
+                    ticker, limit_per_source, entry['provider_watermarks']
+                )
+                logger.info(f"📊 成功数据源: {successful_sources}, 失败数据源: {failed_sources}")
+                
+                if successful_sources or new_reports:
+                    # 至少一个数据源完成检查才刷新存储的检查时间；只有成功的数据源前移水位
+                    all_reports = self.store.merge(ticker, new_reports, self._create_dedup_key, watermarks)
+                else:
+                    all_reports = entry['reports']
             
-            # 如果所有数据源都失败，返回空列表，不使用备用数据
+            # 如果所有数据源都失败且无历史存储，返回空列表，不使用备用数据
             if not all_reports:
                 logger.warning(f"⚠️ 所有数据源都失败，无研报数据可用: {ticker}")
                 logger.info(f"📊 建议检查网络连接或股票代码是否正确: {ticker}")
@@ -2024,9 +2175,9 @@ class ResearchReportManager:
             
             # 按发布时间和可信度综合排序
             all_reports = self._sort_reports_by_quality(all_reports)
+            all_reports = all_reports[:limit_per_source * len(self.providers)]
             
             logger.info(f"📈 综合获取到 {len(all_reports)} 条研报数据: {ticker}")
-            logger.info(f"📊 成功数据源: {successful_sources}, 失败数据源: {failed_sources}")
             return all_reports
             
         except Exception as e:
@@ -2034,6 +2185,75 @@ class ResearchReportManager:
             # 出现异常时返回空列表，不使用备用数据
             return []
     
+    def _fetch_from_providers(self, ticker: str, limit: int,
+                              provider_watermarks: Optional[Dict[str, Optional[str]]] = None):
+        """
+        并行获取各数据源的研报，每个数据源有独立时限，并从各自的水位开始增量获取
+
+        Returns:
+            (研报列表, 成功数据源, 失败数据源, 成功数据源 -> 新水位)。增量模式下数据源
+            按时返回空结果表示没有更新的研报，也算成功，水位保持不变。
+        """
+        provider_watermarks = provider_watermarks or {}
+        start = time.monotonic()
+        deadlines = {}
+        future_to_provider = {}
+        for provider in self.providers:
+            since = provider_watermarks.get(provider.name)
+            future = self._executor.submit(provider.get_reports_since, ticker, limit, since)
+            future_to_provider[future] = provider
+            deadlines[future] = start + self.provider_timeouts.get(provider.name, self.DEFAULT_PROVIDER_TIMEOUT)
+        
+        all_reports = []
+        successful_sources = []
+        failed_sources = []
+        new_watermarks = {}
+        pending = set(future_to_provider)
+        
+        while pending:
+            now = time.monotonic()
+            # 放弃已超过各自时限的数据源
+            for future in [f for f in pending if deadlines[f] <= now and not f.done()]:
+                pending.discard(future)
+                future.cancel()
+                provider = future_to_provider[future]
+                failed_sources.append(provider.name)
+                logger.warning(f"⏱️ {provider.name} 获取研报超时 ({self.provider_timeouts.get(provider.name, self.DEFAULT_PROVIDER_TIMEOUT)}s)，已放弃")
+            if not pending:
+                break
+            
+            timeout = max(0.0, min(deadlines[f] for f in pending) - now)
+            done, pending = concurrent.futures.wait(
+                pending, timeout=timeout, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                provider = future_to_provider[future]
+                since = provider_watermarks.get(provider.name)
+                try:
+                    reports = future.result()
+                except Exception as e:
+                    failed_sources.append(provider.name)
+                    logger.warning(f"⚠️ {provider.name} 获取研报失败: {str(e)}")
+                    continue
+                
+                if reports:
+                    all_reports.extend(reports)
+                    successful_sources.append(provider.name)
+                    new_watermarks[provider.name] = max(
+                        (report.publish_date for report in reports if report.publish_date), default=since
+                    )
+                    logger.info(f"✅ {provider.name} 获取到 {len(reports)} 条研报")
+                elif since:
+                    successful_sources.append(provider.name)
+                    new_watermarks[provider.name] = since
+                    logger.debug(f"ℹ️ {provider.name} 无 {since} 之后的新研报")
+                else:
+                    failed_sources.append(provider.name)
+                    logger.warning(f"⚠️ {provider.name} 返回空数据")
+        
+        logger.debug(f"⏱️ 研报并行获取耗时 {time.monotonic() - start:.2f}s: {ticker}")
+        return all_reports, successful_sources, failed_sources, new_watermarks
+    
     def _deduplicate_and_optimize_reports(self, reports: List[ResearchReport], ticker: str) -> List[ResearchReport]:
         """数据去重和质量优化"""
         try:
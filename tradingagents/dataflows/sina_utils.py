@@ -15,6 +15,8 @@ import re
 from bs4 import BeautifulSoup
 import concurrent.futures
 
+from .http_client import get_http_client
+
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
@@ -37,15 +39,16 @@ class SinaFinanceProvider:
             'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8'
         }
         
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        # 共享池化HTTP客户端（连接池、重试、并发限制、请求指标）
+        self.http = get_http_client('sina', headers=self.headers)
+        self.session = self.http.session
         
         logger.info("✅ 新浪财经数据提供器初始化成功")
 
-    def _make_request(self, url: str, params: Dict = None, timeout: int = 30) -> Optional[str]:
+    def _make_request(self, url: str, params: Dict = None, timeout: Optional[float] = None) -> Optional[str]:
         """发起HTTP请求，返回原始文本"""
         try:
-            response = self.session.get(url, params=params, timeout=timeout)
+            response = self.http.get(url, params=params, timeout=timeout)
             response.raise_for_status()
             response.encoding = 'gbk'  # 新浪财经使用GBK编码
             return response.text
@@ -338,7 +341,7 @@ class SinaFinanceProvider:
                 'format': 'json'
             }
             
-            response = self.session.get(api_url, params=params, timeout=30)
+            response = self.http.get(api_url, params=params)
             if response.status_code != 200:
                 return []
             
@@ -384,7 +387,7 @@ class SinaFinanceProvider:
             
             # 新浪财经股票专栏页面
             stock_url = f"{self.news_url}/stock/s/{symbol}.shtml"
-            response = self.session.get(stock_url, timeout=30)
+            response = self.http.get(stock_url)
             response.encoding = 'utf-8'
             
             if response.status_code != 200:
@@ -549,7 +552,7 @@ class SinaFinanceProvider:
         """获取热门股票（通过网页抓取）"""
         try:
             url = f"{self.news_url}/money/ztjb/"  # 涨停敢死队页面
-            response = self.session.get(url, timeout=30)
+            response = self.http.get(url)
             response.encoding = 'utf-8'
             
             if response.status_code != 200:
@@ -752,7 +755,7 @@ class SinaFinanceProvider:
                 'count': limit
             }
             
-            response = self.session.get(api_url, params=params, timeout=30)
+            response = self.http.get(api_url, params=params)
             if response.status_code != 200:
                 return []
             
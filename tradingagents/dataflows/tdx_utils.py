@@ -6,8 +6,14 @@ Tushare数据接口数据获取工具
 
 import pandas as pd
 import numpy as np
+import queue
+import threading
+import time
+import concurrent.futures
+from contextlib import contextmanager
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Tuple
+from typing import Any, Callable, List, Dict, Optional, Tuple
 import warnings
 
 # 导入日志模块
@@ -50,15 +56,280 @@ except ImportError:
     logger.warning(f"⚠️ pytdx库未安装，无法使用Tushare数据接口")
     logger.info(f"💡 安装命令: pip install pytdx")
 
+# 连接/传输层故障：只有这类异常才驱逐连接并计入服务器失败次数（OSError 已包含 socket 错误与超时）
+try:
+    from pytdx.errors import TdxConnectionError
+    TDX_TRANSPORT_ERRORS = (OSError, TdxConnectionError)
+except ImportError:
+    TDX_TRANSPORT_ERRORS = (OSError,)
+
+
+# 默认行情服务器列表（未找到 tdx_servers_config.json 时使用）
+DEFAULT_TDX_SERVERS = [
+    {'ip': '115.238.56.198', 'port': 7709},
+    {'ip': '115.238.90.165', 'port': 7709},
+    {'ip': '180.153.18.170', 'port': 7709},
+    {'ip': '119.147.212.81', 'port': 7709},  # 备用
+]
+
+
+@dataclass
+class TdxServerStats:
+    """行情服务器健康统计"""
+    ip: str
+    port: int
+    latency_ms: float = float('inf')
+    failures: int = 0
+    last_failure: float = 0.0
+    active_connections: int = 0
+
+    @property
+    def address(self) -> str:
+        return f"{self.ip}:{self.port}"
+
+
+@dataclass
+class _PooledConnection:
+    """连接池中的单个连接"""
+    api: Any
+    server: TdxServerStats
+    last_used: float = 0.0
+
+
+class TdxConnectionPool:
+    """
+    通达信行情连接池
+
+    在多个可用服务器之间维护一组连接：按实测延迟对服务器排序，连接按排名
+    轮流分配到健康服务器；使用中出现连接/传输故障的连接会被断开并计入服务器失败次数，
+    连续失败的服务器在冷却期内不再分配新连接。每个连接同一时刻只被一个线程使用。
+    """
+
+    def __init__(self, servers: List[Dict], pool_size: int = 4,
+                 api_factory: Optional[Callable[[], Any]] = None,
+                 connect_timeout: float = 3.0, max_failures: int = 3,
+                 failure_cooldown: float = 60.0):
+        """
+        初始化连接池
+
+        Args:
+            servers: 服务器列表 [{'ip': ..., 'port': ...}]
+            pool_size: 最大连接数（即最大并发下载数）
+            api_factory: 创建行情API实例的工厂，默认 TdxHq_API（测试时可替换为本地伪服务器客户端）
+            connect_timeout: 单次连接超时（秒）
+            max_failures: 服务器连续失败多少次后进入冷却
+            failure_cooldown: 冷却时长（秒）
+        """
+        self.servers = [TdxServerStats(ip=s['ip'], port=int(s['port'])) for s in servers]
+        self.pool_size = max(1, pool_size)
+        self.api_factory = api_factory or TdxHq_API
+        self.connect_timeout = connect_timeout
+        self.max_failures = max_failures
+        self.failure_cooldown = failure_cooldown
+
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._size = 0
+        self._next_server = 0
+
+    def _mark_failure(self, server: TdxServerStats):
+        with self._lock:
+            server.failures += 1
+            server.last_failure = time.time()
+
+    def _open(self, server: TdxServerStats) -> Optional[Any]:
+        """连接服务器并测量延迟（连接 + 一次轻量查询）"""
+        api = self.api_factory()
+        start = time.perf_counter()
+        try:
+            if not api.connect(server.ip, server.port, time_out=self.connect_timeout):
+                raise ConnectionError("connect returned False")
+            api.get_security_count(0)
+        except Exception as e:
+            logger.debug(f"⚠️ 通达信服务器 {server.address} 不可用: {e}")
+            self._mark_failure(server)
+            try:
+                api.disconnect()
+            except Exception:
+                pass
+            return None
+
+        with self._lock:
+            server.latency_ms = (time.perf_counter() - start) * 1000
+            server.failures = 0
+        return api
+
+    def _close(self, conn: _PooledConnection):
+        try:
+            conn.api.disconnect()
+        except Exception:
+            pass
+        with self._lock:
+            conn.server.active_connections -= 1
+            self._size -= 1
+
+    def healthy_servers(self) -> List[TdxServerStats]:
+        """按延迟排序的健康服务器（冷却期已过的服务器重新参与排名）"""
+        now = time.time()
+        with self._lock:
+            healthy = [s for s in self.servers
+                       if s.failures < self.max_failures or now - s.last_failure > self.failure_cooldown]
+        return sorted(healthy, key=lambda s: s.latency_ms)
+
+    def rank_servers(self) -> List[TdxServerStats]:
+        """并发探测所有服务器延迟，并用探测得到的连接预热连接池"""
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(self.servers) or 1) as executor:
+            probes = list(executor.map(lambda server: (server, self._open(server)), self.servers))
+
+        for server, api in sorted(probes, key=lambda item: item[0].latency_ms):
+            if api is None:
+                continue
+            with self._lock:
+                keep = self._size < self.pool_size
+                if keep:
+                    self._size += 1
+                    server.active_connections += 1
+            if keep:
+                self._idle.put(_PooledConnection(api=api, server=server, last_used=time.time()))
+            else:
+                try:
+                    api.disconnect()
+                except Exception:
+                    pass
+
+        ranked = self.healthy_servers()
+        if ranked:
+            logger.info(f"📡 通达信服务器排名: " +
+                        ", ".join(f"{s.address}({s.latency_ms:.0f}ms)" for s in ranked if s.latency_ms != float('inf')))
+        return ranked
+
+    def _create_connection(self) -> Optional[_PooledConnection]:
+        """在排名靠前的健康服务器之间轮流新建连接"""
+        candidates = self.healthy_servers()
+        for _ in range(len(candidates)):
+            with self._lock:
+                server = candidates[self._next_server % len(candidates)]
+                self._next_server += 1
+            api = self._open(server)
+            if api is not None:
+                with self._lock:
+                    server.active_connections += 1
+                return _PooledConnection(api=api, server=server, last_used=time.time())
+        return None
+
+    def _acquire(self, timeout: Optional[float]) -> _PooledConnection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_grow = self._size < self.pool_size
+            if can_grow:
+                self._size += 1
+        if can_grow:
+            conn = self._create_connection()
+            if conn is not None:
+                return conn
+            with self._lock:
+                self._size -= 1
+            if self._size == 0:
+                raise ConnectionError("没有可用的通达信行情服务器")
+
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError("等待通达信连接超时")
+
+    def _release(self, conn: _PooledConnection, healthy: bool):
+        if healthy:
+            conn.last_used = time.time()
+            self._idle.put(conn)
+        else:
+            logger.debug(f"🔌 驱逐通达信连接: {conn.server.address}")
+            self._mark_failure(conn.server)
+            self._close(conn)
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = 30.0):
+        """
+        借用一个连接
+
+        with 块内抛出的连接/传输异常（TDX_TRANSPORT_ERRORS）视为连接故障：连接被驱逐，
+        服务器记一次失败。其他异常（单只股票的数据、解析错误等）照常抛出，连接归还连接池。
+        """
+        conn = self._acquire(timeout)
+        healthy = True
+        try:
+            yield conn.api
+        except TDX_TRANSPORT_ERRORS:
+            healthy = False
+            raise
+        finally:
+            self._release(conn, healthy)
+
+    def health_check(self) -> int:
+        """检查所有空闲连接，驱逐失效连接；返回驱逐数量"""
+        idle = []
+        while True:
+            try:
+                idle.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+        evicted = 0
+        for conn in idle:
+            try:
+                if conn.api.get_security_count(0):
+                    self._idle.put(conn)
+                    continue
+            except Exception:
+                pass
+            evicted += 1
+            self._release(conn, healthy=False)
+
+        if evicted:
+            logger.warning(f"⚠️ 通达信连接池健康检查驱逐 {evicted} 个连接")
+        return evicted
+
+    def get_stats(self) -> Dict[str, Any]:
+        """连接池统计"""
+        with self._lock:
+            return {
+                'pool_size': self.pool_size,
+                'open_connections': self._size,
+                'idle_connections': self._idle.qsize(),
+                'servers': [
+                    {
+                        'address': s.address,
+                        'latency_ms': None if s.latency_ms == float('inf') else round(s.latency_ms, 1),
+                        'failures': s.failures,
+                        'active_connections': s.active_connections,
+                    }
+                    for s in sorted(self.servers, key=lambda s: s.latency_ms)
+                ]
+            }
+
+    def close(self):
+        """断开所有空闲连接"""
+        while True:
+            try:
+                self._close(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
 
 class TongDaXinDataProvider:
     """通达信数据提供器"""
     
-    def __init__(self):
+    def __init__(self, pool_size: int = 4):
         logger.debug(f"🔍 [DEBUG] 初始化通达信数据提供器...")
         self.api = None
         self.exapi = None  # 扩展行情API
         self.connected = False
+        self.pool_size = pool_size
+        self.pool = None  # 批量下载使用的连接池，首次需要时创建
+        self._pool_lock = threading.Lock()
 
         logger.debug(f"🔍 [DEBUG] 检查pytdx库可用性: {TDX_AVAILABLE}")
         if not TDX_AVAILABLE:
@@ -73,19 +344,12 @@ class TongDaXinDataProvider:
         try:
             # 尝试从配置文件加载可用服务器
             logger.debug(f"🔍 [DEBUG] 加载服务器配置...")
-            working_servers = self._load_working_servers()
-
-            # 如果没有配置文件，使用默认服务器列表
-            if not working_servers:
-                logger.debug(f"🔍 [DEBUG] 未找到配置文件，使用默认服务器列表")
-                working_servers = [
-                    {'ip': '115.238.56.198', 'port': 7709},
-                    {'ip': '115.238.90.165', 'port': 7709},
-                    {'ip': '180.153.18.170', 'port': 7709},
-                    {'ip': '119.147.212.81', 'port': 7709},  # 备用
-                ]
-            else:
-                logger.debug(f"🔍 [DEBUG] 从配置文件加载了 {len(working_servers)} 个服务器")
+            working_servers = self._get_servers()
+
+            # 连接池已完成延迟排名时，按排名顺序尝试
+            if self.pool is not None:
+                ranked = [{'ip': s.ip, 'port': s.port} for s in self.pool.healthy_servers()]
+                working_servers = ranked or working_servers
 
             # 尝试连接可用服务器
             logger.debug(f"🔍 [DEBUG] 创建Tushare数据接口实例...")
@@ -114,6 +378,24 @@ class TongDaXinDataProvider:
             self.connected = False
             return False
 
+    def _get_servers(self) -> List[Dict]:
+        """获取服务器列表：优先配置文件，否则使用默认列表"""
+        working_servers = self._load_working_servers()
+        if not working_servers:
+            logger.debug(f"🔍 [DEBUG] 未找到配置文件，使用默认服务器列表")
+            return list(DEFAULT_TDX_SERVERS)
+        logger.debug(f"🔍 [DEBUG] 从配置文件加载了 {len(working_servers)} 个服务器")
+        return working_servers
+
+    def get_connection_pool(self) -> TdxConnectionPool:
+        """获取（必要时创建并按延迟排名）连接池"""
+        with self._pool_lock:
+            if self.pool is None:
+                pool = TdxConnectionPool(self._get_servers(), pool_size=self.pool_size)
+                pool.rank_servers()
+                self.pool = pool
+            return self.pool
+
     def _load_working_servers(self):
         """加载可用服务器配置"""
         try:
@@ -136,6 +418,10 @@ class TongDaXinDataProvider:
                 self.api.disconnect()
             if self.exapi:
                 self.exapi.disconnect()
+            with self._pool_lock:
+                if self.pool:
+                    self.pool.close()
+                    self.pool = None
             self.connected = False
             logger.info(f"✅ Tushare数据接口连接已断开")
         except:
@@ -284,62 +570,124 @@ class TongDaXinDataProvider:
                 return pd.DataFrame()
         
         try:
-            market = self._get_market_code(stock_code)
-            
-            # 计算需要获取的数据量
-            start_dt = datetime.strptime(start_date, '%Y-%m-%d')
-            end_dt = datetime.strptime(end_date, '%Y-%m-%d')
-            days_diff = (end_dt - start_dt).days
-            
-            # 根据周期调整数据量
-            if period == 'D':
-                count = min(days_diff + 10, 800)  # 日线最多800条
-            elif period == 'W':
-                count = min(days_diff // 7 + 10, 800)
-            elif period == 'M':
-                count = min(days_diff // 30 + 10, 800)
-            else:
-                count = 800
-            
-            # 获取K线数据
-            category_map = {'D': 9, 'W': 5, 'M': 6}
-            category = category_map.get(period, 9)
-            
-            data = self.api.get_security_bars(category, market, stock_code, 0, count)
-            
-            if not data:
-                return pd.DataFrame()
-            
-            # 转换为DataFrame
-            df = pd.DataFrame(data)
-            
-            # 处理数据格式
-            df['datetime'] = pd.to_datetime(df['datetime'])
-            df = df.set_index('datetime')
-            df = df.sort_index()
-            
-            # 筛选日期范围
-            df = df[start_date:end_date]
-            
-            # 重命名列以匹配Yahoo Finance格式
-            df = df.rename(columns={
-                'open': 'Open',
-                'high': 'High', 
-                'low': 'Low',
-                'close': 'Close',
-                'vol': 'Volume',
-                'amount': 'Amount'
-            })
-            
-            # 添加股票代码信息
-            df['Symbol'] = stock_code
-            
-            return df
-            
+            return self._fetch_history_bars(self.api, stock_code, start_date, end_date, period)
         except Exception as e:
             logger.error(f"获取历史数据失败: {e}")
             return pd.DataFrame()
     
+    def get_stock_history_batch(self, symbols: List[str], start_date: str, end_date: str,
+                                period: str = 'D', max_workers: Optional[int] = None) -> Dict[str, pd.DataFrame]:
+        """
+        批量获取多只股票历史数据（通过连接池并发下载）
+
+        Args:
+            symbols: 股票代码列表
+            start_date: 开始日期 'YYYY-MM-DD'
+            end_date: 结束日期 'YYYY-MM-DD'
+            period: 周期 'D'=日线, 'W'=周线, 'M'=月线
+            max_workers: 并发数，默认等于连接池大小
+        Returns:
+            Dict[str, DataFrame]: 股票代码 -> 历史数据（无数据的股票不包含在结果中）
+        """
+        if not symbols:
+            return {}
+
+        pool = self.get_connection_pool()
+        workers = min(len(symbols), max_workers or pool.pool_size)
+        logger.info(f"🚀 通达信批量下载: {len(symbols)} 只股票，{workers} 并发")
+
+        def fetch(symbol: str) -> pd.DataFrame:
+            # 连接故障时换一个连接重试一次；数据错误不重试
+            for attempt in range(2):
+                try:
+                    with pool.connection() as api:
+                        return self._fetch_history_bars(api, symbol, start_date, end_date, period)
+                except TDX_TRANSPORT_ERRORS as e:
+                    if attempt == 1:
+                        logger.error(f"❌ 通达信获取 {symbol} 历史数据失败: {e}")
+                except Exception as e:
+                    logger.error(f"❌ 通达信获取 {symbol} 历史数据失败: {e}")
+                    break
+            return pd.DataFrame()
+
+        results = {}
+        failed = 0
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            future_to_symbol = {executor.submit(fetch, symbol): symbol for symbol in symbols}
+            for future in concurrent.futures.as_completed(future_to_symbol):
+                symbol = future_to_symbol[future]
+                try:
+                    df = future.result()
+                except Exception as e:
+                    logger.error(f"❌ 通达信获取 {symbol} 失败: {e}")
+                    df = None
+                if df is not None and not df.empty:
+                    results[symbol] = df
+                else:
+                    failed += 1
+
+        logger.info(f"✅ 通达信批量下载完成: 成功 {len(results)}，失败 {failed}")
+        return results
+    
+    def _fetch_history_bars(self, api, stock_code: str, start_date: str, end_date: str,
+                            period: str = 'D') -> pd.DataFrame:
+        """使用指定连接获取单只股票的K线数据"""
+        market = self._get_market_code(stock_code)
+        
+        # 计算需要获取的数据量
+        start_dt = datetime.strptime(start_date, '%Y-%m-%d')
+        end_dt = datetime.strptime(end_date, '%Y-%m-%d')
+        days_diff = (end_dt - start_dt).days
+        
+        # 根据周期调整数据量
+        if period == 'D':
+            count = min(days_diff + 10, 800)  # 日线最多800条
+        elif period == 'W':
+            count = min(days_diff // 7 + 10, 800)
+        elif period == 'M':
+            count = min(days_diff // 30 + 10, 800)
+        else:
+            count = 800
+        
+        # 获取K线数据
+        category_map = {'D': 9, 'W': 5, 'M': 6}
+        category = category_map.get(period, 9)
+        
+        data = api.get_security_bars(category, market, stock_code, 0, count)
+
+        # pytdx 在连接断开时吞掉异常并返回 None；无数据的股票返回空列表
+        if data is None:
+            raise ConnectionError(f"通达信服务器未返回 {stock_code} 的K线数据")
+        if not data:
+            return pd.DataFrame()
+        
+        # 转换为DataFrame
+        df = pd.DataFrame(data)
+        
+        # 处理数据格式
+        df['datetime'] = pd.to_datetime(df['datetime'])
+        df = df.set_index('datetime')
+        df = df.sort_index()
+        
+        # 筛选日期范围
+        df = df[start_date:end_date]
+        
+        # 重命名列以匹配Yahoo Finance格式
+        df = df.rename(columns={
+            'open': 'Open',
+            'high': 'High', 
+            'low': 'Low',
+            'close': 'Close',
+            'vol': 'Volume',
+            'amount': 'Amount'
+        })
+        
+        # 添加股票代码信息
+        df['Symbol'] = stock_code
+        
+        return df
+
+    
     def get_stock_technical_indicators(self, stock_code: str, period: int = 20) -> Dict:
         """
         计算技术指标
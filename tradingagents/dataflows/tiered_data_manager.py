@@ -10,9 +10,11 @@ import numpy as np
 from typing import Dict, List, Optional, Any, Tuple, Union
 from datetime import datetime, timedelta
 from enum import Enum
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict, field
+import os
 import time
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import json
 
@@ -69,6 +71,45 @@ class DataResponse:
     cache_hits: int = 0
     batch_hits: int = 0
     realtime_hits: int = 0
+    partial_hits: int = 0  # 本地有部分数据、只补齐缺失区间的股票数
+
+
+class CoverageStatus(Enum):
+    """本地数据覆盖状态"""
+    HIT = "hit"           # 完整覆盖请求区间
+    PARTIAL = "partial"   # 部分覆盖，只需获取缺失区间
+    MISS = "miss"         # 无本地数据
+
+
+@dataclass
+class CacheCoverage:
+    """单只股票的本地数据覆盖情况"""
+    symbol: str
+    status: CoverageStatus
+    missing_ranges: List[Dict[str, str]] = field(default_factory=list)  # [{'start': ..., 'end': ...}]
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    record_count: int = 0
+
+
+@dataclass
+class DownloadCheckpoint:
+    """流式批量下载的断点清单"""
+    data_type: str
+    start_date: Optional[str]
+    end_date: Optional[str]
+    total_symbols: int
+    completed: List[str]
+    failed: Dict[str, str]  # {symbol: 失败原因}
+    chunks_done: int = 0
+    started_at: str = ""
+    updated_at: str = ""
+    finished: bool = False
+
+    def matches(self, data_type: 'DataType', start_date: Optional[str], end_date: Optional[str]) -> bool:
+        """断点是否属于同一次下载任务"""
+        return (self.data_type == data_type.value and self.start_date == start_date
+                and self.end_date == end_date)
 
 
 class TieredDataManager:
@@ -211,42 +252,38 @@ class TieredDataManager:
         )
         
         try:
-            # 1. 检查缓存（如果可用）
-            cached_data = self._check_cache(request)
+            # 1. 批量探测缓存覆盖情况，加载完整命中和部分命中的本地数据
+            coverage = self.probe_cache_coverage(request)
+            cached_data, partial_data = self._check_cache(request, coverage)
             if cached_data:
                 response.data.update(cached_data)
                 response.cache_hits = len(cached_data)
-                logger.info(f"💾 缓存命中: {len(cached_data)}只股票")
-            
-            # 2. 确定需要获取的股票
-            remaining_symbols = [s for s in request.symbols if s not in response.data]
+                self.stats['cache_hits'] += len(cached_data)
             
-            if not remaining_symbols:
-                logger.info("✅ 所有数据都来自缓存")
-                return response
+            # 2. 部分命中的股票只向数据源请求缺失的日期区间
+            new_data = {}
+            if partial_data:
+                filled = self._fill_cache_gaps(partial_data, request, response)
+                response.data.update(filled['merged'])
+                new_data.update(filled['gaps'])
+                response.partial_hits = len(partial_data)
             
-            # 3. 分层数据获取策略
-            if request.batch_preferred and request.data_type in [DataType.HISTORICAL, DataType.FINANCIAL]:
-                # 优先使用批量数据源
-                batch_data = self._get_batch_data(remaining_symbols, request)
-                if batch_data:
-                    response.data.update(batch_data['data'])
-                    response.source_info.update(batch_data['source_info'])
-                    response.batch_hits = len(batch_data['data'])
-                    
-                    # 更新剩余需要获取的股票
-                    remaining_symbols = [s for s in remaining_symbols if s not in batch_data['data']]
+            # 3. 确定需要完整获取的股票
+            remaining_symbols = [s for s in request.symbols if s not in response.data]
             
-            # 4. 实时数据源补充
+            # 4. 分层数据获取：批量数据源优先，实时数据源补充
             if remaining_symbols:
-                realtime_data = self._get_realtime_data(remaining_symbols, request)
-                if realtime_data:
-                    response.data.update(realtime_data['data'])
-                    response.source_info.update(realtime_data['source_info'])
-                    response.realtime_hits = len(realtime_data['data'])
+                fetched = self._fetch_from_tiers(remaining_symbols, request)
+                response.data.update(fetched['data'])
+                response.source_info.update(fetched['source_info'])
+                response.batch_hits += fetched['batch_hits']
+                response.realtime_hits += fetched['realtime_hits']
+                new_data.update(fetched['data'])
+            else:
+                logger.info("✅ 所有数据都来自缓存")
             
-            # 5. 保存新获取的数据到缓存
-            self._save_to_cache(response.data, request)
+            # 5. 只保存新获取的数据（缓存命中的数据已在本地）
+            self._save_to_cache(new_data, request)
             
             # 6. 更新统计信息
             elapsed_time = time.time() - start_time
@@ -256,6 +293,7 @@ class TieredDataManager:
                 'failed': len(request.symbols) - len(response.data),
                 'elapsed_time': elapsed_time,
                 'cache_hits': response.cache_hits,
+                'partial_hits': response.partial_hits,
                 'batch_hits': response.batch_hits,
                 'realtime_hits': response.realtime_hits,
                 'success_rate': len(response.data) / len(request.symbols) * 100 if request.symbols else 0
@@ -281,145 +319,215 @@ class TieredDataManager:
             response.stats = {'error': str(e)}
             return response
 
-    def _check_cache(self, request: DataRequest) -> Optional[Dict[str, pd.DataFrame]]:
-        """检查缓存数据"""
+    def probe_cache_coverage(self, request: DataRequest) -> Dict[str, CacheCoverage]:
+        """
+        批量探测请求中所有股票的本地数据覆盖情况
+        
+        只查询历史数据索引（按主键分批查询，不读取数据文件），
+        非历史K线请求没有持久化索引，全部视为未命中。
+        
+        Args:
+            request: 数据请求
+            
+        Returns:
+            {symbol: CacheCoverage}
+        """
+        if request.data_type != DataType.HISTORICAL or not request.symbols:
+            return {s: CacheCoverage(symbol=s, status=CoverageStatus.MISS) for s in request.symbols}
+        
         try:
-            # 导入现有的缓存管理器
-            from tradingagents.dataflows.cache_manager import get_cache
             from tradingagents.dataflows.historical_data_manager import get_historical_manager
             
-            cached_data = {}
-            cache_manager = get_cache()
-            historical_manager = get_historical_manager()
-            
-            for symbol in request.symbols:
-                # 1. 先检查内存缓存 - 使用多种缓存键尝试
-                cache_keys = [
-                    f"stock_data_{symbol}_{request.start_date}_{request.end_date}",  # 精确匹配
-                    f"stock_data_{symbol}_recent",  # 最近数据（不依赖具体日期）
-                    f"stock_data_{symbol}_daily"  # 日线数据通用缓存
-                ]
-                
-                cached_df = None
-                for cache_key in cache_keys:
-                    cached_df = cache_manager.get(cache_key)
-                    if cached_df is not None and not cached_df.empty:
-                        # 检查数据是否包含所需的日期范围
-                        if hasattr(cached_df, 'index') and len(cached_df.index) > 0:
-                            try:
-                                # 检查数据的日期范围是否满足需求
-                                data_start = cached_df.index[0].date() if hasattr(cached_df.index[0], 'date') else cached_df.index[0]
-                                data_end = cached_df.index[-1].date() if hasattr(cached_df.index[-1], 'date') else cached_df.index[-1]
-                                
-                                from datetime import datetime
-                                req_start = datetime.strptime(request.start_date, '%Y-%m-%d').date() if request.start_date else None
-                                req_end = datetime.strptime(request.end_date, '%Y-%m-%d').date() if request.end_date else None
-                                
-                                # 检查缓存数据是否覆盖所需范围
-                                if req_start and req_end:
-                                    if data_start <= req_start and data_end >= req_end:
-                                        # 过滤出所需的日期范围
-                                        filtered_df = cached_df[(cached_df.index >= request.start_date) & (cached_df.index <= request.end_date)]
-                                        if not filtered_df.empty:
-                                            cached_data[symbol] = filtered_df
-                                            logger.debug(f"✅ 内存缓存命中(范围过滤): {symbol} (key: {cache_key})")
-                                            break
-                                elif req_end is None or data_end >= req_end:
-                                    # 如果没有结束日期限制，或数据足够新
-                                    cached_data[symbol] = cached_df
-                                    logger.debug(f"✅ 内存缓存命中(最新数据): {symbol} (key: {cache_key})")
-                                    break
-                            except Exception as e:
-                                logger.debug(f"缓存数据日期检查失败 {symbol}: {e}")
-                                continue
-                        else:
-                            cached_data[symbol] = cached_df
-                            logger.debug(f"✅ 内存缓存命中(无索引): {symbol} (key: {cache_key})")
-                            break
-                
-                if symbol in cached_data:
-                    continue
-                else:
-                    logger.debug(f"❌ 内存缓存完全未命中: {symbol}")
-                
-                # 2. 检查历史数据管理器（持久化存储）
-                if request.data_type == DataType.HISTORICAL:
-                    try:
-                        stored_data = historical_manager.get_data(
-                            symbol=symbol,
-                            start_date=request.start_date,
-                            end_date=request.end_date
-                        )
-                        
-                        if stored_data is not None and not stored_data.empty:
-                            # 检查数据是否足够新
-                            latest_date = stored_data.index[-1] if hasattr(stored_data, 'index') else None
-                            if latest_date:
-                                # 如果数据在指定时间范围内，使用缓存
-                                current_date = datetime.now().date()
-                                data_date = latest_date.date() if hasattr(latest_date, 'date') else latest_date
-                                
-                                # 激进缓存策略：如果数据不超过3天，认为是新鲜的（智能选股性能优化）
-                                if (current_date - data_date).days <= 3:
-                                    cached_data[symbol] = stored_data
-                                    logger.debug(f"✅ 持久化缓存命中: {symbol} (数据日期: {data_date}, 年龄: {(current_date - data_date).days}天)")
-                                    
-                                    # 同时更新内存缓存
-                                    cache_manager.set(cache_key, stored_data, expire_minutes=60)
-                                else:
-                                    logger.debug(f"❌ 持久化缓存过期: {symbol} (数据日期: {data_date}, 年龄: {(current_date - data_date).days}天)")
-                                    
-                    except Exception as e:
-                        logger.debug(f"检查 {symbol} 历史缓存失败: {e}")
-                        continue
-            
-            if cached_data:
-                logger.info(f"💾 缓存命中: {len(cached_data)} 只股票，跳过重复获取")
-                
-            return cached_data if cached_data else None
-            
+            # 与原有激进缓存策略一致：数据不超过3天视为新鲜
+            probed = get_historical_manager().probe_coverage(
+                request.symbols,
+                start_date=request.start_date,
+                end_date=request.end_date,
+                tolerance_days=3
+            )
         except Exception as e:
-            logger.warning(f"⚠️ 缓存检查失败: {e}")
-            return None
+            logger.warning(f"⚠️ 缓存覆盖探测失败: {e}")
+            return {s: CacheCoverage(symbol=s, status=CoverageStatus.MISS) for s in request.symbols}
+        
+        coverage = {}
+        for symbol, info in probed.items():
+            coverage[symbol] = CacheCoverage(
+                symbol=symbol,
+                status=CoverageStatus(info['status']),
+                missing_ranges=info['missing_ranges'],
+                start_date=info['start_date'],
+                end_date=info['end_date'],
+                record_count=info['record_count']
+            )
+        
+        counts = {status: 0 for status in CoverageStatus}
+        for item in coverage.values():
+            counts[item.status] += 1
+        logger.debug(f"🔍 缓存覆盖探测: 命中{counts[CoverageStatus.HIT]}, "
+                     f"部分命中{counts[CoverageStatus.PARTIAL]}, 未命中{counts[CoverageStatus.MISS]}")
+        
+        return coverage
 
-    def _save_to_cache(self, data: Dict[str, pd.DataFrame], request: DataRequest):
-        """保存数据到缓存"""
+    def _check_cache(self, request: DataRequest, coverage: Dict[str, CacheCoverage]
+                     ) -> Tuple[Dict[str, pd.DataFrame], Dict[str, Tuple[pd.DataFrame, CacheCoverage]]]:
+        """
+        按探测结果加载本地数据
+        
+        Returns:
+            (完整命中的数据 {symbol: DataFrame}, 部分命中的数据 {symbol: (已有数据, 覆盖信息)})
+        """
+        cached_data = {}
+        partial_data = {}
+        
+        to_load = [item for item in coverage.values() if item.status != CoverageStatus.MISS]
+        if not to_load:
+            return cached_data, partial_data
+        
         try:
-            # 导入缓存管理器
-            from tradingagents.dataflows.cache_manager import get_cache
             from tradingagents.dataflows.historical_data_manager import get_historical_manager
-            
-            cache_manager = get_cache()
             historical_manager = get_historical_manager()
+        except Exception as e:
+            logger.warning(f"⚠️ 缓存检查失败: {e}")
+            return cached_data, partial_data
+        
+        def load_single(item: CacheCoverage):
+            try:
+                return item, historical_manager.load_historical_data(
+                    item.symbol,
+                    start_date=request.start_date,
+                    end_date=request.end_date
+                )
+            except Exception as e:
+                logger.debug(f"加载 {item.symbol} 本地数据失败: {e}")
+                return item, None
+        
+        # parquet 读取会释放GIL，命中较多时用线程池并行加载
+        if len(to_load) > 1:
+            with ThreadPoolExecutor(max_workers=min(8, len(to_load))) as executor:
+                loaded = list(executor.map(load_single, to_load))
+        else:
+            loaded = [load_single(item) for item in to_load]
+        
+        for item, stored_data in loaded:
+            if stored_data is None or stored_data.empty:
+                continue
             
-            for symbol, df in data.items():
-                if df is not None and not df.empty:
-                    # 1. 保存到内存缓存（短期缓存）- 使用多种缓存键
-                    cache_keys = [
-                        f"stock_data_{symbol}_{request.start_date}_{request.end_date}",  # 精确匹配
-                        f"stock_data_{symbol}_recent",  # 最近数据
-                        f"stock_data_{symbol}_daily"  # 日线数据通用
-                    ]
-                    
-                    for cache_key in cache_keys:
-                        cache_manager.set(cache_key, df, expire_minutes=480)  # 激进缓存：延长到8小时
-                    
-                    # 2. 保存到历史数据管理器（持久化存储）
-                    if request.data_type == DataType.HISTORICAL:
-                        try:
-                            historical_manager.save_data(
-                                symbol=symbol,
-                                data=df,
-                                data_type='daily'  # 默认日线数据
-                            )
-                        except Exception as e:
-                            logger.debug(f"保存 {symbol} 到历史数据库失败: {e}")
+            if item.status == CoverageStatus.HIT:
+                cached_data[item.symbol] = stored_data
+            else:
+                partial_data[item.symbol] = (stored_data, item)
+        
+        if cached_data or partial_data:
+            logger.info(f"💾 缓存命中: {len(cached_data)} 只股票, 部分命中: {len(partial_data)} 只股票，跳过重复获取")
+        
+        return cached_data, partial_data
+
+    def _fill_cache_gaps(self, partial_data: Dict[str, Tuple[pd.DataFrame, CacheCoverage]],
+                         request: DataRequest, response: DataResponse) -> Dict[str, Dict[str, pd.DataFrame]]:
+        """
+        只获取部分命中股票缺失的日期区间，并与本地数据合并
+        
+        缺失区间相同的股票（通常是最近几个交易日）合并为一次分层请求。
+        
+        Returns:
+            {'merged': 合并后的完整数据, 'gaps': 新获取的缺口数据（用于落盘）}
+        """
+        groups: Dict[Tuple[Tuple[str, str], ...], List[str]] = {}
+        for symbol, (_, item) in partial_data.items():
+            key = tuple((r['start'], r['end']) for r in item.missing_ranges)
+            groups.setdefault(key, []).append(symbol)
+        
+        gap_frames: Dict[str, List[pd.DataFrame]] = {}
+        for ranges, symbols in groups.items():
+            for gap_start, gap_end in ranges:
+                gap_request = DataRequest(
+                    symbols=symbols,
+                    data_type=request.data_type,
+                    start_date=gap_start,
+                    end_date=gap_end,
+                    priority=request.priority,
+                    max_age_hours=request.max_age_hours,
+                    batch_preferred=request.batch_preferred
+                )
+                fetched = self._fetch_from_tiers(symbols, gap_request)
+                response.batch_hits += fetched['batch_hits']
+                response.realtime_hits += fetched['realtime_hits']
+                response.source_info.update(fetched['source_info'])
+                for symbol, df in fetched['data'].items():
+                    gap_frames.setdefault(symbol, []).append(df)
+        
+        merged = {}
+        gaps = {}
+        for symbol, (stored_data, _) in partial_data.items():
+            frames = gap_frames.get(symbol)
+            if not frames:
+                # 缺口获取失败时退回本地已有数据，避免整只股票重新下载
+                merged[symbol] = stored_data
+                response.source_info.setdefault(symbol, 'cache')
+                continue
             
-            if data:
-                logger.info(f"💾 已保存 {len(data)} 只股票数据到缓存")
-                
-        except Exception as e:
-            logger.warning(f"⚠️ 保存数据到缓存失败: {e}")
+            gap_df = pd.concat(frames) if len(frames) > 1 else frames[0]
+            gaps[symbol] = gap_df
+            combined = pd.concat([stored_data, gap_df])
+            if 'date' in combined.columns:
+                combined['date'] = pd.to_datetime(combined['date'])
+                combined = combined.drop_duplicates(subset=['date'], keep='last').sort_values('date')
+                combined = combined.reset_index(drop=True)
+            else:
+                combined = combined[~combined.index.duplicated(keep='last')].sort_index()
+            merged[symbol] = combined
+        
+        logger.info(f"🧩 缺口补齐: {len(gaps)}/{len(partial_data)} 只股票, {len(groups)} 组缺失区间")
+        return {'merged': merged, 'gaps': gaps}
+
+    def _fetch_from_tiers(self, symbols: List[str], request: DataRequest) -> Dict[str, Any]:
+        """
+        按分层策略获取数据：批量数据源优先（历史K线和财务数据），实时数据源补充
+        
+        Returns:
+            {'data', 'source_info', 'batch_hits', 'realtime_hits'}
+        """
+        data: Dict[str, pd.DataFrame] = {}
+        source_info: Dict[str, str] = {}
+        batch_hits = 0
+        realtime_hits = 0
+        
+        if request.batch_preferred and request.data_type in [DataType.HISTORICAL, DataType.FINANCIAL]:
+            batch_data = self._get_batch_data(symbols, request)
+            if batch_data:
+                data.update(batch_data['data'])
+                source_info.update(batch_data['source_info'])
+                batch_hits = len(batch_data['data'])
+        
+        remaining_symbols = [s for s in symbols if s not in data]
+        if remaining_symbols:
+            realtime_data = self._get_realtime_data(remaining_symbols, request)
+            if realtime_data:
+                data.update(realtime_data['data'])
+                source_info.update(realtime_data['source_info'])
+                realtime_hits = len(realtime_data['data'])
+        
+        return {
+            'data': data,
+            'source_info': source_info,
+            'batch_hits': batch_hits,
+            'realtime_hits': realtime_hits
+        }
+
+    def _save_to_cache(self, data: Dict[str, pd.DataFrame], request: DataRequest):
+        """保存新获取的数据到持久化存储（历史K线写入历史数据库，供 probe_cache_coverage 探测）"""
+        if not data or request.data_type != DataType.HISTORICAL:
+            return
+        
+        saved = 0
+        for symbol, df in data.items():
+            if df is None or df.empty:
+                continue
+            if self._persist_symbol_data(symbol, df, request.data_type) is None:
+                saved += 1
+        
+        if saved:
+            logger.info(f"💾 已保存 {saved} 只股票数据到缓存")
 
     def _get_batch_data(self, symbols: List[str], request: DataRequest) -> Optional[Dict[str, Any]]:
         """
@@ -607,7 +715,9 @@ class TieredDataManager:
         return None
 
     def batch_download_all(self, start_date: str = None, end_date: str = None, 
-                          data_types: List[DataType] = None) -> Dict[str, Any]:
+                          data_types: List[DataType] = None, streaming: bool = False,
+                          chunk_size: int = 200, checkpoint_dir: str = None,
+                          resume: bool = True) -> Dict[str, Any]:
         """
         批量下载所有股票数据
         
@@ -615,14 +725,19 @@ class TieredDataManager:
             start_date: 开始日期
             end_date: 结束日期
             data_types: 要下载的数据类型列表
+            streaming: 是否使用流式下载（分块落盘+断点续传，内存峰值只有一个分块）
+            chunk_size: 流式下载的分块大小
+            checkpoint_dir: 流式下载的断点清单目录
+            resume: 流式下载时是否从已有断点继续
             
         Returns:
-            下载结果统计
+            下载结果统计（流式模式下 results 只包含每种数据类型的汇总，不含DataFrame）
         """
         if data_types is None:
             data_types = [DataType.HISTORICAL]
         
-        logger.info(f"🚀 开始批量下载所有股票数据: {[dt.value for dt in data_types]}")
+        logger.info(f"🚀 开始批量下载所有股票数据: {[dt.value for dt in data_types]}"
+                    f"{' (流式模式)' if streaming else ''}")
         
         # 1. 获取股票列表
         stock_list = self.get_stock_list_batch()
@@ -630,6 +745,11 @@ class TieredDataManager:
             return {'error': '无法获取股票列表'}
         
         symbols = stock_list['code'].tolist() if 'code' in stock_list.columns else stock_list['symbol'].tolist()
+        del stock_list
+        
+        if streaming:
+            return self._batch_download_all_streaming(symbols, start_date, end_date, data_types,
+                                                      chunk_size, checkpoint_dir, resume)
         
         # 2. 分批下载不同类型的数据
         results = {}
@@ -666,6 +786,271 @@ class TieredDataManager:
             'results': results
         }
 
+    def _batch_download_all_streaming(self, symbols: List[str], start_date: Optional[str],
+                                      end_date: Optional[str], data_types: List[DataType],
+                                      chunk_size: int, checkpoint_dir: Optional[str],
+                                      resume: bool) -> Dict[str, Any]:
+        """batch_download_all 的流式分支：逐个数据类型调用 batch_download_streaming"""
+        results = {}
+        total_start_time = time.time()
+        start_date, end_date = self._resolve_download_dates(start_date, end_date)
+        
+        for data_type in data_types:
+            checkpoint_path = None
+            if checkpoint_dir:
+                checkpoint_path = str(Path(checkpoint_dir) / self._checkpoint_filename(data_type, start_date, end_date))
+            results[data_type.value] = self.batch_download_streaming(
+                symbols=symbols,
+                start_date=start_date,
+                end_date=end_date,
+                data_type=data_type,
+                chunk_size=chunk_size,
+                checkpoint_path=checkpoint_path,
+                resume=resume
+            )
+        
+        total_elapsed = time.time() - total_start_time
+        total_stats = {
+            'total_symbols': len(symbols),
+            'data_types': [dt.value for dt in data_types],
+            'total_elapsed_time': total_elapsed,
+            'streaming': True,
+            'results': results,
+            'overall_success_rate': sum(r.get('success_rate', 0) for r in results.values()) / len(data_types)
+        }
+        
+        logger.info(f"🎉 流式批量下载完成: 总耗时{total_elapsed:.2f}秒, 平均成功率{total_stats['overall_success_rate']:.1f}%")
+        
+        return {
+            'stats': total_stats,
+            'results': results
+        }
+
+    def batch_download_streaming(self, symbols: List[str] = None, start_date: str = None,
+                                 end_date: str = None, data_type: DataType = DataType.HISTORICAL,
+                                 chunk_size: int = 200, checkpoint_path: str = None,
+                                 resume: bool = True) -> Dict[str, Any]:
+        """
+        流式批量下载：按分块获取数据，每个分块立即写入持久化存储并更新断点清单
+        
+        与 get_data 不同，分块数据不进入内存缓存、也不累积到返回值中，
+        因此内存峰值只有一个分块；进程中断后以相同参数再次调用即可从断点继续。
+        
+        Args:
+            symbols: 股票代码列表，None 时获取全市场股票列表
+            start_date: 开始日期，None 时为一年前
+            end_date: 结束日期，None 时为今天
+            data_type: 数据类型（仅支持历史K线和财务数据）
+            chunk_size: 每个分块的股票数量
+            checkpoint_path: 断点清单文件路径，None 时使用默认目录
+            resume: 是否从未完成的断点继续（False 时重新下载全部股票；已完成的断点总是重新开始）
+            
+        Returns:
+            下载汇总统计
+        """
+        if data_type not in (DataType.HISTORICAL, DataType.FINANCIAL):
+            return {'error': f'流式下载不支持数据类型: {data_type.value}'}
+        
+        if symbols is None:
+            stock_list = self.get_stock_list_batch()
+            if stock_list is None or stock_list.empty:
+                return {'error': '无法获取股票列表'}
+            symbols = stock_list['code'].tolist() if 'code' in stock_list.columns else stock_list['symbol'].tolist()
+            del stock_list
+        
+        chunk_size = max(int(chunk_size), 1)
+        # 断点清单按具体日期区分，避免不同日期的下载共用同一个 auto 断点
+        start_date, end_date = self._resolve_download_dates(start_date, end_date)
+        checkpoint_file = Path(checkpoint_path) if checkpoint_path else (
+            Path("./data/checkpoints") / self._checkpoint_filename(data_type, start_date, end_date))
+        
+        # 1. 加载断点清单
+        checkpoint = self._load_download_checkpoint(checkpoint_file) if resume else None
+        if checkpoint is not None and not checkpoint.matches(data_type, start_date, end_date):
+            logger.warning(f"⚠️ 断点清单参数不一致，重新开始下载: {checkpoint_file}")
+            checkpoint = None
+        elif checkpoint is not None and checkpoint.finished:
+            # 已完成的断点只记录上一次下载，不作为续传起点
+            logger.info(f"🔄 上次下载已完成({checkpoint.updated_at})，重新开始下载: {checkpoint_file}")
+            checkpoint = None
+        
+        now = datetime.now().isoformat(timespec='seconds')
+        if checkpoint is None:
+            checkpoint = DownloadCheckpoint(
+                data_type=data_type.value,
+                start_date=start_date,
+                end_date=end_date,
+                total_symbols=len(symbols),
+                completed=[],
+                failed={},
+                started_at=now,
+                updated_at=now
+            )
+        else:
+            logger.info(f"🔁 从断点继续下载: 已完成{len(checkpoint.completed)}只, 失败{len(checkpoint.failed)}只")
+        
+        # 失败的股票在续传时重试
+        completed = set(checkpoint.completed)
+        pending = [s for s in dict.fromkeys(symbols) if s not in completed]
+        checkpoint.total_symbols = len(completed) + len(pending)
+        checkpoint.finished = False
+        
+        total_chunks = (len(pending) + chunk_size - 1) // chunk_size
+        logger.info(f"🌊 开始流式下载 {data_type.value} 数据: 待下载{len(pending)}只, "
+                    f"分块大小{chunk_size}, 共{total_chunks}块")
+        
+        start_time = time.time()
+        saved_count = 0
+        source_counts: Dict[str, int] = {}
+        
+        # 2. 逐块获取 -> 落盘 -> 更新断点
+        for index in range(total_chunks):
+            chunk = pending[index * chunk_size:(index + 1) * chunk_size]
+            chunk_data, chunk_sources = self._fetch_chunk(chunk, data_type, start_date, end_date)
+            
+            for symbol in chunk:
+                df = chunk_data.pop(symbol, None)
+                if df is None or (hasattr(df, 'empty') and df.empty):
+                    checkpoint.failed[symbol] = '无数据'
+                    continue
+                
+                error = self._persist_symbol_data(symbol, df, data_type)
+                if error:
+                    checkpoint.failed[symbol] = error
+                else:
+                    checkpoint.completed.append(symbol)
+                    checkpoint.failed.pop(symbol, None)
+                    saved_count += 1
+                    source = chunk_sources.get(symbol, 'unknown')
+                    source_counts[source] = source_counts.get(source, 0) + 1
+            
+            # 释放分块数据后再写断点，保证内存峰值只有一个分块
+            del chunk_data, chunk_sources
+            
+            checkpoint.chunks_done += 1
+            checkpoint.updated_at = datetime.now().isoformat(timespec='seconds')
+            self._write_download_checkpoint(checkpoint_file, checkpoint)
+            
+            logger.info(f"📦 分块 {index + 1}/{total_chunks} 完成: 累计成功{len(checkpoint.completed)}"
+                        f"/{checkpoint.total_symbols}")
+        
+        checkpoint.finished = True
+        checkpoint.updated_at = datetime.now().isoformat(timespec='seconds')
+        self._write_download_checkpoint(checkpoint_file, checkpoint)
+        
+        elapsed_time = time.time() - start_time
+        summary = {
+            'data_type': data_type.value,
+            'total_symbols': checkpoint.total_symbols,
+            'successful': len(checkpoint.completed),
+            'failed': len(checkpoint.failed),
+            'saved_this_run': saved_count,
+            'resumed_from': checkpoint.total_symbols - len(pending),
+            'chunks': total_chunks,
+            'chunk_size': chunk_size,
+            'source_counts': source_counts,
+            'checkpoint_path': str(checkpoint_file),
+            'elapsed_time': elapsed_time,
+            'success_rate': len(checkpoint.completed) / checkpoint.total_symbols * 100 if checkpoint.total_symbols else 0
+        }
+        
+        self.stats['performance_log'].append({
+            'timestamp': datetime.now().isoformat(),
+            'symbols_count': len(pending),
+            'data_type': data_type.value,
+            'elapsed_time': elapsed_time,
+            'success_rate': summary['success_rate'],
+            'strategy': 'streaming'
+        })
+        
+        logger.info(f"✅ 流式下载完成: 成功{summary['successful']}/{summary['total_symbols']} "
+                    f"({summary['success_rate']:.1f}%), 本次写入{saved_count}只, 耗时{elapsed_time:.2f}秒")
+        
+        return summary
+
+    def _fetch_chunk(self, symbols: List[str], data_type: DataType, start_date: Optional[str],
+                     end_date: Optional[str]) -> Tuple[Dict[str, pd.DataFrame], Dict[str, str]]:
+        """获取一个分块的数据（批量数据源优先，实时数据源补充，不经过缓存）"""
+        self.stats['total_requests'] += 1
+        request = DataRequest(
+            symbols=symbols,
+            data_type=data_type,
+            start_date=start_date,
+            end_date=end_date,
+            batch_preferred=True
+        )
+        
+        try:
+            fetched = self._fetch_from_tiers(symbols, request)
+            return fetched['data'], fetched['source_info']
+        except Exception as e:
+            logger.error(f"❌ 分块数据获取失败: {e}")
+            return {}, {}
+
+    def _persist_symbol_data(self, symbol: str, df: pd.DataFrame, data_type: DataType) -> Optional[str]:
+        """
+        将单只股票数据写入持久化存储
+        
+        Returns:
+            失败原因，成功时为 None
+        """
+        try:
+            if data_type == DataType.HISTORICAL:
+                from tradingagents.dataflows.historical_data_manager import get_historical_manager
+                
+                # save_historical_data 需要 date 列，批量数据源有的以日期为索引
+                if 'date' not in df.columns:
+                    df = df.reset_index()
+                    df = df.rename(columns={df.columns[0]: 'date'})
+                
+                if not get_historical_manager().save_historical_data(symbol, df, frequency='daily'):
+                    return '写入历史数据库失败'
+            else:
+                from tradingagents.dataflows.persistent_storage import get_persistent_manager
+                get_persistent_manager().save_financial_data(symbol, df)
+            return None
+        except Exception as e:
+            logger.debug(f"保存 {symbol} 到持久化存储失败: {e}")
+            return str(e)
+
+    @staticmethod
+    def _resolve_download_dates(start_date: Optional[str], end_date: Optional[str]) -> Tuple[str, str]:
+        """补全下载日期：与各数据源的默认值一致，结束日期为今天、开始日期为一年前"""
+        if not end_date:
+            end_date = datetime.now().strftime('%Y-%m-%d')
+        if not start_date:
+            start_date = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')
+        return start_date, end_date
+
+    @staticmethod
+    def _checkpoint_filename(data_type: DataType, start_date: Optional[str], end_date: Optional[str]) -> str:
+        """断点清单的默认文件名"""
+        return f"batch_download_{data_type.value}_{start_date or 'auto'}_{end_date or 'auto'}.json"
+
+    @staticmethod
+    def _load_download_checkpoint(path: Path) -> Optional[DownloadCheckpoint]:
+        """读取断点清单，文件不存在或损坏时返回 None"""
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return DownloadCheckpoint(**json.load(f))
+        except Exception as e:
+            logger.warning(f"⚠️ 断点清单读取失败，将重新下载: {path} - {e}")
+            return None
+
+    @staticmethod
+    def _write_download_checkpoint(path: Path, checkpoint: DownloadCheckpoint):
+        """原子写入断点清单（先写临时文件再替换，避免中断时留下半个文件）"""
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(path.name + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(asdict(checkpoint), f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"⚠️ 断点清单写入失败: {path} - {e}")
+
     def get_performance_stats(self) -> Dict[str, Any]:
         """获取性能统计信息"""
         return {
@@ -720,19 +1105,24 @@ def smart_get_stock_data(symbols: Union[str, List[str]], start_date: str = None,
     return response.data
 
 
-def smart_batch_download(start_date: str = None, end_date: str = None) -> Dict[str, Any]:
+def smart_batch_download(start_date: str = None, end_date: str = None, streaming: bool = False,
+                         chunk_size: int = 200, checkpoint_dir: str = None) -> Dict[str, Any]:
     """
     智能批量下载所有股票数据
     
     Args:
         start_date: 开始日期
         end_date: 结束日期
+        streaming: 是否使用流式下载（分块落盘，可断点续传）
+        chunk_size: 流式下载的分块大小
+        checkpoint_dir: 流式下载的断点清单目录
         
     Returns:
         下载结果
     """
     manager = get_tiered_data_manager()
-    return manager.batch_download_all(start_date, end_date)
+    return manager.batch_download_all(start_date, end_date, streaming=streaming,
+                                      chunk_size=chunk_size, checkpoint_dir=checkpoint_dir)
 
 
 if __name__ == "__main__":
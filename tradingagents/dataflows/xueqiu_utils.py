@@ -15,6 +15,8 @@ import re
 from bs4 import BeautifulSoup
 import concurrent.futures
 
+from .http_client import get_http_client
+
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
@@ -38,8 +40,9 @@ class XueqiuProvider:
             'X-Requested-With': 'XMLHttpRequest'
         }
         
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        # 共享池化HTTP客户端（连接池、重试、并发限制、请求指标）
+        self.http = get_http_client('xueqiu', headers=self.headers)
+        self.session = self.http.session
         
         # 缓存配置
         self._cache = {}
@@ -60,7 +63,7 @@ class XueqiuProvider:
         """初始化雪球会话，获取必要的cookies"""
         try:
             # 访问首页获取cookies
-            response = self.session.get(self.base_url, timeout=30)
+            response = self.http.get(self.base_url)
             if response.status_code == 200:
                 logger.debug("✅ 雪球会话初始化成功")
             else:
@@ -68,10 +71,10 @@ class XueqiuProvider:
         except Exception as e:
             logger.error(f"❌ 雪球会话初始化失败: {str(e)}")
 
-    def _make_request(self, url: str, params: Dict = None, timeout: int = 30) -> Optional[Dict]:
+    def _make_request(self, url: str, params: Dict = None, timeout: Optional[float] = None) -> Optional[Dict]:
         """发起HTTP请求"""
         try:
-            response = self.session.get(url, params=params, timeout=timeout)
+            response = self.http.get(url, params=params, timeout=timeout)
             response.raise_for_status()
             
             # 尝试解析JSON响应
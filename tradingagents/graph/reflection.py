@@ -1,6 +1,8 @@
 # TradingAgents/graph/reflection.py
 
-from typing import Dict, Any
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional
 from langchain_openai import ChatOpenAI
 
 # 导入统一日志系统
@@ -8,6 +10,16 @@ from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
 
 
+# 反思组件：记忆名称 -> (组件类型, 从状态中取出待反思内容的函数)
+REFLECTION_COMPONENTS = {
+    "bull_memory": ("BULL", lambda state: state["investment_debate_state"]["bull_history"]),
+    "bear_memory": ("BEAR", lambda state: state["investment_debate_state"]["bear_history"]),
+    "trader_memory": ("TRADER", lambda state: state["trader_investment_plan"]),
+    "invest_judge_memory": ("INVEST JUDGE", lambda state: state["investment_debate_state"]["judge_decision"]),
+    "risk_manager_memory": ("RISK JUDGE", lambda state: state["risk_debate_state"]["judge_decision"]),
+}
+
+
 class Reflector:
     """Handles reflection on decisions and updating memory."""
 
@@ -123,3 +135,63 @@ Adhere strictly to these instructions, and ensure your output is detailed, accur
             "RISK JUDGE", judge_decision, situation, returns_losses
         )
         risk_manager_memory.add_situations([(situation, result)])
+
+    def reflect_all(self, current_state, returns_losses, memories: Dict[str, Any],
+                    max_workers: Optional[int] = None) -> Dict[str, str]:
+        """
+        并发反思所有组件并批量写入记忆
+
+        五个组件的反思LLM调用并发执行；它们共享同一个市场情景，因此按嵌入服务分组后
+        只做一次嵌入计算，再分别写入各自的记忆。单个组件反思失败不影响其他组件。
+
+        Args:
+            current_state: 最终状态
+            returns_losses: 收益/亏损
+            memories: 记忆名称（见 REFLECTION_COMPONENTS）-> FinancialSituationMemory，为 None 的记忆会被跳过
+            max_workers: 最大并发数，默认等于组件数
+
+        Returns:
+            Dict[str, str]: 记忆名称 -> 反思结果（仅包含成功的组件）
+        """
+        situation = self._extract_current_situation(current_state)
+        components = [name for name in REFLECTION_COMPONENTS if memories.get(name) is not None]
+        if not components:
+            return {}
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max_workers or len(components),
+                                thread_name_prefix="reflection") as executor:
+            futures = {}
+            for name in components:
+                component_type, get_report = REFLECTION_COMPONENTS[name]
+                futures[name] = executor.submit(
+                    self._reflect_on_component,
+                    component_type, get_report(current_state), situation, returns_losses
+                )
+
+            results = {}
+            for name, future in futures.items():
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    logger.error(f"❌ [反思] {name} 反思失败: {e}")
+        llm_time = time.perf_counter() - start
+
+        # 按嵌入服务分组，每组只计算一次情景嵌入
+        embedding_groups: Dict[Any, list] = {}
+        for name in results:
+            memory = memories[name]
+            embedding_groups.setdefault(getattr(memory, "embedding_key", id(memory)), []).append(name)
+
+        for names in embedding_groups.values():
+            first_memory = memories[names[0]]
+            embeddings = first_memory.get_embeddings([situation]) if hasattr(first_memory, "get_embeddings") else None
+            for name in names:
+                try:
+                    memories[name].add_situations([(situation, results[name])], embeddings=embeddings)
+                except Exception as e:
+                    logger.error(f"❌ [反思] {name} 写入记忆失败: {e}")
+
+        logger.info(f"🪞 [反思] 完成 {len(results)}/{len(components)} 个组件，"
+                    f"LLM并发耗时 {llm_time:.2f}s，嵌入计算 {len(embedding_groups)} 次")
+        return results
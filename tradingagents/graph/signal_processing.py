@@ -1,5 +1,10 @@
 # TradingAgents/graph/signal_processing.py
 
+import re
+import threading
+import time
+from typing import Optional, Tuple
+
 from langchain_openai import ChatOpenAI
 
 # 导入统一日志系统和图处理模块日志装饰器
@@ -8,12 +13,185 @@ from tradingagents.utils.tool_logging import log_graph_module
 logger = get_logger("graph.signal_processing")
 
 
+_ACTION_WORDS = {
+    '买入': '买入', '增持': '买入', 'BUY': '买入',
+    '持有': '持有', '观望': '持有', 'HOLD': '持有',
+    '卖出': '卖出', '减持': '卖出', 'SELL': '卖出',
+}
+_ACTION_ALTERNATION = r'买入|增持|持有|观望|卖出|减持|BUY|HOLD|SELL'
+_NUMBER = r'(\d+(?:\.\d+)?)'
+# 数字后紧跟年/月/日/%或日期分隔符时不是价格（如"目标价格：2025年达到30元"中的2025）
+_NOT_DATE_OR_PERCENT = r'(?!\d|\.\d|\s*(?:[年月日号%]|个月|个交易日|years?\b|months?\b)|[-/]\d{1,2}[-/]\d{1,2})'
+# 比率的尺度：百分号或"x/10"这类分母
+_RATIO_SCALE = r'\s*(%|/\s*\d+(?:\.\d+)?)?'
+
+# 明确标注的决策（风险经理/交易员的固定结尾格式）
+_DECISION_PATTERNS = [
+    re.compile(r'最终(?:交易)?(?:建议|决策|决定|提案)\s*[：:]?\s*\**\s*(' + _ACTION_ALTERNATION + r')', re.IGNORECASE),
+    re.compile(r'FINAL\s+TRANSACTION\s+PROPOSAL\s*[：:]?\s*\**\s*(BUY|HOLD|SELL)', re.IGNORECASE),
+    re.compile(r'(?:投资|操作|交易)?(?:建议|决策|评级)\s*[：:]\s*\**\s*(' + _ACTION_ALTERNATION + r')', re.IGNORECASE),
+    re.compile(r'(?:recommendation|decision)\s*[：:]?\s*\**\s*(BUY|HOLD|SELL)', re.IGNORECASE),
+]
+_ACTION_WORD_PATTERN = re.compile(_ACTION_ALTERNATION, re.IGNORECASE)
+
+# 明确标注的目标价（支持区间，取中值）
+_TARGET_PRICE_PATTERNS = [
+    re.compile(r'目标价[位格]?\**\s*[：:]?\s*\**\s*(?:约|为)?\s*[¥\$￥]?\s*' + _NUMBER + _NOT_DATE_OR_PERCENT
+               + r'(?:\s*(?:元|美元|港[币元])?\s*[-~～到至]\s*[¥\$￥]?\s*' + _NUMBER + _NOT_DATE_OR_PERCENT + r')?'),
+    re.compile(r'target\s+price\s*[：:]?\s*[¥\$￥]?\s*' + _NUMBER + _NOT_DATE_OR_PERCENT, re.IGNORECASE),
+]
+_CONFIDENCE_PATTERN = re.compile(r'(?:置信度|信心(?:程度)?|confidence)\**\s*[：:]?\s*\**\s*' + _NUMBER + _RATIO_SCALE, re.IGNORECASE)
+_RISK_PATTERN = re.compile(r'(?:风险评分|风险分数|风险等级|risk\s*score)\**\s*[：:]?\s*\**\s*' + _NUMBER + _RATIO_SCALE, re.IGNORECASE)
+# 给出了置信度/风险评分但无法确定尺度时，可信度上限（低于默认阈值，交给LLM提取）
+_AMBIGUOUS_RATIO_SCORE_CAP = 0.5
+_REASONING_PATTERN = re.compile(r'(?:决策)?理由\**\s*[：:]\s*\**\s*([^\n]{4,200})')
+
+
+class LocalSignalExtractor:
+    """
+    本地信号提取器
+
+    用预编译正则从最终决策文本中提取 action/target_price/confidence/risk_score，
+    返回结果及提取可信度评分（0-1），评分不足时由调用方回退到LLM提取。
+    """
+
+    def extract(self, text: str, is_china: bool, price_checker=None) -> Tuple[Optional[dict], float]:
+        """
+        Args:
+            text: 决策文本
+            is_china: 是否A股（用于价格合理性检查）
+            price_checker: 价格合理性检查函数 (price, is_china) -> bool
+        Returns:
+            (提取结果, 可信度评分)；无法识别决策时结果为 None
+        """
+        if not text:
+            return None, 0.0
+
+        score = 0.0
+
+        # 1. 决策：优先匹配明确标注，取最后一次出现（结论通常在末尾）
+        action = None
+        for pattern in _DECISION_PATTERNS:
+            matches = pattern.findall(text)
+            if matches:
+                action = _ACTION_WORDS[matches[-1].upper() if matches[-1].isascii() else matches[-1]]
+                score += 0.6
+                break
+        if action is None:
+            # 全文只出现一种决策时也可采用，但可信度较低
+            actions = {_ACTION_WORDS[word.upper() if word.isascii() else word]
+                       for word in _ACTION_WORD_PATTERN.findall(text)}
+            if len(actions) != 1:
+                return None, 0.0
+            action = actions.pop()
+            score += 0.3
+
+        # 2. 目标价
+        target_price = None
+        for pattern in _TARGET_PRICE_PATTERNS:
+            match = pattern.search(text)
+            if not match:
+                continue
+            groups = [g for g in match.groups() if g]
+            try:
+                prices = [float(g) for g in groups]
+            except ValueError:
+                continue
+            candidate = round(sum(prices) / len(prices), 2)
+            if price_checker is None or price_checker(candidate, is_china):
+                target_price = candidate
+                score += 0.3
+                break
+
+        # 3. 置信度与风险评分（明确给出时加分，给出但尺度不明时不采用本地结果）
+        ambiguous = False
+        confidence = risk_score = None
+        for pattern, name in ((_CONFIDENCE_PATTERN, 'confidence'), (_RISK_PATTERN, 'risk_score')):
+            found, value = self._extract_ratio(pattern, text)
+            if found and value is None:
+                ambiguous = True
+            elif value is not None:
+                score += 0.05
+                if name == 'confidence':
+                    confidence = value
+                else:
+                    risk_score = value
+
+        reasoning_match = _REASONING_PATTERN.search(text)
+        reasoning = reasoning_match.group(1).strip(' *') if reasoning_match else '基于综合分析的投资建议'
+
+        return {
+            'action': action,
+            'target_price': target_price,
+            'confidence': confidence if confidence is not None else 0.7,
+            'risk_score': risk_score if risk_score is not None else 0.5,
+            'reasoning': reasoning,
+        }, min(score, _AMBIGUOUS_RATIO_SCORE_CAP if ambiguous else 1.0)
+
+    @staticmethod
+    def _extract_ratio(pattern, text: str) -> Tuple[bool, Optional[float]]:
+        """
+        提取0-1之间的比率
+
+        支持小数（0.8）、百分数（80%）与"x/N"分数（8/10）；不带尺度的整数中，
+        10以上按百分数处理，1-10之间（可能是10分制也可能是百分数）视为无法确定。
+
+        Returns:
+            (是否给出了该字段, 比率)；无法确定尺度或超出范围时比率为 None
+        """
+        match = pattern.search(text)
+        if not match:
+            return False, None
+        value = float(match.group(1))
+        scale = match.group(2)
+        if scale == '%':
+            value = value / 100
+        elif scale:
+            denominator = float(scale.lstrip('/ '))
+            if denominator <= 0:
+                return True, None
+            value = value / denominator
+        elif value > 10:
+            value = value / 100
+        elif value > 1:
+            return True, None
+        return True, (value if 0 <= value <= 1 else None)
+
+
 class SignalProcessor:
     """Processes trading signals to extract actionable decisions."""
 
-    def __init__(self, quick_thinking_llm: ChatOpenAI):
-        """Initialize with an LLM for processing."""
+    def __init__(self, quick_thinking_llm: ChatOpenAI, enable_local_extraction: bool = True,
+                 local_confidence_threshold: float = 0.8):
+        """
+        Initialize with an LLM for processing.
+
+        Args:
+            quick_thinking_llm: 本地提取可信度不足时使用的LLM
+            enable_local_extraction: 是否先尝试本地正则提取
+            local_confidence_threshold: 本地提取结果被采用的最低可信度
+        """
         self.quick_thinking_llm = quick_thinking_llm
+        self.enable_local_extraction = enable_local_extraction
+        self.local_confidence_threshold = local_confidence_threshold
+        self.local_extractor = LocalSignalExtractor()
+
+        self._metrics_lock = threading.Lock()
+        self._metrics = {
+            'total': 0,
+            'local': 0,
+            'llm_fallback': 0,
+            'local_time_ms': 0.0,
+        }
+
+    def get_metrics(self) -> dict:
+        """获取信号提取统计（本地命中率、LLM回退率）"""
+        with self._metrics_lock:
+            metrics = dict(self._metrics)
+        total = metrics['total']
+        metrics['fallback_rate'] = round(metrics['llm_fallback'] / total, 4) if total else 0.0
+        metrics['avg_local_time_ms'] = round(metrics['local_time_ms'] / total, 4) if total else 0.0
+        return metrics
 
     @log_graph_module("signal_processing")
     def process_signal(self, full_signal: str, stock_symbol: str = None) -> dict:
@@ -40,6 +218,36 @@ class SignalProcessor:
         logger.info(f"🔍 [SignalProcessor] 处理信号: 股票={stock_symbol}, 市场={market_info['market_name']}, 货币={currency}",
                    extra={'stock_symbol': stock_symbol, 'market': market_info['market_name'], 'currency': currency})
 
+        # 本地优先：决策文本结构规整时直接提取，无需LLM往返
+        local_result = None
+        if self.enable_local_extraction:
+            start = time.perf_counter()
+            local_result, local_score = self.local_extractor.extract(
+                full_signal, is_china, price_checker=self._is_price_reasonable
+            )
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            use_local = local_result is not None and local_score >= self.local_confidence_threshold
+            with self._metrics_lock:
+                self._metrics['total'] += 1
+                self._metrics['local_time_ms'] += elapsed_ms
+                self._metrics['local' if use_local else 'llm_fallback'] += 1
+
+            if use_local:
+                logger.info(f"⚡ [SignalProcessor] 本地提取成功 (可信度 {local_score:.2f}, {elapsed_ms:.2f}ms): {local_result}",
+                           extra={'action': local_result['action'], 'target_price': local_result['target_price'],
+                                 'confidence': local_result['confidence'], 'stock_symbol': stock_symbol})
+                return local_result
+            logger.info(f"🔄 [SignalProcessor] 本地提取可信度不足 ({local_score:.2f})，回退到LLM提取")
+
+        return self._process_with_llm(full_signal, stock_symbol, market_info, local_result)
+
+    def _process_with_llm(self, full_signal: str, stock_symbol: str, market_info: dict,
+                          local_result: Optional[dict] = None) -> dict:
+        """使用LLM提取结构化决策；LLM失败时优先使用本地提取结果"""
+        is_china = market_info['is_china']
+        currency = market_info['currency_name']
+        currency_symbol = market_info['currency_symbol']
+
         messages = [
             (
                 "system",
@@ -77,7 +285,6 @@ class SignalProcessor:
 
             # 尝试解析JSON响应
             import json
-            import re
 
             # 提取JSON部分
             json_match = re.search(r'\{.*\}', response, re.DOTALL)
@@ -210,6 +417,9 @@ class SignalProcessor:
 
         except Exception as e:
             logger.error(f"信号处理错误: {e}", exc_info=True, extra={'stock_symbol': stock_symbol})
+            # LLM 不可用时，低可信度的本地结果仍优于纯关键词提取
+            if local_result is not None:
+                return local_result
             # 回退到简单提取
             return self._extract_simple_decision(full_signal)
 
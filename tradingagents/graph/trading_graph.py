@@ -29,6 +29,7 @@ from tradingagents.agents.utils.agent_states import (
     RiskDebateState,
 )
 from tradingagents.dataflows.interface import set_config
+from tradingagents.dataflows.data_context import data_context_scope
 
 # 导入动态LLM管理器
 from tradingagents.llm_adapters.dynamic_llm_manager import get_llm_manager
@@ -178,6 +179,7 @@ class TradingAgentsGraph:
         self.curr_state = None
         self.ticker = None
         self.log_states_dict = {}  # date to full state dict
+        self.data_context_stats = None  # 最近一次运行的数据上下文统计
 
         # Set up the graph
         self.graph = self.graph_setup.setup_graph(selected_analysts)
@@ -250,20 +252,23 @@ class TradingAgentsGraph:
         logger.debug(f"🔍 [GRAPH DEBUG] 初始状态中的trade_date: '{init_agent_state.get('trade_date', 'NOT_FOUND')}'")
         args = self.propagator.get_graph_args()
 
-        if self.debug:
-            # Debug mode with tracing
-            trace = []
-            for chunk in self.graph.stream(init_agent_state, **args):
-                if len(chunk["messages"]) == 0:
-                    pass
-                else:
-                    chunk["messages"][-1].pretty_print()
-                    trace.append(chunk)
-
-            final_state = trace[-1]
-        else:
-            # Standard mode without tracing
-            final_state = self.graph.invoke(init_agent_state, **args)
+        # 本次运行内各分析师共享数据上下文，相同股票/日期区间的数据只获取一次
+        with data_context_scope(company_name, trade_date) as data_context:
+            if self.debug:
+                # Debug mode with tracing
+                trace = []
+                for chunk in self.graph.stream(init_agent_state, **args):
+                    if len(chunk["messages"]) == 0:
+                        pass
+                    else:
+                        chunk["messages"][-1].pretty_print()
+                        trace.append(chunk)
+
+                final_state = trace[-1]
+            else:
+                # Standard mode without tracing
+                final_state = self.graph.invoke(init_agent_state, **args)
+        self.data_context_stats = data_context.get_stats()
 
         # Store current state for reflection
         self.curr_state = final_state
@@ -319,20 +324,17 @@ class TradingAgentsGraph:
 
     def reflect_and_remember(self, returns_losses):
         """Reflect on decisions and update memory based on returns."""
-        self.reflector.reflect_bull_researcher(
-            self.curr_state, returns_losses, self.bull_memory
-        )
-        self.reflector.reflect_bear_researcher(
-            self.curr_state, returns_losses, self.bear_memory
-        )
-        self.reflector.reflect_trader(
-            self.curr_state, returns_losses, self.trader_memory
-        )
-        self.reflector.reflect_invest_judge(
-            self.curr_state, returns_losses, self.invest_judge_memory
-        )
-        self.reflector.reflect_risk_manager(
-            self.curr_state, returns_losses, self.risk_manager_memory
+        # 五个组件并发反思，共享情景的嵌入只计算一次
+        return self.reflector.reflect_all(
+            self.curr_state,
+            returns_losses,
+            {
+                "bull_memory": self.bull_memory,
+                "bear_memory": self.bear_memory,
+                "trader_memory": self.trader_memory,
+                "invest_judge_memory": self.invest_judge_memory,
+                "risk_manager_memory": self.risk_manager_memory,
+            },
         )
 
     def process_signal(self, full_signal, stock_symbol=None):
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+自适应并发控制
+AI分析调用的瓶颈在远端 LLM/API 的限流与排队，而不是本机 CPU/内存，
+因此按数据源（provider）维护一个 AIMD（加性增、乘性减）并发上限：
+调用成功且延迟正常时缓慢加大并发，遇到 429 限流、超时或延迟显著升高时按比例收缩。
+"""
+
+import asyncio
+import concurrent.futures
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Dict, Optional
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('batch_ai_processor')
+
+
+class CallOutcome(Enum):
+    """单次调用的结果信号"""
+    SUCCESS = "success"              # 成功
+    RATE_LIMITED = "rate_limited"    # 被限流（HTTP 429 等）
+    TIMEOUT = "timeout"              # 超时
+    ERROR = "error"                  # 其他错误（不调整并发上限）
+
+
+@dataclass
+class AIMDConfig:
+    """AIMD 并发控制参数"""
+    initial_limit: int = 4                # 初始并发上限
+    min_limit: int = 1                    # 并发上限下界
+    max_limit: int = 32                   # 并发上限上界
+    additive_increase: float = 1.0        # 每完成一个窗口（limit 次）成功调用增加的并发数
+    decrease_factor: float = 0.5          # 限流/超时时的收缩比例
+    latency_decrease_factor: float = 0.9  # 延迟升高时的收缩比例
+    latency_tolerance: float = 2.0        # 平滑延迟超过基线延迟的倍数视为过载
+    ewma_alpha: float = 0.2               # 延迟指数平滑系数
+    cooldown: float = 0.1                 # 两次收缩之间的最小间隔（秒，至少一个平滑延迟），避免同一波失败连续收缩
+    backoff_base: float = 1.0             # 重试退避基数（秒）
+    backoff_max: float = 30.0             # 单次退避上限（秒）
+    throughput_window: float = 10.0       # 吞吐量统计窗口（秒）
+
+
+_RATE_LIMIT_MARKERS = ('rate limit', 'ratelimit', 'too many requests', 'throttl', '限流', '请求过于频繁')
+# 只把独立出现的 429 视为 HTTP 状态码，避免 600429、002429 等股票代码被误判为限流
+_HTTP_429_PATTERN = re.compile(r'(?<![\d.])\b429\b(?![\d.])')
+_TIMEOUT_MARKERS = ('timeout', 'timed out', '超时')
+
+
+def classify_failure(error: Any) -> CallOutcome:
+    """
+    根据异常（或错误信息字符串）判断失败类型
+
+    优先使用异常携带的 HTTP 状态码（requests/openai 等客户端的 response.status_code、status_code），
+    其次按异常类型和错误信息中的关键字识别限流与超时；错误信息中的 429 必须是独立的数字，
+    股票代码等更长数字串中的 429 不算。
+    """
+    if isinstance(error, BaseException):
+        response = getattr(error, 'response', None)
+        status = getattr(response, 'status_code', None) or getattr(error, 'status_code', None)
+        if status == 429:
+            return CallOutcome.RATE_LIMITED
+        if isinstance(error, (TimeoutError, concurrent.futures.TimeoutError, asyncio.TimeoutError)) \
+                or 'timeout' in type(error).__name__.lower():
+            return CallOutcome.TIMEOUT
+
+    text = str(error).lower()
+    if _HTTP_429_PATTERN.search(text) or any(marker in text for marker in _RATE_LIMIT_MARKERS):
+        return CallOutcome.RATE_LIMITED
+    if any(marker in text for marker in _TIMEOUT_MARKERS):
+        return CallOutcome.TIMEOUT
+    return CallOutcome.ERROR
+
+
+def get_retry_after(error: Any) -> Optional[float]:
+    """读取异常响应中的 Retry-After（秒），没有时返回None"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+    try:
+        value = headers.get('Retry-After')
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    单个数据源的 AIMD 并发限制器
+
+    调用方通过 slot() 占用一个并发名额并上报结果；在途调用数达到当前上限时 acquire 阻塞等待。
+    上限以浮点数维护，成功调用每次增加 additive_increase / limit（即每个窗口约 +1），
+    限流/超时按 decrease_factor 收缩，平滑延迟超过基线 latency_tolerance 倍时按 latency_decrease_factor 收缩。
+    只有在途调用接近上限时才增加，避免调用方本身并发不足时上限虚涨。
+    """
+
+    def __init__(self, provider: str, config: Optional[AIMDConfig] = None):
+        self.provider = provider
+        self.config = config or AIMDConfig()
+        self._limit = float(min(max(self.config.initial_limit, self.config.min_limit), self.config.max_limit))
+        self._inflight = 0
+        self._condition = threading.Condition()
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+
+        # 延迟统计（秒）
+        self._ewma_latency: Optional[float] = None
+        self._baseline_latency: Optional[float] = None
+
+        # 计数与吞吐量
+        self._completions: deque = deque()
+        self._started_at = time.time()
+        self.counts = {outcome.value: 0 for outcome in CallOutcome}
+        self.increases = 0
+        self.decreases = 0
+        self.peak_inflight = 0
+        self.peak_limit = int(self._limit)
+        self.min_limit_seen = int(self._limit)
+
+    @property
+    def limit(self) -> int:
+        """当前并发上限"""
+        return int(self._limit)
+
+    @property
+    def inflight(self) -> int:
+        """在途调用数"""
+        return self._inflight
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """占用一个并发名额；限流暂停期间或在途数达到上限时等待"""
+        deadline = time.time() + timeout if timeout is not None else None
+        with self._condition:
+            while True:
+                now = time.time()
+                wait = None
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif self._inflight < int(self._limit):
+                    self._inflight += 1
+                    self.peak_inflight = max(self.peak_inflight, self._inflight)
+                    return True
+                if deadline is not None:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        return False
+                    wait = min(wait, remaining) if wait is not None else remaining
+                self._condition.wait(wait)
+
+    def release(self, outcome: CallOutcome, latency: Optional[float] = None,
+                retry_after: Optional[float] = None):
+        """
+        释放并发名额并根据调用结果调整上限
+
+        Args:
+            outcome: 调用结果
+            latency: 调用耗时（秒），仅成功调用参与延迟统计
+            retry_after: 服务端要求的等待时间（秒），限流时暂停新调用
+        """
+        with self._condition:
+            saturated = self._inflight >= int(self._limit)
+            self._inflight = max(0, self._inflight - 1)
+            now = time.time()
+            self.counts[outcome.value] += 1
+
+            if outcome == CallOutcome.SUCCESS:
+                self._completions.append(now)
+                overloaded = latency is not None and self._observe_latency(latency)
+                if overloaded:
+                    self._decrease(self.config.latency_decrease_factor, now, '延迟升高')
+                elif saturated:
+                    self._increase()
+            elif outcome in (CallOutcome.RATE_LIMITED, CallOutcome.TIMEOUT):
+                self._decrease(self.config.decrease_factor, now,
+                               '触发限流' if outcome == CallOutcome.RATE_LIMITED else '调用超时')
+                if retry_after:
+                    self._paused_until = max(self._paused_until,
+                                             now + min(retry_after, self.config.backoff_max))
+
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self):
+        """
+        占用一个并发名额的上下文
+
+        上下文对象的 outcome/retry_after 可在块内修改；块内抛出异常时自动按异常类型分类并重新抛出。
+        """
+        self.acquire()
+        call = _CallRecord()
+        start = time.perf_counter()
+        try:
+            yield call
+        except BaseException as e:
+            call.outcome = classify_failure(e)
+            call.retry_after = get_retry_after(e)
+            raise
+        finally:
+            self.release(call.outcome, time.perf_counter() - start, call.retry_after)
+
+    def _observe_latency(self, latency: float) -> bool:
+        """更新延迟统计，返回是否判定为过载"""
+        alpha = self.config.ewma_alpha
+        self._ewma_latency = latency if self._ewma_latency is None else \
+            alpha * latency + (1 - alpha) * self._ewma_latency
+        # 基线取观测到的最小延迟，并缓慢向上漂移，适应服务端整体变慢的情况
+        if self._baseline_latency is None or latency < self._baseline_latency:
+            self._baseline_latency = latency
+        else:
+            self._baseline_latency += (latency - self._baseline_latency) * 0.01
+        threshold = self._baseline_latency * self.config.latency_tolerance
+        return self._baseline_latency > 0 and self._ewma_latency > threshold and latency > threshold
+
+    def _increase(self):
+        previous = int(self._limit)
+        self._limit = min(float(self.config.max_limit),
+                          self._limit + self.config.additive_increase / max(self._limit, 1.0))
+        if int(self._limit) > previous:
+            self.increases += 1
+            self.peak_limit = max(self.peak_limit, int(self._limit))
+            logger.debug(f"📈 [{self.provider}] 并发上限提升: {previous} -> {int(self._limit)}")
+
+    def _decrease(self, factor: float, now: float, reason: str):
+        if now - self._last_decrease < max(self.config.cooldown, self._ewma_latency or 0.0):
+            return
+        previous = int(self._limit)
+        self._limit = max(float(self.config.min_limit), self._limit * factor)
+        self._last_decrease = now
+        self.decreases += 1
+        self.min_limit_seen = min(self.min_limit_seen, int(self._limit))
+        logger.info(f"📉 [{self.provider}] {reason}，并发上限收缩: {previous} -> {int(self._limit)}")
+
+    def backoff_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """重试退避时间：优先遵循 Retry-After，否则指数退避 + 全抖动"""
+        if retry_after:
+            return min(retry_after, self.config.backoff_max)
+        ceiling = min(self.config.backoff_max, self.config.backoff_base * (2 ** max(attempt - 1, 0)))
+        return random.uniform(0, ceiling)
+
+    def throughput(self) -> float:
+        """最近窗口内的成功调用吞吐量（次/秒）"""
+        with self._condition:
+            now = time.time()
+            window = self.config.throughput_window
+            while self._completions and now - self._completions[0] > window:
+                self._completions.popleft()
+            span = min(window, max(now - self._started_at, 1e-6))
+            return len(self._completions) / span
+
+    def snapshot(self) -> Dict[str, Any]:
+        """当前状态（并发上限、在途数、吞吐量、延迟及各类信号计数）"""
+        throughput = self.throughput()
+        with self._condition:
+            return {
+                'provider': self.provider,
+                'limit': int(self._limit),
+                'inflight': self._inflight,
+                'peak_inflight': self.peak_inflight,
+                'peak_limit': self.peak_limit,
+                'min_limit': self.min_limit_seen,
+                'throughput_per_s': round(throughput, 3),
+                'ewma_latency_ms': round((self._ewma_latency or 0.0) * 1000, 2),
+                'baseline_latency_ms': round((self._baseline_latency or 0.0) * 1000, 2),
+                'increases': self.increases,
+                'decreases': self.decreases,
+                'counts': dict(self.counts),
+            }
+
+    def reset_stats(self):
+        """清空计数与峰值（保留已学习到的并发上限和延迟基线）"""
+        with self._condition:
+            self._completions.clear()
+            self._started_at = time.time()
+            self.counts = {outcome.value: 0 for outcome in CallOutcome}
+            self.increases = 0
+            self.decreases = 0
+            self.peak_inflight = self._inflight
+            self.peak_limit = int(self._limit)
+            self.min_limit_seen = int(self._limit)
+
+
+@dataclass
+class _CallRecord:
+    """slot() 上下文中可由调用方修改的调用结果"""
+    outcome: CallOutcome = CallOutcome.SUCCESS
+    retry_after: Optional[float] = None
+
+
+class ConcurrencyController:
+    """按数据源管理 AIMD 并发限制器"""
+
+    def __init__(self, default_config: Optional[AIMDConfig] = None):
+        self.default_config = default_config or AIMDConfig()
+        self._limiters: Dict[str, AdaptiveConcurrencyLimiter] = {}
+        self._lock = threading.Lock()
+
+    def get_limiter(self, provider: str, config: Optional[AIMDConfig] = None) -> AdaptiveConcurrencyLimiter:
+        """获取（或创建）数据源的限制器；同一数据源只创建一次，已学习到的上限跨批次保留"""
+        with self._lock:
+            limiter = self._limiters.get(provider)
+            if limiter is None:
+                limiter = AdaptiveConcurrencyLimiter(provider, config or self.default_config)
+                self._limiters[provider] = limiter
+                logger.debug(f"🎚️ 创建并发限制器: {provider} (初始上限: {limiter.limit})")
+            return limiter
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """所有数据源的当前状态"""
+        with self._lock:
+            limiters = list(self._limiters.values())
+        return {limiter.provider: limiter.snapshot() for limiter in limiters}
+
@@ -5,8 +5,8 @@ AI分析批次并行处理器
 
 核心功能:
 1. 智能批次分组 - 根据系统资源动态调整批次大小
-2. 并行处理管理 - 多线程/异步处理多个批次
-3. 失败重试机制 - 自动重试失败的分析任务
+2. 并行处理管理 - 多线程/异步处理多个批次，并发上限按数据源自适应调整（AIMD）
+3. 失败重试机制 - 自动重试失败的分析任务（抖动指数退避）
 4. 进度跟踪报告 - 实时反馈处理进度
 """
 
@@ -28,6 +28,11 @@ import gc
 from functools import partial
 
 from ..utils.logging_manager import get_logger
+from .adaptive_concurrency import (
+    AIMDConfig, AdaptiveConcurrencyLimiter, CallOutcome, ConcurrencyController,
+    classify_failure, get_retry_after
+)
+from .result_cache import AnalysisResultCache, config_fingerprint, get_analysis_cache, make_cache_key
 
 # 导入分析师类 - 如果不存在则创建模拟类
 try:
@@ -81,6 +86,10 @@ class BatchConfig:
     enable_progress_tracking: bool = True  # 启用进度跟踪
     enable_auto_scaling: bool = True  # 启用自动扩缩容
     cache_results: bool = True        # 缓存结果
+    cache_max_entries: int = 5000     # 结果缓存最大条目数
+    cache_max_memory_mb: float = 256.0  # 结果缓存内存上限(MB)
+    cache_ttl: float = 4 * 3600       # 结果缓存有效期(秒)
+    cache_persist_path: Optional[str] = None  # 结果缓存持久化文件，为空时不持久化
     
     # 分析器配置
     enable_fundamentals: bool = True   # 启用基本面分析
@@ -93,6 +102,12 @@ class BatchConfig:
     social_weight: float = 0.2        # 社交数据权重
     min_discussions: int = 10         # 最小讨论数量阈值
     sentiment_threshold: float = 0.3  # 情绪显著性阈值
+    
+    # 自适应并发配置（按数据源根据延迟、超时和429限流信号调整并发上限）
+    enable_adaptive_concurrency: bool = True  # 启用自适应并发控制
+    initial_concurrency: int = 4      # 初始并发上限
+    min_concurrency: int = 1          # 并发上限下界
+    max_concurrency: int = 32         # 并发上限上界（同时也是工作线程数上限）
 
 
 @dataclass
@@ -119,6 +134,8 @@ class ProcessingReport:
     throughput: float                # 处理吞吐量(股票/秒)
     memory_peak: float               # 内存峰值使用率
     batch_stats: Dict[str, Any] = field(default_factory=dict)  # 批次统计
+    concurrency_limit: int = 0       # 处理结束时的并发上限
+    concurrency_stats: Dict[str, Any] = field(default_factory=dict)  # 并发控制统计（吞吐量、延迟、限流/超时次数）
 
 
 class BatchAIProcessor:
@@ -132,13 +149,24 @@ class BatchAIProcessor:
             config: 批处理配置
         """
         self.config = config or BatchConfig()
-        self._results_cache = {}
+        # 分析结果缓存（进程内共享，StockSelector 也使用同一实例）
+        self.results_cache: AnalysisResultCache = get_analysis_cache(
+            max_entries=self.config.cache_max_entries,
+            max_memory_mb=self.config.cache_max_memory_mb,
+            ttl_seconds=self.config.cache_ttl,
+            persist_path=self.config.cache_persist_path
+        )
+        self.last_results: Dict[str, BatchResult] = {}  # 最近一次 process_stocks 的结果
         self._processing_queue = Queue()
         self._results_queue = Queue()
         self._progress_lock = threading.Lock()
         self._memory_monitor = threading.Thread(target=self._monitor_memory, daemon=True)
         self._stop_monitoring = False
         
+        # 自适应并发控制器：按数据源维护并发上限，跨批次保留已学习到的上限
+        self.concurrency = ConcurrencyController(self._build_aimd_config())
+        self._limiter: Optional[AdaptiveConcurrencyLimiter] = None
+        
         # 初始化分析师
         self.analysts = {}
         if self.config.enable_fundamentals:
@@ -158,6 +186,10 @@ class BatchAIProcessor:
                 logger.warning(f"⚠️ 雪球数据提供器初始化失败: {e}")
                 self.config.enable_social = False
             
+        # 当前运行的缓存作用域：(分析配置指纹, 数据日期)
+        self._cache_fingerprint = config_fingerprint(self._default_cache_scope('builtin'))
+        self._data_date: Optional[str] = None
+            
         # 启动内存监控
         self._memory_monitor.start()
         
@@ -165,13 +197,20 @@ class BatchAIProcessor:
         logger.info(f"📊 配置: 批次大小={self.config.batch_size}, 工作线程={self.config.max_workers}, 策略={self.config.strategy.value}")
     
     def process_stocks(self, stock_symbols: List[str], 
-                      analysis_callback: Callable[[str], Dict[str, Any]] = None) -> ProcessingReport:
+                      analysis_callback: Callable[[str], Dict[str, Any]] = None,
+                      provider: Optional[str] = None,
+                      cache_scope: Optional[Dict[str, Any]] = None,
+                      data_date: Optional[str] = None) -> ProcessingReport:
         """
         批量处理股票分析
         
         Args:
             stock_symbols: 股票代码列表
             analysis_callback: 自定义分析回调函数
+            provider: 分析调用的数据源/模型提供商，用于区分并发限制器（默认按是否有回调区分）
+            cache_scope: 影响分析结果的配置（模型、策略参数等），用于生成结果缓存键；
+                默认使用处理器自身的分析师配置
+            data_date: 分析所用数据的日期，用于生成结果缓存键，默认当天
             
         Returns:
             ProcessingReport: 处理报告
@@ -186,6 +225,16 @@ class BatchAIProcessor:
         if self.config.enable_auto_scaling:
             self._adjust_batch_config(total_stocks)
         
+        provider = provider or ('callback' if analysis_callback else 'builtin')
+        self._limiter = self.concurrency.get_limiter(provider)
+        self._limiter.reset_stats()
+        logger.info(f"🎚️ 并发控制: {self._limiter.provider} 当前上限={self._limiter.limit}, 工作线程={self.config.max_workers}")
+        
+        self._cache_fingerprint = config_fingerprint(cache_scope if cache_scope is not None
+                                                     else self._default_cache_scope(provider))
+        self._data_date = data_date
+        cache_hits_before = self.results_cache.stats()['hits']
+        
         try:
             # 创建批次
             batches = self._create_batches(stock_symbols)
@@ -209,6 +258,11 @@ class BatchAIProcessor:
                 all_results = self._process_batches_hybrid(batches, analysis_callback, processing_stats)
             else:
                 all_results = self._process_batches_sequential(batches, analysis_callback, processing_stats)
+            self.last_results = all_results
+            
+            if self.config.cache_results and self.config.cache_persist_path:
+                self.results_cache.save()
+            cache_stats = self.results_cache.stats()
             
             # 生成处理报告
             total_time = time.time() - start_time
@@ -225,14 +279,22 @@ class BatchAIProcessor:
                     'total_batches': len(batches),
                     'completed_batches': processing_stats['batches_completed'],
                     'avg_batch_time': total_time / max(len(batches), 1),
-                    'results_cached': len(self._results_cache)
-                }
+                    'results_cached': cache_stats['entries'],
+                    'cache_hits': cache_stats['hits'] - cache_hits_before,
+                    'cache': cache_stats
+                },
+                concurrency_limit=self._limiter.limit,
+                concurrency_stats=self._limiter.snapshot()
             )
             
             logger.info(f"✅ AI批量分析完成!")
             logger.info(f"📈 处理结果: 总数:{total_stocks} 成功:{processing_stats['successful']} 失败:{processing_stats['failed']}")
             logger.info(f"⏱️  耗时: {total_time:.1f}秒, 吞吐量: {report.throughput:.1f}股票/秒")
+            logger.info(f"🎚️ 并发上限: {report.concurrency_limit} (峰值在途: {report.concurrency_stats['peak_inflight']}, "
+                        f"限流: {report.concurrency_stats['counts']['rate_limited']}, 超时: {report.concurrency_stats['counts']['timeout']})")
             logger.info(f"💾 内存峰值: {report.memory_peak:.1f}%")
+            logger.info(f"📋 结果缓存: 本次命中{report.batch_stats['cache_hits']}次, 缓存{cache_stats['entries']}条 "
+                        f"({cache_stats['memory_mb']:.1f}MB), 淘汰{cache_stats['evictions_entries'] + cache_stats['evictions_memory']}次")
             
             return report
             
@@ -248,7 +310,9 @@ class BatchAIProcessor:
                 average_time_per_stock=0,
                 throughput=0,
                 memory_peak=self._get_memory_usage(),
-                batch_stats={'error': str(e)}
+                batch_stats={'error': str(e)},
+                concurrency_limit=self._limiter.limit,
+                concurrency_stats=self._limiter.snapshot()
             )
     
     def _create_batches(self, stock_symbols: List[str]) -> List[List[str]]:
@@ -265,28 +329,43 @@ class BatchAIProcessor:
     def _process_batches_threaded(self, batches: List[List[str]], 
                                  analysis_callback: Callable,
                                  stats: Dict[str, Any]) -> Dict[str, BatchResult]:
-        """多线程批次处理"""
+        """多线程批次处理 - 按股票提交任务，实际并发由自适应并发限制器控制"""
         all_results = {}
+        remaining = [len(batch) for batch in batches]
+        pool_size = max(1, min(self.config.max_workers, sum(remaining)))
         
-        with ThreadPoolExecutor(max_workers=self.config.max_workers) as executor:
-            # 提交所有批次任务
-            future_to_batch = {
-                executor.submit(self._process_single_batch, batch, analysis_callback): batch_idx
+        with ThreadPoolExecutor(max_workers=pool_size) as executor:
+            # 提交所有股票任务（超出并发上限的线程在限制器上等待）
+            future_to_task = {
+                executor.submit(self._analyze_single_stock, symbol, analysis_callback): (batch_idx, symbol)
                 for batch_idx, batch in enumerate(batches)
+                for symbol in batch
             }
             
             # 收集结果
-            for future in as_completed(future_to_batch):
-                batch_idx = future_to_batch[future]
+            for future in as_completed(future_to_task):
+                batch_idx, symbol = future_to_task[future]
                 try:
-                    batch_results = future.result(timeout=self.config.timeout_per_batch)
-                    all_results.update(batch_results)
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"❌ 批次 {batch_idx} 中 {symbol} 处理失败: {e}")
+                    result = BatchResult(
+                        symbol=symbol,
+                        analysis_result={},
+                        processing_time=0,
+                        retry_count=0,
+                        success=False,
+                        error_message=str(e)
+                    )
+                all_results[symbol] = result
+                remaining[batch_idx] -= 1
+                
+                # 更新统计
+                with self._progress_lock:
+                    stats['processed'] += 1
+                    stats['successful' if result.success else 'failed'] += 1
                     
-                    # 更新统计
-                    with self._progress_lock:
-                        stats['processed'] += len(batch_results)
-                        stats['successful'] += sum(1 for r in batch_results.values() if r.success)
-                        stats['failed'] += sum(1 for r in batch_results.values() if not r.success)
+                    if remaining[batch_idx] == 0:
                         stats['batches_completed'] += 1
                         
                         if self.config.enable_progress_tracking:
@@ -295,10 +374,6 @@ class BatchAIProcessor:
                         # 内存清理
                         if stats['batches_completed'] % 5 == 0:
                             gc.collect()
-                    
-                except Exception as e:
-                    logger.error(f"❌ 批次 {batch_idx} 处理失败: {e}")
-                    stats['failed'] += len(batches[batch_idx])
         
         return all_results
     
@@ -308,6 +383,9 @@ class BatchAIProcessor:
         """异步批次处理"""
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
+        # 同步分析在线程池中执行，线程数按并发上限的上界设置，实际并发由自适应并发限制器控制
+        total = sum(len(batch) for batch in batches)
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=max(1, min(self.config.max_workers, total))))
         
         try:
             return loop.run_until_complete(
@@ -454,19 +532,25 @@ class BatchAIProcessor:
         retry_count = 0
         
         # 检查缓存
-        if self.config.cache_results and symbol in self._results_cache:
-            cached_result = self._results_cache[symbol]
-            logger.debug(f"📋 使用缓存结果: {symbol}")
-            return cached_result
+        cache_key = make_cache_key(symbol, self._cache_fingerprint, self._data_date)
+        if self.config.cache_results:
+            cached_result = self.results_cache.get(cache_key)
+            if cached_result is not None:
+                logger.debug(f"📋 使用缓存结果: {symbol}")
+                return cached_result
+        
+        limiter = self._limiter or self.concurrency.get_limiter('callback' if analysis_callback else 'builtin')
         
         while retry_count <= self.config.max_retries:
             try:
-                if analysis_callback:
-                    # 使用自定义分析回调
-                    analysis_result = analysis_callback(symbol)
-                else:
-                    # 使用内置分析师
-                    analysis_result = self._run_builtin_analysis(symbol)
+                with limiter.slot() as call:
+                    if analysis_callback:
+                        # 使用自定义分析回调
+                        analysis_result = analysis_callback(symbol)
+                    else:
+                        # 使用内置分析师
+                        analysis_result = self._run_builtin_analysis(symbol)
+                    call.outcome = self._classify_result(analysis_result)
                 
                 processing_time = time.time() - start_time
                 result = BatchResult(
@@ -478,9 +562,9 @@ class BatchAIProcessor:
                     analyst_results=analysis_result.get('analyst_results', {})
                 )
                 
-                # 缓存结果
-                if self.config.cache_results:
-                    self._results_cache[symbol] = result
+                # 缓存结果（回调自行捕获异常返回的失败结果不缓存）
+                if self.config.cache_results and analysis_result.get('success') is not False:
+                    self.results_cache.put(cache_key, result)
                 
                 return result
                 
@@ -489,8 +573,9 @@ class BatchAIProcessor:
                 error_msg = str(e)
                 
                 if retry_count <= self.config.max_retries:
-                    logger.warning(f"⚠️ {symbol} 分析失败，重试 {retry_count}/{self.config.max_retries}: {error_msg}")
-                    time.sleep(self.config.retry_delay * retry_count)  # 指数退避
+                    delay = limiter.backoff_delay(retry_count, get_retry_after(e))
+                    logger.warning(f"⚠️ {symbol} 分析失败，{delay:.1f}秒后重试 {retry_count}/{self.config.max_retries}: {error_msg}")
+                    time.sleep(delay)  # 抖动指数退避，限流时遵循 Retry-After
                 else:
                     logger.error(f"❌ {symbol} 分析最终失败: {error_msg}")
                     
@@ -504,6 +589,20 @@ class BatchAIProcessor:
                         error_message=error_msg
                     )
     
+    @staticmethod
+    def _classify_result(analysis_result: Any) -> CallOutcome:
+        """
+        判断分析结果携带的并发信号
+        
+        回调函数可能自行捕获异常并返回 {'success': False, 'error': ...}，
+        其中的限流/超时错误同样需要反馈给并发限制器；其他结果视为成功调用。
+        """
+        if isinstance(analysis_result, dict) and analysis_result.get('success') is False:
+            outcome = classify_failure(analysis_result.get('error', ''))
+            if outcome in (CallOutcome.RATE_LIMITED, CallOutcome.TIMEOUT):
+                return outcome
+        return CallOutcome.SUCCESS
+    
     async def _async_analyze_single_stock(self, symbol: str, 
                                         analysis_callback: Callable = None) -> BatchResult:
         """异步分析单只股票"""
@@ -694,19 +793,61 @@ class BatchAIProcessor:
         
         return signals
     
-    def _adjust_batch_config(self, total_stocks: int):
-        """根据股票数量和系统资源动态调整批次配置"""
-        # 获取系统资源信息
-        cpu_count = psutil.cpu_count()
-        memory_gb = psutil.virtual_memory().total / (1024**3)
-        
-        # 基于系统资源调整工作线程数
-        optimal_workers = min(
-            cpu_count * 2,  # CPU核心数的2倍
-            int(memory_gb),  # 每GB内存一个线程
-            total_stocks // 10,  # 每10只股票一个线程
-            32  # 最大限制
+    def _default_cache_scope(self, provider: str) -> Dict[str, Any]:
+        """处理器自身影响分析结果的配置（未指定 cache_scope 时用于生成缓存键）"""
+        return {
+            'provider': provider,
+            'analysts': sorted(self.analysts),
+            'social': bool(self.config.enable_social and self.xueqiu_provider),
+            'analysis_depth': self.config.analysis_depth,
+            'social_weight': self.config.social_weight,
+            'min_discussions': self.config.min_discussions,
+            'sentiment_threshold': self.config.sentiment_threshold,
+        }
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """获取结果缓存统计"""
+        return self.results_cache.stats()
+    
+    def clear_cache(self, symbols: Optional[List[str]] = None) -> int:
+        """清理结果缓存（指定股票或全部），返回删除的条目数"""
+        removed = self.results_cache.invalidate(symbols)
+        if self.config.cache_persist_path:
+            self.results_cache.save()
+        return removed
+    
+    def _build_aimd_config(self) -> AIMDConfig:
+        """根据批处理配置生成并发控制参数"""
+        if not self.config.enable_adaptive_concurrency:
+            # 关闭自适应时并发上限固定为上界，实际并发由工作线程数决定
+            fixed = max(self.config.max_concurrency, self.config.max_workers)
+            return AIMDConfig(initial_limit=fixed, min_limit=fixed, max_limit=fixed,
+                              backoff_base=self.config.retry_delay)
+        return AIMDConfig(
+            initial_limit=self.config.initial_concurrency,
+            min_limit=self.config.min_concurrency,
+            max_limit=self.config.max_concurrency,
+            backoff_base=self.config.retry_delay
         )
+    
+    def _adjust_batch_config(self, total_stocks: int):
+        """根据股票数量动态调整批次配置"""
+        if self.config.enable_adaptive_concurrency:
+            # AI分析是I/O密集型调用，线程只是等待并发名额的载体，
+            # 实际并发由限制器根据延迟、超时和429信号调整，线程数只需覆盖并发上限的上界
+            optimal_workers = min(self.config.max_concurrency, max(total_stocks, 1))
+        else:
+            # 获取系统资源信息
+            cpu_count = psutil.cpu_count()
+            memory_gb = psutil.virtual_memory().total / (1024**3)
+            
+            # 基于系统资源调整工作线程数
+            optimal_workers = min(
+                cpu_count * 2,  # CPU核心数的2倍
+                int(memory_gb),  # 每GB内存一个线程
+                total_stocks // 10,  # 每10只股票一个线程
+                32  # 最大限制
+            )
         
         if optimal_workers != self.config.max_workers:
             logger.info(f"🔧 自动调整工作线程: {self.config.max_workers} -> {optimal_workers}")
@@ -732,9 +873,14 @@ class BatchAIProcessor:
         progress_pct = stats['batches_completed'] / total_batches * 100
         throughput = stats['successful'] / max(elapsed_time, 1)
         
+        concurrency = f" 并发上限:{self._limiter.limit}" if self._limiter else ""
         logger.info(f"📈 批次进度: {stats['batches_completed']}/{total_batches} ({progress_pct:.1f}%) "
                    f"成功:{stats['successful']} 失败:{stats['failed']} "
-                   f"吞吐量:{throughput:.1f}股票/秒")
+                   f"吞吐量:{throughput:.1f}股票/秒{concurrency}")
+    
+    def get_concurrency_status(self) -> Dict[str, Dict[str, Any]]:
+        """获取各数据源的实时并发状态（并发上限、在途数、吞吐量、延迟）"""
+        return self.concurrency.snapshot()
     
     def _monitor_memory(self):
         """监控内存使用情况"""
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+AI分析结果缓存
+按 (股票代码, 分析配置指纹, 数据日期) 缓存分析结果，支持条目数/内存双重上限的LRU淘汰、
+TTL过期、可选的磁盘持久化以及命中/淘汰统计。BatchAIProcessor 与 StockSelector 共用同一个实例。
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+# 持久化文件格式版本：缓存值结构变化时递增，使旧文件失效
+CACHE_FILE_VERSION = 1
+
+CacheKey = Tuple[str, str, str]
+
+
+def config_fingerprint(config: Optional[Dict[str, Any]]) -> str:
+    """分析配置指纹：配置字典按键排序序列化后取哈希，值无法序列化时使用其字符串形式"""
+    payload = json.dumps(config or {}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def make_cache_key(symbol: str, fingerprint: str, data_date: Optional[str] = None) -> CacheKey:
+    """生成缓存键，数据日期默认为当天"""
+    return (symbol, fingerprint, data_date or datetime.now().strftime('%Y-%m-%d'))
+
+
+@dataclass
+class _CacheEntry:
+    value: Any
+    expires_at: float
+    size: int
+    persistable: bool
+
+
+class AnalysisResultCache:
+    """
+    线程安全的有界TTL缓存
+
+    条目按最近使用顺序维护，写入后条目数超过 max_entries 或估算内存超过 max_memory_mb 时
+    淘汰最久未使用的条目；读取时遇到过期条目直接删除并记为未命中。
+    启用持久化时，save() 把未过期且可序列化的条目写入 persist_path，初始化时自动加载。
+    """
+
+    def __init__(self, max_entries: int = 5000, max_memory_mb: float = 256.0,
+                 ttl_seconds: float = 4 * 3600, persist_path: Optional[str] = None):
+        """
+        Args:
+            max_entries: 最大条目数
+            max_memory_mb: 估算内存上限（MB，按序列化后的大小估算）
+            ttl_seconds: 条目有效期（秒）
+            persist_path: 持久化文件路径，为空时只在内存中缓存
+        """
+        self.max_entries = max(1, int(max_entries))
+        self.max_memory_bytes = int(max_memory_mb * 1024 * 1024)
+        self.ttl_seconds = ttl_seconds
+        self.persist_path = persist_path
+
+        self._entries: 'OrderedDict[CacheKey, _CacheEntry]' = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'expired': 0,
+            'puts': 0,
+            'evictions_entries': 0,
+            'evictions_memory': 0,
+            'loaded': 0,
+        }
+
+        if persist_path:
+            self.load()
+
+    @staticmethod
+    def _estimate_size(value: Any) -> Tuple[int, bool]:
+        """估算条目大小，返回 (字节数, 是否可持久化)"""
+        try:
+            return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)), True
+        except Exception:
+            # 动态类型等无法序列化的对象只缓存在内存中，按对象本身大小粗略估算
+            return sys.getsizeof(value) + sum(sys.getsizeof(v) for v in getattr(value, '__dict__', {}).values()), False
+
+    def _remove(self, key: CacheKey) -> Optional[_CacheEntry]:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= entry.size
+            self._dirty = True
+        return entry
+
+    def get(self, key: CacheKey) -> Optional[Any]:
+        """读取缓存，未命中或已过期返回None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            if entry.expires_at <= time.time():
+                self._remove(key)
+                self._stats['expired'] += 1
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return entry.value
+
+    def put(self, key: CacheKey, value: Any, ttl_seconds: Optional[float] = None):
+        """写入缓存并按条目数/内存上限淘汰最久未使用的条目"""
+        size, persistable = self._estimate_size(value)
+        if size > self.max_memory_bytes:
+            logger.debug(f"⚠️ 分析结果过大，跳过缓存: {key[0]} ({size}字节)")
+            return
+        expires_at = time.time() + (ttl_seconds if ttl_seconds is not None else self.ttl_seconds)
+
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = _CacheEntry(value=value, expires_at=expires_at, size=size, persistable=persistable)
+            self._memory_bytes += size
+            self._stats['puts'] += 1
+            self._dirty = True
+
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self._stats['evictions_entries'] += 1
+            while self._memory_bytes > self.max_memory_bytes and len(self._entries) > 1:
+                self._remove(next(iter(self._entries)))
+                self._stats['evictions_memory'] += 1
+
+    def contains(self, key: CacheKey) -> bool:
+        """是否存在未过期的条目（不计入命中统计、不改变使用顺序）"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry.expires_at > time.time()
+
+    def invalidate(self, symbols: Optional[Iterable[str]] = None) -> int:
+        """删除指定股票（为空时删除全部）的缓存条目，返回删除数量"""
+        with self._lock:
+            if symbols is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                self._memory_bytes = 0
+                self._dirty = True
+                return removed
+            targets = set(symbols)
+            keys = [key for key in self._entries if key[0] in targets]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self):
+        """清空缓存"""
+        self.invalidate()
+
+    def purge_expired(self) -> int:
+        """删除所有过期条目，返回删除数量"""
+        now = time.time()
+        with self._lock:
+            keys = [key for key, entry in self._entries.items() if entry.expires_at <= now]
+            for key in keys:
+                self._remove(key)
+            self._stats['expired'] += len(keys)
+            return len(keys)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计（命中率、条目数、估算内存、各类淘汰次数）"""
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return {
+                **self._stats,
+                'entries': len(self._entries),
+                'memory_mb': round(self._memory_bytes / 1024 / 1024, 3),
+                'hit_rate': round(self._stats['hits'] / lookups, 4) if lookups else 0.0,
+                'max_entries': self.max_entries,
+                'max_memory_mb': round(self.max_memory_bytes / 1024 / 1024, 3),
+                'ttl_seconds': self.ttl_seconds,
+                'persist_path': self.persist_path,
+            }
+
+    def save(self) -> bool:
+        """把未过期且可序列化的条目写入持久化文件（先写临时文件再替换，避免中断时损坏）"""
+        if not self.persist_path:
+            return False
+        now = time.time()
+        with self._lock:
+            if not self._dirty:
+                return True
+            records = [(key, entry.value, entry.expires_at) for key, entry in self._entries.items()
+                       if entry.persistable and entry.expires_at > now]
+            self._dirty = False
+        try:
+            directory = os.path.dirname(self.persist_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.persist_path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({'version': CACHE_FILE_VERSION, 'records': records}, f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.persist_path)
+            logger.debug(f"💾 AI分析结果缓存已保存: {len(records)}条 -> {self.persist_path}")
+            return True
+        except Exception as e:
+            self._dirty = True
+            logger.warning(f"⚠️ 保存AI分析结果缓存失败: {e}")
+            return False
+
+    def load(self) -> int:
+        """从持久化文件加载未过期的条目，返回加载数量"""
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return 0
+        try:
+            with open(self.persist_path, 'rb') as f:
+                payload = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"⚠️ 加载AI分析结果缓存失败: {e}")
+            return 0
+        if not isinstance(payload, dict) or payload.get('version') != CACHE_FILE_VERSION:
+            logger.info("🔄 AI分析结果缓存文件版本不一致，忽略")
+            return 0
+
+        now = time.time()
+        loaded = 0
+        with self._lock:
+            # 按写入顺序恢复，越靠后越近使用
+            for key, value, expires_at in payload.get('records', []):
+                if expires_at <= now:
+                    continue
+                ttl = expires_at - now
+                self.put(tuple(key), value, ttl_seconds=ttl)
+                loaded += 1
+            self._stats['puts'] -= loaded
+            self._stats['loaded'] += loaded
+            self._dirty = False
+        logger.info(f"📂 加载AI分析结果缓存: {loaded}条 ({self.persist_path})")
+        return loaded
+
+
+# 全局缓存实例
+_analysis_cache = None
+_analysis_cache_lock = threading.Lock()
+
+
+def get_analysis_cache(max_entries: int = 5000, max_memory_mb: float = 256.0,
+                       ttl_seconds: float = 4 * 3600, persist_path: Optional[str] = None) -> AnalysisResultCache:
+    """
+    获取全局AI分析结果缓存实例
+
+    实例在进程内只创建一次，参数仅在首次调用时生效。
+    """
+    global _analysis_cache
+    with _analysis_cache_lock:
+        if _analysis_cache is None:
+            _analysis_cache = AnalysisResultCache(max_entries=max_entries, max_memory_mb=max_memory_mb,
+                                                  ttl_seconds=ttl_seconds, persist_path=persist_path)
+        return _analysis_cache
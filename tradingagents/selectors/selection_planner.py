@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+选股查询计划
+根据筛选条件引用的字段和排序字段，决定哪些条件可以在数据丰富前下推到基础股票表上执行，
+以及综合评分、AI分析这些昂贵的丰富步骤需要对哪些股票执行
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set, Union
+
+from .filter_conditions import FilterCondition, FilterGroup
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+# 综合评分丰富步骤产生的字段（_enrich_stock_data）
+SCORE_FIELDS = frozenset({
+    'overall_score', 'grade', 'technical_score', 'fundamental_score',
+    'sentiment_score', 'quality_score', 'risk_score',
+})
+
+# AI增强丰富步骤产生的字段（_enrich_stock_data_with_ai 及智能排序）
+AI_FIELDS = frozenset({
+    'ai_overall_score', 'ai_confidence', 'ai_recommendation', 'ai_risk_assessment',
+    'expert_committee_score', 'adaptive_strategy_score', 'pattern_recognition_score',
+    'social_score', 'social_signals', 'social_heat', 'social_sentiment', 'intelligent_score',
+})
+
+
+def collect_filter_fields(condition: Union[FilterCondition, FilterGroup]) -> Set[str]:
+    """递归收集筛选条件引用的全部字段名"""
+    if isinstance(condition, FilterGroup):
+        fields = set()
+        for child in condition.conditions:
+            fields |= collect_filter_fields(child)
+        return fields
+    field_name = getattr(condition, 'field_name', None)
+    return {field_name} if field_name else set()
+
+
+@dataclass
+class SelectionPlan:
+    """
+    选股执行计划
+
+    顶层筛选条件之间是 AND 关系，因此可以按字段来源拆成三段依次执行：
+    base_filters 在丰富前执行，score_filters 在综合评分后、AI分析前执行，post_filters 在全部丰富后执行。
+    """
+    base_filters: List[Union[FilterCondition, FilterGroup]] = field(default_factory=list)
+    score_filters: List[Union[FilterCondition, FilterGroup]] = field(default_factory=list)
+    post_filters: List[Union[FilterCondition, FilterGroup]] = field(default_factory=list)
+    needs_scores: bool = False          # 是否计算综合评分
+    needs_ai: bool = False              # 是否执行AI分析
+    defer_enrichment: bool = False      # 是否先排序截断，再只丰富最终结果
+    sort_column: Optional[str] = None   # 可在丰富前使用的排序字段（仅 defer_enrichment 时有效）
+    top_k: bool = False                 # 是否按预估评分增量评分并提前终止
+
+    # 执行统计
+    stats: Dict[str, Any] = field(default_factory=dict)
+
+    def record(self, stage: str, before: int, after: int):
+        """记录某一阶段的行数变化"""
+        self.stats[stage] = {'before': before, 'after': after}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """执行报告（写入选股结果摘要）"""
+        return {
+            'base_filters': len(self.base_filters),
+            'score_filters': len(self.score_filters),
+            'post_filters': len(self.post_filters),
+            'needs_scores': self.needs_scores,
+            'needs_ai': self.needs_ai,
+            'defer_enrichment': self.defer_enrichment,
+            'top_k': self.top_k,
+            **self.stats,
+        }
+
+
+def plan_selection(filters: List[Union[FilterCondition, FilterGroup]], base_columns: Iterable[str],
+                   sort_by: Optional[str], limit: Optional[int], include_scores: bool,
+                   ai_enabled: bool, sort_ascending: bool = False,
+                   top_k_requested: bool = False) -> SelectionPlan:
+    """
+    生成选股执行计划
+
+    Args:
+        filters: 顶层筛选条件（AND 关系）
+        base_columns: 基础股票表（丰富前）已有的字段
+        sort_by: 排序字段
+        limit: 结果数量限制
+        include_scores: 是否计算综合评分（与原流程一致，关闭时不计算评分）
+        ai_enabled: 是否启用AI增强
+        sort_ascending: 排序方向
+        top_k_requested: 是否请求 Top-K 提前终止
+
+    Returns:
+        SelectionPlan: 执行计划
+    """
+    base_columns = set(base_columns)
+    plan = SelectionPlan(needs_scores=include_scores, needs_ai=ai_enabled)
+
+    for condition in filters:
+        fields = collect_filter_fields(condition)
+        if fields and fields <= base_columns:
+            plan.base_filters.append(condition)
+        elif fields and fields <= (base_columns | SCORE_FIELDS) and include_scores:
+            plan.score_filters.append(condition)
+        else:
+            # 引用AI字段或未知字段的条件保持在最后执行，结果与原流程一致
+            plan.post_filters.append(condition)
+
+    # 排序字段在基础表中且没有依赖丰富字段的筛选条件时，可以先排序截断再丰富最终结果；
+    # 排序字段为空或不在基础表中时，原流程会回退到综合评分/AI评分排序，必须先丰富
+    if (limit and sort_by and sort_by in base_columns
+            and not plan.score_filters and not plan.post_filters):
+        plan.defer_enrichment = True
+        plan.sort_column = sort_by
+
+    # Top-K 提前终止：结果按综合评分降序截断（sort_by 为空时原流程同样回退到综合评分降序），
+    # 且没有依赖丰富字段的筛选条件、不启用AI重排序
+    if (top_k_requested and limit and include_scores and not ai_enabled and not plan.defer_enrichment
+            and not plan.score_filters and not plan.post_filters
+            and (sort_by is None or (sort_by == 'overall_score' and not sort_ascending))):
+        plan.top_k = True
+
+    logger.debug(f"🧭 选股执行计划: 下推{len(plan.base_filters)}个条件, 评分后{len(plan.score_filters)}个, "
+                 f"最终{len(plan.post_filters)}个, 延迟丰富: {plan.defer_enrichment}, Top-K: {plan.top_k}")
+    return plan
@@ -9,7 +9,8 @@ import numpy as np
 from typing import Dict, List, Optional, Any, Union, Tuple
 from datetime import datetime, timedelta
 import time
-from dataclasses import dataclass, field
+import heapq
+from dataclasses import dataclass, field, asdict
 import asyncio
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
@@ -18,13 +19,15 @@ from .filter_conditions import (
     FilterCondition, FilterGroup, FilterLogic, STOCK_FILTER_FIELDS,
     NumericFilter, EnumFilter, BooleanFilter, FilterOperator
 )
-from ..analytics.comprehensive_scoring_system import get_comprehensive_scoring_system, ComprehensiveScore
+from ..analytics.comprehensive_scoring_system import get_comprehensive_scoring_system, ComprehensiveScore, ScoreCategory
 from ..analytics.data_fusion_engine import get_fusion_engine
 from ..dataflows.enhanced_data_manager import EnhancedDataManager
 from ..utils.logging_manager import get_logger
-from .ai_strategies.ai_strategy_manager import get_ai_strategy_manager, AIMode, AISelectionConfig
+from .ai_strategies.ai_strategy_manager import get_ai_strategy_manager, AIMode, AISelectionConfig, AIAnalysisResult
 from .intelligent_sampling import get_intelligent_sampler, SamplingConfig, SamplingStrategy
-from .batch_ai_processor import get_batch_ai_processor, BatchConfig, ProcessingStrategy
+from .batch_ai_processor import get_batch_ai_processor, BatchConfig, BatchResult, ProcessingStrategy
+from .result_cache import config_fingerprint, get_analysis_cache, make_cache_key
+from .selection_planner import plan_selection
 from ..analytics.longhubang_analyzer import get_longhubang_analyzer, LongHuBangAnalysisResult
 from ..dataflows.longhubang_utils import get_longhubang_provider, RankingType
 
@@ -49,6 +52,10 @@ class SelectionCriteria:
     enable_smart_sampling: bool = True                           # 启用智能采样
     sampling_config: Optional[SamplingConfig] = None            # 采样配置
     
+    # Top-K 提前终止选项（近似模式，需显式开启）
+    enable_top_k: bool = False                                   # 按预估评分优先级增量评分，预估确定前K名后提前终止
+    top_k_margin: float = 5.0                                    # 预估评分的经验余量（不是严格上界，实际超出次数见 top_k_stats）
+    
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典格式"""
         return {
@@ -57,7 +64,9 @@ class SelectionCriteria:
             'sort_ascending': self.sort_ascending,
             'limit': self.limit,
             'include_scores': self.include_scores,
-            'include_basic_info': self.include_basic_info
+            'include_basic_info': self.include_basic_info,
+            'enable_top_k': self.enable_top_k,
+            'top_k_margin': self.top_k_margin
         }
 
 
@@ -169,6 +178,9 @@ class StockSelector:
                 logger.warning(f"⚠️ AI批次处理器初始化失败: {batch_error}")
                 self.batch_processor = None
             
+            # AI分析结果缓存（与批次处理器共用同一实例）
+            self.analysis_cache = self.batch_processor.results_cache if self.batch_processor else get_analysis_cache()
+            
             # 初始化龙虎榜分析器
             try:
                 self.longhubang_analyzer = get_longhubang_analyzer()
@@ -290,53 +302,213 @@ class StockSelector:
             try:
                 logger.info("🔄 正在获取综合评分数据...")
                 
-                # 批量获取评分（限制并发数量避免API限制）
+                # 批量获取行情（限制并发数量避免API限制）
                 batch_size = 10
                 symbols = enriched_data['ts_code'].tolist()
-                all_scores = []
+                quotes = []
                 
                 for i in range(0, len(symbols), batch_size):
                     batch_symbols = symbols[i:i + batch_size]
-                    batch_scores = []
                     
                     for symbol in batch_symbols:
                         try:
-                            # 获取基础数据用于评分
                             basic_data = self.data_manager.get_latest_price_data(symbol)
                             if basic_data:
-                                score = self.scoring_system.calculate_comprehensive_score(symbol, basic_data)
-                                batch_scores.append({
-                                    'ts_code': symbol,
-                                    'overall_score': score.overall_score,
-                                    'grade': score.grade,
-                                    'technical_score': score.category_scores.get('technical', {}).get('score', 0),
-                                    'fundamental_score': score.category_scores.get('fundamental', {}).get('score', 0),
-                                    'sentiment_score': score.category_scores.get('sentiment', {}).get('score', 0),
-                                    'quality_score': score.category_scores.get('quality', {}).get('score', 0),
-                                    'risk_score': score.category_scores.get('risk', {}).get('score', 0)
-                                })
+                                quotes.append((symbol, basic_data))
                         except Exception as e:
                             logger.warning(f"⚠️ 获取 {symbol} 评分失败: {e}")
                             continue
                     
-                    all_scores.extend(batch_scores)
-                    
                     # 添加延迟避免API限制
                     if i + batch_size < len(symbols):
                         time.sleep(0.1)
                 
+                # 全部行情一次性向量化评分
+                all_scores = self._score_quotes(quotes)
+                
                 if all_scores:
                     scores_df = pd.DataFrame(all_scores)
                     enriched_data = enriched_data.merge(scores_df, on='ts_code', how='left')
                     logger.info(f"✅ 添加评分数据成功: {len(scores_df)}条记录")
                 else:
                     logger.warning("⚠️ 未获取到有效的评分数据")
+                
+                # 本轮评分写入评分历史
+                self.scoring_system.flush_score_history()
                     
             except Exception as e:
                 logger.error(f"❌ 获取综合评分数据失败: {e}")
         
         return enriched_data
     
+    def _score_symbol(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """计算单只股票的综合评分，返回评分列（无行情数据时返回None）"""
+        # 获取基础数据用于评分
+        basic_data = self.data_manager.get_latest_price_data(symbol)
+        if not basic_data:
+            return None
+        score = self.scoring_system.calculate_comprehensive_score(symbol, basic_data)
+        return self._score_row(symbol, score)
+    
+    @staticmethod
+    def _score_row(symbol: str, score: ComprehensiveScore) -> Dict[str, Any]:
+        """综合评分结果转为评分列"""
+        def category_score(category: ScoreCategory) -> float:
+            category_result = score.category_scores.get(category)
+            return category_result.score if category_result else 0
+        
+        return {
+            'ts_code': symbol,
+            'overall_score': score.overall_score,
+            'grade': score.grade,
+            'technical_score': category_score(ScoreCategory.TECHNICAL),
+            'fundamental_score': category_score(ScoreCategory.FUNDAMENTAL),
+            'sentiment_score': category_score(ScoreCategory.SENTIMENT),
+            'quality_score': category_score(ScoreCategory.QUALITY),
+            'risk_score': category_score(ScoreCategory.RISK)
+        }
+    
+    def _score_quotes(self, quotes: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        批量计算多只股票的综合评分，返回评分列（与逐只调用 _score_symbol 的结果一致）
+        
+        Args:
+            quotes: [(股票代码, 最新行情)]
+        """
+        def has_null(quote: Dict[str, Any]) -> bool:
+            return any(value is None or (isinstance(value, float) and np.isnan(value)) for value in quote.values())
+        
+        # 含空值的行情放进DataFrame后无法与"字段不存在"区分，按标量路径逐只计算
+        regular = [(symbol, quote) for symbol, quote in quotes if not has_null(quote)]
+        irregular = [(symbol, quote) for symbol, quote in quotes if has_null(quote)]
+        score_rows = []
+        
+        if regular:
+            try:
+                scores = self.scoring_system.calculate_scores_batch(
+                    pd.DataFrame([quote for _, quote in regular]),
+                    symbols=[symbol for symbol, _ in regular]
+                )
+                score_rows = scores.rename(columns={'symbol': 'ts_code'})[
+                    ['ts_code', 'overall_score', 'grade', 'technical_score', 'fundamental_score',
+                     'sentiment_score', 'quality_score', 'risk_score']
+                ].to_dict('records')
+            except Exception as e:
+                logger.warning(f"⚠️ 批量评分失败，改为逐只计算: {e}")
+                irregular = quotes
+        
+        for symbol, quote in irregular:
+            try:
+                score = self.scoring_system.calculate_comprehensive_score(symbol, quote)
+                score_rows.append(self._score_row(symbol, score))
+            except Exception as e:
+                logger.warning(f"⚠️ 获取 {symbol} 评分失败: {e}")
+        
+        return score_rows
+    
+    def _enrich_top_k(self, stock_data: pd.DataFrame, limit: int, margin: float,
+                      stats: Dict[str, Any]) -> Optional[pd.DataFrame]:
+        """
+        Top-K 增量评分（近似）
+        
+        先用一次批量行情快照为每只股票计算单源预估评分，预估评分加上 margin 作为实际评分的上界；
+        按上界从高到低逐只计算综合评分并维护大小为 limit 的最小堆，当堆已满且堆顶评分不低于
+        下一只候选的上界时停止。快照中缺失的股票上界视为无穷大，优先评分。
+        
+        实际评分还包含多源行情与新闻等快照没有的输入，与预估的差距没有理论上界，margin 只是经验值：
+        提前终止时结果可能与全量评分的前K名不同。stats 中记录已评分股票的实际超出预估的最大/平均差距
+        （max_gap/mean_gap）和超出 margin 的次数（margin_exceeded），调用方可据此判断是否需要调大 margin
+        或改用全量评分；possibly_inexact 为 True 表示提前终止且观察到超出 margin 的情况。
+        
+        Args:
+            stock_data: 候选股票（已完成基础字段筛选）
+            limit: 需要的结果数量
+            margin: 预估评分的上界余量
+            stats: 执行统计（输出）
+            
+        Returns:
+            Optional[pd.DataFrame]: 带评分列的股票数据；提前终止时只包含前K名，
+            无法获取行情快照时返回None（由调用方回退到全量评分）
+        """
+        if stock_data.empty or not self.scoring_system or not hasattr(self.data_manager, 'get_price_snapshot'):
+            return None
+        
+        symbols = stock_data['ts_code'].tolist()
+        snapshot = self.data_manager.get_price_snapshot(symbols)
+        if not snapshot:
+            logger.info("⚠️ 无法获取批量行情快照，Top-K 回退到全量评分")
+            return None
+        
+        candidates = []
+        for position, symbol in enumerate(symbols):
+            quote = snapshot.get(symbol)
+            bound = self.scoring_system.estimate_overall_score(symbol, quote) + margin if quote else float('inf')
+            candidates.append((bound, position, symbol))
+        candidates.sort(key=lambda item: (-item[0], item[1]))
+        
+        # 最小堆元素: (评分, -原始位置, 评分列)，同分时保留原始位置靠前的股票
+        heap: List[Tuple[float, int, Dict[str, Any]]] = []
+        all_scores = []
+        scored = 0
+        stopped_at = None
+        gaps = []  # 实际评分 - 预估评分（仅有快照的股票）
+        
+        for index, (bound, position, symbol) in enumerate(candidates):
+            if len(heap) >= limit and heap[0][0] >= bound:
+                stopped_at = index
+                break
+            
+            # 与全量评分保持相同的节奏：每评分10只股票暂停一次，避免API限制
+            if scored and scored % 10 == 0:
+                time.sleep(0.1)
+            scored += 1
+            
+            try:
+                score_row = self._score_symbol(symbol)
+            except Exception as e:
+                logger.warning(f"⚠️ 获取 {symbol} 评分失败: {e}")
+                continue
+            if not score_row:
+                continue
+            
+            all_scores.append(score_row)
+            if bound != float('inf'):
+                gaps.append(score_row['overall_score'] - (bound - margin))
+            entry = (score_row['overall_score'], -position, score_row)
+            if len(heap) < limit:
+                heapq.heappush(heap, entry)
+            elif entry[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, entry)
+        
+        stats.update({
+            'candidates': len(symbols),
+            'snapshot_hits': len(snapshot),
+            'scored': scored,
+            'skipped': len(symbols) - scored,
+            'stopped_early': stopped_at is not None,
+            'margin': margin,
+            'max_gap': round(max(gaps), 2) if gaps else None,
+            'mean_gap': round(sum(gaps) / len(gaps), 2) if gaps else None,
+            'margin_exceeded': sum(1 for gap in gaps if gap > margin),
+        })
+        stats['possibly_inexact'] = stats['stopped_early'] and stats['margin_exceeded'] > 0
+        logger.info(f"🎯 Top-K 增量评分: 候选{len(symbols)}只, 实际评分{scored}只, "
+                    f"{'提前终止' if stopped_at is not None else '全部评分'}")
+        if stats['possibly_inexact']:
+            logger.warning(f"⚠️ Top-K 实际评分超出预估余量 {stats['margin_exceeded']} 次 "
+                           f"(最大差距 {stats['max_gap']}, 余量 {margin})，提前终止的结果可能与全量评分不同")
+        self.scoring_system.flush_score_history()
+
+        if stopped_at is None:
+            # 全部候选都已评分，结果与全量评分完全一致
+            if not all_scores:
+                return stock_data.copy()
+            return stock_data.merge(pd.DataFrame(all_scores), on='ts_code', how='left')
+        
+        positions = sorted(-entry[1] for entry in heap)
+        top_data = stock_data.iloc[positions].reset_index(drop=True)
+        return top_data.merge(pd.DataFrame([entry[2] for entry in heap]), on='ts_code', how='left')
+    
     def _enrich_stock_data_with_ai(self, stock_data: pd.DataFrame, 
                                   ai_config: AISelectionConfig = None) -> pd.DataFrame:
         """使用AI增强股票数据"""
@@ -369,6 +541,17 @@ class StockSelector:
             
             logger.info(f"🤖 发现 {available_engines} 个可用AI引擎")
             
+            # 结果缓存作用域：模型与AI配置相同、数据日期相同的分析结果可以复用
+            model_info = self.ai_strategy_manager.get_current_ai_model_info() or {}
+            provider = model_info.get('provider') or 'ai_strategy'
+            cache_scope = {
+                'source': 'ai_strategy',
+                'provider': provider,
+                'model': model_info.get('model_name'),
+                'ai_config': asdict(ai_config),
+            }
+            cache_fingerprint = config_fingerprint(cache_scope)
+            
             # 准备股票代码列表
             stock_symbols = []
             stock_symbol_to_data = {}
@@ -441,17 +624,18 @@ class StockSelector:
                             'error': str(e)
                         }
                 
-                # 执行批量处理
+                # 执行批量处理（按当前AI模型提供商区分并发限制器，按缓存作用域复用已有结果）
                 processing_report = self.batch_processor.process_stocks(
                     stock_symbols, 
-                    analysis_callback=ai_analysis_callback
+                    analysis_callback=ai_analysis_callback,
+                    provider=provider,
+                    cache_scope=cache_scope
                 )
                 
                 # 处理批次处理结果
                 for symbol in stock_symbols:
-                    # 从批处理器的缓存中获取结果
-                    if hasattr(self.batch_processor, '_results_cache') and symbol in self.batch_processor._results_cache:
-                        batch_result = self.batch_processor._results_cache[symbol]
+                    batch_result = self.batch_processor.last_results.get(symbol)
+                    if batch_result is not None:
                         if batch_result.success and batch_result.analysis_result:
                             # 提取社交信号数据
                             if 'social_signals' in batch_result.analysis_result:
@@ -492,12 +676,38 @@ class StockSelector:
                 logger.info(f"❌ 失败数量: {processing_report.failed_stocks}")
                 logger.info(f"⏱️ 总耗时: {processing_report.total_time:.2f}秒")
                 logger.info(f"🚀 处理吞吐量: {processing_report.throughput:.2f}股票/秒")
+                logger.info(f"🎚️ 并发上限: {processing_report.concurrency_limit}")
                 logger.info(f"💾 内存峰值: {processing_report.memory_peak:.1f}%")
                 
             else:
-                # 回退到原有的批处理方式
+                # 回退到原有的批处理方式，同样先复用结果缓存
                 logger.warning("⚠️ AI批次处理器不可用，使用传统批处理方式")
-                ai_results = self._fallback_ai_processing(stock_symbol_to_data, ai_config, enriched_data)
+                ai_results = []
+                pending = {}
+                for symbol, stock_info in stock_symbol_to_data.items():
+                    cached = self.analysis_cache.get(make_cache_key(symbol, cache_fingerprint))
+                    if cached is not None and cached.analysis_result.get('ai_result') is not None:
+                        ai_results.append(cached.analysis_result['ai_result'])
+                    else:
+                        pending[symbol] = stock_info
+                if ai_results:
+                    logger.info(f"📋 复用缓存的AI分析结果: {len(ai_results)}只股票")
+                
+                fresh_results = self._fallback_ai_processing(pending, ai_config, enriched_data) if pending else []
+                for ai_result in fresh_results:
+                    # 只缓存真实的分析结果，失败时生成的默认结果不缓存
+                    if isinstance(ai_result, AIAnalysisResult):
+                        self.analysis_cache.put(
+                            make_cache_key(ai_result.symbol, cache_fingerprint),
+                            BatchResult(
+                                symbol=ai_result.symbol,
+                                analysis_result={'symbol': ai_result.symbol, 'ai_result': ai_result, 'success': True},
+                                processing_time=0.0,
+                                retry_count=0,
+                                success=True
+                            )
+                        )
+                ai_results.extend(fresh_results)
             
             # 将AI分析结果合并到数据中
             if ai_results:
@@ -792,35 +1002,87 @@ class StockSelector:
                 else:
                     logger.info(f"📊 数据量较小({len(stock_data)})，无需智能采样")
             
-            # 3. 丰富股票数据
-            if criteria.include_scores or criteria.include_basic_info:
+            # 3. 生成执行计划：只涉及基础字段的筛选条件下推到丰富之前执行
+            enrich = criteria.include_scores or criteria.include_basic_info
+            ai_enabled = criteria.ai_mode != AIMode.BASIC and self.ai_strategy_manager is not None
+            plan = plan_selection(
+                criteria.filters,
+                base_columns=stock_data.columns,
+                sort_by=criteria.sort_by,
+                limit=criteria.limit,
+                include_scores=enrich and criteria.include_scores,
+                ai_enabled=enrich and ai_enabled,
+                sort_ascending=criteria.sort_ascending,
+                top_k_requested=criteria.enable_top_k
+            )
+            
+            # 更新实际候选数量（考虑智能采样后的数量）
+            actual_candidates = len(stock_data)
+            
+            if plan.base_filters:
+                logger.info(f"🔍 下推 {len(plan.base_filters)} 个基础字段筛选条件...")
+                stock_data = self._apply_filters(stock_data, plan.base_filters).reset_index(drop=True)
+                plan.record('base_filter', actual_candidates, len(stock_data))
+            
+            if plan.defer_enrichment and len(stock_data) > criteria.limit:
+                # 排序只依赖基础字段，先截断到最终数量，只丰富需要返回的股票
+                logger.info(f"⏩ 按 {plan.sort_column} 预先排序截断: {len(stock_data)} -> {criteria.limit}")
+                stock_data = stock_data.sort_values(
+                    by=plan.sort_column,
+                    ascending=criteria.sort_ascending
+                ).head(criteria.limit).reset_index(drop=True)
+            
+            # 4. 按需丰富股票数据
+            scored_rows = 0
+            ai_rows = 0
+            if enrich:
                 logger.info("🔄 正在丰富股票数据...")
                 
-                # 基础数据丰富
-                stock_data = self._enrich_stock_data(
-                    stock_data, 
-                    include_scores=criteria.include_scores
-                )
+                # 基础数据丰富：Top-K 模式下按预估评分增量评分，确定前K名后提前终止
+                top_k_data = None
+                if plan.top_k and len(stock_data) > criteria.limit:
+                    top_k_stats = {}
+                    top_k_data = self._enrich_top_k(stock_data, criteria.limit, criteria.top_k_margin, top_k_stats)
+                    if top_k_data is not None:
+                        plan.stats['top_k'] = top_k_stats
+                        scored_rows = top_k_stats['scored']
+                        stock_data = top_k_data
+                
+                if top_k_data is None:
+                    scored_rows = len(stock_data) if plan.needs_scores else 0
+                    stock_data = self._enrich_stock_data(
+                        stock_data, 
+                        include_scores=plan.needs_scores
+                    )
+                
+                # 只依赖评分字段的条件在AI分析之前执行
+                if plan.score_filters:
+                    before = len(stock_data)
+                    stock_data = self._apply_filters(stock_data, plan.score_filters).reset_index(drop=True)
+                    plan.record('score_filter', before, len(stock_data))
                 
                 # AI增强数据丰富
-                if criteria.ai_mode != AIMode.BASIC and self.ai_strategy_manager:
+                if plan.needs_ai:
                     logger.info(f"🤖 启用AI增强模式: {criteria.ai_mode.value}")
+                    ai_rows = len(stock_data)
                     stock_data = self._enrich_stock_data_with_ai(
                         stock_data,
                         criteria.ai_config
                     )
             
-            # 3. 应用筛选条件
-            if criteria.filters:
+            plan.stats['score_evaluations'] = scored_rows
+            plan.stats['ai_evaluations'] = ai_rows
+            plan.stats['skipped_score_evaluations'] = actual_candidates - scored_rows if plan.needs_scores else 0
+            plan.stats['skipped_ai_evaluations'] = actual_candidates - ai_rows if plan.needs_ai else 0
+            
+            # 5. 应用其余筛选条件
+            if plan.post_filters:
                 logger.info("🔍 正在应用筛选条件...")
-                filtered_data = self._apply_filters(stock_data, criteria.filters)
+                filtered_data = self._apply_filters(stock_data, plan.post_filters)
             else:
                 filtered_data = stock_data.copy()
             
-            # 更新实际候选数量（考虑智能采样后的数量）
-            actual_candidates = len(stock_data)
-            
-            # 4. 智能排序 - 结合AI评分和传统评分
+            # 6. 智能排序 - 结合AI评分和传统评分
             sort_column = criteria.sort_by
             
             # 创建综合评分列用于排序
@@ -907,15 +1169,21 @@ class StockSelector:
                     ascending=False
                 )
             
-            # 5. 限制结果数量
+            # 7. 限制结果数量
             if criteria.limit and len(filtered_data) > criteria.limit:
                 filtered_data = filtered_data.head(criteria.limit)
                 logger.info(f"✂️ 限制结果数量为: {criteria.limit}")
             
-            # 6. 生成结果
+            # 8. 生成结果
             symbols = filtered_data['ts_code'].tolist() if 'ts_code' in filtered_data.columns else []
             summary = self._generate_summary(filtered_data, total_candidates)
             
+            # 执行计划报告：下推的条件数量与跳过的昂贵计算次数
+            summary['query_plan'] = plan.to_dict()
+            if plan.stats['skipped_score_evaluations'] or plan.stats['skipped_ai_evaluations']:
+                logger.info(f"⚡ 查询下推跳过评分计算 {plan.stats['skipped_score_evaluations']} 次, "
+                            f"AI分析 {plan.stats['skipped_ai_evaluations']} 次")
+            
             # 在摘要中添加智能采样信息
             if criteria.enable_smart_sampling and actual_candidates != total_candidates:
                 summary['intelligent_sampling'] = {
@@ -1268,12 +1536,38 @@ class StockSelector:
                 'ai_enabled': False
             }
     
+    def get_score_movers(self, days: int = 7, top_n: int = 50, category: str = 'overall',
+                         direction: str = 'up') -> pd.DataFrame:
+        """
+        评分变动排行（基于持久化的综合评分历史）
+        
+        Args:
+            days: 时间窗口（天）
+            top_n: 返回数量
+            category: 评分类别（overall/technical/fundamental/sentiment/quality/risk）
+            direction: 'up' 提升最多，'down' 下降最多
+            
+        Returns:
+            评分变动DataFrame，无数据时返回空DataFrame
+        """
+        if not self.scoring_system:
+            logger.warning("⚠️ 综合评分系统未初始化")
+            return pd.DataFrame()
+        
+        movers = self.scoring_system.get_score_movers(days=days, top_n=top_n,
+                                                      category=category, direction=direction)
+        if movers is None:
+            return pd.DataFrame()
+        logger.info(f"📈 评分变动排行: {len(movers)}只股票 (近{days}天, {category}, {direction})")
+        return movers
+    
     def clear_ai_cache(self):
         """
         清理AI分析缓存
         """
         if self.ai_strategy_manager:
             self.ai_strategy_manager.clear_cache()
+            self.analysis_cache.clear()
             logger.info("🧹 AI分析缓存已清理")
         else:
             logger.warning("⚠️ AI策略管理器未初始化")
@@ -4,10 +4,14 @@
 提供项目级别的日志配置和管理功能
 """
 
+import atexit
 import logging
 import logging.handlers
 import os
+import queue
 import sys
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any, Optional, Union
@@ -69,6 +73,173 @@ class StructuredFormatter(logging.Formatter):
         return json.dumps(log_entry, ensure_ascii=False)
 
 
+class BatchedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    批量写入的轮转文件处理器
+
+    emit 时只写入缓冲区而不逐条 flush，由队列监听器在每批记录处理完后统一 flush。
+    """
+
+    def emit(self, record):
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    按日志器 + 调用位置限流的过滤器（令牌桶）
+
+    热点循环中同一行代码反复输出的日志（消息内容常为 f-string，每次都不同）超过速率后被丢弃，
+    恢复输出时在消息后附加被抑制的条数。只限制不高于 max_level 的日志，警告和错误始终保留。
+    """
+
+    MAX_KEYS = 10000
+
+    def __init__(self, rate: float = 10.0, burst: int = 50, max_level: int = logging.INFO,
+                 logger_rates: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            rate: 每个调用位置每秒补充的令牌数
+            burst: 令牌桶容量（允许的突发条数）
+            max_level: 参与限流的最高日志级别
+            logger_rates: 按日志器名称（前缀匹配）覆盖的速率
+        """
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.max_level = max_level
+        self.logger_rates = logger_rates or {}
+        self._buckets: Dict[tuple, list] = {}  # key -> [tokens, last_time, suppressed]
+        self._lock = threading.Lock()
+        self.suppressed_total = 0
+
+    def _rate_for(self, logger_name: str) -> float:
+        for prefix, rate in self.logger_rates.items():
+            if logger_name == prefix or logger_name.startswith(prefix + '.'):
+                return rate
+        return self.rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.max_level:
+            return True
+
+        key = (record.name, record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.MAX_KEYS:
+                    self._buckets.clear()
+                bucket = [float(self.burst), now, 0]
+                self._buckets[key] = bucket
+            else:
+                rate = self._rate_for(record.name)
+                bucket[0] = min(float(self.burst), bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+
+            if bucket[0] < 1.0:
+                bucket[2] += 1
+                self.suppressed_total += 1
+                return False
+
+            bucket[0] -= 1.0
+            suppressed, bucket[2] = bucket[2], 0
+
+        if suppressed:
+            record.msg = f"{record.msg} [已抑制 {suppressed} 条相似日志]"
+            record.suppressed = suppressed
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """队列满时丢弃低级别日志而不阻塞调用线程（警告及以上最多等待1秒）"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if record.levelno >= logging.WARNING:
+                try:
+                    self.queue.put(record, timeout=1.0)
+                    return
+                except queue.Full:
+                    pass
+            self.dropped += 1
+
+
+class BatchingQueueListener(logging.handlers.QueueListener):
+    """批量处理队列记录的监听器：每批最多 batch_size 条，处理完后统一 flush 各处理器"""
+
+    def __init__(self, log_queue, handlers, batch_size: int = 256, flush_interval: float = 1.0):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+    def _flush_handlers(self):
+        for handler in self.handlers:
+            try:
+                handler.flush()
+            except Exception:
+                pass
+
+    def _monitor(self):
+        log_queue = self.queue
+        has_task_done = hasattr(log_queue, 'task_done')
+        while True:
+            try:
+                record = log_queue.get(True, self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch = [record]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(log_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = False
+            for item in batch:
+                if item is self._sentinel:
+                    stop = True
+                else:
+                    self.handle(item)
+                if has_task_done:
+                    log_queue.task_done()
+            self._flush_handlers()
+            if stop:
+                break
+
+
+# 当前运行中的队列监听器（重新初始化日志系统时先停止旧的监听器）
+_active_listener: Optional[BatchingQueueListener] = None
+_listener_lock = threading.Lock()
+
+
+def _stop_active_listener():
+    global _active_listener
+    with _listener_lock:
+        if _active_listener is not None:
+            try:
+                _active_listener.stop()
+            except Exception:
+                pass
+            _active_listener = None
+
+
+atexit.register(_stop_active_listener)
+
+
 class TradingAgentsLogger:
     """TradingAgents统一日志管理器"""
     
@@ -125,7 +296,8 @@ class TradingAgentsLogger:
             'docker': {
                 'enabled': os.getenv('DOCKER_CONTAINER', 'false').lower() == 'true',
                 'stdout_only': True  # Docker环境只输出到stdout
-            }
+            },
+            'queue': {}
         }
 
     def _load_config_file(self) -> Optional[Dict[str, Any]]:
@@ -172,11 +344,25 @@ class TradingAgentsLogger:
             },
             'performance': logging_config.get('performance', {}),
             'security': logging_config.get('security', {}),
-            'business': logging_config.get('business', {})
+            'business': logging_config.get('business', {}),
+            'tracing': logging_config.get('tracing', {}),
+            'queue': logging_config.get('queue', {})
         }
     
+    def _get_queue_config(self) -> Dict[str, Any]:
+        """队列日志配置（环境变量 TRADINGAGENTS_LOG_QUEUE 覆盖 enabled）"""
+        queue_config = dict(self.config.get('queue') or {})
+        env_enabled = os.getenv('TRADINGAGENTS_LOG_QUEUE')
+        if env_enabled is not None:
+            queue_config['enabled'] = env_enabled.lower() == 'true'
+        return queue_config
+
     def _setup_logging(self):
         """设置日志系统"""
+        self.queue_config = self._get_queue_config()
+        self.queue_handler: Optional[NonBlockingQueueHandler] = None
+        self.rate_limit_filter: Optional[RateLimitFilter] = None
+
         # 创建日志目录
         if self.config['handlers']['file']['enabled']:
             log_dir = Path(self.config['handlers']['file']['directory'])
@@ -186,7 +372,8 @@ class TradingAgentsLogger:
         root_logger = logging.getLogger()
         root_logger.setLevel(getattr(logging, self.config['level']))
         
-        # 清除现有处理器
+        # 清除现有处理器（并停止之前的队列监听器）
+        _stop_active_listener()
         root_logger.handlers.clear()
         
         # 添加处理器
@@ -197,8 +384,58 @@ class TradingAgentsLogger:
             if self.config['handlers']['structured']['enabled']:
                 self._add_structured_handler(root_logger)
         
+        # 队列模式：格式化和磁盘I/O移到后台监听线程
+        if self.queue_config.get('enabled', False):
+            self._enable_queue_mode(root_logger)
+
         # 配置特定日志器
         self._configure_specific_loggers()
+
+    def _enable_queue_mode(self, root_logger: logging.Logger):
+        """将根日志器上的处理器移交给后台队列监听器，根日志器只保留一个非阻塞的队列处理器"""
+        global _active_listener
+
+        handlers = list(root_logger.handlers)
+        root_logger.handlers.clear()
+
+        log_queue = queue.Queue(maxsize=int(self.queue_config.get('queue_size', 10000)))
+        self.queue_handler = NonBlockingQueueHandler(log_queue)
+
+        rate_limit = self.queue_config.get('rate_limit', {}) or {}
+        if rate_limit.get('enabled', True):
+            self.rate_limit_filter = RateLimitFilter(
+                rate=float(rate_limit.get('rate', 10.0)),
+                burst=int(rate_limit.get('burst', 50)),
+                max_level=getattr(logging, str(rate_limit.get('max_level', 'INFO')).upper()),
+                logger_rates={name: float(rate) for name, rate in (rate_limit.get('loggers') or {}).items()},
+            )
+            self.queue_handler.addFilter(self.rate_limit_filter)
+        root_logger.addHandler(self.queue_handler)
+
+        listener = BatchingQueueListener(
+            log_queue, handlers,
+            batch_size=int(self.queue_config.get('batch_size', 256)),
+            flush_interval=float(self.queue_config.get('flush_interval', 1.0)),
+        )
+        with _listener_lock:
+            _active_listener = listener
+        listener.start()
+
+    def get_queue_stats(self) -> Dict[str, Any]:
+        """队列日志统计"""
+        if self.queue_handler is None:
+            return {'enabled': False}
+        return {
+            'enabled': True,
+            'queued': self.queue_handler.queue.qsize(),
+            'dropped': self.queue_handler.dropped,
+            'rate_limited': self.rate_limit_filter.suppressed_total if self.rate_limit_filter else 0,
+        }
+
+    def flush(self):
+        """等待队列中的日志全部写出（仅队列模式下有效）"""
+        if self.queue_handler is not None:
+            self.queue_handler.queue.join()
     
     def _add_console_handler(self, logger: logging.Logger):
         """添加控制台处理器"""
@@ -230,7 +467,10 @@ class TradingAgentsLogger:
         max_size = self._parse_size(self.config['handlers']['file']['max_size'])
         backup_count = self.config['handlers']['file']['backup_count']
         
-        file_handler = logging.handlers.RotatingFileHandler(
+        # 队列模式下由监听器按批 flush
+        handler_class = (BatchedRotatingFileHandler if self.queue_config.get('enabled', False)
+                         else logging.handlers.RotatingFileHandler)
+        file_handler = handler_class(
             log_file,
             maxBytes=max_size,
             backupCount=backup_count,
@@ -249,7 +489,9 @@ class TradingAgentsLogger:
         log_dir = Path(self.config['handlers']['structured']['directory'])
         log_file = log_dir / 'tradingagents_structured.log'
         
-        structured_handler = logging.handlers.RotatingFileHandler(
+        handler_class = (BatchedRotatingFileHandler if self.queue_config.get('enabled', False)
+                         else logging.handlers.RotatingFileHandler)
+        structured_handler = handler_class(
             log_file,
             maxBytes=self._parse_size('10MB'),
             backupCount=3,
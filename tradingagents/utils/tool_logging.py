@@ -1,10 +1,11 @@
 #!/usr/bin/env python3
 """
 工具调用日志装饰器
-为所有工具调用添加统一的日志记录
+为所有工具调用添加统一的日志记录，并为每次调用创建追踪 span（见 tracing.py）
 """
 
 import time
+import logging
 import functools
 from typing import Any, Dict, Optional, Callable
 from datetime import datetime
@@ -15,100 +16,89 @@ from tradingagents.utils.logging_init import get_logger
 from tradingagents.utils.logging_manager import get_logger, get_logger_manager
 logger = get_logger('agents')
 
+from tradingagents.utils.tracing import get_tracer, summarize_value, estimate_size
+
 # 工具调用日志器
 tool_logger = get_logger("tools")
 
 
+def _summarize_call_args(args, kwargs) -> Dict[str, Any]:
+    """生成调用参数摘要（截断后的字符串，不渲染DataFrame等大对象）"""
+    args_info = {}
+    if args:
+        args_info['args'] = [summarize_value(arg) for arg in args]
+    if kwargs:
+        args_info['kwargs'] = {k: summarize_value(v) for k, v in kwargs.items()}
+    return args_info
+
+
+def _is_failed_result(result: Any) -> bool:
+    """判断数据源返回结果是否表示失败（只检查字符串结果，不对其他对象做 str()）"""
+    if result is None:
+        return True
+    if isinstance(result, str):
+        return not result or "❌" in result or "错误" in result
+    empty = getattr(result, 'empty', None)
+    if isinstance(empty, bool):
+        return empty
+    try:
+        return len(result) == 0
+    except TypeError:
+        return False
+
+
 def log_tool_call(tool_name: Optional[str] = None, log_args: bool = True, log_result: bool = False):
     """
     工具调用日志装饰器
-    
+
+    每次调用创建一个 tool 类型的追踪 span；参数摘要只在 span 被采样或 DEBUG 日志开启时生成。
+    开始事件记录为 DEBUG，完成事件记录为一条 INFO。
+
     Args:
         tool_name: 工具名称，如果不提供则使用函数名
         log_args: 是否记录参数
-        log_result: 是否记录返回结果（注意：可能包含大量数据）
+        log_result: 是否记录返回结果（截断摘要）
     """
     def decorator(func: Callable) -> Callable:
+        name = tool_name or getattr(func, '__name__', 'unknown_tool')
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            # 确定工具名称
-            name = tool_name or getattr(func, '__name__', 'unknown_tool')
-            
-            # 记录开始时间
-            start_time = time.time()
-            
-            # 准备参数信息
-            args_info = {}
-            if log_args:
-                # 记录位置参数
-                if args:
-                    args_info['args'] = [str(arg)[:100] + '...' if len(str(arg)) > 100 else str(arg) for arg in args]
-                
-                # 记录关键字参数
-                if kwargs:
-                    args_info['kwargs'] = {
-                        k: str(v)[:100] + '...' if len(str(v)) > 100 else str(v) 
-                        for k, v in kwargs.items()
-                    }
-            
-            # 记录工具调用开始
-            tool_logger.info(
-                f"🔧 [工具调用] {name} - 开始",
-                extra={
-                    'tool_name': name,
-                    'event_type': 'tool_call_start',
-                    'timestamp': datetime.now().isoformat(),
-                    'args_info': args_info if log_args else None
-                }
-            )
-            
-            try:
-                # 执行工具函数
-                result = func(*args, **kwargs)
-                
-                # 计算执行时间
-                duration = time.time() - start_time
-                
-                # 准备结果信息
+            with get_tracer().start_span(name, 'tool') as span:
+                args_info = None
+                if log_args and (span.recording or tool_logger.isEnabledFor(logging.DEBUG)):
+                    args_info = _summarize_call_args(args, kwargs)
+                    span.set_attribute('args', args_info)
+                tool_logger.debug(
+                    "🔧 [工具调用] %s - 开始", name,
+                    extra={'tool_name': name, 'event_type': 'tool_call_start', 'args_info': args_info}
+                )
+
+                start_time = time.perf_counter()
+                try:
+                    result = func(*args, **kwargs)
+                except Exception as e:
+                    duration = time.perf_counter() - start_time
+                    tool_logger.error(
+                        f"❌ [工具调用] {name} - 失败 (耗时: {duration:.2f}s): {e}",
+                        extra={'tool_name': name, 'event_type': 'tool_call_error', 'duration': duration,
+                               'error': str(e), 'trace_id': span.trace_id, 'span_id': span.span_id},
+                        exc_info=True
+                    )
+                    raise
+
+                duration = time.perf_counter() - start_time
                 result_info = None
                 if log_result and result is not None:
-                    result_str = str(result)
-                    result_info = result_str[:200] + '...' if len(result_str) > 200 else result_str
-                
-                # 记录工具调用成功
+                    result_info = summarize_value(result, 200)
+                    span.set_attribute('result', result_info)
                 tool_logger.info(
-                    f"✅ [工具调用] {name} - 完成 (耗时: {duration:.2f}s)",
-                    extra={
-                        'tool_name': name,
-                        'event_type': 'tool_call_success',
-                        'duration': duration,
-                        'result_info': result_info if log_result else None,
-                        'timestamp': datetime.now().isoformat()
-                    }
+                    "✅ [工具调用] %s - 完成 (耗时: %.2fs)", name, duration,
+                    extra={'tool_name': name, 'event_type': 'tool_call_success', 'duration': duration,
+                           'result_info': result_info, 'trace_id': span.trace_id, 'span_id': span.span_id}
                 )
-                
                 return result
-                
-            except Exception as e:
-                # 计算执行时间
-                duration = time.time() - start_time
-                
-                # 记录工具调用失败
-                tool_logger.error(
-                    f"❌ [工具调用] {name} - 失败 (耗时: {duration:.2f}s): {str(e)}",
-                    extra={
-                        'tool_name': name,
-                        'event_type': 'tool_call_error',
-                        'duration': duration,
-                        'error': str(e),
-                        'timestamp': datetime.now().isoformat()
-                    },
-                    exc_info=True
-                )
-                
-                # 重新抛出异常
-                raise
-        
+
         return wrapper
     return decorator
 
@@ -116,80 +106,57 @@ def log_tool_call(tool_name: Optional[str] = None, log_args: bool = True, log_re
 def log_data_source_call(source_name: str):
     """
     数据源调用专用日志装饰器
-    
+
     Args:
         source_name: 数据源名称（如：tushare、akshare、yfinance等）
     """
     def decorator(func: Callable) -> Callable:
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            start_time = time.time()
-            
             # 提取股票代码（通常是第一个参数）
             symbol = args[0] if args else kwargs.get('symbol', kwargs.get('ticker', 'unknown'))
-            
-            # 记录数据源调用开始
-            tool_logger.info(
-                f"📊 [数据源] {source_name} - 获取 {symbol} 数据",
-                extra={
-                    'data_source': source_name,
-                    'symbol': symbol,
-                    'event_type': 'data_source_call',
-                    'timestamp': datetime.now().isoformat()
-                }
-            )
-            
-            try:
-                result = func(*args, **kwargs)
-                duration = time.time() - start_time
-                
-                # 检查结果是否成功
-                success = result and "❌" not in str(result) and "错误" not in str(result)
-                
-                if success:
+
+            with get_tracer().start_span(f"{source_name}.{func.__name__}", 'data_source') as span:
+                if span.recording:
+                    span.set_attributes({'data_source': source_name, 'symbol': summarize_value(symbol)})
+                tool_logger.debug(
+                    "📊 [数据源] %s - 获取 %s 数据", source_name, symbol,
+                    extra={'data_source': source_name, 'symbol': symbol, 'event_type': 'data_source_call'}
+                )
+
+                start_time = time.perf_counter()
+                try:
+                    result = func(*args, **kwargs)
+                except Exception as e:
+                    duration = time.perf_counter() - start_time
+                    tool_logger.error(
+                        f"❌ [数据源] {source_name} - {symbol} 数据获取异常 (耗时: {duration:.2f}s): {e}",
+                        extra={'data_source': source_name, 'symbol': symbol, 'event_type': 'data_source_error',
+                               'duration': duration, 'error': str(e),
+                               'trace_id': span.trace_id, 'span_id': span.span_id},
+                        exc_info=True
+                    )
+                    raise
+
+                duration = time.perf_counter() - start_time
+                if not _is_failed_result(result):
+                    data_size = estimate_size(result)
+                    span.set_attribute('data_size', data_size)
                     tool_logger.info(
-                        f"✅ [数据源] {source_name} - {symbol} 数据获取成功 (耗时: {duration:.2f}s)",
-                        extra={
-                            'data_source': source_name,
-                            'symbol': symbol,
-                            'event_type': 'data_source_success',
-                            'duration': duration,
-                            'data_size': len(str(result)) if result else 0,
-                            'timestamp': datetime.now().isoformat()
-                        }
+                        "✅ [数据源] %s - %s 数据获取成功 (耗时: %.2fs)", source_name, symbol, duration,
+                        extra={'data_source': source_name, 'symbol': symbol, 'event_type': 'data_source_success',
+                               'duration': duration, 'data_size': data_size,
+                               'trace_id': span.trace_id, 'span_id': span.span_id}
                     )
                 else:
+                    span.set_attribute('failed', True)
                     tool_logger.warning(
-                        f"⚠️ [数据源] {source_name} - {symbol} 数据获取失败 (耗时: {duration:.2f}s)",
-                        extra={
-                            'data_source': source_name,
-                            'symbol': symbol,
-                            'event_type': 'data_source_failure',
-                            'duration': duration,
-                            'timestamp': datetime.now().isoformat()
-                        }
+                        "⚠️ [数据源] %s - %s 数据获取失败 (耗时: %.2fs)", source_name, symbol, duration,
+                        extra={'data_source': source_name, 'symbol': symbol, 'event_type': 'data_source_failure',
+                               'duration': duration, 'trace_id': span.trace_id, 'span_id': span.span_id}
                     )
-                
                 return result
-                
-            except Exception as e:
-                duration = time.time() - start_time
-                
-                tool_logger.error(
-                    f"❌ [数据源] {source_name} - {symbol} 数据获取异常 (耗时: {duration:.2f}s): {str(e)}",
-                    extra={
-                        'data_source': source_name,
-                        'symbol': symbol,
-                        'event_type': 'data_source_error',
-                        'duration': duration,
-                        'error': str(e),
-                        'timestamp': datetime.now().isoformat()
-                    },
-                    exc_info=True
-                )
-                
-                raise
-        
+
         return wrapper
     return decorator
 
@@ -197,7 +164,7 @@ def log_data_source_call(source_name: str):
 def log_llm_call(provider: str, model: str):
     """
     LLM调用专用日志装饰器
-    
+
     Args:
         provider: LLM提供商（如：openai、deepseek、tongyi等）
         model: 模型名称
@@ -205,54 +172,36 @@ def log_llm_call(provider: str, model: str):
     def decorator(func: Callable) -> Callable:
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            start_time = time.time()
-            
-            # 记录LLM调用开始
-            tool_logger.info(
-                f"🤖 [LLM调用] {provider}/{model} - 开始",
-                extra={
-                    'llm_provider': provider,
-                    'llm_model': model,
-                    'event_type': 'llm_call_start',
-                    'timestamp': datetime.now().isoformat()
-                }
-            )
-            
-            try:
-                result = func(*args, **kwargs)
-                duration = time.time() - start_time
-                
+            with get_tracer().start_span(f"llm.{provider}", 'llm') as span:
+                if span.recording:
+                    span.set_attributes({'llm_provider': provider, 'llm_model': model})
+                tool_logger.debug(
+                    "🤖 [LLM调用] %s/%s - 开始", provider, model,
+                    extra={'llm_provider': provider, 'llm_model': model, 'event_type': 'llm_call_start'}
+                )
+
+                start_time = time.perf_counter()
+                try:
+                    result = func(*args, **kwargs)
+                except Exception as e:
+                    duration = time.perf_counter() - start_time
+                    tool_logger.error(
+                        f"❌ [LLM调用] {provider}/{model} - 失败 (耗时: {duration:.2f}s): {e}",
+                        extra={'llm_provider': provider, 'llm_model': model, 'event_type': 'llm_call_error',
+                               'duration': duration, 'error': str(e),
+                               'trace_id': span.trace_id, 'span_id': span.span_id},
+                        exc_info=True
+                    )
+                    raise
+
+                duration = time.perf_counter() - start_time
                 tool_logger.info(
-                    f"✅ [LLM调用] {provider}/{model} - 完成 (耗时: {duration:.2f}s)",
-                    extra={
-                        'llm_provider': provider,
-                        'llm_model': model,
-                        'event_type': 'llm_call_success',
-                        'duration': duration,
-                        'timestamp': datetime.now().isoformat()
-                    }
+                    "✅ [LLM调用] %s/%s - 完成 (耗时: %.2fs)", provider, model, duration,
+                    extra={'llm_provider': provider, 'llm_model': model, 'event_type': 'llm_call_success',
+                           'duration': duration, 'trace_id': span.trace_id, 'span_id': span.span_id}
                 )
-                
                 return result
-                
-            except Exception as e:
-                duration = time.time() - start_time
-                
-                tool_logger.error(
-                    f"❌ [LLM调用] {provider}/{model} - 失败 (耗时: {duration:.2f}s): {str(e)}",
-                    extra={
-                        'llm_provider': provider,
-                        'llm_model': model,
-                        'event_type': 'llm_call_error',
-                        'duration': duration,
-                        'error': str(e),
-                        'timestamp': datetime.now().isoformat()
-                    },
-                    exc_info=True
-                )
-                
-                raise
-        
+
         return wrapper
     return decorator
 
@@ -349,45 +298,51 @@ def log_analysis_module(module_name: str, session_id: str = None):
             # 记录模块开始
             logger_manager = get_logger_manager()
 
-            start_time = time.time()
+            with get_tracer().start_span(module_name, 'module') as span:
+                if span.recording:
+                    span.set_attributes({'symbol': symbol, 'session_id': actual_session_id,
+                                         'function_name': func.__name__})
 
-            logger_manager.log_module_start(
-                tool_logger, module_name, symbol, actual_session_id,
-                function_name=func.__name__,
-                args_count=len(args),
-                kwargs_keys=list(kwargs.keys())
-            )
+                start_time = time.perf_counter()
 
-            try:
-                # 执行分析函数
-                result = func(*args, **kwargs)
-
-                # 计算执行时间
-                duration = time.time() - start_time
-
-                # 记录模块完成
-                result_length = len(str(result)) if result else 0
-                logger_manager.log_module_complete(
+                logger_manager.log_module_start(
                     tool_logger, module_name, symbol, actual_session_id,
-                    duration, success=True, result_length=result_length,
-                    function_name=func.__name__
+                    function_name=func.__name__,
+                    args_count=len(args),
+                    kwargs_keys=list(kwargs.keys())
                 )
 
-                return result
+                try:
+                    # 执行分析函数
+                    result = func(*args, **kwargs)
 
-            except Exception as e:
-                # 计算执行时间
-                duration = time.time() - start_time
+                    # 计算执行时间
+                    duration = time.perf_counter() - start_time
 
-                # 记录模块错误
-                logger_manager.log_module_error(
-                    tool_logger, module_name, symbol, actual_session_id,
-                    duration, str(e),
-                    function_name=func.__name__
-                )
+                    # 记录模块完成（结果大小按字符串长度/元素数估算，不整体 str()）
+                    result_length = estimate_size(result)
+                    span.set_attribute('result_length', result_length)
+                    logger_manager.log_module_complete(
+                        tool_logger, module_name, symbol, actual_session_id,
+                        duration, success=True, result_length=result_length,
+                        function_name=func.__name__
+                    )
+
+                    return result
+
+                except Exception as e:
+                    # 计算执行时间
+                    duration = time.perf_counter() - start_time
+
+                    # 记录模块错误
+                    logger_manager.log_module_error(
+                        tool_logger, module_name, symbol, actual_session_id,
+                        duration, str(e),
+                        function_name=func.__name__
+                    )
 
-                # 重新抛出异常
-                raise
+                    # 重新抛出异常
+                    raise
 
         return wrapper
     return decorator
@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+轻量级追踪（Tracing）
+为工具调用、数据源调用、LLM调用和分析模块记录嵌套的 span（ID、父子关系、耗时、属性、状态），
+支持采样，并导出为 JSONL（原生格式或 OpenTelemetry OTLP/JSON 格式）。
+
+追踪关闭或未被采样时返回共享的空 span，不做任何格式化和分配，单个 span 的开销在微秒以内。
+
+配置（环境变量优先于 config/logging.toml 中的 [logging.tracing]）:
+    TRADINGAGENTS_TRACING=true            启用追踪
+    TRADINGAGENTS_TRACE_SAMPLE_RATE=0.1   根 span 采样率（子 span 跟随根 span）
+    TRADINGAGENTS_TRACE_FILE=./logs/traces.jsonl
+    TRADINGAGENTS_TRACE_FORMAT=native|otlp
+"""
+
+import atexit
+import contextvars
+import json
+import os
+import random
+import reprlib
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger, get_logger_manager
+logger = get_logger('agents')
+
+
+# ---------- 参数摘要 ----------
+
+_summary_repr = reprlib.Repr()
+_summary_repr.maxstring = 100
+_summary_repr.maxother = 100
+_summary_repr.maxlist = 5
+_summary_repr.maxdict = 5
+
+
+def summarize_value(value: Any, limit: int = 100) -> str:
+    """
+    生成参数/结果的截断摘要
+
+    字符串只切片不整体复制；DataFrame/ndarray 等只记录类型和形状，不渲染内容；
+    容器只渲染前几个元素。
+    """
+    if value is None or isinstance(value, (bool, int, float)):
+        return str(value)
+    if isinstance(value, str):
+        return value if len(value) <= limit else value[:limit] + '...'
+    shape = getattr(value, 'shape', None)
+    if shape is not None and not callable(shape):
+        return f"{type(value).__name__}(shape={tuple(shape)})"
+    text = _summary_repr.repr(value)
+    return text if len(text) <= limit else text[:limit] + '...'
+
+
+def estimate_size(value: Any) -> int:
+    """估算结果大小（字符串为长度，容器为元素数），不对整个对象做 str()"""
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(len(v) if isinstance(v, str) else 1 for v in value.values())
+    try:
+        return len(value)
+    except TypeError:
+        return 1
+
+
+# ---------- Span ----------
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+class Span:
+    """一个已采样的 span"""
+
+    __slots__ = ('name', 'kind', 'trace_id', 'span_id', 'parent_id', 'start_ns', 'end_ns',
+                 'attributes', 'status', 'error', '_token', '_tracer')
+
+    recording = True
+
+    def __init__(self, tracer: 'Tracer', name: str, kind: str, trace_id: str,
+                 parent_id: Optional[str], attributes: Optional[Dict[str, Any]]):
+        self._tracer = tracer
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.attributes = dict(attributes) if attributes else {}
+        self.status = 'ok'
+        self.error: Optional[str] = None
+        self.end_ns: Optional[int] = None
+        self._token = None
+        self.start_ns = time.time_ns()
+
+    @property
+    def duration(self) -> float:
+        """耗时（秒）"""
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end_ns - self.start_ns) / 1e9
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]):
+        self.attributes.update(attributes)
+
+    def record_error(self, error: BaseException):
+        self.status = 'error'
+        self.error = f"{type(error).__name__}: {summarize_value(str(error), 500)}"
+
+    def end(self):
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if self._token is not None:
+            _current_span.reset(self._token)
+            self._token = None
+        self._tracer._on_end(self)
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self.record_error(exc)
+        self.end()
+        return False
+
+    def to_dict(self) -> Dict[str, Any]:
+        """原生导出格式"""
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'kind': self.kind,
+            'start_ns': self.start_ns,
+            'end_ns': self.end_ns,
+            'duration_ms': round(self.duration * 1000, 3),
+            'status': self.status,
+            'error': self.error,
+            'attributes': self.attributes,
+        }
+
+    def to_otlp_dict(self) -> Dict[str, Any]:
+        """OpenTelemetry OTLP/JSON span 格式"""
+        attributes = []
+        for key, value in self.attributes.items():
+            if isinstance(value, bool):
+                attributes.append({'key': key, 'value': {'boolValue': value}})
+            elif isinstance(value, int):
+                attributes.append({'key': key, 'value': {'intValue': str(value)}})
+            elif isinstance(value, float):
+                attributes.append({'key': key, 'value': {'doubleValue': value}})
+            else:
+                attributes.append({'key': key, 'value': {'stringValue': str(value)}})
+        attributes.append({'key': 'tradingagents.kind', 'value': {'stringValue': self.kind}})
+
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': 1,  # SPAN_KIND_INTERNAL
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'attributes': attributes,
+            'status': {'code': 2, 'message': self.error} if self.status == 'error' else {'code': 1},
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        return span
+
+
+class _NoopSpan:
+    """追踪关闭或未采样时使用的空 span"""
+
+    __slots__ = ('_token',)
+
+    recording = False
+    trace_id = None
+    span_id = None
+    status = 'ok'
+
+    def __init__(self):
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]):
+        pass
+
+    def record_error(self, error: BaseException):
+        pass
+
+    def end(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class _UnsampledSpan(_NoopSpan):
+    """未被采样的根 span：不记录，但作为上下文标记让子 span 跟随不采样"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._token is not None:
+            _current_span.reset(self._token)
+            self._token = None
+        return False
+
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar('tradingagents_current_span', default=None)
+
+
+def get_current_span():
+    """获取当前 span（不在 span 中时返回 None）"""
+    return _current_span.get()
+
+
+# ---------- 导出器 ----------
+
+class JsonlSpanExporter:
+    """将结束的 span 以 JSONL 追加写入文件（缓冲写入，进程退出时刷新）"""
+
+    def __init__(self, path: str, format: str = 'native', buffer_size: int = 64):
+        """
+        Args:
+            path: 输出文件路径
+            format: native（原生格式）或 otlp（OpenTelemetry OTLP/JSON 格式，每行一个 resourceSpans）
+            buffer_size: 缓冲的 span 数量
+        """
+        self.path = Path(path)
+        self.format = format
+        self.buffer_size = buffer_size
+        self._buffer: List[Span] = []
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def export(self, span: Span):
+        with self._lock:
+            self._buffer.append(span)
+            if len(self._buffer) >= self.buffer_size:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._buffer:
+            return
+        spans, self._buffer = self._buffer, []
+        try:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                if self.format == 'otlp':
+                    payload = {'resourceSpans': [{
+                        'resource': {'attributes': [
+                            {'key': 'service.name', 'value': {'stringValue': 'tradingagents'}}]},
+                        'scopeSpans': [{'scope': {'name': 'tradingagents.tracing'},
+                                        'spans': [span.to_otlp_dict() for span in spans]}],
+                    }]}
+                    f.write(json.dumps(payload, ensure_ascii=False, default=str) + '\n')
+                else:
+                    for span in spans:
+                        f.write(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + '\n')
+        except Exception as e:
+            logger.warning(f"⚠️ [追踪] 导出span失败: {e}")
+
+
+class InMemorySpanExporter:
+    """在内存中保留最近的 span（用于调试和测试）"""
+
+    def __init__(self, max_spans: int = 1000):
+        self.spans = deque(maxlen=max_spans)
+
+    def export(self, span: Span):
+        self.spans.append(span)
+
+    def flush(self):
+        pass
+
+
+# ---------- Tracer ----------
+
+class Tracer:
+    """追踪器"""
+
+    def __init__(self, enabled: bool = False, sample_rate: float = 1.0, exporters: Optional[List[Any]] = None):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.exporters: List[Any] = list(exporters or [])
+        self._stats_lock = threading.Lock()
+        self.finished_spans = 0
+        self.dropped_roots = 0
+
+    def start_span(self, name: str, kind: str = 'internal', attributes: Optional[Dict[str, Any]] = None):
+        """
+        创建 span，需配合 with 使用（进入时成为当前 span，退出时结束并导出）
+
+        Args:
+            name: span 名称
+            kind: span 类型（tool / data_source / llm / module / internal）
+            attributes: 初始属性
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        parent = _current_span.get()
+        if parent is None:
+            if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+                with self._stats_lock:
+                    self.dropped_roots += 1
+                return _UnsampledSpan()
+            return Span(self, name, kind, _new_id(128), None, attributes)
+        if not parent.recording:
+            # 每个子 span 使用独立实例：上下文令牌保存在实例上，共享实例会被子 span 覆盖，
+            # 导致外层退出时无法恢复上下文（也不是线程安全的）
+            return _UnsampledSpan() if isinstance(parent, _UnsampledSpan) else NOOP_SPAN
+        return Span(self, name, kind, parent.trace_id, parent.span_id, attributes)
+
+    def _on_end(self, span: Span):
+        with self._stats_lock:
+            self.finished_spans += 1
+        for exporter in self.exporters:
+            try:
+                exporter.export(span)
+            except Exception as e:
+                logger.debug(f"⚠️ [追踪] 导出器异常: {e}")
+
+    def add_exporter(self, exporter):
+        self.exporters.append(exporter)
+
+    def flush(self):
+        for exporter in self.exporters:
+            try:
+                exporter.flush()
+            except Exception as e:
+                logger.debug(f"⚠️ [追踪] 刷新导出器失败: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'enabled': self.enabled,
+            'sample_rate': self.sample_rate,
+            'finished_spans': self.finished_spans,
+            'dropped_roots': self.dropped_roots,
+            'exporters': [type(exporter).__name__ for exporter in self.exporters],
+        }
+
+
+def _load_tracing_config() -> Dict[str, Any]:
+    """读取追踪配置：logging.toml 的 [logging.tracing]，环境变量覆盖"""
+    config: Dict[str, Any] = {}
+    try:
+        config.update(get_logger_manager().config.get('tracing', {}) or {})
+    except Exception:
+        pass
+
+    if os.getenv('TRADINGAGENTS_TRACING') is not None:
+        config['enabled'] = os.getenv('TRADINGAGENTS_TRACING', 'false').lower() == 'true'
+    if os.getenv('TRADINGAGENTS_TRACE_SAMPLE_RATE'):
+        config['sample_rate'] = float(os.getenv('TRADINGAGENTS_TRACE_SAMPLE_RATE'))
+    if os.getenv('TRADINGAGENTS_TRACE_FILE'):
+        config['file'] = os.getenv('TRADINGAGENTS_TRACE_FILE')
+    if os.getenv('TRADINGAGENTS_TRACE_FORMAT'):
+        config['format'] = os.getenv('TRADINGAGENTS_TRACE_FORMAT')
+    return config
+
+
+# 全局追踪器实例
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """获取全局追踪器实例"""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = _create_tracer(_load_tracing_config())
+    return _tracer
+
+
+def _create_tracer(config: Dict[str, Any]) -> Tracer:
+    enabled = bool(config.get('enabled', False))
+    tracer = Tracer(enabled=enabled, sample_rate=float(config.get('sample_rate', 1.0)))
+    if enabled:
+        path = config.get('file') or os.path.join(
+            os.getenv('TRADINGAGENTS_LOG_DIR', './logs'), 'traces.jsonl')
+        tracer.add_exporter(JsonlSpanExporter(path, format=config.get('format', 'native')))
+        atexit.register(tracer.flush)
+        logger.info(f"🔭 [追踪] 已启用，采样率: {tracer.sample_rate}，输出: {path}")
+    return tracer
+
+
+def configure_tracing(enabled: bool = True, sample_rate: float = 1.0, file: Optional[str] = None,
+                      format: str = 'native', exporters: Optional[List[Any]] = None) -> Tracer:
+    """
+    以代码方式配置全局追踪器（替换现有实例）
+
+    Args:
+        enabled: 是否启用
+        sample_rate: 根 span 采样率
+        file: JSONL 输出文件，为空且未提供 exporters 时使用 ./logs/traces.jsonl
+        format: native 或 otlp
+        exporters: 自定义导出器列表
+    """
+    global _tracer
+    with _tracer_lock:
+        if _tracer is not None:
+            _tracer.flush()
+        if exporters is not None:
+            _tracer = Tracer(enabled=enabled, sample_rate=sample_rate, exporters=exporters)
+        else:
+            _tracer = _create_tracer({'enabled': enabled, 'sample_rate': sample_rate,
+                                      'file': file, 'format': format})
+    return _tracer
+
+
+def start_span(name: str, kind: str = 'internal', attributes: Optional[Dict[str, Any]] = None):
+    """在全局追踪器上创建 span（便捷函数）"""
+    return get_tracer().start_span(name, kind, attributes)
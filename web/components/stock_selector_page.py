@@ -257,6 +257,46 @@ def render_stock_selector_page():
         
         # 显示选股结果
         display_selection_results()
+        
+        # 评分变动排行
+        render_score_movers(selector)
+
+def render_score_movers(selector):
+    """渲染评分变动排行（基于持久化的综合评分历史）"""
+    with st.expander("📈 评分变动排行", expanded=False):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            days = st.selectbox("时间窗口", [1, 3, 7, 30], index=2, format_func=lambda d: f"近{d}天",
+                                key="score_movers_days")
+        with col2:
+            category_labels = {'overall': '综合评分', 'technical': '技术面', 'fundamental': '基本面',
+                               'sentiment': '情绪面', 'quality': '数据质量', 'risk': '风险'}
+            category = st.selectbox("评分类别", list(category_labels), format_func=category_labels.get,
+                                    key="score_movers_category")
+        with col3:
+            direction = st.radio("方向", ['up', 'down'], horizontal=True,
+                                 format_func=lambda d: "提升" if d == 'up' else "下降",
+                                 key="score_movers_direction")
+        
+        try:
+            movers = selector.get_score_movers(days=days, top_n=50, category=category, direction=direction)
+        except Exception as e:
+            st.error(f"查询评分变动失败: {e}")
+            return
+        
+        if movers.empty:
+            st.info("暂无足够的评分历史（同一股票在窗口内至少需要两次评分）")
+            return
+        
+        st.dataframe(
+            movers.rename(columns={
+                'symbol': '股票代码', 'first_score': '期初评分', 'last_score': '最新评分',
+                'change': '变动', 'change_pct': '变动%', 'points': '评分次数',
+                'first_time': '首次评分', 'last_time': '最近评分'
+            }).round(2),
+            use_container_width=True,
+            hide_index=True
+        )
 
 def render_quick_selection_form():
     """渲染快速选股表单"""